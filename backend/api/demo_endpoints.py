@@ -7,7 +7,7 @@ Provides FastAPI endpoints for:
 - Downloading color-coded DXF output
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks, Depends
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 import logging
@@ -21,7 +21,7 @@ from demo.pilot_zone_processor import process_pilot_zone
 from demo.fast_layout_generator import FastLayoutGenerator
 from demo.demo_dxf_generator import DemoDXFGenerator
 from demo.full_site_analyzer import FullSiteAnalyzer
-from demo.scenario_generator import ScenarioGenerator
+from demo.scenario_generator import ScenarioGenerator, ScenarioStrategy
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +65,7 @@ class JobStatusResponse(BaseModel):
     message: Optional[str] = None
     result: Optional[Dict] = None
     error: Optional[str] = None
+    preview: Optional[Dict] = None
 
 
 @router.post("/analyze-pilot", response_model=ZoneAnalysisResponse)
@@ -201,7 +202,8 @@ async def get_job_status(job_id: str):
         progress=job.get('progress', 0),
         message=job.get('message'),
         result=job.get('result'),
-        error=job.get('error')
+        error=job.get('error'),
+        preview=job.get('preview')
     )
 
 
@@ -319,6 +321,16 @@ def process_zone_layout(
 # FULL-SITE ANALYSIS ENDPOINTS
 # ============================================================================
 
+# Accuracy presets: (base grid resolution, zone search resolution) in metres.
+# Zones are searched on the coarse pyramid level and only the selected
+# zones are refined at the base resolution.
+ANALYSIS_ACCURACY = {
+    'draft': (20.0, 40.0),
+    'standard': (10.0, 20.0),
+    'fine': (5.0, 20.0)
+}
+
+
 class FullSiteAnalysisRequest(BaseModel):
     """Request for full-site analysis"""
     target_plot_count: int = 200
@@ -347,7 +359,10 @@ class FullSiteAnalysisResponse(BaseModel):
 async def analyze_full_site(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = BackgroundTasks(),
-    target_plot_count: int = 200
+    target_plot_count: int = 200,
+    accuracy: str = 'standard',
+    grid_resolution: Optional[float] = None,
+    scenario_strategies: Optional[str] = Form(None)
 ):
     """
     Analyze entire Pilot site and generate development scenarios.
@@ -355,16 +370,43 @@ async def analyze_full_site(
     This endpoint:
     1. Extracts site boundary
     2. Analyzes terrain and identifies buildable zones
-    3. Generates 3 development scenarios (Cost, Capacity, Balanced)
+    3. Generates development scenarios in parallel (default: Cost,
+       Capacity, Balanced)
     4. Returns job ID for tracking progress
     
     Args:
         file: DWG/DXF file upload
         target_plot_count: Target number of plots (default: 200)
+        accuracy: 'draft', 'standard' or 'fine' (grid / zone search resolution)
+        grid_resolution: Optional base grid resolution (m) overriding the preset
+        scenario_strategies: Optional JSON list of scenario strategies
+            (scenario_id, name, strategy, rank_by, area_factor,
+            plots_per_ha, terrain_strategy, ...)
     
     Returns:
         Job ID and initial status
     """
+    if accuracy not in ANALYSIS_ACCURACY:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid accuracy '{accuracy}' (expected one of {list(ANALYSIS_ACCURACY)})"
+        )
+    base_resolution, search_resolution = ANALYSIS_ACCURACY[accuracy]
+    if grid_resolution is not None:
+        if grid_resolution <= 0:
+            raise HTTPException(status_code=400, detail="grid_resolution must be positive")
+        base_resolution = grid_resolution
+        search_resolution = max(search_resolution, grid_resolution)
+    
+    strategies = None
+    if scenario_strategies:
+        try:
+            strategies = [ScenarioStrategy.from_dict(s) for s in json.loads(scenario_strategies)]
+        except (ValueError, TypeError, AttributeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid scenario_strategies: {e}")
+        if not strategies:
+            raise HTTPException(status_code=400, detail="scenario_strategies must not be empty")
+    
     try:
         # Save uploaded file to uploads directory
         import uuid
@@ -396,7 +438,10 @@ async def analyze_full_site(
                 process_full_site_analysis,
                 job_id=job_id,
                 file_path=tmp_path,
-                target_plot_count=target_plot_count
+                target_plot_count=target_plot_count,
+                strategies=strategies,
+                grid_resolution=base_resolution,
+                search_resolution=search_resolution
             )
         
         return {
@@ -432,6 +477,7 @@ async def get_scenarios(job_id: str):
             'status': job['status'],
             'progress': job.get('progress', 0),
             'message': job.get('message', ''),
+            'preview': job.get('preview'),
             'scenarios': None
         }
     
@@ -442,7 +488,8 @@ async def get_scenarios(job_id: str):
         'progress': 100,
         'message': 'Analysis complete',
         'site_analysis': job['result']['site_analysis'],
-        'scenarios': job['result']['scenarios']
+        'scenarios': job['result']['scenarios'],
+        'scenario_timings': job['result'].get('scenario_timings', {})
     }
 
 
@@ -495,7 +542,7 @@ async def select_scenario(
             export_scenario_dxf,
             export_job_id=export_job_id,
             scenario=selected,
-            site_boundary=job['result']['site_analysis']['terrain_data']['elevation_grid']
+            site_boundary=job.get('_site_boundary')
         )
     
     return {
@@ -513,10 +560,16 @@ async def select_scenario(
 def process_full_site_analysis(
     job_id: str,
     file_path: str,
-    target_plot_count: int
+    target_plot_count: int,
+    strategies: Optional[List[ScenarioStrategy]] = None,
+    grid_resolution: float = 20.0,
+    search_resolution: Optional[float] = None
 ):
     """
     Background worker for full-site analysis.
+    
+    Publishes a zone preview in demo_jobs as soon as the coarse zone search
+    is done and updates it once the zones are refined.
     """
     try:
         logger.info(f"[Job {job_id}] Starting full-site analysis")
@@ -533,18 +586,49 @@ def process_full_site_analysis(
         demo_jobs[job_id]['progress'] = 20
         demo_jobs[job_id]['message'] = "Analyzing terrain and identifying buildable zones..."
         
-        analyzer = FullSiteAnalyzer(grid_resolution=20.0)
-        site_analysis = analyzer.analyze_entire_site(file_path, site_boundary)
+        def publish_zones(stage: str, resolution: float, zones: List[Dict]):
+            demo_jobs[job_id]['progress'] = 35 if stage == 'zones' else 45
+            demo_jobs[job_id]['message'] = (
+                f"Found {len(zones)} candidate zones at {resolution:g}m, refining..."
+                if stage == 'zones' else
+                f"Refined {len(zones)} zones at {resolution:g}m"
+            )
+            demo_jobs[job_id]['preview'] = {
+                'stage': stage,
+                'resolution_m': resolution,
+                'optimal_zones': [
+                    {
+                        'id': z['id'],
+                        'area_ha': z['area_ha'],
+                        'score': float(z['scores']['total']),
+                        'bounds': list(z['geometry'].bounds)
+                    }
+                    for z in zones
+                ]
+            }
+        
+        analyzer = FullSiteAnalyzer(
+            grid_resolution=grid_resolution,
+            search_resolution=search_resolution
+        )
+        site_analysis = analyzer.analyze_entire_site(
+            file_path,
+            site_boundary,
+            progress_callback=publish_zones
+        )
         
         # Generate scenarios
         demo_jobs[job_id]['progress'] = 50
         demo_jobs[job_id]['message'] = "Generating development scenarios..."
         
+        scenario_start = time.time()
         scenario_gen = ScenarioGenerator()
         scenarios = scenario_gen.generate_scenarios(
             site_analysis,
-            target_plot_count=target_plot_count
+            target_plot_count=target_plot_count,
+            strategies=strategies
         )
+        scenario_time = time.time() - scenario_start
         
         # Convert scenarios to serializable format
         serializable_scenarios = []
@@ -575,6 +659,8 @@ def process_full_site_analysis(
             
             serializable_scenarios.append(scenario_copy)
         
+        raster = site_analysis['terrain_data']['raster']
+        
         # Complete
         demo_jobs[job_id]['progress'] = 100
         demo_jobs[job_id]['status'] = 'completed'
@@ -585,12 +671,25 @@ def process_full_site_analysis(
                 'buildable_zones': len(site_analysis['buildable_zones']),
                 'optimal_zones': len(site_analysis['optimal_zones']),
                 'statistics': site_analysis['statistics'],
+                'terrain': {
+                    'shape': list(raster.shape),
+                    'resolution': raster.resolution,
+                    'bounds': list(raster.bounds),
+                    'memory_mapped': raster.path is not None
+                },
                 'processing_time_s': site_analysis['processing_time_s']
             },
-            'scenarios': serializable_scenarios
+            'scenarios': serializable_scenarios,
+            'scenario_timings': {
+                'total_s': scenario_time,
+                'per_scenario_s': {s['scenario_id']: s['generation_time_s'] for s in scenarios}
+            }
         }
         # Store original scenarios separately for DXF export (not serialized)
         demo_jobs[job_id]['_original_scenarios'] = scenarios
+        demo_jobs[job_id]['_site_boundary'] = site_boundary
+        # Raster handle (memory-mapped for large sites) instead of grid copies
+        demo_jobs[job_id]['_terrain'] = raster
         
         logger.info(f"[Job {job_id}] Completed successfully")
         
@@ -606,7 +705,7 @@ def process_full_site_analysis(
 def export_scenario_dxf(
     export_job_id: str,
     scenario: Dict,
-    site_boundary: Dict
+    site_boundary=None
 ):
     """
     Background worker to export scenario to DXF.
@@ -630,7 +729,7 @@ def export_scenario_dxf(
         export_layout = {
             'name': f"Pilot Full Site - Scenario {scenario['scenario_id']}",
             'variant_id': f"fullsite_scenario_{scenario['scenario_id']}",
-            'site_boundary': None,  # Will be reconstructed from terrain data
+            'site_boundary': site_boundary,
             'buildings': layout['plots'],
             'roads': layout['roads'],
             'green_areas': layout.get('green_areas', []),
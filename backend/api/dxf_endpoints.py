@@ -7,15 +7,29 @@ Endpoints:
 - GET /api/dxf/{file_id}/features: Get detected existing features
 - POST /api/dxf/{file_id}/classify-reusability: Classify feature reusability
 - GET /api/dxf/{file_id}/geojson: Get georeferenced GeoJSON
+- GET /api/dxf/cache/stats: Artifact cache statistics
+
+Derived artifacts (features, reusability, GeoJSON) are persisted in a
+bounded on-disk cache keyed by file_id + georeference parameters, so
+repeated map loads are served without re-reading the DXF.
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import List, Tuple, Dict, Optional
+import gzip
+import json
 import os
 import uuid
 import logging
 
+from config import settings
+from cad.artifact_cache import (
+    DXFArtifactCache,
+    file_fingerprint,
+    georef_fingerprint,
+)
 from cad.dxf_georeferencer import DXFGeoreferencer
 from cad.existing_features_detector import ExistingFeaturesDetector
 
@@ -26,9 +40,76 @@ router = APIRouter(prefix="/dxf", tags=["dxf"])
 UPLOAD_DIR = "uploads/dxf"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Storage for georeferencing instances
+# Georeferencing instances: {file_id: (georef.json st_mtime_ns, georeferencer)},
+# reloaded when another worker rewrites the file
 georef_instances = {}
-feature_cache = {}
+
+# Persistent artifact cache shared by all workers
+artifact_cache = DXFArtifactCache(
+    settings.dxf_cache_dir,
+    max_bytes=settings.dxf_cache_max_bytes
+)
+
+
+def _dxf_path(file_id: str) -> str:
+    return os.path.join(UPLOAD_DIR, f"{file_id}.dxf")
+
+
+def _is_safe_file_id(file_id: str) -> bool:
+    """Same character rule as DXFArtifactCache.path_for (no path separators or dots)."""
+    return bool(file_id) and all(c.isalnum() or c in "-_" for c in file_id)
+
+
+def _save_georeferencer(file_id: str, georef: DXFGeoreferencer):
+    """Persist georeference parameters next to the uploaded DXF."""
+    path = os.path.join(UPLOAD_DIR, f"{file_id}.georef.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(georef.to_dict(), f)
+    georef_instances[file_id] = (os.stat(path).st_mtime_ns, georef)
+
+
+def _load_georeferencer(file_id: str) -> Optional[DXFGeoreferencer]:
+    """
+    Return georeferencer for file from its georef.json.
+    
+    The memo is only used while the file's mtime is unchanged, so a file
+    re-georeferenced by another worker is picked up.
+    """
+    path = os.path.join(UPLOAD_DIR, f"{file_id}.georef.json")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        georef_instances.pop(file_id, None)
+        return None
+    
+    memo = georef_instances.get(file_id)
+    if memo is not None and memo[0] == mtime:
+        return memo[1]
+    
+    with open(path, "r", encoding="utf-8") as f:
+        georef = DXFGeoreferencer.from_dict(json.load(f))
+    georef_instances[file_id] = (mtime, georef)
+    return georef
+
+
+def _accepts_gzip(request: Optional[Request]) -> bool:
+    if request is None:
+        return False
+    return "gzip" in request.headers.get("accept-encoding", "")
+
+
+def _gzip_json_response(compressed: bytes, request: Optional[Request]) -> Response:
+    """Serve a cached gzip payload, decompressing only if the client must."""
+    if _accepts_gzip(request):
+        return Response(
+            content=compressed,
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+    return Response(
+        content=gzip.decompress(compressed),
+        media_type="application/json"
+    )
 
 
 class ControlPointsRequest(BaseModel):
@@ -74,7 +155,7 @@ async def upload_dxf(file: UploadFile = File(...)):
             logger.info(
                 f"[DXF API] Auto-georeferencing successful for {file_id}"
             )
-            georef_instances[file_id] = georef
+            _save_georeferencer(file_id, georef)
             needs_manual = False
         else:
             logger.info(
@@ -124,8 +205,9 @@ async def georeference_dxf(request: ControlPointsRequest):
             request.geo_points
         )
         
-        # Store instance
-        georef_instances[request.file_id] = georef
+        # Store instance (persisted; old GeoJSON entries are keyed by the
+        # previous parameters and age out of the cache)
+        _save_georeferencer(request.file_id, georef)
         
         logger.info(
             f"[DXF API] Georeferenced {request.file_id} with "
@@ -146,84 +228,109 @@ async def georeference_dxf(request: ControlPointsRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _load_features(file_id: str) -> Dict:
+    """
+    Return GeoJSON-compatible features for a file, using the artifact cache.
+    
+    Raises:
+        HTTPException(404) if the DXF has not been uploaded
+    """
+    file_path = _dxf_path(file_id)
+    
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    fingerprint = file_fingerprint(file_path)
+    cached = artifact_cache.get(file_id, "features", fingerprint)
+    if cached is not None:
+        return cached
+    
+    # Detect features
+    detector = ExistingFeaturesDetector()
+    features = detector.detect_features(file_path)
+    
+    # Convert Shapely geometries to GeoJSON-compatible dicts
+    result = {
+        "water_bodies": [
+            {
+                **wb,
+                "polygon": wb["polygon"].__geo_interface__
+            }
+            for wb in features["water_bodies"]
+        ],
+        "buildings": [
+            {
+                **b,
+                "polygon": b["polygon"].__geo_interface__
+            }
+            for b in features["buildings"]
+        ],
+        "roads": [
+            {
+                **r,
+                "linestring": r["linestring"].__geo_interface__
+            }
+            for r in features["roads"]
+        ],
+        "vegetation": [
+            {
+                **v,
+                "polygon": v["polygon"].__geo_interface__
+            }
+            for v in features["vegetation"]
+        ],
+        "obstacles": [
+            {
+                **o,
+                "polygon": o["polygon"].__geo_interface__
+            }
+            for o in features["obstacles"]
+        ],
+        "boundary": (
+            features["boundary"].__geo_interface__
+            if features["boundary"]
+            else None
+        ),
+        "summary": features["summary"]
+    }
+    
+    # Persist for later calls and other workers
+    artifact_cache.put(file_id, "features", result, fingerprint)
+    
+    logger.info(
+        f"[DXF API] Detected features for {file_id}: "
+        f"{len(result['water_bodies'])} water, "
+        f"{len(result['buildings'])} buildings"
+    )
+    
+    return result
+
+
 @router.get("/{file_id}/features")
-async def get_features(file_id: str):
+async def get_features(file_id: str, request: Request):
     """
     Detect existing features from DXF file.
     
     Returns water bodies, buildings, roads, vegetation, obstacles.
+    Served from the artifact cache after the first call.
     """
     try:
-        file_path = os.path.join(UPLOAD_DIR, f"{file_id}.dxf")
+        file_path = _dxf_path(file_id)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        # Check cache
-        if file_id in feature_cache:
-            logger.info(f"[DXF API] Returning cached features for {file_id}")
-            return feature_cache[file_id]
-        
-        # Detect features
-        detector = ExistingFeaturesDetector()
-        features = detector.detect_features(file_path)
-        
-        # Convert Shapely geometries to GeoJSON-compatible dicts
-        result = {
-            "water_bodies": [
-                {
-                    **wb,
-                    "polygon": wb["polygon"].__geo_interface__
-                }
-                for wb in features["water_bodies"]
-            ],
-            "buildings": [
-                {
-                    **b,
-                    "polygon": b["polygon"].__geo_interface__
-                }
-                for b in features["buildings"]
-            ],
-            "roads": [
-                {
-                    **r,
-                    "linestring": r["linestring"].__geo_interface__
-                }
-                for r in features["roads"]
-            ],
-            "vegetation": [
-                {
-                    **v,
-                    "polygon": v["polygon"].__geo_interface__
-                }
-                for v in features["vegetation"]
-            ],
-            "obstacles": [
-                {
-                    **o,
-                    "polygon": o["polygon"].__geo_interface__
-                }
-                for o in features["obstacles"]
-            ],
-            "boundary": (
-                features["boundary"].__geo_interface__
-                if features["boundary"]
-                else None
-            ),
-            "summary": features["summary"]
-        }
-        
-        # Cache result
-        feature_cache[file_id] = result
-        
-        logger.info(
-            f"[DXF API] Detected features for {file_id}: "
-            f"{len(result['water_bodies'])} water, "
-            f"{len(result['buildings'])} buildings"
+        compressed = artifact_cache.get_bytes(
+            file_id, "features", file_fingerprint(file_path)
         )
+        if compressed is not None:
+            logger.info(f"[DXF API] Returning cached features for {file_id}")
+            return _gzip_json_response(compressed, request)
         
-        return result
+        return _load_features(file_id)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[DXF API] Feature detection error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -237,12 +344,18 @@ async def classify_reusability(file_id: str):
     Returns keep_as_is, reuse_modified, demolish lists and constraints.
     """
     try:
-        # Get features
-        if file_id not in feature_cache:
-            # Fetch features first
-            await get_features(file_id)
+        file_path = _dxf_path(file_id)
+        
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        fingerprint = file_fingerprint(file_path)
+        cached = artifact_cache.get(file_id, "reusability", fingerprint)
+        if cached is not None:
+            return cached
         
-        features_data = feature_cache[file_id]
+        # Get features (cached after first detection)
+        features_data = _load_features(file_id)
         
         # Reconstruct Shapely geometries
         from shapely.geometry import shape
@@ -301,6 +414,7 @@ async def classify_reusability(file_id: str):
             **reusability,
             "constraints": constraints_json
         }
+        artifact_cache.put(file_id, "reusability", result, fingerprint)
         
         logger.info(
             f"[DXF API] Classified reusability for {file_id}: "
@@ -311,6 +425,8 @@ async def classify_reusability(file_id: str):
         
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"[DXF API] Reusability classification error: {str(e)}"
@@ -318,56 +434,118 @@ async def classify_reusability(file_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _geojson_fingerprint(file_path: str, georef: DXFGeoreferencer) -> str:
+    return (
+        f"{file_fingerprint(file_path)}-"
+        f"{georef_fingerprint(georef.transformation_matrix)}"
+    )
+
+
+def georeferenced_geojson_fingerprint(file_id: str) -> Optional[str]:
+    """Fingerprint of the current DXF + georeference (None if unavailable)."""
+    file_path = _dxf_path(file_id)
+    georef = _load_georeferencer(file_id)
+    if georef is None or not os.path.exists(file_path):
+        return None
+    return _geojson_fingerprint(file_path, georef)
+
+
+def load_georeferenced_geojson(file_id: str) -> Optional[Dict]:
+    """
+    Return cached {"geojson", "bounds"} for a georeferenced file.
+    
+    Converts and caches on miss. Returns None if the file is missing or
+    not georeferenced yet. Used by the vector tile endpoints.
+    """
+    file_path = _dxf_path(file_id)
+    georef = _load_georeferencer(file_id)
+    if georef is None or not os.path.exists(file_path):
+        return None
+    
+    fingerprint = _geojson_fingerprint(file_path, georef)
+    cached = artifact_cache.get(file_id, "geojson", fingerprint)
+    if cached is not None:
+        return cached
+    
+    geojson = georef.dxf_to_geojson(file_path)
+    result = {"geojson": geojson, "bounds": georef.calculate_bounds(geojson)}
+    artifact_cache.put(file_id, "geojson", result, fingerprint)
+    return result
+
+
 @router.get("/{file_id}/geojson")
-async def get_geojson(file_id: str):
+async def get_geojson(file_id: str, request: Request):
     """
     Get georeferenced GeoJSON for Mapbox display.
     
-    Requires file to be georeferenced first.
+    Requires file to be georeferenced first. The converted response is
+    cached per georeference parameters and served as gzip when accepted.
     """
     try:
-        file_path = os.path.join(UPLOAD_DIR, f"{file_id}.dxf")
+        file_path = _dxf_path(file_id)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        if file_id not in georef_instances:
+        georef = _load_georeferencer(file_id)
+        if georef is None:
             raise HTTPException(
                 status_code=400,
                 detail="File not georeferenced. "
                        "Upload and georeference first."
             )
         
-        georef = georef_instances[file_id]
+        fingerprint = _geojson_fingerprint(file_path, georef)
+        compressed = artifact_cache.get_bytes(file_id, "geojson", fingerprint)
         
-        # Convert to GeoJSON
-        geojson = georef.dxf_to_geojson(file_path)
-        
-        # Calculate bounds for Mapbox viewport
-        bounds = georef.calculate_bounds(geojson)
-        
-        logger.info(
-            f"[DXF API] Generated GeoJSON for {file_id}, "
-            f"{len(geojson['features'])} features"
-        )
+        if compressed is None:
+            # Convert to GeoJSON
+            geojson = georef.dxf_to_geojson(file_path)
+            
+            # Calculate bounds for Mapbox viewport
+            bounds = georef.calculate_bounds(geojson)
+            
+            logger.info(
+                f"[DXF API] Generated GeoJSON for {file_id}, "
+                f"{len(geojson['features'])} features"
+            )
+            
+            compressed = artifact_cache.put(
+                file_id,
+                "geojson",
+                {"geojson": geojson, "bounds": bounds},
+                fingerprint
+            )
+        else:
+            logger.info(f"[DXF API] Returning cached GeoJSON for {file_id}")
         
-        return {
-            "geojson": geojson,
-            "bounds": bounds
-        }
+        return _gzip_json_response(compressed, request)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[DXF API] GeoJSON generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Artifact cache size, budget and hit/miss counters (this worker)."""
+    return artifact_cache.stats()
+
+
 @router.post("/{file_id}/reusability-override")
-async def override_reusability(request: FeatureReusabilityRequest):
+async def override_reusability(file_id: str, request: FeatureReusabilityRequest):
     """
     Manually override automatic reusability classification.
     
     Allows user to customize which features to keep/reuse/demolish.
     """
+    if request.file_id != file_id:
+        raise HTTPException(status_code=400, detail="file_id in body does not match the URL")
+    if not _is_safe_file_id(file_id) or not os.path.exists(_dxf_path(file_id)):
+        raise HTTPException(status_code=404, detail="File not found")
+    
     try:
         logger.info(
             f"[DXF API] Reusability override for {request.file_id}: "
@@ -376,13 +554,17 @@ async def override_reusability(request: FeatureReusabilityRequest):
             f"demolish={len(request.demolish)}"
         )
         
-        # Store user preferences (in production, save to database)
-        override_key = f"{request.file_id}_reusability"
-        feature_cache[override_key] = {
-            "keep_as_is": request.keep_as_is,
-            "reuse_modified": request.reuse_modified,
-            "demolish": request.demolish
-        }
+        # Store user preferences next to the upload (not subject to
+        # cache eviction)
+        override_path = os.path.join(
+            UPLOAD_DIR, f"{file_id}.reusability.json"
+        )
+        with open(override_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "keep_as_is": request.keep_as_is,
+                "reuse_modified": request.reuse_modified,
+                "demolish": request.demolish
+            }, f)
         
         return {
             "file_id": request.file_id,
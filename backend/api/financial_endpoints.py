@@ -18,6 +18,11 @@ from optimization.financial_optimizer import (
     CostParameters,
     RevenueParameters
 )
+from optimization.financial_risk import Distribution, FinancialRiskSimulator
+
+# Largest Monte Carlo run accepted by /api/financial/risk
+MAX_RISK_SCENARIOS = 100_000
+MAX_RISK_HORIZON = 50  # years; cash-flow arrays are chunk x (horizon + 1)
 
 router = APIRouter()
 financial_model = FinancialModel()
@@ -30,6 +35,16 @@ class FinancialAnalysisRequest(BaseModel):
     revenue_params: Optional[Dict[str, float]] = None
 
 
+class RiskAnalysisRequest(BaseModel):
+    """Request for Monte Carlo risk analysis"""
+    design: Dict[str, Any]
+    n_scenarios: int = 10_000
+    distributions: Optional[Dict[str, Dict[str, Any]]] = None
+    horizon_years: int = 10
+    construction_years: int = 2
+    seed: Optional[int] = None
+
+
 class DesignComparison(BaseModel):
     """Multiple designs for comparison"""
     designs: List[Dict[str, Any]]
@@ -74,6 +89,56 @@ async def analyze_financial(request: FinancialAnalysisRequest):
         raise HTTPException(status_code=500, detail=f"Financial analysis failed: {str(e)}")
 
 
+@router.post("/api/financial/risk")
+def analyze_risk(request: RiskAnalysisRequest):
+    """
+    Monte Carlo risk analysis for a design
+    
+    **Parameters:**
+    - design: Design object with lots, roads, utilities
+    - n_scenarios: Number of scenarios (max 100,000)
+    - distributions: Optional overrides for price, cost, absorption,
+      interest_rate, e.g. {"price": {"kind": "triangular", "low": 0.8, "mode": 1.0, "high": 1.1}}
+    - horizon_years / construction_years: Cash-flow timeline
+      (1 <= construction_years <= horizon_years <= 50)
+    - seed: Random seed for reproducible runs
+    
+    **Returns:**
+    - P10/P50/P90 NPV, IRR and payback, loss probability, histograms, tornado
+    """
+    # Plain def: the CPU-bound simulation runs in FastAPI's threadpool
+    if not 1 <= request.n_scenarios <= MAX_RISK_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"n_scenarios must be 1-{MAX_RISK_SCENARIOS}")
+    if not 1 <= request.construction_years <= request.horizon_years <= MAX_RISK_HORIZON:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Need 1 <= construction_years <= horizon_years <= {MAX_RISK_HORIZON}"
+        )
+    try:
+        distributions = {
+            name: Distribution.from_dict(spec)
+            for name, spec in (request.distributions or {}).items()
+        }
+        simulator = FinancialRiskSimulator(
+            financial_model,
+            distributions=distributions,
+            horizon_years=request.horizon_years,
+            construction_years=request.construction_years,
+            seed=request.seed
+        )
+    except (KeyError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid distribution: {e}")
+    
+    try:
+        result = simulator.simulate(request.design, request.n_scenarios)
+        return {
+            "success": True,
+            "risk": result.summary()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Risk analysis failed: {str(e)}")
+
+
 @router.post("/api/financial/compare")
 async def compare_designs(comparison: DesignComparison):
     """
@@ -88,16 +153,17 @@ async def compare_designs(comparison: DesignComparison):
     try:
         comparisons = []
         
+        # All designs evaluated in one vectorized pass
+        metrics = financial_model.evaluate_population(comparison.designs)
         for i, design in enumerate(comparison.designs):
-            metrics = financial_model.calculate_roi_metrics(design)
             comparisons.append({
                 "design_id": i,
                 "design_name": design.get('name', f'Design {i+1}'),
-                "roi": metrics['roi_percentage'],
-                "profit": metrics['gross_profit'],
-                "cost": metrics['total_cost'],
-                "revenue": metrics['total_revenue'],
-                "profit_margin": metrics['profit_margin'],
+                "roi": float(metrics['roi_percentage'][i]),
+                "profit": float(metrics['gross_profit'][i]),
+                "cost": float(metrics['total_cost'][i]),
+                "revenue": float(metrics['total_revenue'][i]),
+                "profit_margin": float(metrics['profit_margin'][i]),
                 "num_lots": len(design.get('lots', []))
             })
         
@@ -5,7 +5,7 @@ Provides REST API and WebSocket endpoints for design generation.
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, BackgroundTasks, HTTPException, Query, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import asyncio
@@ -34,6 +34,8 @@ from optimization.ga_optimizer import IndustrialParkGA
 from design.compliance_checker import ComplianceChecker
 from design.enhanced_layout_generator import EnhancedLayoutGenerator
 from cad.dxf_generator import DXFGenerator
+from database.session_store import MemorySessionStore, create_session_store
+from database.layout_repository import get_layout_repository
 
 # Import optimized subdivision endpoint
 from api.optimized_subdivision_endpoint import get_router as get_optimized_router
@@ -46,6 +48,14 @@ except Exception as e:
     print(f"⚠️ Could not load financial endpoints: {e}")
     FINANCIAL_ENDPOINTS_AVAILABLE = False
 
+# Import scoring endpoints
+try:
+    from api.scoring_endpoints import get_router as get_scoring_router
+    SCORING_ENDPOINTS_AVAILABLE = True
+except Exception as e:
+    print(f"[WARN] Could not load scoring endpoints: {e}")
+    SCORING_ENDPOINTS_AVAILABLE = False
+
 # Import DXF endpoints
 try:
     from api.dxf_endpoints import router as dxf_router
@@ -54,6 +64,14 @@ except Exception as e:
     print(f"[WARN] Could not load DXF endpoints: {e}")
     DXF_ENDPOINTS_AVAILABLE = False
 
+# Import vector tile endpoints
+try:
+    from api.tile_endpoints import get_router as get_tile_router
+    TILE_ENDPOINTS_AVAILABLE = True
+except Exception as e:
+    print(f"[WARN] Could not load tile endpoints: {e}")
+    TILE_ENDPOINTS_AVAILABLE = False
+
 # Import demo endpoints
 try:
     from api.demo_endpoints import get_router as get_demo_router
@@ -106,6 +124,14 @@ if FINANCIAL_ENDPOINTS_AVAILABLE:
     except Exception as e:
         print(f"[WARN] Could not include financial router: {e}")
 
+# Include design scoring router
+if SCORING_ENDPOINTS_AVAILABLE:
+    try:
+        app.include_router(get_scoring_router(), prefix="/api")
+        print("[OK] Design scoring endpoints loaded successfully")
+    except Exception as e:
+        print(f"[WARN] Could not include scoring router: {e}")
+
 # Include DXF endpoints router
 if DXF_ENDPOINTS_AVAILABLE:
     try:
@@ -114,6 +140,14 @@ if DXF_ENDPOINTS_AVAILABLE:
     except Exception as e:
         print(f"[WARN] Could not include DXF router: {e}")
 
+# Include vector tile router
+if TILE_ENDPOINTS_AVAILABLE:
+    try:
+        app.include_router(get_tile_router())
+        print("[OK] Vector tile endpoints loaded successfully")
+    except Exception as e:
+        print(f"[WARN] Could not include tile router: {e}")
+
 # Include demo endpoints router
 if DEMO_ENDPOINTS_AVAILABLE:
     try:
@@ -132,10 +166,29 @@ if AUTO_DESIGN_AVAILABLE:
     except Exception as e:
         print(f"[WARN] Could not include auto-design router: {e}")
 
-# In-memory storage (replace with database in production)
-projects: Dict[str, Dict] = {}
-design_jobs: Dict[str, Dict] = {}
-chat_sessions: Dict[str, IndustrialParkLLMOrchestrator] = {}
+# Bounded stores (TTL + LRU). With a sqlite:// or redis:// SESSION_STORE_URL,
+# values are copies: mutate, then write back with store[key] = value.
+projects = create_session_store(
+    "projects",
+    settings.session_store_url,
+    default_ttl=settings.session_ttl_seconds,
+    max_items=settings.session_store_max_items,
+    max_bytes=settings.session_store_max_bytes,
+    sliding=True
+)
+design_jobs = create_session_store(
+    "design_jobs",
+    settings.session_store_url,
+    default_ttl=24 * 3600,
+    max_items=settings.session_store_max_items
+)
+# LLM orchestrators hold API clients and cannot be serialized
+chat_sessions = MemorySessionStore(
+    "chat_sessions",
+    default_ttl=settings.session_ttl_seconds,
+    max_items=settings.chat_sessions_max,
+    sliding=True
+)
 
 
 # ==================== DATA MODELS ====================
@@ -161,6 +214,8 @@ class ExportRequest(BaseModel):
     project_id: str
     variant_id: str
     format: str = Field("dxf", pattern="^(dxf|json|pdf)$")
+    stream: bool = False   # dxf: stream the file instead of returning a download_url
+    binary: bool = False   # dxf: binary DXF (only with stream)
 
 
 # ==================== ENDPOINTS ====================
@@ -207,6 +262,7 @@ async def create_new_project(request: ProjectCreate):
     }
     
     projects[project_id] = project
+    get_layout_repository().save_project(project)
     
     # Initialize chat session
     chat_sessions[project_id] = IndustrialParkLLMOrchestrator()
@@ -226,7 +282,18 @@ async def get_project(project_id: str):
 @app.get("/api/projects")
 async def list_projects():
     """List all projects."""
-    return {"projects": list(projects.values())}
+    return {"projects": projects.values()}
+
+
+@app.get("/api/stores/stats")
+async def get_store_stats():
+    """Item counts, memory usage and hit/eviction metrics of the session stores."""
+    return {
+        "projects": projects.info(),
+        "design_jobs": design_jobs.info(),
+        "chat_sessions": chat_sessions.info(),
+        "layout_db": get_layout_repository().stats()
+    }
 
 
 @app.post("/api/upload-dxf")
@@ -287,13 +354,15 @@ async def upload_and_analyze_dxf(
             ai_greeting = orchestrator.inject_dxf_context(analysis)
             
             # Update project with DXF info
-            if project_id in projects:
-                projects[project_id]["site"]["area_ha"] = (
+            project = projects.get(project_id)
+            if project is not None:
+                project["site"]["area_ha"] = (
                     analysis["site_info"]["area_ha"]
                 )
-                projects[project_id]["site"]["boundary"] = (
+                project["site"]["boundary"] = (
                     analysis.get("boundary_points", [])
                 )
+                projects[project_id] = project
         
         # Format response với gợi ý thông minh
         return {
@@ -342,16 +411,18 @@ async def chat_endpoint(request: ChatMessage):
         response = orchestrator.chat(request.message)
         
         # Store in project history
-        projects[project_id]["chat_history"].append({
+        project = projects[project_id]
+        project["chat_history"].append({
             "role": "user",
             "content": request.message,
             "timestamp": datetime.now().isoformat()
         })
-        projects[project_id]["chat_history"].append({
+        project["chat_history"].append({
             "role": "assistant",
             "content": response.content,
             "timestamp": datetime.now().isoformat()
         })
+        projects[project_id] = project
         
         return {
             "response": response.content,
@@ -470,29 +541,66 @@ async def get_job_status(job_id: str):
 
 
 @app.get("/api/designs/{project_id}/variants")
-async def get_design_variants(project_id: str):
-    """Retrieve generated variants for a project."""
-    if project_id not in projects:
-        raise HTTPException(status_code=404, detail="Project not found")
+async def get_design_variants(project_id: str, summary: bool = False):
+    """
+    Retrieve generated variants for a project.
     
-    return {"variants": projects[project_id].get("variants", [])}
+    Served from the layout database; with summary=true the layout JSON is
+    left out (scores, compliance and lot statistics only).
+    """
+    repository = get_layout_repository()
+    variants = repository.list_variants(project_id, include_layout=not summary)
+    if variants:
+        return {"variants": variants}
+    
+    if project_id in projects:
+        return {"variants": projects[project_id].get("variants", [])}
+    if repository.project_exists(project_id):
+        return {"variants": []}
+    raise HTTPException(status_code=404, detail="Project not found")
+
+
+@app.get("/api/designs/variants/{variant_id}/lots")
+async def get_variant_lots(
+    variant_id: str,
+    bbox: str = Query(..., description="minx,miny,maxx,maxy in layout coordinates"),
+    kind: Optional[str] = Query(None, description="Feature kind, e.g. lot or building"),
+    limit: int = Query(5000, ge=1, le=50000)
+):
+    """Lots / features of a variant inside a viewport (R-tree indexed)."""
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be minx,miny,maxx,maxy")
+    if minx > maxx or miny > maxy:
+        raise HTTPException(status_code=400, detail="bbox min must not exceed max")
+    
+    repository = get_layout_repository()
+    if repository.get_variant(variant_id, include_layout=False) is None:
+        raise HTTPException(status_code=404, detail="Variant not found")
+    
+    features = repository.query_bbox(variant_id, (minx, miny, maxx, maxy), kind=kind, limit=limit)
+    return {"type": "FeatureCollection", "features": features}
 
 
 @app.post("/api/export")
 async def export_design(request: ExportRequest):
     """Export design in specified format."""
-    if request.project_id not in projects:
+    repository = get_layout_repository()
+    project = projects.get(request.project_id)
+    if project is None:
+        project = repository.get_project(request.project_id)
+    if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    project = projects[request.project_id]
-    variants = project.get("variants", [])
-    
-    # Find variant
+    # Find variant (session store first, then the layout database)
     variant = None
-    for v in variants:
+    for v in project.get("variants", []):
         if v.get("id") == request.variant_id:
             variant = v
             break
+    if variant is None:
+        variant = repository.get_variant(request.variant_id)
     
     if not variant:
         raise HTTPException(status_code=404, detail="Variant not found")
@@ -504,6 +612,16 @@ async def export_design(request: ExportRequest):
         layout["name"] = project.get("name", "Industrial Park")
         layout["variant_id"] = request.variant_id
         
+        if request.stream:
+            return StreamingResponse(
+                generator.stream(layout, binary=request.binary),
+                media_type="application/dxf",
+                headers={
+                    "Content-Disposition":
+                        f"attachment; filename={DXFGenerator.default_filename(layout)}"
+                }
+            )
+        
         filepath = generator.generate(layout)
         
         return {
@@ -615,6 +733,14 @@ async def convert_dwg_to_dxf(file: UploadFile = File(...)):
 
 # ==================== BACKGROUND WORKERS ====================
 
+def _update_job(job_id: str, **fields):
+    """Update a design job and write it back to the store."""
+    job = design_jobs.get(job_id)
+    if job is None:
+        return
+    job.update(fields)
+    design_jobs[job_id] = job
+
 async def design_generation_worker(job_id: str, project_id: str, params: Dict):
     """Background worker for design generation with progress updates."""
     import time
@@ -622,16 +748,22 @@ async def design_generation_worker(job_id: str, project_id: str, params: Dict):
     timings = {}  # Track timing for each step
     
     try:
-        design_jobs[job_id]["status"] = "running"
-        design_jobs[job_id]["progress"] = 5
-        design_jobs[job_id]["current_step"] = "Đang phân tích yêu cầu..."
+        _update_job(
+            job_id,
+            status="running",
+            progress=5,
+            current_step="Đang phân tích yêu cầu..."
+        )
         
         await asyncio.sleep(0.5)  # Allow UI to update
         
         # 1. Parse parameters and generate buildings
         step_start = time.time()
-        design_jobs[job_id]["progress"] = 10
-        design_jobs[job_id]["current_step"] = "Tạo danh sách nhà máy và tòa nhà..."
+        _update_job(
+            job_id,
+            progress=10,
+            current_step="Tạo danh sách nhà máy và tòa nhà..."
+        )
         
         site_params = {
             "total_area_m2": params.get("total_area_m2", 500000),
@@ -644,16 +776,22 @@ async def design_generation_worker(job_id: str, project_id: str, params: Dict):
         
         buildings = generate_buildings_from_params(params)
         timings["building_generation"] = time.time() - step_start
-        design_jobs[job_id]["progress"] = 15
-        design_jobs[job_id]["current_step"] = f"✓ Đã tạo {len(buildings)} tòa nhà ({timings['building_generation']:.1f}s)"
+        _update_job(
+            job_id,
+            progress=15,
+            current_step=f"✓ Đã tạo {len(buildings)} tòa nhà ({timings['building_generation']:.1f}s)"
+        )
         print(f"[Design] Generated {len(buildings)} buildings in {timings['building_generation']:.2f}s")
         
         await asyncio.sleep(0.5)
         
         # 2. Run CSP to get feasible solutions
         step_start = time.time()
-        design_jobs[job_id]["progress"] = 20
-        design_jobs[job_id]["current_step"] = "Đang giải bài toán ràng buộc CSP..."
+        _update_job(
+            job_id,
+            progress=20,
+            current_step="Đang giải bài toán ràng buộc CSP..."
+        )
         
         csp_solver = IndustrialParkCSP(site_params)
         csp_solver.set_buildings(buildings)
@@ -661,51 +799,70 @@ async def design_generation_worker(job_id: str, project_id: str, params: Dict):
         csp_solver.add_no_overlap_constraint()
         csp_solver.add_boundary_constraint()
         
-        design_jobs[job_id]["progress"] = 30
-        design_jobs[job_id]["current_step"] = "Tìm kiếm layout khả thi..."
+        _update_job(
+            job_id,
+            progress=30,
+            current_step="Tìm kiếm layout khả thi..."
+        )
         
         feasible_layouts = csp_solver.solve(max_solutions=3)
         timings["csp_solver"] = time.time() - step_start
-        design_jobs[job_id]["progress"] = 40
-        design_jobs[job_id]["current_step"] = f"✓ Tìm được {len(feasible_layouts)} layout khả thi ({timings['csp_solver']:.1f}s)"
+        _update_job(
+            job_id,
+            progress=40,
+            current_step=f"✓ Tìm được {len(feasible_layouts)} layout khả thi ({timings['csp_solver']:.1f}s)"
+        )
         print(f"[Design] CSP solved in {timings['csp_solver']:.2f}s, found {len(feasible_layouts)} layouts")
         
         await asyncio.sleep(0.5)
         
         # 3. Run GA for optimization (reduced for speed)
         step_start = time.time()
-        design_jobs[job_id]["progress"] = 45
-        design_jobs[job_id]["current_step"] = "Khởi tạo thuật toán di truyền GA..."
+        _update_job(
+            job_id,
+            progress=45,
+            current_step="Khởi tạo thuật toán di truyền GA..."
+        )
         
         ga_optimizer = IndustrialParkGA(site_params, feasible_layouts=feasible_layouts)
         ga_optimizer.set_buildings(buildings)
         
-        design_jobs[job_id]["progress"] = 50
-        design_jobs[job_id]["current_step"] = "Đang tối ưu hóa với GA (10 thế hệ)..."
+        _update_job(
+            job_id,
+            progress=50,
+            current_step="Đang tối ưu hóa với GA (10 thế hệ)..."
+        )
         print("[Design] Starting GA optimization...")
         
         # Reduced to 10/10 for faster generation (~10 seconds)
         optimized_variants = ga_optimizer.optimize(population_size=10, generations=10)
         timings["ga_optimizer"] = time.time() - step_start
-        design_jobs[job_id]["progress"] = 70
-        design_jobs[job_id]["current_step"] = f"✓ Tối ưu xong! Có {len(optimized_variants)} phương án ({timings['ga_optimizer']:.1f}s)"
+        _update_job(
+            job_id,
+            progress=70,
+            current_step=f"✓ Tối ưu xong! Có {len(optimized_variants)} phương án ({timings['ga_optimizer']:.1f}s)"
+        )
         print(f"[Design] GA optimization complete in {timings['ga_optimizer']:.2f}s, {len(optimized_variants)} variants")
         
         await asyncio.sleep(0.5)
         
         # 4. Check compliance for each variant
         step_start = time.time()
-        design_jobs[job_id]["progress"] = 75
-        design_jobs[job_id]["current_step"] = (
-            "Kiểm tra tuân thủ IEAT Thailand..."
+        _update_job(
+            job_id,
+            progress=75,
+            current_step="Kiểm tra tuân thủ IEAT Thailand..."
         )
         
         compliance_checker = ComplianceChecker()
         
         results = []
         for i, (layout, fitness_scores) in enumerate(optimized_variants[:5]):
-            design_jobs[job_id]["progress"] = 75 + (i * 3)
-            design_jobs[job_id]["current_step"] = f"Phân tích phương án {i+1}/5..."
+            _update_job(
+                job_id,
+                progress=75 + (i * 3),
+                current_step=f"Phân tích phương án {i+1}/5..."
+            )
             
             layout["site"] = site_params
             layout["worker_capacity"] = params.get("worker_capacity", 3000)
@@ -728,31 +885,45 @@ async def design_generation_worker(job_id: str, project_id: str, params: Dict):
             results.append(variant)
         
         timings["compliance_check"] = time.time() - step_start
-        design_jobs[job_id]["progress"] = 90
-        design_jobs[job_id]["current_step"] = "Lưu kết quả..."
+        _update_job(
+            job_id,
+            progress=90,
+            current_step="Lưu kết quả..."
+        )
         
         # 5. Save to project
-        projects[project_id]["variants"] = results
+        project = projects.get(project_id)
+        if project is not None:
+            project["variants"] = results
+            projects[project_id] = project
+        # Written on the repository's writer thread
+        get_layout_repository().save_variants(project_id, results)
         
         # 6. Calculate total time and update job status
         total_time = time.time() - start_time
         timings["total"] = total_time
         
-        design_jobs[job_id]["status"] = "completed"
-        design_jobs[job_id]["progress"] = 100
-        design_jobs[job_id]["current_step"] = f"✓ Hoàn thành trong {total_time:.1f}s!"
-        design_jobs[job_id]["variants"] = results
-        design_jobs[job_id]["timings"] = timings
-        design_jobs[job_id]["completed_at"] = datetime.now().isoformat()
+        _update_job(
+            job_id,
+            status="completed",
+            progress=100,
+            current_step=f"✓ Hoàn thành trong {total_time:.1f}s!",
+            variants=results,
+            timings=timings,
+            completed_at=datetime.now().isoformat()
+        )
         
         print(f"[Design] Job {job_id} completed in {total_time:.2f}s")
         print(f"[Design] Timings: Buildings={timings.get('building_generation',0):.2f}s, CSP={timings.get('csp_solver',0):.2f}s, GA={timings.get('ga_optimizer',0):.2f}s, Compliance={timings.get('compliance_check',0):.2f}s")
         print(f"[Design] Generated {len(results)} variants successfully")
         
     except Exception as e:
-        design_jobs[job_id]["status"] = "failed"
-        design_jobs[job_id]["error"] = str(e)
-        design_jobs[job_id]["current_step"] = f"❌ Lỗi: {str(e)}"
+        _update_job(
+            job_id,
+            status="failed",
+            error=str(e),
+            current_step=f"❌ Lỗi: {str(e)}"
+        )
         print(f"Design generation error: {e}")
         import traceback
         traceback.print_exc()
@@ -5,18 +5,26 @@ Endpoints:
 - POST /api/scoring/score-design: Score a single design
 - POST /api/scoring/compare-designs: Compare multiple designs
 - POST /api/scoring/sensitivity: Sensitivity analysis
+- POST /api/scoring/sensitivity/multi: Parameter grid or Sobol indices
+
+Designs referenced by id are loaded from the layout repository
+(database/layout_repository.py).
 """
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 
-from backend.optimization.scoring_matrix import DesignScorer, ScoreWeights
+from database.layout_repository import get_layout_repository
+from optimization.scoring_matrix import DesignScorer, ScoreWeights
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/scoring", tags=["scoring"])
 
+# Upper bound on design evaluations per multi-parameter request
+MAX_SENSITIVITY_EVALUATIONS = 200_000
+
 
 class ScoreDesignRequest(BaseModel):
     """Request to score a single design."""
@@ -40,6 +48,17 @@ class SensitivityRequest(BaseModel):
     num_steps: int = 10
 
 
+class MultiSensitivityRequest(BaseModel):
+    """Request for multi-parameter sensitivity analysis."""
+    design_id: str
+    design_data: Optional[dict] = None
+    parameters: Dict[str, Tuple[float, float]]
+    method: str = "grid"  # "grid" or "sobol"
+    num_steps: int = 10  # grid: steps per parameter
+    num_samples: int = 512  # sobol: base samples
+    seed: Optional[int] = None
+
+
 @router.post("/score-design")
 async def score_design(request: ScoreDesignRequest):
     """
@@ -74,6 +93,8 @@ async def score_design(request: ScoreDesignRequest):
         
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[SCORING API] Error scoring design: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -90,11 +111,8 @@ async def compare_designs(request: CompareDesignsRequest):
         num_designs = len(request.design_ids)
         logger.info(f"[COMPARISON API] Comparing {num_designs} designs")
         
-        # Load all designs
-        designs = [
-            _load_design_from_db(design_id)
-            for design_id in request.design_ids
-        ]
+        # Load all designs in one batch
+        designs = _load_designs_from_db(request.design_ids)
         
         # Create scorer
         if request.custom_weights:
@@ -111,6 +129,8 @@ async def compare_designs(request: CompareDesignsRequest):
         
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[COMPARISON API] Error comparing designs: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -123,6 +143,11 @@ async def sensitivity_analysis(request: SensitivityRequest):
     
     Shows how score changes with parameter variation.
     """
+    if not 1 <= request.num_steps <= MAX_SENSITIVITY_EVALUATIONS:
+        raise HTTPException(
+            status_code=400, detail=f"num_steps must be 1-{MAX_SENSITIVITY_EVALUATIONS}"
+        )
+    
     try:
         logger.info(
             f"[SENSITIVITY API] Analyzing {request.parameter} "
@@ -137,6 +162,10 @@ async def sensitivity_analysis(request: SensitivityRequest):
         
         # Create scorer
         scorer = DesignScorer()
+        if scorer.unknown_parameters(design, [request.parameter]):
+            raise HTTPException(
+                status_code=400, detail=f"Unknown design parameter: {request.parameter}"
+            )
         
         # Run sensitivity analysis
         result = scorer.sensitivity_analysis(
@@ -153,6 +182,8 @@ async def sensitivity_analysis(request: SensitivityRequest):
         
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"[SENSITIVITY API] Error in sensitivity analysis: {str(e)}"
@@ -160,61 +191,87 @@ async def sensitivity_analysis(request: SensitivityRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _load_design_from_db(design_id: str) -> dict:
+@router.post("/sensitivity/multi")
+def multi_sensitivity_analysis(request: MultiSensitivityRequest):
     """
-    Load design data from database.
+    Vary several design parameters together.
     
-    In production, this would query the actual database.
-    For now, returns mock data.
+    method="grid" scores the full num_steps^k grid; method="sobol" returns
+    first- and total-order Sobol indices of the weighted score.
     """
-    # Mock data for testing
-    from shapely.geometry import Polygon
+    # Plain def: up to MAX_SENSITIVITY_EVALUATIONS scorings run in FastAPI's threadpool
+    k = len(request.parameters)
+    if k == 0:
+        raise HTTPException(status_code=400, detail="At least one parameter is required")
+    if request.method == "grid":
+        if request.num_steps < 1:
+            raise HTTPException(status_code=400, detail="num_steps must be at least 1")
+        evaluations = request.num_steps ** k
+    elif request.method == "sobol":
+        if request.num_samples < 1:
+            raise HTTPException(status_code=400, detail="num_samples must be at least 1")
+        evaluations = request.num_samples * (k + 2)
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown method: {request.method}")
+    if evaluations > MAX_SENSITIVITY_EVALUATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{evaluations} evaluations exceeds the limit of {MAX_SENSITIVITY_EVALUATIONS}"
+        )
+    
+    try:
+        logger.info(
+            f"[SENSITIVITY API] {request.method} over {', '.join(request.parameters)} "
+            f"for design {request.design_id}"
+        )
+        
+        if request.design_data:
+            design = request.design_data
+        else:
+            design = _load_design_from_db(request.design_id)
+        
+        scorer = DesignScorer()
+        unknown = scorer.unknown_parameters(design, list(request.parameters))
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown design parameter(s): {', '.join(unknown)}"
+            )
+        if request.method == "grid":
+            return scorer.sensitivity_grid(design, request.parameters, request.num_steps)
+        return scorer.sobol_analysis(
+            design, request.parameters, request.num_samples, seed=request.seed
+        )
     
-    return {
-        "name": f"Design {design_id}",
-        "site_boundary": Polygon(
-            [(0, 0), (1000, 0), (1000, 800), (0, 800)]
-        ),
-        "lots": [
-            Polygon([
-                (i*50, j*50),
-                (i*50+40, j*50),
-                (i*50+40, j*50+40),
-                (i*50, j*50+40)
-            ])
-            for i in range(15) for j in range(12)
-        ],
-        "compliance": {
-            "salable_area_pct": 0.76,
-            "green_space_pct": 0.12,
-            "invalid_plots": [],
-            "road_standards_met": True,
-            "infrastructure_complete": True
-        },
-        "financial": {
-            "roi_percent": 28,
-            "revenue_per_rai_thb": 9_500_000,
-            "payback_years": 4.2,
-            "salable_lots": 35,
-            "infrastructure_cost_per_rai_thb": 1_800_000,
-            "total_cost_thb": 120_000_000,
-            "infrastructure_cost_thb": 22_000_000,
-            "road_length_km": 2.8
-        },
-        "timeline": {
-            "total_months": 11,
-            "critical_path_pct": 75,
-            "parallel_tasks": 4
-        },
-        "customer": {
-            "lot_size_diversity": 3,
-            "industry_compatibility_score": 85
-        },
-        "risks": {
-            "ieat_compliant": True,
-            "roi_percent": 28,
-            "construction_complexity": "medium",
-            "environmental_impact": "low",
-            "market_demand": "high"
-        }
-    }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"[SENSITIVITY API] Error in multi-parameter analysis: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _load_designs_from_db(design_ids: List[str]) -> List[dict]:
+    """
+    Load designs (variants) from the layout repository, in request order.
+
+    Raises:
+        HTTPException 404 if any id is unknown
+    """
+    found = get_layout_repository().load_designs(design_ids)
+    missing = [design_id for design_id in design_ids if design_id not in found]
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Design(s) not found: {', '.join(missing)}"
+        )
+    return [found[design_id] for design_id in design_ids]
+
+
+def _load_design_from_db(design_id: str) -> dict:
+    """Load a single design from the layout repository (404 if unknown)."""
+    return _load_designs_from_db([design_id])[0]
+
+
+def get_router():
+    """Get the scoring router"""
+    return router
@@ -0,0 +1,169 @@
+"""
+Vector Tile API Endpoints
+
+Serves Mapbox Vector Tiles for large layouts and DXF overlays instead of
+whole GeoJSON FeatureCollections.
+
+Endpoints:
+- POST /tiles/layers: Register a FeatureCollection (e.g. /api/optimize result)
+- GET /tiles/{layer}/tilejson: TileJSON metadata for a Mapbox source
+- GET /tiles/{layer}/{z}/{x}/{y}.pbf: Vector tile
+- GET /tiles/stats: Tileset / tile cache statistics
+
+Layer ids:
+- ``dxf-{file_id}``: georeferenced DXF overlay (built on first request)
+- ids returned by POST /tiles/layers: optimization result layers
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+import json
+import logging
+
+from cad.vector_tiles import MAX_ZOOM, VectorTileSet, VectorTileStore, content_key
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/tiles", tags=["Vector Tiles"])
+
+tile_store = VectorTileStore()
+
+DXF_LAYER_PREFIX = "dxf-"
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+class TileLayerRequest(BaseModel):
+    """Register a GeoJSON FeatureCollection for tiling."""
+    geojson: Dict[str, Any]
+    layer_property: Optional[str] = "type"
+    default_layer: str = "layout"
+    max_zoom: int = 20
+
+
+def _resolve_tileset(layer: str) -> VectorTileSet:
+    """Find a registered tileset, building DXF overlays on demand."""
+    if layer.startswith(DXF_LAYER_PREFIX):
+        return _resolve_dxf_tileset(layer)
+
+    tileset = tile_store.get(layer)
+    if tileset is None:
+        raise HTTPException(status_code=404, detail=f"Tile layer {layer} not found")
+    return tileset
+
+
+def _resolve_dxf_tileset(layer: str) -> VectorTileSet:
+    """DXF overlay tileset, rebuilt when the file is re-georeferenced."""
+    from api.dxf_endpoints import (
+        georeferenced_geojson_fingerprint,
+        load_georeferenced_geojson,
+    )
+
+    file_id = layer[len(DXF_LAYER_PREFIX):]
+    fingerprint = georeferenced_geojson_fingerprint(file_id)
+    if fingerprint is None:
+        raise HTTPException(
+            status_code=404,
+            detail="DXF not found or not georeferenced"
+        )
+
+    tileset = tile_store.get(layer)
+    if tileset is not None and tileset.source_fingerprint == fingerprint:
+        return tileset
+
+    cached = load_georeferenced_geojson(file_id)
+    tileset = VectorTileSet(
+        cached["geojson"]["features"],
+        default_layer="dxf",
+        max_zoom=20
+    )
+    tileset.source_fingerprint = fingerprint
+    tile_store.register(layer, tileset)
+    logger.info(f"[TILES] Built DXF overlay tileset {layer}")
+    return tileset
+
+
+def _tile_url(request: Request, layer: str) -> str:
+    base = str(request.base_url).rstrip("/")
+    return f"{base}/tiles/{layer}/{{z}}/{{x}}/{{y}}.pbf"
+
+
+@router.post("/layers")
+async def register_layer(body: TileLayerRequest, request: Request):
+    """
+    Register a FeatureCollection and return its tile source.
+
+    Identical payloads map to the same layer id, so re-posting a result
+    reuses already rendered tiles.
+    """
+    features = body.geojson.get("features")
+    if body.geojson.get("type") != "FeatureCollection" or features is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Expected a GeoJSON FeatureCollection"
+        )
+
+    layer = content_key(
+        json.dumps(body.geojson, sort_keys=True, separators=(",", ":")).encode()
+        + f"|{body.layer_property}|{body.default_layer}|{body.max_zoom}".encode()
+    )
+
+    tileset = tile_store.get(layer)
+    if tileset is None:
+        tileset = await run_in_threadpool(
+            VectorTileSet,
+            features,
+            default_layer=body.default_layer,
+            layer_property=body.layer_property,
+            max_zoom=body.max_zoom
+        )
+        tile_store.register(layer, tileset)
+
+    return {
+        "layer": layer,
+        "tilejson": tileset.tilejson(_tile_url(request, layer))
+    }
+
+
+@router.get("/stats")
+async def get_tile_stats():
+    """Registered tilesets and rendered tile cache usage."""
+    return tile_store.stats()
+
+
+@router.get("/{layer}/tilejson")
+async def get_tilejson(layer: str, request: Request):
+    """TileJSON for use as a Mapbox GL ``vector`` source."""
+    # Cold DXF overlays are built here; keep that off the event loop
+    tileset = await run_in_threadpool(_resolve_tileset, layer)
+    return tileset.tilejson(_tile_url(request, layer))
+
+
+@router.get("/{layer}/{z}/{x}/{y}.pbf")
+async def get_tile(layer: str, z: int, x: int, y: int):
+    """Return one Mapbox Vector Tile (204 when the tile is empty)."""
+    # Bound z before 2 ** z
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+
+    tileset = await run_in_threadpool(_resolve_tileset, layer)
+    if z > tileset.max_zoom:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Zoom {z} exceeds the layer's max zoom {tileset.max_zoom}"
+        )
+    data = await run_in_threadpool(tile_store.tile, layer, z, x, y)
+
+    if not data:
+        return Response(status_code=204)
+
+    return Response(
+        content=data,
+        media_type=MVT_MEDIA_TYPE,
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
+
+
+def get_router():
+    return router
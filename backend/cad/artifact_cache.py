@@ -0,0 +1,269 @@
+"""
+DXF Artifact Cache
+
+Persistent, size-bounded cache for derived DXF artifacts:
+- Extracted existing features (GeoJSON-compatible dicts)
+- Reusability classification
+- Georeferenced GeoJSON responses for Mapbox
+
+Artifacts are stored on local disk as gzip-compressed JSON, one file per
+(file_id, artifact, fingerprint). Reads memory-map the file and decompress
+straight from the mapping, and the raw gzip bytes can be sent to clients
+that accept ``Content-Encoding: gzip`` without decompressing at all.
+
+Writes are atomic (temp file + rename) and recency is tracked with file
+mtimes, so several uvicorn workers can share one cache directory.
+Eviction is LRU by total bytes on disk.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import zlib
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any):
+    """Serialize NumPy scalars/arrays and tuples produced by feature extraction."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def georef_fingerprint(transformation_matrix: Optional[np.ndarray]) -> str:
+    """
+    Stable fingerprint for georeference parameters.
+
+    The affine matrix is rounded to 1e-9 so that re-submitting the same
+    control points maps to the same cache entry.
+    """
+    if transformation_matrix is None:
+        return "none"
+    matrix = np.round(np.asarray(transformation_matrix, dtype=np.float64), 9)
+    return hashlib.sha1(matrix.tobytes()).hexdigest()[:16]
+
+
+def file_fingerprint(path: str) -> str:
+    """Fingerprint a source file by size and mtime (cheap, no full read)."""
+    stat = os.stat(path)
+    return hashlib.sha1(
+        f"{stat.st_size}:{stat.st_mtime_ns}".encode()
+    ).hexdigest()[:16]
+
+
+class DXFArtifactCache:
+    """
+    Disk-backed LRU cache of per-file DXF artifacts.
+
+    Features:
+    - gzip-compressed JSON payloads, read via mmap
+    - Keys combine file_id, artifact name and a parameter fingerprint
+    - LRU eviction when total size exceeds ``max_bytes``
+    - Safe to share between processes (atomic renames, no shared index)
+    """
+
+    SUFFIX = ".json.gz"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize cache.
+
+        Args:
+            cache_dir: Directory for cached artifacts (created if missing)
+            max_bytes: Total on-disk budget before LRU eviction kicks in
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # ==================== PUBLIC API ====================
+
+    def path_for(self, file_id: str, artifact: str, fingerprint: str = "") -> str:
+        """Return on-disk path for an artifact entry."""
+        safe_id = "".join(c for c in file_id if c.isalnum() or c in "-_")
+        name = f"{safe_id}.{artifact}"
+        if fingerprint:
+            name += f".{fingerprint}"
+        return os.path.join(self.cache_dir, name + self.SUFFIX)
+
+    def get_bytes(
+        self,
+        file_id: str,
+        artifact: str,
+        fingerprint: str = ""
+    ) -> Optional[bytes]:
+        """
+        Return the raw gzip-compressed payload, or None on miss.
+
+        Suitable for serving directly with ``Content-Encoding: gzip``.
+        """
+        path = self.path_for(file_id, artifact, fingerprint)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return data
+
+    def get(
+        self,
+        file_id: str,
+        artifact: str,
+        fingerprint: str = ""
+    ) -> Optional[Dict]:
+        """Return the decoded artifact, or None on miss."""
+        path = self.path_for(file_id, artifact, fingerprint)
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    self.misses += 1
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # wbits=31 -> gzip container
+                    raw = zlib.decompress(mm, 31)
+            value = json.loads(raw)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, zlib.error, ValueError) as e:
+            # ValueError covers json.JSONDecodeError / bad UTF-8
+            logger.warning(f"[CACHE] Dropping corrupt entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self._touch(path)
+        self.hits += 1
+        return value
+
+    def put(
+        self,
+        file_id: str,
+        artifact: str,
+        value: Dict,
+        fingerprint: str = ""
+    ) -> bytes:
+        """
+        Store an artifact and return its compressed bytes.
+
+        Evicts least-recently-used entries if the budget is exceeded.
+        """
+        payload = json.dumps(
+            value, default=_json_default, separators=(",", ":")
+        ).encode("utf-8")
+        compressed = gzip.compress(payload, compresslevel=6, mtime=0)
+
+        path = self.path_for(file_id, artifact, fingerprint)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            raise
+
+        logger.info(
+            f"[CACHE] Stored {artifact} for {file_id}: "
+            f"{len(payload) / 1024:.1f} KB -> {len(compressed) / 1024:.1f} KB"
+        )
+
+        self.evict()
+        return compressed
+
+    def invalidate(self, file_id: str, artifact: Optional[str] = None):
+        """Remove all entries for a file (optionally a single artifact)."""
+        prefix = "".join(c for c in file_id if c.isalnum() or c in "-_") + "."
+        if artifact:
+            prefix += artifact
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith(self.SUFFIX):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    def evict(self) -> int:
+        """
+        Evict least-recently-used entries until under ``max_bytes``.
+
+        Returns:
+            Number of bytes freed
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return 0
+
+            freed = 0
+            for _, size, path in sorted(entries):
+                if total - freed <= self.max_bytes:
+                    break
+                self._remove(path)
+                freed += size
+
+            logger.info(
+                f"[CACHE] Evicted {freed / 1024:.1f} KB "
+                f"(budget {self.max_bytes / 1024 / 1024:.0f} MB)"
+            )
+            return freed
+
+    def stats(self) -> Dict:
+        """Return cache size and hit/miss counters for this process."""
+        total = 0
+        count = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    total += entry.stat().st_size
+                    count += 1
+                except FileNotFoundError:
+                    continue
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    # ==================== HELPER METHODS ====================
+
+    def _touch(self, path: str):
+        """Mark entry as recently used."""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
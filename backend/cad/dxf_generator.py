@@ -6,12 +6,82 @@ Generates industry-standard DXF files compatible with AutoCAD.
 import ezdxf
 from ezdxf import new
 from ezdxf.addons import geo
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
+import io
 import math
 import os
+import queue
+import threading
 import numpy as np
 from shapely.geometry import Polygon, LineString, Point
 
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Chunks buffered between the DXF writer thread and the response
+STREAM_QUEUE_CHUNKS = 4
+
+
+class _StreamClosed(Exception):
+    """The consumer stopped reading; aborts the writer thread."""
+
+
+class _ChunkQueueWriter(io.RawIOBase):
+    """
+    Write-only file object that hands fixed-size chunks to a bounded queue.
+    
+    ezdxf writes into it from a worker thread while the response iterates
+    the queue, so at most STREAM_QUEUE_CHUNKS chunks are held in memory.
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, chunk_size: int):
+        super().__init__()
+        self.chunk_size = chunk_size
+        self.queue: "queue.Queue" = queue.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+        self.cancelled = threading.Event()
+        self._pending = bytearray()
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._pending += data
+        while len(self._pending) >= self.chunk_size:
+            self._put(bytes(self._pending[:self.chunk_size]))
+            del self._pending[:self.chunk_size]
+        return len(data)
+    
+    def finish(self, error: Optional[BaseException] = None):
+        """Flush the tail and signal the end (or the writer's error)."""
+        if error is None and self._pending:
+            self._put(bytes(self._pending))
+            self._pending.clear()
+        self._put(error if error is not None else self._DONE)
+    
+    def _put(self, item):
+        while True:
+            if self.cancelled.is_set():
+                raise _StreamClosed()
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def chunks(self) -> Iterator[bytes]:
+        """Yield chunks until the writer finishes; re-raise its error."""
+        try:
+            while True:
+                item = self.queue.get()
+                if item is self._DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.cancelled.set()
+
 
 class DXFGenerator:
     """
@@ -43,16 +113,15 @@ class DXFGenerator:
         # Create output directory if not exists
         os.makedirs(output_dir, exist_ok=True)
     
-    def generate(self, layout: Dict, filename: str = None) -> str:
+    def build(self, layout: Dict):
         """
-        Generate DXF from layout.
+        Draw the layout into a new in-memory DXF document.
         
         Args:
             layout: Design layout dictionary
-            filename: Output DXF filename (without path)
             
         Returns:
-            Path to generated DXF file
+            ezdxf Drawing (also kept as self.doc)
         """
         # Create new DXF document
         self.doc = new(dxfversion='R2010')
@@ -87,6 +156,84 @@ class DXFGenerator:
         # 8. Add annotations
         self._add_annotations(layout)
         
+        return self.doc
+    
+    def generate(self, layout: Dict, filename: str = None) -> str:
+        """
+        Generate DXF from layout.
+        
+        Args:
+            layout: Design layout dictionary
+            filename: Output DXF filename (without path)
+            
+        Returns:
+            Path to generated DXF file
+        """
+        self.build(layout)
+        
+        # Full path
+        filepath = os.path.join(self.output_dir, self.default_filename(layout, filename))
+        
+        # Save
+        self.doc.saveas(filepath)
+        
+        return filepath
+    
+    def stream(self, layout: Dict, binary: bool = False,
+               chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Generate DXF from layout and yield it in chunks, without a file on disk.
+        
+        The document is written by a worker thread straight into a chunking
+        file object; chunks are yielded as they fill, so only a few chunks
+        are in memory at a time (no full-file buffer).
+        
+        Args:
+            layout: Design layout dictionary
+            binary: Write binary DXF (smaller, faster to load in AutoCAD)
+            chunk_size: Chunk size in bytes
+            
+        Yields:
+            DXF file content
+        """
+        self.build(layout)
+        doc = self.doc
+        sink = _ChunkQueueWriter(chunk_size)
+        
+        def write():
+            try:
+                if binary:
+                    doc.write(sink, fmt='bin')
+                else:
+                    text = io.TextIOWrapper(
+                        sink,
+                        encoding=doc.output_encoding,
+                        errors='dxfreplace',
+                        newline='',
+                        write_through=True
+                    )
+                    doc.write(text, fmt='asc')
+                    text.flush()
+                    text.detach()
+                sink.finish()
+            except _StreamClosed:
+                pass
+            except Exception as e:
+                try:
+                    sink.finish(e)
+                except _StreamClosed:
+                    pass
+        
+        writer = threading.Thread(target=write, name="dxf-stream", daemon=True)
+        writer.start()
+        try:
+            yield from sink.chunks()
+        finally:
+            writer.join()
+    
+    @staticmethod
+    def default_filename(layout: Dict, filename: str = None) -> str:
+        """Output filename for a layout (``{name}_{variant}.dxf`` by default)."""
         # Generate filename if not provided
         if not filename:
             project_name = layout.get('name', 'industrial_park')
@@ -97,13 +244,7 @@ class DXFGenerator:
         if not filename.endswith('.dxf'):
             filename += '.dxf'
         
-        # Full path
-        filepath = os.path.join(self.output_dir, filename)
-        
-        # Save
-        self.doc.saveas(filepath)
-        
-        return filepath
+        return filename
     
     def _create_layers(self):
         """Create standard layers for the drawing."""
@@ -187,6 +328,9 @@ class DXFGenerator:
         """Draw buildings with color-coding by type."""
         buildings = layout.get('buildings', [])
         
+        # Solid fills are batched into one HATCH per layer/color
+        fills: Dict[Tuple[str, int], List[List[Tuple[float, float]]]] = {}
+        
         for building in buildings:
             btype = building.get('type', 'default')
             color = self.BUILDING_COLORS.get(btype, 256)
@@ -222,13 +366,7 @@ class DXFGenerator:
                 close=True
             )
             
-            # Add solid hatch for fill (optional)
-            hatch = self.msp.add_hatch(
-                color=color,
-                dxfattribs={'layer': layer}
-            )
-            hatch.paths.add_polyline_path(rectangle, is_closed=True)
-            hatch.set_pattern_fill('SOLID')
+            fills.setdefault((layer, color), []).append(rectangle)
             
             # Add building label
             label = building.get('label', building.get('id', 'Building'))
@@ -248,6 +386,15 @@ class DXFGenerator:
                     'style': 'Standard'
                 }
             ).set_placement((label_x, label_y), align=ezdxf.enums.TextEntityAlignment.MIDDLE_CENTER)
+        
+        for (layer, color), rectangles in fills.items():
+            hatch = self.msp.add_hatch(
+                color=color,
+                dxfattribs={'layer': layer}
+            )
+            for rectangle in rectangles:
+                hatch.paths.add_polyline_path(rectangle, is_closed=True)
+            hatch.set_pattern_fill('SOLID')
     
     def _draw_roads(self, layout: Dict):
         """Draw road network."""
@@ -72,6 +72,35 @@ class DXFGeoreferencer:
             f"transformation ready"
         )
     
+    def to_dict(self) -> Dict:
+        """Serialize georeference parameters (for persistence)."""
+        return {
+            "transformation_matrix": (
+                self.transformation_matrix.tolist()
+                if self.transformation_matrix is not None
+                else None
+            ),
+            "control_points": [
+                [list(dxf_pt), list(geo_pt)]
+                for dxf_pt, geo_pt in self.control_points
+            ],
+            "is_georeferenced": self.is_georeferenced
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DXFGeoreferencer":
+        """Restore georeferencer from ``to_dict`` output."""
+        georef = cls()
+        matrix = data.get("transformation_matrix")
+        if matrix is not None:
+            georef.transformation_matrix = np.array(matrix, dtype=float)
+        georef.control_points = [
+            (tuple(dxf_pt), tuple(geo_pt))
+            for dxf_pt, geo_pt in data.get("control_points", [])
+        ]
+        georef.is_georeferenced = bool(data.get("is_georeferenced", False))
+        return georef
+
     def auto_georeference_from_dxf(self, dxf_path: str) -> bool:
         """
         Attempt automatic georeferencing from DXF header.
@@ -0,0 +1,527 @@
+"""
+Vector Tile Generation Module
+
+Cuts georeferenced GeoJSON (DXF overlays, optimization results) into
+Mapbox Vector Tiles (MVT 2.1) so the map only downloads what is visible
+at the current zoom.
+
+Pipeline per tileset:
+1. Project lng/lat to normalized Web Mercator once (vectorized)
+2. Per zoom level: simplify all geometries to ~1 tile pixel and build an
+   STRtree (computed lazily, cached)
+3. Per tile: STRtree query, clip_by_rect, quantize to tile extent and
+   encode protobuf with NumPy varint packing
+
+Pure Python/NumPy + Shapely, no external tile services required.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+logger = logging.getLogger(__name__)
+
+# MVT constants
+EXTENT = 4096
+BUFFER = 64  # tile units around each tile to avoid seams
+MAX_ZOOM = 22
+
+# Web Mercator latitude limit
+_MAX_LAT = 85.0511287798
+
+# Geometry type codes (vector_tile.proto)
+_POINT, _LINESTRING, _POLYGON = 1, 2, 3
+
+# Command ids
+_MOVE_TO, _LINE_TO, _CLOSE_PATH = 1, 2, 7
+
+
+# ==================== PROTOBUF HELPERS ====================
+
+def _varint(value: int) -> bytes:
+    """Encode one non-negative integer as a protobuf varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _encode_varints(values: np.ndarray) -> bytes:
+    """Encode an array of non-negative integers as concatenated varints."""
+    v = np.asarray(values, dtype=np.uint64).ravel()
+    if v.size < 32:
+        # NumPy dispatch overhead dominates for short arrays
+        return b"".join(_varint(int(value)) for value in v)
+
+    out = np.empty((v.size, 10), dtype=np.uint8)
+    lengths = np.ones(v.size, dtype=np.int64)
+    width = 0
+    for i in range(10):
+        byte = (v & np.uint64(0x7F)).astype(np.uint8)
+        v = v >> np.uint64(7)
+        more = v > 0
+        out[:, i] = byte | (more.astype(np.uint8) << 7)
+        lengths += more
+        width = i + 1
+        if not more.any():
+            break
+
+    mask = np.arange(width) < lengths[:, None]
+    return out[:, :width][mask].tobytes()
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Length-delimited field (wire type 2)."""
+    return _varint((number << 3) | 2) + _varint(len(payload)) + payload
+
+
+def _field_varint(number: int, value: int) -> bytes:
+    """Varint field (wire type 0)."""
+    return _varint(number << 3) + _varint(value)
+
+
+def _encode_value(value) -> bytes:
+    """Encode a Tile.Value message."""
+    if isinstance(value, (bool, np.bool_)):
+        return _field_varint(7, int(value))
+    if isinstance(value, (int, np.integer)):
+        value = int(value)
+        return _field_varint(6, (value << 1) ^ (value >> 63))
+    if isinstance(value, (float, np.floating)):
+        return _varint((3 << 3) | 1) + np.float64(value).tobytes()
+    return _field(1, str(value).encode("utf-8"))
+
+
+# ==================== GEOMETRY ENCODING ====================
+
+def _command(cmd_id: int, count: int) -> int:
+    return (cmd_id & 0x7) | (count << 3)
+
+
+def _ring_commands(coords: np.ndarray, cursor: np.ndarray, closed: bool) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Encode one path as MoveTo/LineTo(/ClosePath) integers.
+
+    Returns:
+        (list of uint arrays, new cursor)
+    """
+    if closed:
+        coords = coords[:-1]  # ClosePath implies the repeated vertex
+    deltas = np.diff(np.vstack([cursor, coords]), axis=0)
+    params = _zigzag(deltas).ravel()
+
+    parts = [
+        np.array([_command(_MOVE_TO, 1)], dtype=np.uint64),
+        params[:2],
+        np.array([_command(_LINE_TO, len(coords) - 1)], dtype=np.uint64),
+        params[2:],
+    ]
+    if closed:
+        parts.append(np.array([_command(_CLOSE_PATH, 1)], dtype=np.uint64))
+    return parts, coords[-1]
+
+
+def _dedupe(coords: np.ndarray) -> np.ndarray:
+    """Drop consecutive duplicate vertices after quantization."""
+    if len(coords) < 2:
+        return coords
+    keep = np.ones(len(coords), dtype=bool)
+    keep[1:] = np.any(coords[1:] != coords[:-1], axis=1)
+    return coords[keep]
+
+
+def _signed_area(coords: np.ndarray) -> float:
+    x, y = coords[:, 0], coords[:, 1]
+    return 0.5 * float(np.sum(x[:-1] * y[1:] - x[1:] * y[:-1]))
+
+
+def _encode_geometry(geom) -> Optional[Tuple[int, np.ndarray]]:
+    """
+    Encode a tile-space (already quantized) geometry.
+
+    Returns:
+        (geometry type, command integer array) or None if degenerate
+    """
+    type_id = shapely.get_type_id(geom)
+    cursor = np.zeros(2, dtype=np.int64)
+    parts: List[np.ndarray] = []
+
+    if type_id in (0, 4):  # Point / MultiPoint
+        coords = shapely.get_coordinates(geom).astype(np.int64)
+        if len(coords) == 0:
+            return None
+        deltas = np.diff(np.vstack([cursor, coords]), axis=0)
+        parts = [
+            np.array([_command(_MOVE_TO, len(coords))], dtype=np.uint64),
+            _zigzag(deltas).ravel(),
+        ]
+        return _POINT, np.concatenate(parts)
+
+    if type_id in (1, 2, 5):  # LineString / LinearRing / MultiLineString
+        for line in shapely.get_parts(geom):
+            coords = _dedupe(shapely.get_coordinates(line).astype(np.int64))
+            if len(coords) < 2:
+                continue
+            line_parts, cursor = _ring_commands(coords, cursor, closed=False)
+            parts.extend(line_parts)
+        if not parts:
+            return None
+        return _LINESTRING, np.concatenate(parts)
+
+    if type_id in (3, 6):  # Polygon / MultiPolygon
+        for poly in shapely.get_parts(geom):
+            rings = [shapely.get_exterior_ring(poly)] + [
+                shapely.get_interior_ring(poly, i)
+                for i in range(shapely.get_num_interior_rings(poly))
+            ]
+            for ring_index, ring in enumerate(rings):
+                coords = _dedupe(shapely.get_coordinates(ring).astype(np.int64))
+                if len(coords) < 4:
+                    if ring_index == 0:
+                        break  # Degenerate exterior drops the whole polygon
+                    continue
+                area = _signed_area(coords)
+                if area == 0:
+                    if ring_index == 0:
+                        break
+                    continue
+                # MVT (y-down): exterior positive area, interiors negative
+                if (ring_index == 0) != (area > 0):
+                    coords = coords[::-1]
+                ring_parts, cursor = _ring_commands(coords, cursor, closed=True)
+                parts.extend(ring_parts)
+        if not parts:
+            return None
+        return _POLYGON, np.concatenate(parts)
+
+    if type_id == 7:  # GeometryCollection: encode the first encodable member
+        for member in shapely.get_parts(geom):
+            encoded = _encode_geometry(member)
+            if encoded:
+                return encoded
+    return None
+
+
+# ==================== PROJECTION ====================
+
+def lnglat_to_world(coords: np.ndarray) -> np.ndarray:
+    """Project (lng, lat) to normalized Web Mercator [0, 1]² (y down)."""
+    lng = coords[:, 0]
+    lat = np.clip(coords[:, 1], -_MAX_LAT, _MAX_LAT)
+    x = (lng + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return np.column_stack([x, y])
+
+
+def world_to_lnglat(x: float, y: float) -> Tuple[float, float]:
+    lng = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lng, lat
+
+
+# ==================== TILESET ====================
+
+class VectorTileSet:
+    """
+    Tileable set of GeoJSON features.
+
+    Features:
+    - Per-zoom simplification (~1 tile pixel) computed once per zoom
+    - STRtree tile queries, vectorized clipping
+    - MVT layers split by a feature property (e.g. "type": lot/road/...)
+    """
+
+    def __init__(
+        self,
+        features: List[Dict],
+        default_layer: str = "features",
+        layer_property: Optional[str] = None,
+        min_zoom: int = 0,
+        max_zoom: int = 18,
+        simplify_px: float = 1.0
+    ):
+        """
+        Build tileset from GeoJSON features in lng/lat.
+
+        Args:
+            features: GeoJSON Feature dicts (EPSG:4326)
+            default_layer: MVT layer name when ``layer_property`` is absent
+            layer_property: Property used to split features into MVT layers
+            min_zoom/max_zoom: Zoom range served
+            simplify_px: Simplification tolerance in tile pixels (of 256)
+        """
+        self.min_zoom = min_zoom
+        self.max_zoom = min(max_zoom, MAX_ZOOM)
+        self.simplify_px = simplify_px
+        # Identifies the source data version (set by callers, e.g. DXF
+        # georeference fingerprint) so stale tilesets can be rebuilt
+        self.source_fingerprint: Optional[str] = None
+
+        geoms = []
+        properties = []
+        layers = []
+        for feature in features:
+            geometry = feature.get("geometry")
+            if not geometry:
+                continue
+            try:
+                geom = shape(geometry)
+            except Exception:
+                continue
+            if geom.is_empty:
+                continue
+            props = feature.get("properties") or {}
+            geoms.append(geom)
+            properties.append(props)
+            layer = props.get(layer_property) if layer_property else None
+            layers.append(str(layer) if layer else default_layer)
+
+        geom_array = np.array(geoms, dtype=object)
+        self.lnglat_bounds = (
+            shapely.total_bounds(geom_array).tolist() if geoms else None
+        )
+        self.geometries = (
+            shapely.transform(geom_array, lnglat_to_world)
+            if geoms else geom_array
+        )
+        self.properties = properties
+        self.layers = np.array(layers, dtype=object)
+        self.layer_names = sorted(set(layers))
+
+        self._zoom_cache: Dict[int, Tuple[np.ndarray, np.ndarray, shapely.STRtree]] = {}
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"[TILES] Tileset ready: {len(geoms)} features, "
+            f"layers={self.layer_names}"
+        )
+
+    def _zoom_level(self, z: int) -> Tuple[np.ndarray, np.ndarray, shapely.STRtree]:
+        """Simplified geometries (and their indices) + STRtree for a zoom."""
+        cached = self._zoom_cache.get(z)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            cached = self._zoom_cache.get(z)
+            if cached is not None:
+                return cached
+
+            tolerance = self.simplify_px / (256.0 * 2 ** z)
+            simplified = shapely.simplify(
+                self.geometries, tolerance, preserve_topology=False
+            )
+
+            # Drop features that collapse below one pixel at this zoom
+            xmin, ymin, xmax, ymax = shapely.bounds(simplified).T
+            extent = np.maximum(xmax - xmin, ymax - ymin)
+            keep = ~shapely.is_empty(simplified) & (
+                (extent >= tolerance) |
+                np.isin(shapely.get_type_id(simplified), (0, 4))
+            )
+            indices = np.flatnonzero(keep)
+            kept = simplified[indices]
+            level = (kept, indices, shapely.STRtree(kept))
+            self._zoom_cache[z] = level
+
+            logger.info(
+                f"[TILES] Zoom {z}: kept {len(indices)}/{len(simplified)} features"
+            )
+            return level
+
+    def render(self, z: int, x: int, y: int) -> bytes:
+        """Render tile z/x/y as MVT protobuf bytes (empty bytes if no data)."""
+        if z < self.min_zoom or z > self.max_zoom or len(self.geometries) == 0:
+            return b""
+
+        n = 2 ** z
+        scale = EXTENT * n
+        pad = BUFFER / scale
+        x0, y0 = x / n, y / n
+        x1, y1 = (x + 1) / n, (y + 1) / n
+
+        geoms, indices, tree = self._zoom_level(z)
+        hits = tree.query(shapely.box(x0 - pad, y0 - pad, x1 + pad, y1 + pad))
+        if len(hits) == 0:
+            return b""
+
+        clipped = shapely.clip_by_rect(
+            geoms[hits], x0 - pad, y0 - pad, x1 + pad, y1 + pad
+        )
+        # World -> tile coordinates, quantized
+        tiled = shapely.transform(
+            clipped,
+            lambda c: np.round((c - (x0, y0)) * scale)
+        )
+
+        grouped: Dict[str, List[Tuple[int, Dict, int, np.ndarray]]] = {}
+        for hit, geom in zip(hits, tiled):
+            if geom is None or shapely.is_empty(geom):
+                continue
+            encoded = _encode_geometry(geom)
+            if encoded is None:
+                continue
+            feature_index = int(indices[hit])
+            geom_type, commands = encoded
+            grouped.setdefault(self.layers[feature_index], []).append(
+                (feature_index, self.properties[feature_index], geom_type, commands)
+            )
+
+        return b"".join(
+            _field(3, self._encode_layer(name, features))
+            for name, features in grouped.items()
+        )
+
+    def _encode_layer(self, name: str, features: List[Tuple[int, Dict, int, np.ndarray]]) -> bytes:
+        keys: Dict[str, int] = {}
+        values: Dict[Tuple[type, object], int] = {}
+        value_list: List[object] = []
+        body = [_field(1, name.encode("utf-8"))]
+
+        for feature_id, props, geom_type, commands in features:
+            tags = []
+            for key, value in props.items():
+                if value is None or isinstance(value, (dict, list, tuple)):
+                    continue
+                key_index = keys.setdefault(key, len(keys))
+                value_key = (type(value), value)
+                if value_key not in values:
+                    values[value_key] = len(value_list)
+                    value_list.append(value)
+                tags.extend((key_index, values[value_key]))
+
+            feature = _field_varint(1, feature_id)
+            if tags:
+                feature += _field(2, _encode_varints(np.array(tags)))
+            feature += _field_varint(3, geom_type)
+            feature += _field(4, _encode_varints(commands))
+            body.append(_field(2, feature))
+
+        body.extend(_field(3, key.encode("utf-8")) for key in keys)
+        body.extend(_field(4, _encode_value(value)) for value in value_list)
+        body.append(_field_varint(5, EXTENT))
+        body.append(_field_varint(15, 2))
+        return b"".join(body)
+
+    def tilejson(self, tile_url: str) -> Dict:
+        """TileJSON 3.0 metadata for Mapbox GL sources."""
+        bounds = self.lnglat_bounds or [-180, -_MAX_LAT, 180, _MAX_LAT]
+        return {
+            "tilejson": "3.0.0",
+            "tiles": [tile_url],
+            "minzoom": self.min_zoom,
+            "maxzoom": self.max_zoom,
+            "bounds": bounds,
+            "center": [
+                (bounds[0] + bounds[2]) / 2,
+                (bounds[1] + bounds[3]) / 2,
+                self.min_zoom_for_bounds()
+            ],
+            "vector_layers": [
+                {"id": name, "fields": {}} for name in self.layer_names
+            ]
+        }
+
+    def min_zoom_for_bounds(self) -> int:
+        """Smallest zoom at which the data spans more than one tile pixel width."""
+        if not self.lnglat_bounds:
+            return self.min_zoom
+        world = lnglat_to_world(np.array([
+            self.lnglat_bounds[:2], self.lnglat_bounds[2:]
+        ]))
+        span = float(np.max(np.abs(world[1] - world[0])))
+        if span <= 0:
+            return self.max_zoom
+        return int(np.clip(math.floor(-math.log2(span)), self.min_zoom, self.max_zoom))
+
+
+# ==================== TILE STORE ====================
+
+def content_key(geojson_bytes: bytes) -> str:
+    """Deterministic tileset id for a GeoJSON payload."""
+    return hashlib.sha1(geojson_bytes).hexdigest()[:16]
+
+
+class VectorTileStore:
+    """
+    Registry of tilesets with a byte-bounded LRU cache of rendered tiles.
+
+    Tilesets are kept per file/result id; rendered tiles are cached per
+    (tileset, z, x, y). Evicting a tileset drops its tiles as well.
+    """
+
+    def __init__(self, max_tilesets: int = 32, max_tile_bytes: int = 256 * 1024 * 1024):
+        self.max_tilesets = max_tilesets
+        self.max_tile_bytes = max_tile_bytes
+        self._tilesets: "OrderedDict[str, VectorTileSet]" = OrderedDict()
+        self._tiles: "OrderedDict[Tuple[str, int, int, int], bytes]" = OrderedDict()
+        self._tile_bytes = 0
+        self._lock = threading.Lock()
+
+    def register(self, name: str, tileset: VectorTileSet):
+        with self._lock:
+            self._drop_tiles(name)
+            self._tilesets[name] = tileset
+            self._tilesets.move_to_end(name)
+            while len(self._tilesets) > self.max_tilesets:
+                evicted, _ = self._tilesets.popitem(last=False)
+                self._drop_tiles(evicted)
+                logger.info(f"[TILES] Evicted tileset {evicted}")
+
+    def get(self, name: str) -> Optional[VectorTileSet]:
+        with self._lock:
+            tileset = self._tilesets.get(name)
+            if tileset is not None:
+                self._tilesets.move_to_end(name)
+            return tileset
+
+    def tile(self, name: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """Return cached or freshly rendered tile; None if tileset unknown."""
+        key = (name, z, x, y)
+        with self._lock:
+            data = self._tiles.get(key)
+            if data is not None:
+                self._tiles.move_to_end(key)
+                return data
+
+        tileset = self.get(name)
+        if tileset is None:
+            return None
+        data = tileset.render(z, x, y)
+
+        with self._lock:
+            if name in self._tilesets and key not in self._tiles:
+                self._tiles[key] = data
+                self._tile_bytes += len(data)
+                while self._tile_bytes > self.max_tile_bytes and self._tiles:
+                    _, old = self._tiles.popitem(last=False)
+                    self._tile_bytes -= len(old)
+        return data
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "tilesets": list(self._tilesets.keys()),
+                "cached_tiles": len(self._tiles),
+                "cached_bytes": self._tile_bytes,
+                "max_tile_bytes": self.max_tile_bytes
+            }
+
+    def _drop_tiles(self, name: str):
+        for key in [k for k in self._tiles if k[0] == name]:
+            self._tile_bytes -= len(self._tiles.pop(key))
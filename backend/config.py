@@ -34,7 +34,21 @@ class Settings(BaseSettings):
     
     # Redis
     redis_url: str = "redis://localhost:6379"
-    
+
+    # DXF artifact cache (features / GeoJSON), LRU-evicted by bytes
+    dxf_cache_dir: str = "uploads/cache/dxf"
+    dxf_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Session / project stores: memory://, sqlite:///uploads/sessions.db or redis://...
+    session_store_url: str = "memory://"
+    session_ttl_seconds: int = 7 * 24 * 3600
+    session_store_max_items: int = 1000
+    session_store_max_bytes: int = 256 * 1024 * 1024
+    chat_sessions_max: int = 200  # LLM orchestrators always stay in-process
+
+    # Projects / variants / layout geometry (SQLite, WKB + R-tree)
+    layout_db_path: str = "uploads/layouts.db"
+
     # App
     app_env: str = "development"
     debug: bool = True
@@ -75,6 +89,11 @@ INDUSTRIAL_PARK_REGULATIONS: Dict = {
             "main_road_row_m": (25, 30),
             "double_loaded_roads": True  # Secondary roads
         },
+        "setbacks": {
+            "plot_spacing_m": 12,             # Fire access between plots
+            "boundary_setback_m": 10,         # Green buffer strip
+            "max_frontage_distance_m": 30     # Plot edge to road edge (centreline - width / 2)
+        },
         "infrastructure": {
             "retention_pond": {
                 "ratio_rai": 20,  # 20 rai gross per 1 rai pond
@@ -0,0 +1,573 @@
+"""
+SQLite persistence for projects, design variants and layout geometry.
+
+Runs on the standard library sqlite3 module (no Postgres / SpatiaLite
+needed):
+
+- geometry is stored as WKB and decoded in bulk with shapely.from_wkb
+- one R-tree over (variant, x, y): the variant dimension gives every
+  layout its own partition, so viewport queries only touch one layout
+- variant summaries (scores, compliance, financial, lot statistics) live
+  in their own columns, so listing and comparing variants does not load
+  geometry
+- writes go through a single background writer thread; reads use
+  per-thread connections (WAL mode)
+
+Usage:
+    repo = get_layout_repository()
+    repo.save_variants(project_id, variants)        # returns a Future
+    repo.list_variants(project_id)                  # summaries
+    repo.query_bbox(variant_id, (x0, y0, x1, y1))   # GeoJSON features
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import box, mapping, shape
+from shapely.geometry.base import BaseGeometry
+
+logger = logging.getLogger(__name__)
+
+# Variant keys holding geometry; everything else is summary data
+GEOMETRY_KEYS = ("layout", "lots", "features", "site_boundary")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    key INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    project_id TEXT,
+    name TEXT,
+    summary TEXT NOT NULL,
+    layout TEXT,
+    site_wkb BLOB,
+    site_area REAL,
+    lot_count INTEGER NOT NULL DEFAULT 0,
+    lot_area REAL NOT NULL DEFAULT 0,
+    feature_count INTEGER NOT NULL DEFAULT 0,
+    minx REAL, miny REAL, maxx REAL, maxy REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_variants_project ON variants (project_id, created_at);
+CREATE TABLE IF NOT EXISTS features (
+    id INTEGER PRIMARY KEY,
+    variant_key INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    properties TEXT,
+    area REAL,
+    geom BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_features_variant ON features (variant_key, kind);
+CREATE VIRTUAL TABLE IF NOT EXISTS features_rtree USING rtree (
+    id, min_v, max_v, minx, maxx, miny, maxy
+);
+"""
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, BaseGeometry):
+        return mapping(value)
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+
+def _to_geometry(value) -> Optional[BaseGeometry]:
+    """Shapely geometry from a geometry, GeoJSON geometry or Feature."""
+    if value is None:
+        return None
+    if isinstance(value, BaseGeometry):
+        return value
+    if isinstance(value, dict):
+        if value.get("type") == "Feature":
+            value = value.get("geometry")
+        if value and value.get("coordinates") is not None:
+            return shape(value)
+    return None
+
+
+def extract_features(variant: Dict) -> List[Tuple[str, BaseGeometry, Dict]]:
+    """
+    Collect (kind, geometry, properties) from a variant.
+
+    Understands:
+    - ``lots``: Shapely geometries or GeoJSON (kind "lot")
+    - ``features`` / ``layout.features``: GeoJSON features (kind = properties.type)
+    - ``layout.buildings``: x/y/width/height rectangles (kind "building")
+    """
+    found = []
+
+    for lot in variant.get("lots") or []:
+        geom = _to_geometry(lot)
+        if geom is not None and not geom.is_empty:
+            props = lot.get("properties", {}) if isinstance(lot, dict) else {}
+            found.append(("lot", geom, props))
+
+    layout = variant.get("layout") or {}
+    collections = [variant.get("features"), layout.get("features")]
+    for collection in collections:
+        if isinstance(collection, dict):
+            collection = collection.get("features")
+        for feature in collection or []:
+            geom = _to_geometry(feature)
+            if geom is None or geom.is_empty:
+                continue
+            props = feature.get("properties") or {}
+            found.append((str(props.get("type", "feature")), geom, props))
+
+    for building in layout.get("buildings") or []:
+        try:
+            x, y = float(building["x"]), float(building["y"])
+            w, h = float(building["width"]), float(building["height"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        found.append(("building", box(x, y, x + w, y + h), building))
+
+    return found
+
+
+def _site_geometry(variant: Dict) -> Optional[BaseGeometry]:
+    geom = _to_geometry(variant.get("site_boundary"))
+    if geom is not None:
+        return geom
+    site = (variant.get("layout") or {}).get("site") or {}
+    if site.get("boundary"):
+        try:
+            return shapely.Polygon(site["boundary"])
+        except (TypeError, ValueError):
+            pass
+    if site.get("width") and site.get("height"):
+        return box(0, 0, float(site["width"]), float(site["height"]))
+    return None
+
+
+class LayoutRepository:
+    """Projects, variants and indexed layout geometry in one SQLite file."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="layout-db-writer")
+        self._pending: List[Future] = []
+        self._pending_lock = threading.Lock()
+
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ==================== WRITE PATH ====================
+
+    def _submit(self, fn, *args) -> Future:
+        future = self._writer.submit(self._in_transaction, fn, *args)
+        with self._pending_lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(future)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: Future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"[LAYOUT DB] Write failed: {error}")
+
+    def _in_transaction(self, fn, *args):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait for all queued writes to finish."""
+        with self._pending_lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def save_project(self, project: Dict) -> Future:
+        """Queue an upsert of project metadata (variants are stored separately)."""
+        data = {k: v for k, v in project.items() if k not in ("variants", "chat_history")}
+        return self._submit(self._write_project, data)
+
+    def _write_project(self, conn: sqlite3.Connection, data: Dict):
+        now = time.time()
+        conn.execute(
+            "INSERT INTO projects (id, name, data, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = excluded.name, data = excluded.data, "
+            "updated_at = excluded.updated_at",
+            (data["id"], data.get("name"), _dumps(data), now, now)
+        )
+
+    def save_variants(self, project_id: Optional[str], variants: Sequence[Dict],
+                      replace: bool = True) -> Future:
+        """
+        Queue variants for writing in one transaction.
+
+        Args:
+            project_id: Owning project (None for standalone designs)
+            variants: Variant dicts with an ``id``; geometry is taken from
+                lots / features / layout (see extract_features)
+            replace: Drop the project's previous variants first
+
+        Returns:
+            Future resolving to the number of features written
+        """
+        return self._submit(self._write_variants, project_id, list(variants), replace)
+
+    def _write_variants(self, conn: sqlite3.Connection, project_id, variants, replace) -> int:
+        if replace and project_id is not None:
+            keys = [row[0] for row in conn.execute(
+                "SELECT key FROM variants WHERE project_id = ?", (project_id,)
+            )]
+            self._delete_variant_keys(conn, keys)
+
+        written = 0
+        for variant in variants:
+            written += self._write_variant(conn, project_id, variant)
+
+        logger.info(
+            f"[LAYOUT DB] Stored {len(variants)} variants ({written} features) "
+            f"for project {project_id}"
+        )
+        return written
+
+    def _write_variant(self, conn: sqlite3.Connection, project_id, variant: Dict) -> int:
+        variant_id = str(variant["id"])
+        old = conn.execute("SELECT key FROM variants WHERE id = ?", (variant_id,)).fetchone()
+        if old:
+            self._delete_variant_keys(conn, [old[0]])
+
+        features = extract_features(variant)
+        geoms = np.array([f[1] for f in features], dtype=object)
+        kinds = [f[0] for f in features]
+        areas = shapely.area(geoms) if len(geoms) else np.empty(0)
+        lot_mask = np.array([k == "lot" for k in kinds], dtype=bool)
+
+        site = _site_geometry(variant)
+        if site is not None:
+            extent = site.bounds
+        elif len(geoms):
+            b = shapely.bounds(geoms)
+            extent = (b[:, 0].min(), b[:, 1].min(), b[:, 2].max(), b[:, 3].max())
+        else:
+            extent = (None, None, None, None)
+
+        summary = {k: v for k, v in variant.items() if k not in GEOMETRY_KEYS}
+        layout = variant.get("layout")
+
+        cur = conn.execute(
+            "INSERT INTO variants (id, project_id, name, summary, layout, site_wkb, "
+            "site_area, lot_count, lot_area, feature_count, minx, miny, maxx, maxy, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                variant_id, project_id, variant.get("name"), _dumps(summary),
+                _dumps(layout) if layout is not None else None,
+                shapely.to_wkb(site) if site is not None else None,
+                site.area if site is not None else None,
+                int(lot_mask.sum()), float(areas[lot_mask].sum()) if len(areas) else 0.0,
+                len(features), *extent, time.time()
+            )
+        )
+        variant_key = cur.lastrowid
+        if not features:
+            return 0
+
+        wkbs = shapely.to_wkb(geoms)
+        bounds = shapely.bounds(geoms)
+        first_id = (conn.execute("SELECT COALESCE(MAX(id), 0) FROM features").fetchone()[0]) + 1
+        ids = range(first_id, first_id + len(features))
+
+        conn.executemany(
+            "INSERT INTO features (id, variant_key, kind, properties, area, geom) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (fid, variant_key, kind, _dumps(props), float(area), wkb)
+                for fid, (kind, _, props), area, wkb in zip(ids, features, areas, wkbs)
+            )
+        )
+        conn.executemany(
+            "INSERT INTO features_rtree VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (fid, variant_key, variant_key, b[0], b[2], b[1], b[3])
+                for fid, b in zip(ids, bounds.tolist())
+            )
+        )
+        return len(features)
+
+    @staticmethod
+    def _delete_variant_keys(conn: sqlite3.Connection, keys: Iterable[int]):
+        for key in keys:
+            conn.execute(
+                "DELETE FROM features_rtree WHERE id IN "
+                "(SELECT id FROM features WHERE variant_key = ?)", (key,)
+            )
+            conn.execute("DELETE FROM features WHERE variant_key = ?", (key,))
+            conn.execute("DELETE FROM variants WHERE key = ?", (key,))
+
+    def delete_variant(self, variant_id: str) -> Future:
+        """Queue removal of a variant and its geometry."""
+        def _delete(conn, variant_id):
+            row = conn.execute("SELECT key FROM variants WHERE id = ?", (variant_id,)).fetchone()
+            if row:
+                self._delete_variant_keys(conn, [row[0]])
+            return bool(row)
+        return self._submit(_delete, variant_id)
+
+    # ==================== READ PATH ====================
+
+    def project_exists(self, project_id: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM projects WHERE id = ? UNION ALL "
+            "SELECT 1 FROM variants WHERE project_id = ? LIMIT 1",
+            (project_id, project_id)
+        ).fetchone()
+        return row is not None
+
+    def get_project(self, project_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT data FROM projects WHERE id = ?", (project_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _summary(row) -> Dict:
+        summary = json.loads(row[0])
+        summary.update({
+            "id": row[1],
+            "name": row[2],
+            "lot_count": row[3],
+            "lot_area_m2": row[4],
+            "site_area_m2": row[5],
+            "feature_count": row[6],
+            "bounds": None if row[7] is None else list(row[7:11]),
+        })
+        return summary
+
+    _SUMMARY_COLUMNS = (
+        "summary, id, name, lot_count, lot_area, site_area, feature_count, "
+        "minx, miny, maxx, maxy"
+    )
+
+    def list_variants(self, project_id: str, include_layout: bool = False) -> List[Dict]:
+        """
+        Variants of a project in creation order.
+
+        Summaries come from indexed columns only; ``include_layout`` adds the
+        stored layout JSON (no geometry decoding either way).
+        """
+        columns = self._SUMMARY_COLUMNS + (", layout" if include_layout else "")
+        rows = self._conn().execute(
+            f"SELECT {columns} FROM variants WHERE project_id = ? ORDER BY created_at, key",
+            (project_id,)
+        ).fetchall()
+
+        variants = []
+        for row in rows:
+            variant = self._summary(row)
+            if include_layout:
+                variant["layout"] = json.loads(row[11]) if row[11] else None
+            variants.append(variant)
+        return variants
+
+    def get_variant(self, variant_id: str, include_layout: bool = True) -> Optional[Dict]:
+        columns = self._SUMMARY_COLUMNS + ", layout"
+        row = self._conn().execute(
+            f"SELECT {columns} FROM variants WHERE id = ?", (variant_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        variant = self._summary(row)
+        if include_layout:
+            variant["layout"] = json.loads(row[11]) if row[11] else None
+        return variant
+
+    def load_designs(self, variant_ids: Sequence[str]) -> Dict[str, Dict]:
+        """
+        Variants in DesignScorer format (``site_boundary`` and ``lots`` as
+        Shapely geometries), fetched with one indexed query per table.
+
+        Lots fall back to building footprints for layouts without lots, and
+        the site boundary to the lots' envelope when none was stored.
+
+        Returns:
+            variant_id -> design (missing ids are omitted)
+        """
+        if not variant_ids:
+            return {}
+        conn = self._conn()
+        marks = ",".join("?" * len(variant_ids))
+        rows = conn.execute(
+            f"SELECT key, id, name, summary, site_wkb FROM variants WHERE id IN ({marks})",
+            list(variant_ids)
+        ).fetchall()
+        if not rows:
+            return {}
+
+        keys = [row[0] for row in rows]
+        key_marks = ",".join("?" * len(keys))
+        feature_rows = conn.execute(
+            f"SELECT variant_key, kind, geom FROM features "
+            f"WHERE variant_key IN ({key_marks}) AND kind IN ('lot', 'building') "
+            f"ORDER BY id",
+            keys
+        ).fetchall()
+
+        geoms = shapely.from_wkb([r[2] for r in feature_rows]) if feature_rows else []
+        by_key: Dict[int, Dict[str, list]] = {}
+        for (key, kind, _), geom in zip(feature_rows, geoms):
+            by_key.setdefault(key, {}).setdefault(kind, []).append(geom)
+
+        designs = {}
+        for key, variant_id, name, summary, site_wkb in rows:
+            design = json.loads(summary)
+            parts = by_key.get(key, {})
+            lots = parts.get("lot") or parts.get("building") or []
+            if site_wkb:
+                site = shapely.from_wkb(site_wkb)
+            elif lots:
+                site = box(*shapely.total_bounds(lots))
+            else:
+                site = None
+            design.update({
+                "id": variant_id,
+                "name": name or design.get("name") or f"Design {variant_id}",
+                "site_boundary": site,
+                "lots": lots,
+            })
+            designs[variant_id] = design
+        return designs
+
+    def load_design(self, variant_id: str) -> Optional[Dict]:
+        return self.load_designs([variant_id]).get(variant_id)
+
+    def query_bbox(self, variant_id: str, bbox: Tuple[float, float, float, float],
+                   kind: Optional[str] = None, limit: int = 5000) -> List[Dict]:
+        """
+        Features of one variant intersecting a viewport.
+
+        The R-tree narrows candidates by bounding box (float32, conservative),
+        then geometries are tested exactly.
+
+        Args:
+            variant_id: Variant id
+            bbox: (minx, miny, maxx, maxy) in layout coordinates
+            kind: Optional feature kind filter (e.g. "lot")
+            limit: Maximum number of features returned
+
+        Returns:
+            GeoJSON Feature dicts
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT key FROM variants WHERE id = ?", (variant_id,)).fetchone()
+        if row is None:
+            return []
+        key = row[0]
+        minx, miny, maxx, maxy = bbox
+
+        sql = (
+            "SELECT f.id, f.kind, f.properties, f.area, f.geom "
+            "FROM features_rtree r JOIN features f ON f.id = r.id "
+            "WHERE r.min_v <= ? AND r.max_v >= ? "
+            "AND r.minx <= ? AND r.maxx >= ? AND r.miny <= ? AND r.maxy >= ?"
+        )
+        params: List[Any] = [key, key, maxx, minx, maxy, miny]
+        if kind:
+            sql += " AND f.kind = ?"
+            params.append(kind)
+        rows = conn.execute(sql, params).fetchall()
+        if not rows:
+            return []
+
+        geoms = shapely.from_wkb([r[4] for r in rows])
+        hits = np.flatnonzero(shapely.intersects(geoms, box(minx, miny, maxx, maxy)))[:limit]
+
+        features = []
+        for i in hits:
+            fid, feature_kind, props, area, _ = rows[i]
+            properties = json.loads(props) if props else {}
+            properties.setdefault("type", feature_kind)
+            properties["area_m2"] = area
+            features.append({
+                "type": "Feature",
+                "id": fid,
+                "geometry": mapping(geoms[i]),
+                "properties": properties
+            })
+        return features
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("projects", "variants", "features")
+        }
+        with self._pending_lock:
+            pending = sum(1 for f in self._pending if not f.done())
+        counts.update({
+            "path": self.path,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "pending_writes": pending
+        })
+        return counts
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+
+
+# ==================== SHARED INSTANCE ====================
+
+_repository: Optional[LayoutRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_layout_repository() -> LayoutRepository:
+    """Process-wide repository at settings.layout_db_path."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                from config import settings
+                _repository = LayoutRepository(settings.layout_db_path)
+    return _repository
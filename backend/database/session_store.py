@@ -0,0 +1,44 @@
+"""
+Bounded session / project stores.
+
+The implementation lives in docker/utils/session_store.py, which the land
+redistribution service ships standalone; it is loaded here by path (the
+service's top-level "utils" / "api" packages are not importable from this
+backend) and re-exported unchanged.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+_SOURCE = Path(__file__).resolve().parent.parent / "docker" / "utils" / "session_store.py"
+_MODULE_NAME = "redistribution_session_store"
+
+
+def _load():
+    module = sys.modules.get(_MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(_MODULE_NAME, _SOURCE)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[_MODULE_NAME] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+_impl = _load()
+
+estimate_size = _impl.estimate_size
+SessionStore = _impl.SessionStore
+MemorySessionStore = _impl.MemorySessionStore
+SQLiteSessionStore = _impl.SQLiteSessionStore
+RedisSessionStore = _impl.RedisSessionStore
+create_session_store = _impl.create_session_store
+
+__all__ = [
+    "estimate_size",
+    "SessionStore",
+    "MemorySessionStore",
+    "SQLiteSessionStore",
+    "RedisSessionStore",
+    "create_session_store",
+]
@@ -16,12 +16,71 @@ import numpy as np
 import re
 import logging
 from typing import List, Dict, Tuple, Optional
+import shapely
 from shapely.geometry import Polygon, LineString, Point
-from scipy.interpolate import griddata
 from pathlib import Path
 
+from optimization.elevation_interpolation import interpolate_grid, split_points
+from optimization.elevation_raster import Affine, ElevationRaster
+
 logger = logging.getLogger(__name__)
 
+# Entity types read by the extraction pass
+_TOPOGRAPHY_TYPES = frozenset({'LWPOLYLINE', 'POLYLINE', 'POINT', 'TEXT', 'MTEXT'})
+
+_NUMBER_RE = re.compile(r'\d+\.?\d*')
+
+
+class _PointBuffer:
+    """Growable (N, 3) float64 buffer (capacity doubles when full)."""
+    
+    def __init__(self, capacity: int = 1024):
+        self._data = np.empty((capacity, 3))
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data)), 3))
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+    
+    def append(self, x: float, y: float, z: float):
+        self._reserve(1)
+        self._data[self._size] = (x, y, z)
+        self._size += 1
+    
+    def extend(self, xyz: np.ndarray):
+        self._reserve(len(xyz))
+        self._data[self._size:self._size + len(xyz)] = xyz
+        self._size += len(xyz)
+    
+    def array(self) -> np.ndarray:
+        return self._data[:self._size]
+
+
+def _polyline_xyz(entity) -> np.ndarray:
+    """
+    (N, 3) vertices of an LWPOLYLINE / POLYLINE.
+    
+    LWPOLYLINE vertices are 2D with one elevation for the whole entity;
+    POLYLINE vertices carry their own Z (3D) or share the entity elevation (2D).
+    """
+    if entity.dxftype() == 'LWPOLYLINE':
+        xy = np.asarray(entity.get_points('xy'), dtype=np.float64).reshape(-1, 2)
+        xyz = np.empty((len(xy), 3))
+        xyz[:, :2] = xy
+        xyz[:, 2] = entity.dxf.get('elevation', 0.0)
+        return xyz
+    
+    xyz = np.asarray([tuple(p) for p in entity.points()], dtype=np.float64).reshape(-1, 3)
+    if not entity.is_3d_polyline:
+        xyz[:, 2] = entity.dxf.get('elevation', (0.0, 0.0, 0.0))[2]
+    return xyz
+
 
 class DWGTopographyExtractor:
     """Extract topography data from DWG/DXF files"""
@@ -37,7 +96,7 @@ class DWGTopographyExtractor:
         'SURVEY_POINTS', 'SURVEY POINTS', 'SPOT_ELEV'
     ]
     
-    # Regex patterns for elevation text parsing
+    # Regex patterns for elevation text parsing (in priority order)
     ELEVATION_TEXT_PATTERNS = [
         r'RL\s*[:\-]?\s*(\d+\.?\d*)',      # RL 105.5, RL:105.5
         r'EL\.?\s*(\d+\.?\d*)',             # EL.105.5, EL 105.5
@@ -59,16 +118,20 @@ class DWGTopographyExtractor:
         """
         Extract all topography data from DWG/DXF file
         
+        The modelspace is walked once; every entity is dispatched by type
+        and layer (layer classification / elevation cached per layer name)
+        and points go straight into NumPy buffers.
+        
         Args:
             file_path: Path to DWG or DXF file
             
         Returns:
             Dictionary containing:
-                - elevation_points: List[(x, y, z)]
+                - elevation_points: (N, 3) float64 array of (x, y, z)
                 - contour_lines: List[{'elevation': float, 'geometry': LineString}]
-                - existing_features: Dict with water, buildings, roads, vegetation
                 - elevation_range: Tuple(min_elev, max_elev)
                 - point_count: int
+                - contour_count: int
         """
         logger.info(f"Extracting topography from: {file_path}")
         
@@ -81,39 +144,28 @@ class DWGTopographyExtractor:
             
         msp = self.doc.modelspace()
         
-        # Extract different types of elevation data
-        elevation_points = []
-        contour_lines = []
-        
-        # 1. Extract contour lines
-        contours = self._extract_contour_lines(msp)
-        contour_lines.extend(contours)
-        logger.info(f"Extracted {len(contours)} contour lines")
-        
-        # 2. Extract 3D polylines
-        polyline_points = self._extract_3d_polylines(msp)
-        elevation_points.extend(polyline_points)
-        logger.info(f"Extracted {len(polyline_points)} points from 3D polylines")
-        
-        # 3. Extract elevation points
-        point_entities = self._extract_elevation_points(msp)
-        elevation_points.extend(point_entities)
-        logger.info(f"Extracted {len(point_entities)} elevation point entities")
-        
-        # 4. Parse elevation text annotations
-        text_points = self._parse_elevation_text(msp)
-        elevation_points.extend(text_points)
-        logger.info(f"Extracted {len(text_points)} points from text annotations")
+        # 1-4. Contours, 3D polylines, point entities and text in one pass
+        scan = self._scan_modelspace(msp)
+        contour_lines = scan['contour_lines']
+        logger.info(f"Extracted {len(contour_lines)} contour lines")
+        logger.info(f"Extracted {len(scan['polyline_points'])} points from 3D polylines")
+        logger.info(f"Extracted {len(scan['point_entities'])} elevation point entities")
+        logger.info(f"Extracted {len(scan['text_points'])} points from text annotations")
         
         # 5. Extract points from contour lines for grid interpolation
         contour_points = self._sample_points_from_contours(contour_lines)
-        elevation_points.extend(contour_points)
         logger.info(f"Sampled {len(contour_points)} points from contours")
         
+        elevation_points = np.concatenate([
+            scan['polyline_points'],
+            scan['point_entities'],
+            scan['text_points'],
+            contour_points
+        ])
+        
         # Calculate elevation range
-        if elevation_points:
-            elevations = [p[2] for p in elevation_points]
-            elevation_range = (min(elevations), max(elevations))
+        if len(elevation_points):
+            elevation_range = (float(elevation_points[:, 2].min()), float(elevation_points[:, 2].max()))
         else:
             elevation_range = (0.0, 0.0)
             logger.warning("No elevation data found!")
@@ -131,146 +183,83 @@ class DWGTopographyExtractor:
         
         return result
     
-    def _extract_contour_lines(self, msp) -> List[Dict]:
+    def _scan_modelspace(self, msp) -> Dict:
         """
-        Extract contour lines from DXF
+        Single pass over the modelspace
         
         Returns:
-            List of dicts with 'elevation' and 'geometry' (LineString)
+            Dict with 'contour_lines' (list of contour dicts) and
+            'polyline_points', 'point_entities', 'text_points' ((N, 3) arrays)
         """
         contours = []
+        polyline_points = _PointBuffer()
+        point_entities = _PointBuffer()
+        text_points = _PointBuffer()
+        layers: Dict[str, Tuple[bool, bool, Optional[float]]] = {}
         
         for entity in msp:
-            # Check if entity is on a contour layer
-            layer_name = entity.dxf.layer.upper()
+            dxftype = entity.dxftype()
+            if dxftype not in _TOPOGRAPHY_TYPES:
+                continue
             
-            is_contour_layer = any(
-                pattern in layer_name 
-                for pattern in self.CONTOUR_LAYERS
-            )
+            layer_name = entity.dxf.layer
+            layer = layers.get(layer_name)
+            if layer is None:
+                layer = layers[layer_name] = self._classify_layer(layer_name)
+            is_contour_layer, is_elevation_layer, layer_elevation = layer
             
-            if not is_contour_layer:
-                continue
-                
-            # Extract polylines
-            if entity.dxftype() in ['LWPOLYLINE', 'POLYLINE']:
-                try:
-                    points = list(entity.get_points())
-                    if len(points) < 2:
+            try:
+                if dxftype in ('LWPOLYLINE', 'POLYLINE'):
+                    xyz = _polyline_xyz(entity)
+                    if len(xyz) == 0:
                         continue
                     
-                    # Convert to 2D coordinates
-                    coords_2d = [(p[0], p[1]) for p in points]
-                    
-                    # Try to extract elevation from layer name
-                    elevation = self._parse_elevation_from_layer(layer_name)
-                    
-                    # If no elevation in layer name, try to get from Z-coordinate
-                    if elevation is None and len(points[0]) > 2:
-                        # Use average Z of all points
-                        z_values = [p[2] for p in points if len(p) > 2]
-                        if z_values:
-                            elevation = np.mean(z_values)
-                    
-                    if elevation is not None:
-                        contours.append({
-                            'elevation': elevation,
-                            'geometry': LineString(coords_2d)
-                        })
-                        
-                except Exception as e:
-                    logger.debug(f"Failed to extract contour: {e}")
-                    continue
-        
-        return contours
-    
-    def _extract_3d_polylines(self, msp) -> List[Tuple[float, float, float]]:
-        """
-        Extract elevation points from 3D polylines
-        
-        Returns:
-            List of (x, y, z) tuples
-        """
-        points_3d = []
-        
-        for entity in msp:
-            if entity.dxftype() in ['LWPOLYLINE', 'POLYLINE']:
-                try:
-                    points = list(entity.get_points())
-                    
-                    for point in points:
-                        # Check if point has Z-coordinate
-                        if len(point) > 2 and point[2] != 0:
-                            points_3d.append((point[0], point[1], point[2]))
-                            
-                except Exception as e:
-                    logger.debug(f"Failed to extract 3D polyline: {e}")
-                    continue
-        
-        return points_3d
-    
-    def _extract_elevation_points(self, msp) -> List[Tuple[float, float, float]]:
-        """
-        Extract POINT entities with elevation
-        
-        Returns:
-            List of (x, y, z) tuples
-        """
-        elevation_points = []
-        
-        for entity in msp:
-            # Check if on elevation point layer
-            layer_name = entity.dxf.layer.upper()
-            
-            is_elevation_layer = any(
-                pattern in layer_name 
-                for pattern in self.ELEVATION_POINT_LAYERS
-            )
-            
-            if entity.dxftype() == 'POINT':
-                try:
-                    location = entity.dxf.location
+                    # 3D polylines: vertices with a Z-coordinate
+                    polyline_points.extend(xyz[xyz[:, 2] != 0])
                     
+                    if is_contour_layer and len(xyz) >= 2:
+                        # Elevation from the layer name, else the average Z
+                        elevation = layer_elevation
+                        if elevation is None and np.any(xyz[:, 2] != 0):
+                            elevation = float(xyz[:, 2].mean())
+                        if elevation is not None:
+                            contours.append({
+                                'elevation': elevation,
+                                'geometry': LineString(xyz[:, :2])
+                            })
+                
+                elif dxftype == 'POINT':
+                    x, y, z = entity.dxf.location
                     # Only include if has Z-coordinate or on elevation layer
-                    if len(location) > 2 and (location[2] != 0 or is_elevation_layer):
-                        z = location[2] if len(location) > 2 else 0
-                        elevation_points.append((location[0], location[1], z))
-                        
-                except Exception as e:
-                    logger.debug(f"Failed to extract point: {e}")
-                    continue
-        
-        return elevation_points
-    
-    def _parse_elevation_text(self, msp) -> List[Tuple[float, float, float]]:
-        """
-        Parse elevation values from text annotations
-        
-        Returns:
-            List of (x, y, z) tuples
-        """
-        text_elevations = []
-        
-        for entity in msp:
-            if entity.dxftype() in ['TEXT', 'MTEXT']:
-                try:
-                    # Get text content
-                    text = entity.dxf.text if entity.dxftype() == 'TEXT' else entity.text
-                    text = text.strip()
-                    
-                    # Try to parse elevation from text
-                    elevation = self._parse_elevation_from_text(text)
-                    
+                    if z != 0 or is_elevation_layer:
+                        point_entities.append(x, y, z)
+                
+                else:
+                    # TEXT / MTEXT elevation annotations
+                    text = entity.dxf.text if dxftype == 'TEXT' else entity.text
+                    elevation = self._parse_elevation_from_text(text.strip())
                     if elevation is not None:
-                        # Get text insertion point
                         insert = entity.dxf.insert
-                        text_elevations.append((insert[0], insert[1], elevation))
+                        text_points.append(insert[0], insert[1], elevation)
                         
-                except Exception as e:
-                    logger.debug(f"Failed to parse text elevation: {e}")
-                    continue
+            except Exception as e:
+                logger.debug(f"Failed to extract {dxftype} on layer {layer_name}: {e}")
+                continue
         
-        return text_elevations
+        return {
+            'contour_lines': contours,
+            'polyline_points': polyline_points.array(),
+            'point_entities': point_entities.array(),
+            'text_points': text_points.array()
+        }
+    
+    def _classify_layer(self, layer_name: str) -> Tuple[bool, bool, Optional[float]]:
+        """(is contour layer, is elevation point layer, elevation in the name)"""
+        upper = layer_name.upper()
+        is_contour = any(pattern in upper for pattern in self.CONTOUR_LAYERS)
+        is_elevation = any(pattern in upper for pattern in self.ELEVATION_POINT_LAYERS)
+        elevation = self._parse_elevation_from_layer(upper) if is_contour else None
+        return is_contour, is_elevation, elevation
     
     def _parse_elevation_from_layer(self, layer_name: str) -> Optional[float]:
         """
@@ -282,7 +271,7 @@ class DWGTopographyExtractor:
             "C-ELEV-110.25" -> 110.25
         """
         # Try to find numbers in layer name
-        numbers = re.findall(r'\d+\.?\d*', layer_name)
+        numbers = _NUMBER_RE.findall(layer_name)
         
         if numbers:
             try:
@@ -302,13 +291,12 @@ class DWGTopographyExtractor:
             "EL.100.0" -> 100.0
             "105.5m" -> 105.5
         """
-        for pattern in self.ELEVATION_TEXT_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1))
-                except (ValueError, IndexError):
-                    continue
+        match = _ELEVATION_TEXT_RE.match(text)
+        if match:
+            try:
+                return float(match.group(match.lastindex))
+            except (ValueError, IndexError, TypeError):
+                pass
         
         return None
     
@@ -316,47 +304,54 @@ class DWGTopographyExtractor:
         self, 
         contour_lines: List[Dict], 
         sample_distance: float = 20.0
-    ) -> List[Tuple[float, float, float]]:
+    ) -> np.ndarray:
         """
         Sample elevation points along contour lines
         
+        All contours are sampled in one shapely.line_interpolate_point call.
+        
         Args:
             contour_lines: List of contour dicts
             sample_distance: Distance between samples in meters
             
         Returns:
-            List of (x, y, z) tuples
+            (N, 3) array of (x, y, z)
         """
-        sampled_points = []
-        
-        for contour in contour_lines:
-            elevation = contour['elevation']
-            line = contour['geometry']
-            
-            # Sample points along the line
-            line_length = line.length
-            num_samples = max(2, int(line_length / sample_distance))
-            
-            for i in range(num_samples):
-                # Interpolate point along line
-                distance = (i / (num_samples - 1)) * line_length
-                point = line.interpolate(distance)
-                
-                sampled_points.append((point.x, point.y, elevation))
-        
-        return sampled_points
+        if not contour_lines:
+            return np.empty((0, 3))
+        
+        lines = np.array([c['geometry'] for c in contour_lines], dtype=object)
+        elevations = np.array([c['elevation'] for c in contour_lines], dtype=np.float64)
+        lengths = shapely.length(lines)
+        counts = np.maximum(2, (lengths / sample_distance).astype(np.int64))
+        
+        # Flat (contour, sample) layout
+        line_idx = np.repeat(np.arange(len(lines)), counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        local = np.arange(counts.sum()) - np.repeat(starts, counts)
+        distances = local / (counts - 1)[line_idx] * lengths[line_idx]
+        
+        sampled = np.empty((len(line_idx), 3))
+        sampled[:, :2] = shapely.get_coordinates(shapely.line_interpolate_point(lines[line_idx], distances))
+        sampled[:, 2] = elevations[line_idx]
+        return sampled
     
     def create_elevation_grid(
         self, 
-        elevation_points: List[Tuple[float, float, float]],
-        boundary: Polygon
+        elevation_points,
+        boundary: Polygon,
+        method: str = 'linear',
+        fill: Optional[str] = 'nearest'
     ) -> Dict:
         """
         Create interpolated elevation grid from sparse points
         
         Args:
-            elevation_points: List of (x, y, z) tuples
+            elevation_points: (N, 3) array or list of (x, y, z) tuples
             boundary: Site boundary polygon
+            method: 'linear', 'cubic', 'nearest' or 'idw'
+            fill: Fill for cells outside the data hull
+                ('nearest', 'idw', 'mean' or None to keep NaN)
             
         Returns:
             Dict with:
@@ -364,8 +359,10 @@ class DWGTopographyExtractor:
                 - x_coords: 1D array of x coordinates
                 - y_coords: 1D array of y coordinates
                 - resolution: grid resolution in meters
+                - raster: ElevationRaster over the same float32 grid
+                  (memory-mapped for large sites)
         """
-        if not elevation_points:
+        if elevation_points is None or len(elevation_points) == 0:
             logger.warning("No elevation points to create grid")
             return None
         
@@ -376,46 +373,27 @@ class DWGTopographyExtractor:
         x_coords = np.arange(minx, maxx, self.grid_resolution)
         y_coords = np.arange(miny, maxy, self.grid_resolution)
         
-        grid_x, grid_y = np.meshgrid(x_coords, y_coords)
-        
         # Extract point coordinates and elevations
-        points_xy = np.array([(p[0], p[1]) for p in elevation_points])
-        elevations = np.array([p[2] for p in elevation_points])
+        points_xy, elevations = split_points(elevation_points)
         
-        # Interpolate elevation grid
+        # Interpolate elevation grid (one cached triangulation, KD-tree fill
+        # for cells outside the hull, evaluated in row tiles)
         logger.info(f"Interpolating elevation grid: {len(x_coords)}x{len(y_coords)} cells")
         
+        raster = ElevationRaster.empty(
+            (len(y_coords), len(x_coords)),
+            Affine.from_origin(minx, miny, self.grid_resolution)
+        )
         try:
-            grid_z = griddata(
-                points_xy, 
-                elevations, 
-                (grid_x, grid_y), 
-                method='linear',
-                fill_value=np.nan
+            interpolate_grid(
+                points_xy, elevations, x_coords, y_coords,
+                method=method, fill=fill, out=raster.data
             )
-            
-            # Fill NaN values with nearest neighbor
-            mask = np.isnan(grid_z)
-            if mask.any():
-                grid_z_nearest = griddata(
-                    points_xy, 
-                    elevations, 
-                    (grid_x, grid_y), 
-                    method='nearest'
-                )
-                grid_z[mask] = grid_z_nearest[mask]
-            
         except Exception as e:
             logger.error(f"Grid interpolation failed: {e}")
             raise
         
-        return {
-            'grid': grid_z,
-            'x_coords': x_coords,
-            'y_coords': y_coords,
-            'resolution': self.grid_resolution,
-            'shape': grid_z.shape
-        }
+        return raster.to_grid_dict()
     
     def calculate_slope_map(self, elevation_grid: np.ndarray) -> np.ndarray:
         """
@@ -471,12 +449,15 @@ class DWGTopographyExtractor:
             Dict with slope_map, buildable_areas, statistics
         """
         grid = elevation_grid_data['grid']
+        raster = elevation_grid_data.get('raster')
         
-        # Calculate slope
-        slope_map = self.calculate_slope_map(grid)
-        
-        # Identify buildable areas
-        buildable_areas = self.identify_buildable_areas(slope_map)
+        if raster is not None:
+            # Cached on the raster, shared with zone windows
+            slope_map = raster.slope()
+            buildable_areas = raster.buildable_mask()
+        else:
+            slope_map = self.calculate_slope_map(grid)
+            buildable_areas = self.identify_buildable_areas(slope_map)
         
         # Calculate statistics
         metrics = {
@@ -497,6 +478,18 @@ class DWGTopographyExtractor:
         return metrics
 
 
+# All text patterns in one regex matched at the start of the text: every
+# alternative scans ahead by itself, so the first pattern (in list order)
+# that occurs anywhere wins, as when searching the patterns one by one
+_ELEVATION_TEXT_RE = re.compile(
+    '|'.join(
+        f"(?:{pattern[1:]})" if pattern.startswith('^') else f"(?:.*?{pattern})"
+        for pattern in DWGTopographyExtractor.ELEVATION_TEXT_PATTERNS
+    ),
+    re.IGNORECASE | re.DOTALL
+)
+
+
 # Convenience function
 def extract_topography(
     file_path: str, 
@@ -520,7 +513,7 @@ def extract_topography(
     topo_data = extractor.extract_from_file(file_path)
     
     # Create elevation grid
-    if topo_data['elevation_points']:
+    if len(topo_data['elevation_points']):
         grid_data = extractor.create_elevation_grid(
             topo_data['elevation_points'],
             boundary
@@ -16,8 +16,16 @@ from shapely.geometry import Polygon, LineString, Point, box
 from shapely.ops import unary_union
 import math
 
+from optimization.elevation_raster import ElevationRaster
+from optimization.zonal_stats import zonal_statistics, grading_cost
+from optimization.road_profile import profile_roads
+from optimization.mass_haul import plot_nodes, solve_mass_haul
+
 logger = logging.getLogger(__name__)
 
+MAX_ROAD_GRADE = 8.0  # percent
+BORROW_DISTANCE_KM = 1.0  # haul to / from off-site borrow or disposal
+
 
 class FastLayoutGenerator:
     """Generate terrain-aware layout optimized for speed"""
@@ -155,19 +163,10 @@ class FastLayoutGenerator:
             (mid_x, maxy - 20)
         ])
         
-        # Calculate grades if terrain available
-        if terrain_data:
-            grade_h = self._calculate_road_grade(main_road_h, terrain_data)
-            grade_v = self._calculate_road_grade(main_road_v, terrain_data)
-        else:
-            grade_h = 0.0
-            grade_v = 0.0
-        
         roads.append({
             'geometry': main_road_h,
             'type': 'main',
             'width': main_width,
-            'grade': grade_h,
             'length': main_road_h.length
         })
         
@@ -175,7 +174,6 @@ class FastLayoutGenerator:
             'geometry': main_road_v,
             'type': 'main',
             'width': main_width,
-            'grade': grade_v,
             'length': main_road_v.length
         })
         
@@ -191,13 +189,10 @@ class FastLayoutGenerator:
                 (x, maxy - 20)
             ])
             
-            grade = self._calculate_road_grade(sec_road, terrain_data) if terrain_data else 0.0
-            
             roads.append({
                 'geometry': sec_road,
                 'type': 'secondary',
                 'width': sec_width,
-                'grade': grade,
                 'length': sec_road.length
             })
         
@@ -209,66 +204,48 @@ class FastLayoutGenerator:
                 (maxx - 20, y)
             ])
             
-            grade = self._calculate_road_grade(sec_road, terrain_data) if terrain_data else 0.0
-            
             roads.append({
                 'geometry': sec_road,
                 'type': 'secondary',
                 'width': sec_width,
-                'grade': grade,
                 'length': sec_road.length
             })
         
+        # Grades and earthwork for all roads in one profiling pass
+        self._apply_road_profiles(roads, terrain_data)
+        
         return roads
     
-    def _calculate_road_grade(
+    def _apply_road_profiles(
         self,
-        road: LineString,
-        terrain_data: Dict
-    ) -> float:
+        roads: List[Dict],
+        terrain_data: Optional[Dict]
+    ) -> None:
         """
-        Calculate average grade along road
+        Profile roads along their whole length and attach grades
+        
+        Sets 'grade' (length-weighted mean), 'max_grade' and the cut/fill
+        needed to keep each road within MAX_ROAD_GRADE.
         
         Args:
-            road: Road LineString
+            roads: Road dicts with geometry and width (updated in place)
             terrain_data: Terrain data with elevation grid
-            
-        Returns:
-            Average grade as percentage
         """
         if not terrain_data or 'elevation_grid' not in terrain_data:
-            return 0.0
-        
-        grid = terrain_data['elevation_grid']
-        x_coords = terrain_data['x_coords']
-        y_coords = terrain_data['y_coords']
-        
-        # Sample points along road
-        num_samples = max(10, int(road.length / 20))
-        elevations = []
-        
-        for i in range(num_samples):
-            distance = (i / (num_samples - 1)) * road.length
-            point = road.interpolate(distance)
-            
-            # Find grid cell
-            x_idx = np.searchsorted(x_coords, point.x)
-            y_idx = np.searchsorted(y_coords, point.y)
-            
-            # Bounds check
-            if 0 <= y_idx < grid.shape[0] and 0 <= x_idx < grid.shape[1]:
-                elevations.append(grid[y_idx, x_idx])
-        
-        if len(elevations) < 2:
-            return 0.0
-        
-        # Calculate grade
-        elevation_change = abs(elevations[-1] - elevations[0])
-        horizontal_distance = road.length
-        
-        grade = (elevation_change / horizontal_distance) * 100 if horizontal_distance > 0 else 0.0
-        
-        return grade
+            for road in roads:
+                road.update({'grade': 0.0, 'max_grade': 0.0, 'cut_m3': 0.0, 'fill_m3': 0.0})
+            return
+        
+        spacing = max(float(terrain_data.get('resolution', 10.0)) / 2, 1.0)
+        profiles = profile_roads(roads, terrain_data, spacing=spacing, max_grade=MAX_ROAD_GRADE)
+        
+        for road, profile in zip(roads, profiles):
+            road.update({
+                'grade': profile.mean_grade if profile else 0.0,
+                'max_grade': profile.max_grade if profile else 0.0,
+                'cut_m3': profile.cut_m3 if profile else 0.0,
+                'fill_m3': profile.fill_m3 if profile else 0.0
+            })
     
     def identify_buildable_plots(
         self,
@@ -397,89 +374,72 @@ class FastLayoutGenerator:
             List of plot dicts with elevations and cut/fill
         """
         plots = []
-        
+
         for i, poly in enumerate(plot_polygons):
-            plot = {
+            plots.append({
                 'id': i + 1,
                 'geometry': poly,
                 'area_m2': poly.area,
-                'centroid': (poly.centroid.x, poly.centroid.y)
-            }
-            
-            # Calculate platform elevation if terrain available
-            if terrain_data:
-                elevation_data = self._calculate_platform_elevation(poly, terrain_data)
-                plot.update(elevation_data)
-            else:
-                plot['platform_elevation'] = 0.0
-                plot['cut_volume_m3'] = 0.0
-                plot['fill_volume_m3'] = 0.0
-            
-            plots.append(plot)
-        
+                'centroid': (poly.centroid.x, poly.centroid.y),
+                'platform_elevation': 0.0,
+                'cut_volume_m3': 0.0,
+                'fill_volume_m3': 0.0
+            })
+
+        # Platform elevations and cut/fill for all plots in one raster pass
+        if terrain_data and plots:
+            elevation_data = self.calculate_platform_elevations(plot_polygons, terrain_data)
+            for plot, data in zip(plots, elevation_data):
+                plot.update(data)
+
         return plots
-    
-    def _calculate_platform_elevation(
+
+    def calculate_platform_elevations(
         self,
-        plot: Polygon,
+        plot_polygons: List[Polygon],
         terrain_data: Dict
-    ) -> Dict:
+    ) -> List[Dict]:
         """
-        Calculate optimal platform elevation for plot
-        
+        Calculate platform elevation and cut/fill for every plot
+
+        All plots are rasterized onto the elevation grid once; volumes are
+        summed over every covered cell rather than estimated from samples.
+
         Args:
-            plot: Plot polygon
+            plot_polygons: Plot polygons
             terrain_data: Terrain data
-            
+
         Returns:
-            Dict with platform_elevation, cut_volume, fill_volume
+            Per-plot dicts with platform_elevation, cut/fill volumes and
+            min/max/mean terrain elevation
         """
-        grid = terrain_data['elevation_grid']
-        x_coords = terrain_data['x_coords']
-        y_coords = terrain_data['y_coords']
-        resolution = terrain_data['resolution']
-        
-        # Sample elevations at plot corners and center
-        coords = list(plot.exterior.coords)
-        sample_points = coords[:4] + [(plot.centroid.x, plot.centroid.y)]
-        
-        elevations = []
-        for x, y in sample_points:
-            x_idx = np.searchsorted(x_coords, x)
-            y_idx = np.searchsorted(y_coords, y)
-            
-            if 0 <= y_idx < grid.shape[0] and 0 <= x_idx < grid.shape[1]:
-                elevations.append(grid[y_idx, x_idx])
-        
-        if not elevations:
-            return {
-                'platform_elevation': 0.0,
-                'cut_volume_m3': 0.0,
-                'fill_volume_m3': 0.0
-            }
-        
-        # Balanced cut/fill strategy: use average elevation
-        platform_elev = np.mean(elevations)
-        
-        # Estimate cut/fill volumes (simplified)
-        cut_volume = 0.0
-        fill_volume = 0.0
-        
-        for elev in elevations:
-            diff = platform_elev - elev
-            volume = abs(diff) * (plot.area / len(elevations))
-            
-            if diff < 0:  # Need to cut
-                cut_volume += volume
-            else:  # Need to fill
-                fill_volume += volume
-        
-        return {
-            'platform_elevation': float(platform_elev),
-            'cut_volume_m3': float(cut_volume),
-            'fill_volume_m3': float(fill_volume),
-            'corner_elevations': [float(e) for e in elevations[:4]]
-        }
+        raster = ElevationRaster.from_grid(terrain_data)
+        stats = zonal_statistics(raster, plot_polygons)
+        levels = stats.platform_levels(self.terrain_strategy)
+        volumes = stats.cut_fill(levels)
+
+        results = []
+        for i in range(stats.zone_count):
+            if np.isnan(levels[i]):
+                results.append({
+                    'platform_elevation': 0.0,
+                    'cut_volume_m3': 0.0,
+                    'fill_volume_m3': 0.0
+                })
+                continue
+            results.append({
+                'platform_elevation': float(levels[i]),
+                'cut_volume_m3': float(volumes['cut_m3'][i]),
+                'fill_volume_m3': float(volumes['fill_m3'][i]),
+                'terrain_elevation': {
+                    'mean': float(stats.mean[i]),
+                    'min': float(stats.min[i]),
+                    'max': float(stats.max[i])
+                },
+                'grid_cells': int(stats.count[i])
+            })
+
+        return results
     
     def assign_industry_types(
         self,
@@ -647,36 +607,25 @@ class FastLayoutGenerator:
                 'estimated_cost_vnd': 0
             }
         
-        # Sum up cut/fill volumes
+        # Sum up cell-exact cut/fill volumes of the plots
         total_cut = sum(p.get('cut_volume_m3', 0) for p in plots)
         total_fill = sum(p.get('fill_volume_m3', 0) for p in plots)
-        
-        # Net import needed
-        net_import = max(0, total_fill - total_cut)
-        
-        # Cost parameters (VND)
-        cut_cost_per_m3 = 50_000
-        fill_cost_per_m3 = 80_000
-        haul_cost_per_m3_km = 20_000
-        avg_haul_distance_km = 1.0
-        
-        # Calculate costs
-        cut_cost = total_cut * cut_cost_per_m3
-        fill_cost = total_fill * fill_cost_per_m3
-        haul_cost = net_import * haul_cost_per_m3_km * avg_haul_distance_km
-        
-        total_cost = cut_cost + fill_cost + haul_cost
-        
-        return {
-            'total_cut_m3': float(total_cut),
-            'total_fill_m3': float(total_fill),
-            'net_import_m3': float(net_import),
-            'cut_cost_vnd': float(cut_cost),
-            'fill_cost_vnd': float(fill_cost),
-            'haul_cost_vnd': float(haul_cost),
-            'estimated_cost_vnd': float(total_cost),
-            'estimated_cost_usd': float(total_cost / 24000)  # Approx exchange rate
-        }
+
+        # Haul plot surpluses to plot deficits; the net balance is off site
+        mass_haul = solve_mass_haul(
+            plot_nodes(plots),
+            borrow_distance_km=BORROW_DISTANCE_KM,
+            disposal_distance_km=BORROW_DISTANCE_KM
+        )
+        cost = grading_cost(
+            total_cut, total_fill,
+            haul_distance_km=mass_haul.average_haul_km,
+            haul_cost_vnd=mass_haul.haul_cost
+        )
+        cost['average_haul_km'] = mass_haul.average_haul_km
+        cost['mass_haul'] = mass_haul.summary()
+        cost['haul_routes'] = mass_haul.to_geojson()
+        return cost
     
     def _calculate_statistics(
         self,
@@ -701,5 +650,5 @@ class FastLayoutGenerator:
             'land_use_ratio': plot_area / total_area,
             'green_ratio': green_area / total_area,
             'avg_plot_size_m2': plot_area / len(plots) if plots else 0,
-            'max_road_grade': max((r['grade'] for r in roads), default=0.0)
+            'max_road_grade': max((r.get('max_grade', r['grade']) for r in roads), default=0.0)
         }
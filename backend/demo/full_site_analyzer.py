@@ -3,19 +3,31 @@ Full-Site Analyzer for Pilot DWG
 
 Analyzes entire site (191.42 ha) to identify optimal development zones
 and generate multiple development scenarios.
+
+Zone search and scoring run on a coarse level of a terrain pyramid; only
+the selected zones are re-outlined and re-measured at the base resolution.
 """
 
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 import numpy as np
+import shapely
 from shapely.geometry import Polygon, Point, MultiPolygon
 from shapely.ops import unary_union
 import time
 
 from demo.dwg_topography_extractor import DWGTopographyExtractor
+from optimization.elevation_raster import ElevationRaster
+from optimization.terrain_pyramid import TerrainPyramid
 
 logger = logging.getLogger(__name__)
 
+MAX_BUILDABLE_SLOPE = 15.0  # percent
+
+# Progress hook: (stage, resolution_m, zones); stages 'zones' (coarse
+# search result) and 'refined' (zones re-outlined at base resolution)
+ProgressCallback = Callable[[str, float, List[Dict]], None]
+
 
 class FullSiteAnalyzer:
     """
@@ -28,23 +40,35 @@ class FullSiteAnalyzer:
     4. Generate development scenarios
     """
     
-    def __init__(self, grid_resolution: float = 20.0):
+    def __init__(self, grid_resolution: float = 20.0, search_resolution: Optional[float] = None):
         """
         Initialize analyzer.
         
         Args:
-            grid_resolution: Grid resolution in meters (20m for speed)
+            grid_resolution: Base grid resolution in meters (20m for speed)
+            search_resolution: Resolution for the whole-site zone search;
+                coarser than grid_resolution searches a pyramid level and
+                refines the selected zones at the base resolution
+                (None = search at the base resolution)
         """
         self.grid_resolution = grid_resolution
+        self.search_resolution = search_resolution
         self.topo_extractor = DWGTopographyExtractor(grid_resolution=grid_resolution)
         
-    def analyze_entire_site(self, dwg_file: str, site_boundary: Polygon) -> Dict:
+    def analyze_entire_site(
+        self,
+        dwg_file: str,
+        site_boundary: Polygon,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> Dict:
         """
         Analyze entire site to find optimal development zones.
         
         Args:
             dwg_file: Path to DWG/DXF file
             site_boundary: Site boundary polygon
+            progress_callback: Optional hook called with the coarse zones
+                and again with the refined zones
             
         Returns:
             {
@@ -52,7 +76,8 @@ class FullSiteAnalyzer:
                 'terrain_data': Dict,
                 'buildable_zones': List[Dict],
                 'optimal_zones': List[Dict],
-                'recommendations': Dict
+                'pyramid': TerrainPyramid,
+                'statistics': Dict
             }
         """
         logger.info(f"Analyzing full site: {site_boundary.area / 10000:.2f} ha")
@@ -73,30 +98,29 @@ class FullSiteAnalyzer:
         )
         logger.info(f"Elevation grid created in {time.time() - grid_start:.1f}s")
         
-        # Calculate slope map
+        raster = ElevationRaster.from_grid(elevation_grid_data)
+        pyramid = TerrainPyramid(raster, max_slope=MAX_BUILDABLE_SLOPE)
+        
+        # Calculate slope map (cached on the raster)
         logger.info("Calculating slope map...")
         slope_start = time.time()
-        slope_map = self.topo_extractor.calculate_slope_map(
-            elevation_grid_data['grid']
-        )
+        slope_map = raster.slope()
         logger.info(f"Slope map calculated in {time.time() - slope_start:.1f}s")
         
         # Identify buildable areas
         logger.info("Identifying buildable zones...")
         buildable_start = time.time()
-        buildable_mask = self.topo_extractor.identify_buildable_areas(
-            slope_map, 
-            max_slope=15.0
-        )
+        buildable_mask = raster.buildable_mask(max_slope=MAX_BUILDABLE_SLOPE)
         logger.info(f"Buildable zones identified in {time.time() - buildable_start:.1f}s")
         
-        # Find contiguous buildable zones
-        logger.info("Finding contiguous buildable zones...")
+        # Find contiguous buildable zones on the search level
+        search = pyramid.for_resolution(self.search_resolution)
+        logger.info(f"Finding contiguous buildable zones at {search.resolution:g}m...")
         zones_start = time.time()
         buildable_zones = self._find_contiguous_zones(
-            buildable_mask,
-            elevation_grid_data,
-            slope_map,
+            search.buildable_mask(MAX_BUILDABLE_SLOPE),
+            search.to_grid_dict(),
+            search.slope(),
             site_boundary
         )
         logger.info(f"Found {len(buildable_zones)} contiguous zones in {time.time() - zones_start:.1f}s")
@@ -114,6 +138,26 @@ class FullSiteAnalyzer:
         
         # Select optimal zones
         optimal_zones = self._select_optimal_zones(scored_zones)
+        if progress_callback:
+            progress_callback('zones', search.resolution, optimal_zones)
+        
+        # Refine the selected zones on the base grid
+        if search is not raster and optimal_zones:
+            refine_start = time.time()
+            self._refine_zones(optimal_zones, raster, site_boundary, search.resolution)
+            scored_zones = self._score_zones(
+                buildable_zones,
+                elevation_grid_data,
+                slope_map,
+                site_boundary
+            )
+            optimal_zones.sort(key=lambda z: z['scores']['total'], reverse=True)
+            logger.info(
+                f"Refined {len(optimal_zones)} zones at {raster.resolution:g}m "
+                f"in {time.time() - refine_start:.1f}s"
+            )
+            if progress_callback:
+                progress_callback('refined', raster.resolution, optimal_zones)
         
         total_time = time.time() - start_time
         logger.info(f"Full site analysis completed in {total_time:.1f}s")
@@ -125,6 +169,7 @@ class FullSiteAnalyzer:
         return {
             'site_area_ha': site_area_ha,
             'terrain_data': {
+                'raster': raster,
                 'elevation_grid': elevation_grid_data,
                 'grid': elevation_grid_data['grid'],
                 'slope_map': slope_map,
@@ -141,11 +186,14 @@ class FullSiteAnalyzer:
             },
             'buildable_zones': buildable_zones,
             'optimal_zones': optimal_zones,
+            'pyramid': pyramid,
             'statistics': {
                 'total_buildable_area_ha': total_buildable_area,
                 'buildable_percentage': (total_buildable_area / site_area_ha) * 100,
                 'num_zones': len(buildable_zones),
-                'num_optimal_zones': len(optimal_zones)
+                'num_optimal_zones': len(optimal_zones),
+                'base_resolution_m': raster.resolution,
+                'search_resolution_m': search.resolution
             },
             'processing_time_s': total_time
         }
@@ -160,6 +208,10 @@ class FullSiteAnalyzer:
         """
         Find contiguous buildable zones using connected components.
         
+        Per-zone statistics are computed for all labels at once (bincount /
+        labelled reductions); only zones above the size threshold are
+        outlined, each within its own bounding slice.
+        
         Args:
             buildable_mask: Boolean mask of buildable cells
             elevation_data: Elevation grid data
@@ -173,51 +225,58 @@ class FullSiteAnalyzer:
         
         # Label connected components
         labeled_array, num_features = ndimage.label(buildable_mask)
+        if num_features == 0:
+            logger.info("Found 0 contiguous buildable zones (>5 ha)")
+            return []
         
-        zones = []
-        grid_resolution = self.grid_resolution
+        grid_resolution = float(elevation_data.get('resolution', self.grid_resolution))
         x_min = elevation_data['x_coords'][0]
         y_min = elevation_data['y_coords'][0]
+        cell_area = grid_resolution ** 2
         
-        for zone_id in range(1, num_features + 1):
-            # Get cells for this zone
-            zone_mask = (labeled_array == zone_id)
-            zone_cells = np.argwhere(zone_mask)
-            
-            if len(zone_cells) < 4:  # Skip tiny zones
-                continue
-            
-            # Calculate zone area
-            zone_area_m2 = len(zone_cells) * (grid_resolution ** 2)
-            zone_area_ha = zone_area_m2 / 10000
-            
-            # Skip zones smaller than 5 ha
-            if zone_area_ha < 5.0:
-                continue
-            
-            # Create polygon for zone
-            # Get boundary cells
-            from scipy.ndimage import binary_erosion
-            boundary_mask = zone_mask & ~binary_erosion(zone_mask)
-            boundary_cells = np.argwhere(boundary_mask)
-            
-            # Convert to coordinates
-            coords = []
-            for i, j in boundary_cells:
-                x = x_min + j * grid_resolution
-                y = y_min + i * grid_resolution
-                coords.append((x, y))
-            
-            if len(coords) < 3:
-                continue
+        # Per-label statistics in one pass over the grid
+        elevations = np.asarray(elevation_data['grid'], dtype=np.float64)
+        slopes = np.asarray(slope_map, dtype=np.float64)
+        labels = labeled_array.ravel()
+        index = np.arange(1, num_features + 1)
+        counts = np.bincount(labels, minlength=num_features + 1)
+        
+        def _nan_stats(values: np.ndarray):
+            """Mean / std / min / max per label (index = label), NaN cells ignored."""
+            flat = values.ravel()
+            valid = ~np.isnan(flat)
+            lab, vals = labels[valid], flat[valid]
+            n = np.bincount(lab, minlength=num_features + 1)
+            total = np.bincount(lab, weights=vals, minlength=num_features + 1)
+            total_sq = np.bincount(lab, weights=vals * vals, minlength=num_features + 1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = total / n
+                std = np.sqrt(np.maximum(total_sq / n - mean * mean, 0))
+            low = ndimage.minimum(np.where(np.isnan(values), np.inf, values), labeled_array, index)
+            high = ndimage.maximum(np.where(np.isnan(values), -np.inf, values), labeled_array, index)
+            return mean, std, np.concatenate(([np.nan], low)), np.concatenate(([np.nan], high))
+        
+        elev_mean, _, elev_min, elev_max = _nan_stats(elevations)
+        slope_mean, slope_std, _, slope_max = _nan_stats(slopes)
+        
+        # Skip tiny zones and zones smaller than 5 ha
+        candidates = index[(counts[1:] >= 4) & (counts[1:] * cell_area / 10000 >= 5.0)]
+        slices = ndimage.find_objects(labeled_array)
+        
+        zones = []
+        for zone_id in candidates:
+            rows, cols = slices[zone_id - 1]
+            zone_mask = labeled_array[rows, cols] == zone_id
             
-            # Create convex hull as approximation
+            # Exact cell outline (holes preserved), clipped to the site
             try:
-                from shapely.geometry import MultiPoint
-                zone_polygon = MultiPoint(coords).convex_hull
-                
-                # Intersect with site boundary
-                zone_polygon = zone_polygon.intersection(site_boundary)
+                zone_polygon = _mask_outline(
+                    zone_mask,
+                    x_min + cols.start * grid_resolution,
+                    y_min + rows.start * grid_resolution,
+                    grid_resolution
+                ).intersection(site_boundary)
+                zone_polygon = _largest_polygon(zone_polygon)
                 
                 if zone_polygon.is_empty or zone_polygon.area < 50000:  # 5 ha minimum
                     continue
@@ -226,24 +285,22 @@ class FullSiteAnalyzer:
                 logger.warning(f"Failed to create polygon for zone {zone_id}: {e}")
                 continue
             
-            # Calculate zone metrics
-            zone_elevations = elevation_data['grid'][zone_mask]
-            zone_slopes = slope_map[zone_mask]
-            
             zone_info = {
-                'id': zone_id,
+                'id': int(zone_id),
                 'geometry': zone_polygon,
                 'area_ha': zone_polygon.area / 10000,
                 'area_m2': zone_polygon.area,
                 'centroid': zone_polygon.centroid,
+                'cell_count': int(counts[zone_id]),
+                'resolution': grid_resolution,
                 'metrics': {
-                    'avg_elevation': float(np.nanmean(zone_elevations)),
-                    'min_elevation': float(np.nanmin(zone_elevations)),
-                    'max_elevation': float(np.nanmax(zone_elevations)),
-                    'elevation_range': float(np.nanmax(zone_elevations) - np.nanmin(zone_elevations)),
-                    'avg_slope': float(np.nanmean(zone_slopes)),
-                    'max_slope': float(np.nanmax(zone_slopes)),
-                    'slope_std': float(np.nanstd(zone_slopes))
+                    'avg_elevation': float(elev_mean[zone_id]),
+                    'min_elevation': float(elev_min[zone_id]),
+                    'max_elevation': float(elev_max[zone_id]),
+                    'elevation_range': float(elev_max[zone_id] - elev_min[zone_id]),
+                    'avg_slope': float(slope_mean[zone_id]),
+                    'max_slope': float(slope_max[zone_id]),
+                    'slope_std': float(slope_std[zone_id])
                 }
             }
             
@@ -256,6 +313,76 @@ class FullSiteAnalyzer:
         
         return zones
     
+    def _refine_zones(
+        self,
+        zones: List[Dict],
+        raster: ElevationRaster,
+        site_boundary: Polygon,
+        search_resolution: float
+    ) -> None:
+        """
+        Re-outline and re-measure zones on the base grid (in place).
+        
+        Each zone is redrawn from the base buildable cells within one search
+        cell of its coarse outline; only that window of the base grid is
+        read. Zones whose refined outline drops below 5 ha keep the coarse
+        result.
+        
+        Args:
+            zones: Zones found on a coarse pyramid level
+            raster: Base raster
+            site_boundary: Site boundary
+            search_resolution: Resolution the zones were found at
+        """
+        from scipy import ndimage
+        
+        resolution = raster.resolution
+        coarse = [z['geometry'] for z in zones]
+        for i, zone in enumerate(zones):
+            # Grow by one search cell, but not into the other zones
+            region = zone['geometry'].buffer(search_resolution, join_style=2)
+            others = [g for j, g in enumerate(coarse) if j != i and g.intersects(region)]
+            if others:
+                region = region.difference(unary_union(others))
+            minx, miny, maxx, maxy = region.bounds
+            window = raster.window(minx, miny, maxx + resolution, maxy + resolution)
+            if window.data.size == 0:
+                continue
+            
+            xs, ys = np.meshgrid(window.x_coords, window.y_coords)
+            mask = window.buildable_mask(MAX_BUILDABLE_SLOPE) & shapely.contains_xy(region, xs, ys)
+            labeled, count = ndimage.label(mask)
+            if count == 0:
+                continue
+            mask = labeled == np.argmax(np.bincount(labeled.ravel())[1:]) + 1
+            
+            polygon = _largest_polygon(
+                _mask_outline(mask, window.x_coords[0], window.y_coords[0], resolution).intersection(site_boundary)
+            )
+            if polygon.is_empty or polygon.area < 50000:  # 5 ha minimum
+                logger.warning(f"Zone {zone['id']} vanished at {resolution:g}m, keeping coarse outline")
+                continue
+            
+            elevations = np.asarray(window.data, dtype=np.float64)[mask]
+            slopes = np.asarray(window.slope(), dtype=np.float64)[mask]
+            zone.update({
+                'geometry': polygon,
+                'area_ha': polygon.area / 10000,
+                'area_m2': polygon.area,
+                'centroid': polygon.centroid,
+                'cell_count': int(mask.sum()),
+                'resolution': resolution
+            })
+            zone['metrics'].update({
+                'avg_elevation': float(np.nanmean(elevations)),
+                'min_elevation': float(np.nanmin(elevations)),
+                'max_elevation': float(np.nanmax(elevations)),
+                'elevation_range': float(np.nanmax(elevations) - np.nanmin(elevations)),
+                'avg_slope': float(np.nanmean(slopes)),
+                'max_slope': float(np.nanmax(slopes)),
+                'slope_std': float(np.nanstd(slopes))
+            })
+    
     def _score_zones(
         self,
         zones: List[Dict],
@@ -398,3 +525,77 @@ class FullSiteAnalyzer:
         logger.info(f"Selected {len(optimal)} optimal zones for development")
         
         return optimal
+
+
+def _largest_polygon(geometry) -> Polygon:
+    """Largest polygon part of a (multi)polygon / collection; empty if none."""
+    if geometry.geom_type == 'Polygon':
+        return geometry
+    parts = [g for g in getattr(geometry, 'geoms', []) if g.geom_type == 'Polygon']
+    return max(parts, key=lambda p: p.area) if parts else Polygon()
+
+
+def _edge_runs(signed: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Runs of equal non-zero values along each row of a -1/0/+1 array.
+    
+    Returns:
+        (row, start, end) with the run covering columns start..end-1
+    """
+    padded = np.zeros((signed.shape[0], signed.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = signed
+    rows, cols = np.nonzero(np.diff(padded, axis=1))
+    # Consecutive change points on the same row delimit a run
+    same_row = rows[:-1] == rows[1:]
+    rows, starts, ends = rows[:-1][same_row], cols[:-1][same_row], cols[1:][same_row]
+    nonzero = padded[rows, starts + 1] != 0
+    return rows[nonzero], starts[nonzero], ends[nonzero]
+
+
+def _mask_outline(mask: np.ndarray, x0: float, y0: float, resolution: float) -> Polygon:
+    """
+    Exact outline of the True cells of a mask (contour tracing on cell edges).
+    
+    Boundary edges between True and False cells are merged into straight
+    runs, polygonized, and the faces lying on True cells are kept, so the
+    result follows the cell edges and keeps interior holes.
+    
+    Args:
+        mask: 2D boolean mask (row = y, col = x)
+        x0, y0: Centre of cell [0, 0]
+        resolution: Cell size
+        
+    Returns:
+        Polygon or MultiPolygon
+    """
+    m = np.zeros((mask.shape[0] + 2, mask.shape[1] + 2), dtype=np.int8)
+    m[1:-1, 1:-1] = mask
+    half = resolution / 2
+    
+    # Edges between vertically / horizontally adjacent cells; runs keep the
+    # side of the mask so every corner is a segment end point
+    row, c0, c1 = _edge_runs(np.diff(m, axis=0))
+    col, r0, r1 = _edge_runs(np.diff(m, axis=1).T)
+    if len(row) == 0:
+        return Polygon()
+    
+    hy = y0 + row * resolution - half
+    vx = x0 + col * resolution - half
+    segments = np.concatenate([
+        np.stack([x0 + (c0 - 1) * resolution - half, hy, x0 + (c1 - 1) * resolution - half, hy], axis=1),
+        np.stack([vx, y0 + (r0 - 1) * resolution - half, vx, y0 + (r1 - 1) * resolution - half], axis=1)
+    ]).reshape(-1, 2, 2)
+    
+    faces = np.asarray(shapely.get_parts(shapely.polygonize(shapely.linestrings(segments))))
+    if len(faces) == 0:
+        return Polygon()
+    
+    # Keep faces on True cells (hole faces lie on False cells)
+    points = shapely.point_on_surface(faces)
+    cols = np.clip(np.floor((shapely.get_x(points) - x0 + half) / resolution).astype(int), 0, mask.shape[1] - 1)
+    rows = np.clip(np.floor((shapely.get_y(points) - y0 + half) / resolution).astype(int), 0, mask.shape[0] - 1)
+    parts = faces[mask[rows, cols]]
+    
+    if len(parts) == 1:
+        return parts[0]
+    return MultiPolygon(list(parts))
@@ -17,6 +17,7 @@ from shapely.ops import unary_union
 from pathlib import Path
 
 from .dwg_topography_extractor import extract_topography
+from optimization.elevation_raster import ElevationRaster
 
 logger = logging.getLogger(__name__)
 
@@ -248,51 +249,13 @@ class PilotZoneProcessor:
             elevation_data: Full site topography data
             
         Returns:
-            Zone-specific terrain data
+            Zone-specific terrain data (arrays are views of the site raster)
         """
-        zone_geom = zone['geometry']
-        zone_bounds = zone_geom.bounds
-        
-        # Get elevation grid data
-        grid_data = elevation_data['elevation_grid']
-        full_grid = grid_data['grid']
-        x_coords = grid_data['x_coords']
-        y_coords = grid_data['y_coords']
-        resolution = grid_data['resolution']
-        
-        # Find grid indices for zone bounds
-        minx, miny, maxx, maxy = zone_bounds
-        
-        x_start = np.searchsorted(x_coords, minx)
-        x_end = np.searchsorted(x_coords, maxx)
-        y_start = np.searchsorted(y_coords, miny)
-        y_end = np.searchsorted(y_coords, maxy)
-        
-        # Extract zone grid
-        zone_grid = full_grid[y_start:y_end, x_start:x_end]
-        zone_x = x_coords[x_start:x_end]
-        zone_y = y_coords[y_start:y_end]
-        
-        # Calculate zone slope map
-        dy, dx = np.gradient(zone_grid, resolution)
-        zone_slope = np.sqrt(dx**2 + dy**2) * 100
-        
-        # Identify buildable areas
-        zone_buildable = zone_slope <= 15.0
-        
-        terrain_data = {
-            'elevation_grid': zone_grid,
-            'x_coords': zone_x,
-            'y_coords': zone_y,
-            'slope_map': zone_slope,
-            'buildable_areas': zone_buildable,
-            'resolution': resolution,
-            'avg_elevation': float(np.mean(zone_grid)),
-            'min_elevation': float(np.min(zone_grid)),
-            'max_elevation': float(np.max(zone_grid)),
-            'avg_slope': float(np.mean(zone_slope)),
-            'buildable_percentage': float((zone_buildable.sum() / zone_buildable.size) * 100)
-        }
+        raster = ElevationRaster.from_grid(elevation_data['elevation_grid'])
+        
+        # Zero-copy window; slope / buildable layers are shared with the site
+        zone_raster = raster.window(*zone['geometry'].bounds)
+        terrain_data = zone_raster.to_terrain_dict(max_slope=15.0)
         
         logger.info(f"Zone terrain: avg elevation {terrain_data['avg_elevation']:.1f}m, "
                    f"avg slope {terrain_data['avg_slope']:.1f}%, "
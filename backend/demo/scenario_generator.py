@@ -5,19 +5,153 @@ Generates multiple development scenarios based on different optimization strateg
 - Scenario A: Cost-Optimized (minimize grading cost)
 - Scenario B: Maximum Capacity (maximize plot count)
 - Scenario C: Balanced (balance cost and capacity)
+
+Any number of user-defined ScenarioStrategy entries can replace the default
+three. Scenarios run concurrently in a process pool; workers attach to the
+terrain raster read-only (memmap file or shared memory) instead of receiving
+a pickled copy.
 """
 
 import logging
-from typing import Dict, List, Optional
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, List, Optional, Sequence, Union
 import numpy as np
 from shapely.geometry import Polygon, Point
 import time
 
 from demo.fast_layout_generator import FastLayoutGenerator
+from optimization.elevation_raster import ElevationRaster, RasterHandle
 
 logger = logging.getLogger(__name__)
 
 
+# ==================== STRATEGIES ====================
+
+# Zone ordering for each ranking: (key, descending)
+ZONE_RANKINGS = {
+    'flatness': (lambda z: z['metrics']['avg_slope'], False),
+    'area': (lambda z: z['area_ha'], True),
+    'score': (lambda z: z['scores']['total'], True)
+}
+
+
+@dataclass
+class ScenarioStrategy:
+    """
+    Definition of one development scenario.
+
+    Zones are ranked by ``rank_by`` and taken until their area covers
+    target_plots * area_factor plots at ~0.5 ha per plot; the layout then
+    packs ``plots_per_ha`` plots per hectare of the selected zones.
+    """
+    scenario_id: str
+    name: str
+    strategy: str
+    rank_by: str = 'score'
+    area_factor: float = 1.0
+    plots_per_ha: float = 10
+    terrain_strategy: str = 'adaptive'
+    description: str = ''
+    priority: str = ''
+    target_market: str = ''
+
+    def __post_init__(self):
+        if self.rank_by not in ZONE_RANKINGS:
+            raise ValueError(
+                f"Unknown zone ranking '{self.rank_by}' (expected one of {sorted(ZONE_RANKINGS)})"
+            )
+        if self.area_factor <= 0 or self.plots_per_ha <= 0:
+            raise ValueError("area_factor and plots_per_ha must be positive")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScenarioStrategy":
+        """Strategy from a request dict; unknown keys are ignored."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+DEFAULT_STRATEGIES = [
+    ScenarioStrategy(
+        scenario_id='A',
+        name='Cost-Optimized',
+        strategy='cost_optimized',
+        rank_by='flatness',
+        area_factor=0.75,       # 75-90% of target plots
+        plots_per_ha=8,         # Conservative
+        terrain_strategy='balanced_cut_fill',
+        description='Tối ưu chi phí san nền - Chọn khu vực phẳng nhất',
+        priority='Minimize cost',
+        target_market='Cost-sensitive developers'
+    ),
+    ScenarioStrategy(
+        scenario_id='B',
+        name='Maximum Capacity',
+        strategy='max_capacity',
+        rank_by='area',
+        area_factor=1.3,        # 125-140% of target plots
+        plots_per_ha=12,        # Aggressive
+        description='Tối đa công suất - Sử dụng tối đa diện tích',
+        priority='Maximize plots',
+        target_market='High-demand areas'
+    ),
+    ScenarioStrategy(
+        scenario_id='C',
+        name='Balanced',
+        strategy='balanced',
+        rank_by='score',
+        area_factor=1.0,        # 100-115% of target plots
+        plots_per_ha=10,        # Moderate
+        description='Cân bằng - Tối ưu cả chi phí và công suất',
+        priority='Balance cost & capacity',
+        target_market='General market'
+    )
+]
+
+
+# ==================== WORKERS ====================
+
+# Terrain attached once per worker process
+_worker_terrain: Dict = {}
+
+
+def _terrain_metadata(terrain_data: Dict) -> Dict:
+    """Scalar terrain fields (averages, extents) without the grids."""
+    return {
+        k: v for k, v in terrain_data.items()
+        if k not in ('raster', 'elevation_grid', 'grid', 'slope_map', 'buildable_mask')
+    }
+
+
+def _shared_terrain(raster: ElevationRaster, terrain_meta: Dict) -> Dict:
+    """Scenario terrain dict around a raster attached in a worker."""
+    return {
+        **terrain_meta,
+        'raster': raster,
+        'elevation_grid': raster.to_grid_dict(),
+        'grid': raster.data
+    }
+
+
+def _init_scenario_worker(handle: RasterHandle, terrain_meta: Dict):
+    """Pool initializer: attach to the shared terrain raster."""
+    _worker_terrain.clear()
+    _worker_terrain.update(_shared_terrain(ElevationRaster.attach(handle), terrain_meta))
+
+
+def _run_scenario(
+    zones: List[Dict],
+    strategy: ScenarioStrategy,
+    target_plots: int
+) -> Dict:
+    """Generate one scenario in a worker process."""
+    return ScenarioGenerator().generate_scenario(zones, _worker_terrain, strategy, target_plots)
+
+
 class ScenarioGenerator:
     """
     Generate multiple development scenarios for optimal zones.
@@ -28,26 +162,42 @@ class ScenarioGenerator:
     - Balanced: Optimize both cost and capacity
     """
     
-    def __init__(self):
-        """Initialize scenario generator."""
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize scenario generator.
+        
+        Args:
+            max_workers: Worker processes for scenario generation
+                (default: one per scenario, up to the CPU count; 1 runs
+                scenarios sequentially in this process)
+        """
         self.layout_generator = FastLayoutGenerator()
+        self.max_workers = max_workers
         
     def generate_scenarios(
         self,
         site_analysis: Dict,
-        target_plot_count: int = 200
+        target_plot_count: int = 200,
+        strategies: Optional[Sequence[Union[ScenarioStrategy, Dict]]] = None
     ) -> List[Dict]:
         """
-        Generate 3 development scenarios.
+        Generate development scenarios concurrently.
         
         Args:
             site_analysis: Full site analysis from FullSiteAnalyzer
             target_plot_count: Target number of plots (default: 200)
+            strategies: Scenario definitions (ScenarioStrategy or dicts);
+                defaults to Cost-Optimized, Maximum Capacity and Balanced
             
         Returns:
-            List of 3 scenario dictionaries
+            One scenario dictionary per strategy, in order; each carries
+            its own generation_time_s
         """
-        logger.info(f"Generating scenarios with target {target_plot_count} plots")
+        strategies = [
+            s if isinstance(s, ScenarioStrategy) else ScenarioStrategy.from_dict(s)
+            for s in (strategies if strategies is not None else DEFAULT_STRATEGIES)
+        ]
+        logger.info(f"Generating {len(strategies)} scenarios with target {target_plot_count} plots")
         start_time = time.time()
         
         optimal_zones = site_analysis['optimal_zones']
@@ -57,138 +207,72 @@ class ScenarioGenerator:
             logger.error("No optimal zones found for scenario generation")
             return []
         
-        # Generate 3 scenarios
-        scenarios = []
-        
-        # Scenario A: Cost-Optimized
-        logger.info("Generating Scenario A: Cost-Optimized...")
-        scenario_a = self._generate_cost_optimized(
-            optimal_zones,
-            terrain_data,
-            target_plot_count
-        )
-        scenarios.append(scenario_a)
-        
-        # Scenario B: Maximum Capacity
-        logger.info("Generating Scenario B: Maximum Capacity...")
-        scenario_b = self._generate_max_capacity(
-            optimal_zones,
-            terrain_data,
-            target_plot_count
-        )
-        scenarios.append(scenario_b)
-        
-        # Scenario C: Balanced
-        logger.info("Generating Scenario C: Balanced...")
-        scenario_c = self._generate_balanced(
-            optimal_zones,
-            terrain_data,
-            target_plot_count
-        )
-        scenarios.append(scenario_c)
+        workers = min(len(strategies), self.max_workers or os.cpu_count() or 1)
+        scenarios = None
+        if workers > 1:
+            try:
+                scenarios = self._generate_parallel(
+                    optimal_zones, terrain_data, strategies, target_plot_count, workers
+                )
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"Parallel scenario generation unavailable ({e}), running sequentially")
+        
+        if scenarios is None:
+            scenarios = [
+                self.generate_scenario(optimal_zones, terrain_data, strategy, target_plot_count)
+                for strategy in strategies
+            ]
         
         total_time = time.time() - start_time
-        logger.info(f"Generated {len(scenarios)} scenarios in {total_time:.1f}s")
+        timings = ", ".join(f"{s['scenario_id']}={s['generation_time_s']:.1f}s" for s in scenarios)
+        logger.info(f"Generated {len(scenarios)} scenarios in {total_time:.1f}s ({timings})")
         
         return scenarios
     
-    def _generate_cost_optimized(
+    def _generate_parallel(
         self,
         optimal_zones: List[Dict],
         terrain_data: Dict,
-        target_plots: int
-    ) -> Dict:
-        """
-        Generate cost-optimized scenario.
-        
-        Strategy:
-        - Select flattest zones (lowest avg slope)
-        - Minimize cut/fill volumes
-        - Target: 70-80% of target plots
-        - Focus on quality over quantity
-        
-        Args:
-            optimal_zones: List of optimal zones
-            terrain_data: Terrain data
-            target_plots: Target plot count
-            
-        Returns:
-            Scenario dictionary
-        """
-        start_time = time.time()
-        
-        # Sort zones by flatness (lowest slope first)
-        sorted_zones = sorted(
-            optimal_zones,
-            key=lambda z: z['metrics']['avg_slope']
-        )
-        
-        # Select flattest zones until we have enough area
-        # Target: 150-180 plots (75-90% of target)
-        target_area_ha = (target_plots * 0.75) * 0.5  # ~0.5 ha per plot
-        selected_zones = []
-        total_area = 0
-        
-        for zone in sorted_zones:
-            selected_zones.append(zone)
-            total_area += zone['area_ha']
-            
-            if total_area >= target_area_ha:
-                break
-        
-        logger.info(f"Scenario A: Selected {len(selected_zones)} zones, {total_area:.1f} ha")
-        
-        # Generate layout for selected zones
-        layout = self._generate_layout_for_zones(
-            selected_zones,
-            terrain_data,
-            strategy='cost_optimized'
-        )
-        
-        # Calculate costs
-        grading_cost = self._calculate_grading_cost(layout, terrain_data)
-        
-        # Calculate metrics
-        metrics = self._calculate_scenario_metrics(
-            layout,
-            selected_zones,
-            grading_cost
-        )
-        
-        generation_time = time.time() - start_time
-        
-        return {
-            'scenario_id': 'A',
-            'name': 'Cost-Optimized',
-            'description': 'Tối ưu chi phí san nền - Chọn khu vực phẳng nhất',
-            'strategy': 'cost_optimized',
-            'selected_zones': selected_zones,
-            'layout': layout,
-            'metrics': metrics,
-            'grading_cost': grading_cost,
-            'generation_time_s': generation_time,
-            'priority': 'Minimize cost',
-            'target_market': 'Cost-sensitive developers'
-        }
+        strategies: List[ScenarioStrategy],
+        target_plots: int,
+        workers: int
+    ) -> List[Dict]:
+        """Run the scenarios in a process pool sharing the terrain raster."""
+        raster = terrain_data.get('raster')
+        if raster is None:
+            raster = ElevationRaster.from_grid(terrain_data['elevation_grid'])
+        
+        with raster.shared() as handle:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_scenario_worker,
+                initargs=(handle, _terrain_metadata(terrain_data))
+            ) as pool:
+                futures = [
+                    pool.submit(_run_scenario, optimal_zones, strategy, target_plots)
+                    for strategy in strategies
+                ]
+                return [future.result() for future in futures]
     
-    def _generate_max_capacity(
+    def generate_scenario(
         self,
         optimal_zones: List[Dict],
         terrain_data: Dict,
+        strategy: ScenarioStrategy,
         target_plots: int
     ) -> Dict:
         """
-        Generate maximum capacity scenario.
+        Generate one scenario.
         
         Strategy:
-        - Select largest zones (max area)
-        - Maximize plot count
-        - Target: 120-140% of target plots
-        - Accept higher grading costs
+        - Rank zones by the strategy's ranking (flatness, area or score)
+        - Select zones until they cover target_plots * area_factor plots
+        - Lay out plots_per_ha plots per hectare on the selected zones
         
         Args:
             optimal_zones: List of optimal zones
             terrain_data: Terrain data
+            strategy: Scenario strategy
             target_plots: Target plot count
             
         Returns:
@@ -196,16 +280,11 @@ class ScenarioGenerator:
         """
         start_time = time.time()
         
-        # Sort zones by size (largest first)
-        sorted_zones = sorted(
-            optimal_zones,
-            key=lambda z: z['area_ha'],
-            reverse=True
-        )
+        key, descending = ZONE_RANKINGS[strategy.rank_by]
+        sorted_zones = sorted(optimal_zones, key=key, reverse=descending)
         
-        # Select largest zones
-        # Target: 250-280 plots (125-140% of target)
-        target_area_ha = (target_plots * 1.3) * 0.5  # ~0.5 ha per plot
+        # Select zones until we have enough area
+        target_area_ha = (target_plots * strategy.area_factor) * 0.5  # ~0.5 ha per plot
         selected_zones = []
         total_area = 0
         
@@ -216,93 +295,15 @@ class ScenarioGenerator:
             if total_area >= target_area_ha:
                 break
         
-        logger.info(f"Scenario B: Selected {len(selected_zones)} zones, {total_area:.1f} ha")
-        
-        # Generate layout for selected zones
-        layout = self._generate_layout_for_zones(
-            selected_zones,
-            terrain_data,
-            strategy='max_capacity'
+        logger.info(
+            f"Scenario {strategy.scenario_id}: Selected {len(selected_zones)} zones, {total_area:.1f} ha"
         )
         
-        # Calculate costs
-        grading_cost = self._calculate_grading_cost(layout, terrain_data)
-        
-        # Calculate metrics
-        metrics = self._calculate_scenario_metrics(
-            layout,
-            selected_zones,
-            grading_cost
-        )
-        
-        generation_time = time.time() - start_time
-        
-        return {
-            'scenario_id': 'B',
-            'name': 'Maximum Capacity',
-            'description': 'Tối đa công suất - Sử dụng tối đa diện tích',
-            'strategy': 'max_capacity',
-            'selected_zones': selected_zones,
-            'layout': layout,
-            'metrics': metrics,
-            'grading_cost': grading_cost,
-            'generation_time_s': generation_time,
-            'priority': 'Maximize plots',
-            'target_market': 'High-demand areas'
-        }
-    
-    def _generate_balanced(
-        self,
-        optimal_zones: List[Dict],
-        terrain_data: Dict,
-        target_plots: int
-    ) -> Dict:
-        """
-        Generate balanced scenario.
-        
-        Strategy:
-        - Balance between cost and capacity
-        - Select zones with best overall score
-        - Target: 100% of target plots
-        - Moderate grading costs
-        
-        Args:
-            optimal_zones: List of optimal zones
-            terrain_data: Terrain data
-            target_plots: Target plot count
-            
-        Returns:
-            Scenario dictionary
-        """
-        start_time = time.time()
-        
-        # Sort zones by total score (best first)
-        sorted_zones = sorted(
-            optimal_zones,
-            key=lambda z: z['scores']['total'],
-            reverse=True
-        )
-        
-        # Select best-scored zones
-        # Target: 200-230 plots (100-115% of target)
-        target_area_ha = target_plots * 0.5  # ~0.5 ha per plot
-        selected_zones = []
-        total_area = 0
-        
-        for zone in sorted_zones:
-            selected_zones.append(zone)
-            total_area += zone['area_ha']
-            
-            if total_area >= target_area_ha:
-                break
-        
-        logger.info(f"Scenario C: Selected {len(selected_zones)} zones, {total_area:.1f} ha")
-        
         # Generate layout for selected zones
         layout = self._generate_layout_for_zones(
             selected_zones,
             terrain_data,
-            strategy='balanced'
+            strategy
         )
         
         # Calculate costs
@@ -318,24 +319,24 @@ class ScenarioGenerator:
         generation_time = time.time() - start_time
         
         return {
-            'scenario_id': 'C',
-            'name': 'Balanced',
-            'description': 'Cân bằng - Tối ưu cả chi phí và công suất',
-            'strategy': 'balanced',
+            'scenario_id': strategy.scenario_id,
+            'name': strategy.name,
+            'description': strategy.description,
+            'strategy': strategy.strategy,
             'selected_zones': selected_zones,
             'layout': layout,
             'metrics': metrics,
             'grading_cost': grading_cost,
             'generation_time_s': generation_time,
-            'priority': 'Balance cost & capacity',
-            'target_market': 'General market'
+            'priority': strategy.priority,
+            'target_market': strategy.target_market
         }
     
     def _generate_layout_for_zones(
         self,
         zones: List[Dict],
         terrain_data: Dict,
-        strategy: str
+        strategy: ScenarioStrategy
     ) -> Dict:
         """
         Generate layout for selected zones.
@@ -343,7 +344,7 @@ class ScenarioGenerator:
         Args:
             zones: List of selected zones
             terrain_data: Terrain data
-            strategy: Strategy name
+            strategy: Scenario strategy
             
         Returns:
             Combined layout dictionary
@@ -357,15 +358,8 @@ class ScenarioGenerator:
         # Calculate total area
         total_area_ha = combined_area.area / 10000
         
-        # Estimate plot count based on strategy
-        if strategy == 'cost_optimized':
-            plots_per_ha = 8  # Conservative
-        elif strategy == 'max_capacity':
-            plots_per_ha = 12  # Aggressive
-        else:  # balanced
-            plots_per_ha = 10  # Moderate
-        
-        target_plots = int(total_area_ha * plots_per_ha)
+        # Plot density of the strategy
+        target_plots = int(total_area_ha * strategy.plots_per_ha)
         
         # Create zone data structure for layout generator
         # Need to rename 'grid' to 'elevation_grid' for compatibility
@@ -431,8 +425,7 @@ class ScenarioGenerator:
         }
         
         # Generate layout using FastLayoutGenerator
-        terrain_strategy = 'balanced_cut_fill' if strategy == 'cost_optimized' else 'adaptive'
-        generator = FastLayoutGenerator(terrain_strategy=terrain_strategy)
+        generator = FastLayoutGenerator(terrain_strategy=strategy.terrain_strategy)
         
         layout = generator.generate_layout(
             zone=zone_data,
@@ -457,6 +450,18 @@ class ScenarioGenerator:
         if 'grading_cost' in layout:
             return layout['grading_cost']
         
+        # Measure cut/fill over the plots on the terrain grid
+        plots = layout.get('plots', [])
+        grid_data = (terrain_data or {}).get('elevation_grid')
+        if plots and isinstance(grid_data, dict):
+            polygons = [p['geometry'] for p in plots]
+            volumes = self.layout_generator.calculate_platform_elevations(polygons, grid_data)
+            measured = [
+                {**v, 'geometry': poly, 'area_m2': poly.area}
+                for v, poly in zip(volumes, polygons)
+            ]
+            return self.layout_generator.calculate_grading_cost(measured, grid_data)
+        
         # Fallback: estimate based on plot count
         plot_count = len(layout.get('plots', []))
         
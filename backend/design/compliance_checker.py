@@ -1,14 +1,60 @@
 ﻿"""
 Compliance Checker for IEAT Thailand Standards.
 Automated verification of industrial park layouts against IEAT regulations.
+
+Per-plot rules are evaluated incrementally:
+- plot results are cached by a hash of the plot footprint (and of the site
+  boundary, roads and rules they were checked against)
+- dimension rules are vectorized over the plots that miss the cache
+- spacing, boundary setback and road frontage use STRtree queries; plots
+  without a position (no geometry or x / y) are reported as unchecked
+- check_layout_diff reports what an edit changed against the previous call
 """
 
-from typing import Dict
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import hashlib
+import logging
+import time
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import LineString, Polygon, box
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+logger = logging.getLogger(__name__)
+
+# Used when the regulations carry no "setbacks" section
+DEFAULT_SETBACKS = {
+    "plot_spacing_m": 12,
+    "boundary_setback_m": 10,
+    "max_frontage_distance_m": 30
+}
+
+# Plot footprint defaults (m) when a building gives no dimensions
+DEFAULT_PLOT_WIDTH_M = 50
+DEFAULT_PLOT_LENGTH_M = 80
+
+# Cached per-plot results
+PLOT_CACHE_SIZE = 100_000
+
+
+class _PlotState:
+    """Per-plot results of one check, kept for the next incremental check."""
+
+    def __init__(self, ids: List[str], hashes: List[str], results: List[Dict],
+                 pairs: set, context: str):
+        self.ids = ids
+        self.hashes = hashes
+        self.results = results
+        self.pairs = pairs        # {(id_a, id_b)} closer than the plot spacing
+        self.context = context
+
 
 class ComplianceChecker:
     """
@@ -32,6 +78,13 @@ class ComplianceChecker:
 
         self.standard = "ieat_thailand"  # Only IEAT Thailand supported
         self.regs = self.all_regs.get("ieat_thailand", {})
+        self.setbacks = {**DEFAULT_SETBACKS, **self.regs.get("setbacks", {})}
+        
+        self._plot_cache: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._previous: Optional[_PlotState] = None
+        self._previous_report: Optional[Dict] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def check_layout(self, layout: Dict) -> Dict:
         """
@@ -56,9 +109,13 @@ class ComplianceChecker:
             "recommendations": []
         }
         
+        # Per-plot rules (cached by geometry, spatial rules via STRtree)
+        plots = self._evaluate_plots(layout)
+        
         # Execute IEAT Thailand checks only
         report["checks"]["land_use"] = self._check_ieat_land_use(layout)
-        report["checks"]["plot_dimensions"] = self._check_ieat_plot_dimensions(layout)
+        report["checks"]["plot_dimensions"] = self._check_ieat_plot_dimensions(layout, plots)
+        report["checks"]["setbacks"] = self._check_ieat_setbacks(layout, plots)
         report["checks"]["road_standards"] = self._check_ieat_roads(layout)
         report["checks"]["infrastructure"] = self._check_ieat_infrastructure(layout)
         report["checks"]["green_requirements"] = self._check_ieat_green(layout)
@@ -86,8 +143,263 @@ class ComplianceChecker:
             if check_result.get("recommendations"):
                 report["recommendations"].extend(check_result["recommendations"])
         
+        self._previous = plots
+        self._previous_report = dict(report)
+        return report
+    
+    def check_layout_diff(self, layout: Dict) -> Dict:
+        """
+        Re-check a layout after an edit and report what changed.
+        
+        Unchanged plots are served from the geometry cache and spacing
+        pairs between unchanged plots are reused, so editing one plot
+        costs little more than checking that plot.
+        
+        Returns:
+            check_layout report plus "diff": {
+                "added_plots", "removed_plots", "changed_plots": [ids],
+                "new_violations", "resolved_violations": [str],
+                "score_changes": {check: {"before", "after"}},
+                "overall_change": float,
+                "status_change": None | {"before", "after"},
+                "reused_plots": int,
+                "runtime_ms": float
+            }
+        """
+        started = time.perf_counter()
+        previous, previous_report = self._previous, self._previous_report
+        hits = self.cache_hits
+        report = self.check_layout(layout)
+        current = self._previous
+        
+        before = dict(zip(previous.ids, previous.hashes)) if previous else {}
+        after = dict(zip(current.ids, current.hashes))
+        old_checks = previous_report["checks"] if previous_report else {}
+        old_violations = set(previous_report["violations"]) if previous_report else set()
+        old_overall = previous_report["overall_compliance_percent"] if previous_report else 0
+        old_status = previous_report["status"] if previous_report else None
+        
+        report["diff"] = {
+            "added_plots": [i for i in after if i not in before],
+            "removed_plots": [i for i in before if i not in after],
+            "changed_plots": [i for i in after if i in before and before[i] != after[i]],
+            "new_violations": [v for v in report["violations"] if v not in old_violations],
+            "resolved_violations": sorted(old_violations - set(report["violations"])),
+            "score_changes": {
+                name: {"before": old_checks.get(name, {}).get("score"), "after": check["score"]}
+                for name, check in report["checks"].items()
+                if old_checks.get(name, {}).get("score") != check["score"]
+            },
+            "overall_change": round(report["overall_compliance_percent"] - old_overall, 1),
+            "status_change": (
+                {"before": old_status, "after": report["status"]}
+                if old_status != report["status"] else None
+            ),
+            "reused_plots": self.cache_hits - hits,
+            "runtime_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        logger.info(
+            f"[COMPLIANCE] Diff: {len(report['diff']['changed_plots'])} changed, "
+            f"{len(report['diff']['added_plots'])} added, "
+            f"{len(report['diff']['removed_plots'])} removed plots "
+            f"in {report['diff']['runtime_ms']:.1f} ms"
+        )
         return report
     
+    # ==================== PER-PLOT ENGINE ====================
+    
+    def _evaluate_plots(self, layout: Dict) -> _PlotState:
+        """Per-plot rule results, from the cache where the geometry is unchanged."""
+        buildings = layout.get('buildings', [])
+        n = len(buildings)
+        ids = [str(b.get('id', i)) for i, b in enumerate(buildings)]
+        if len(set(ids)) < n:
+            ids = [str(i) for i in range(n)]
+        
+        width = np.array([b.get('width_m', b.get('width', DEFAULT_PLOT_WIDTH_M)) for b in buildings], dtype=np.float64)
+        length = np.array([b.get('length_m', b.get('height', DEFAULT_PLOT_LENGTH_M)) for b in buildings], dtype=np.float64)
+        footprints, positioned = self._footprints(buildings, width, length)
+        wkb = shapely.to_wkb(footprints) if n else []
+        dims = np.column_stack([width, length]).tobytes()
+        hashes = [
+            hashlib.blake2b(w + dims[16 * i:16 * i + 16] + bytes([int(positioned[i])]), digest_size=16).hexdigest()
+            for i, w in enumerate(wkb)
+        ]
+        
+        boundary, roads, road_widths = self._site_geometry(layout.get('site', {}))
+        context = self._context_key(boundary, roads, road_widths)
+        
+        results: List[Optional[Dict]] = [None] * n
+        for i, key in enumerate(hashes):
+            cached = self._plot_cache.get((context, key))
+            if cached is not None:
+                self._plot_cache.move_to_end((context, key))
+                results[i] = cached
+        todo = np.array([i for i in range(n) if results[i] is None], dtype=np.int64)
+        self.cache_hits += n - len(todo)
+        self.cache_misses += len(todo)
+        
+        if len(todo):
+            fresh = self._plot_rules(
+                width[todo], length[todo], footprints[todo], positioned[todo], boundary, roads, road_widths
+            )
+            for i, result in zip(todo, fresh):
+                results[i] = result
+                self._plot_cache[(context, hashes[i])] = result
+            while len(self._plot_cache) > PLOT_CACHE_SIZE:
+                self._plot_cache.popitem(last=False)
+        
+        pairs = self._spacing_pairs(ids, hashes, footprints, positioned)
+        return _PlotState(ids, hashes, results, pairs, context)
+    
+    @staticmethod
+    def _footprints(buildings: List[Dict], width: np.ndarray, length: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Plot polygons: the building geometry when given, else x/y + width/length box.
+        
+        Returns:
+            (footprints, positioned); plots with neither geometry nor x and y
+            get a box at the origin and positioned False
+        """
+        positioned = np.array([
+            b.get('geometry') is not None or (b.get('x') is not None and b.get('y') is not None)
+            for b in buildings
+        ], dtype=bool)
+        x = np.array([b.get('x') or 0 for b in buildings], dtype=np.float64)
+        y = np.array([b.get('y') or 0 for b in buildings], dtype=np.float64)
+        footprints = shapely.box(x, y, x + width, y + length) if len(buildings) else np.empty(0, dtype=object)
+        for i, b in enumerate(buildings):
+            geometry = b.get('geometry')
+            if geometry is not None:
+                footprints[i] = geometry if hasattr(geometry, 'geom_type') else Polygon(geometry)
+        return footprints, positioned
+    
+    @staticmethod
+    def _site_geometry(site: Dict):
+        """Site boundary polygon and road centrelines (None where not given)."""
+        boundary = site.get('boundary')
+        if boundary is not None and not hasattr(boundary, 'geom_type'):
+            boundary = Polygon(boundary)
+        if boundary is None and site.get('width') and site.get('height'):
+            boundary = box(0, 0, site['width'], site['height'])
+        
+        roads, widths = [], []
+        for road in site.get('road_network', []):
+            line = road.get('geometry', road.get('coordinates'))
+            if line is None:
+                continue
+            roads.append(line if hasattr(line, 'geom_type') else LineString(line))
+            widths.append(float(road.get('width_m', 12)))
+        return boundary, np.array(roads, dtype=object), np.array(widths, dtype=np.float64)
+    
+    def _context_key(self, boundary, roads: np.ndarray, road_widths: np.ndarray) -> str:
+        """Hash of everything a per-plot result depends on besides the plot."""
+        digest = hashlib.blake2b(digest_size=16)
+        if boundary is not None:
+            digest.update(shapely.to_wkb(boundary))
+        for wkb in shapely.to_wkb(roads) if len(roads) else []:
+            digest.update(wkb)
+        digest.update(road_widths.tobytes())
+        digest.update(repr((self.regs.get("plot_dimensions"), self.setbacks)).encode())
+        return digest.hexdigest()
+    
+    def _plot_rules(
+        self,
+        width: np.ndarray,
+        length: np.ndarray,
+        footprints: np.ndarray,
+        positioned: np.ndarray,
+        boundary,
+        roads: np.ndarray,
+        road_widths: np.ndarray
+    ) -> List[Dict]:
+        """
+        Dimension, boundary setback and road frontage rules for a batch of plots.
+        
+        Spatial rules are skipped (distance None, rule passed) for plots
+        without a position.
+        """
+        reqs = self.regs["plot_dimensions"]
+        min_ratio, max_ratio = reqs["width_to_depth_ratio"]
+        safe_width = np.where(width > 0, width, 1.0)
+        ratio = np.where(width > 0, length / safe_width, 1.0)
+        aspect_ok = (ratio >= min_ratio) & (ratio <= max_ratio)
+        frontage_ok = width >= reqs["min_frontage_width_m"]
+        
+        n = len(footprints)
+        boundary_distance = np.full(n, np.nan)
+        boundary_ok = np.ones(n, dtype=bool)
+        placed = np.flatnonzero(positioned)
+        if boundary is not None and len(placed):
+            distance = shapely.distance(footprints[placed], boundary.exterior)
+            inside = shapely.within(footprints[placed], boundary)
+            boundary_distance[placed] = np.where(inside, distance, -distance)
+            boundary_ok[placed] = boundary_distance[placed] >= self.setbacks["boundary_setback_m"]
+        
+        road_distance = np.full(n, np.nan)
+        road_ok = np.ones(n, dtype=bool)
+        if len(roads) and len(placed):
+            (plot_idx, road_idx), distance = STRtree(roads).query_nearest(
+                footprints[placed], return_distance=True, all_matches=False
+            )
+            # Distance from the road edge (centreline distance - half the width)
+            road_distance[placed[plot_idx]] = distance - road_widths[road_idx] / 2
+            reachable = np.nan_to_num(road_distance[placed], nan=np.inf) <= self.setbacks["max_frontage_distance_m"]
+            road_ok[placed] = reachable
+        
+        return [
+            {
+                "width": float(width[i]),
+                "length": float(length[i]),
+                "ratio": float(ratio[i]),
+                "aspect_ok": bool(aspect_ok[i]),
+                "frontage_ok": bool(frontage_ok[i]),
+                "boundary_distance": None if np.isnan(boundary_distance[i]) else float(boundary_distance[i]),
+                "boundary_ok": bool(boundary_ok[i]),
+                "road_distance": None if np.isnan(road_distance[i]) else float(road_distance[i]),
+                "road_ok": bool(road_ok[i]),
+                "positioned": bool(positioned[i])
+            }
+            for i in range(n)
+        ]
+    
+    def _spacing_pairs(self, ids: List[str], hashes: List[str], footprints: np.ndarray,
+                       positioned: np.ndarray) -> set:
+        """
+        Plot pairs closer than the plot spacing.
+        
+        Pairs between plots unchanged since the previous check are reused;
+        only changed or new plots are queried against the STRtree. Plots
+        without a position take no part.
+        """
+        spacing = self.setbacks["plot_spacing_m"]
+        placed = np.flatnonzero(positioned)
+        if len(placed) < 2:
+            return set()
+        ids = [ids[i] for i in placed]
+        hashes = [hashes[i] for i in placed]
+        footprints = footprints[placed]
+        tree = STRtree(footprints)
+        
+        previous = self._previous
+        if previous is not None:
+            old = dict(zip(previous.ids, previous.hashes))
+            query = np.array([
+                i for i, (pid, key) in enumerate(zip(ids, hashes)) if old.get(pid) != key
+            ], dtype=np.int64)
+            stale = {ids[i] for i in query} | (set(old) - set(ids))
+            pairs = {p for p in previous.pairs if p[0] not in stale and p[1] not in stale}
+        else:
+            query = np.arange(len(footprints))
+            pairs = set()
+        
+        if len(query):
+            src, dst = tree.query(footprints[query], predicate='dwithin', distance=spacing)
+            for a, b in zip(query[src], dst):
+                if a != b:
+                    pairs.add((ids[a], ids[b]) if ids[a] < ids[b] else (ids[b], ids[a]))
+        return pairs
+    
     # ==================== IEAT THAILAND CHECKS ====================
     
     def _check_ieat_land_use(self, layout: Dict) -> Dict:
@@ -176,40 +488,36 @@ class ComplianceChecker:
             }
         }
     
-    def _check_ieat_plot_dimensions(self, layout: Dict) -> Dict:
+    def _check_ieat_plot_dimensions(self, layout: Dict, plots: Optional[_PlotState] = None) -> Dict:
         """
         IEAT Plot Requirements:
         - Rectangular shape (1:1.5 to 1:2)
         - Min frontage width 90m (preferred 100m)
         """
-        buildings = layout.get('buildings', [])
+        plots = plots or self._evaluate_plots(layout)
         reqs = self.regs["plot_dimensions"]
+        min_ratio, max_ratio = reqs["width_to_depth_ratio"]
         violations = []
         recommendations = []
         score = 100
         
-        for i, building in enumerate(buildings):
-            width = building.get('width_m', 50)
-            length = building.get('length_m', 80)
-            
-            # Calculate aspect ratio
-            ratio = length / width if width > 0 else 1
-            min_ratio, max_ratio = reqs["width_to_depth_ratio"]
+        for i, plot in enumerate(plots.results):
+            width = plot["width"]
             
             # Check aspect ratio (1:1.5 to 1:2)
-            if ratio < min_ratio or ratio > max_ratio:
+            if not plot["aspect_ok"]:
                 violations.append(
-                    f"Plot {i+1}: aspect ratio {ratio:.2f} outside range {min_ratio}-{max_ratio}"
+                    f"Plot {i+1}: aspect ratio {plot['ratio']:.2f} outside range {min_ratio}-{max_ratio}"
                 )
                 recommendations.append(
-                    f"Plot {i+1}: Adjust to {width}m Ã— {width * 1.5:.0f}m (optimal 1:1.5)"
+                    f"Plot {i+1}: Adjust to {width:g}m Ã— {width * 1.5:.0f}m (optimal 1:1.5)"
                 )
                 score -= 5
             
             # Check frontage width
-            if width < reqs["min_frontage_width_m"]:
+            if not plot["frontage_ok"]:
                 violations.append(
-                    f"Plot {i+1}: frontage {width}m < {reqs['min_frontage_width_m']}m minimum"
+                    f"Plot {i+1}: frontage {width:g}m < {reqs['min_frontage_width_m']}m minimum"
                 )
                 recommendations.append(
                     f"Plot {i+1}: Increase frontage to {reqs['preferred_frontage_m']}m"
@@ -222,6 +530,65 @@ class ComplianceChecker:
             "recommendations": recommendations
         }
     
+    def _check_ieat_setbacks(self, layout: Dict, plots: Optional[_PlotState] = None) -> Dict:
+        """
+        Spatial plot rules:
+        - Min spacing between plots (fire access)
+        - Boundary setback (green buffer strip)
+        - Road frontage within reach of a road (when roads carry geometry)
+        """
+        plots = plots or self._evaluate_plots(layout)
+        setbacks = self.setbacks
+        index = {pid: i for i, pid in enumerate(plots.ids)}
+        violations = []
+        recommendations = []
+        score = 100
+        
+        for a, b in sorted(plots.pairs, key=lambda p: (index[p[0]], index[p[1]])):
+            violations.append(
+                f"Plots {index[a]+1} and {index[b]+1}: closer than {setbacks['plot_spacing_m']}m spacing"
+            )
+            score -= 5
+        
+        unchecked = [i + 1 for i, plot in enumerate(plots.results) if not plot["positioned"]]
+        if unchecked:
+            recommendations.append(
+                f"Plots {', '.join(map(str, unchecked))}: no position (geometry or x/y); "
+                f"spacing, boundary setback and road frontage not checked"
+            )
+        
+        for i, plot in enumerate(plots.results):
+            if not plot["boundary_ok"]:
+                violations.append(
+                    f"Plot {i+1}: {plot['boundary_distance']:.1f}m from site boundary < "
+                    f"{setbacks['boundary_setback_m']}m setback"
+                )
+                recommendations.append(
+                    f"Plot {i+1}: Move inside the {setbacks['boundary_setback_m']}m boundary buffer"
+                )
+                score -= 5
+            if not plot["road_ok"]:
+                violations.append(
+                    f"Plot {i+1}: no road within {setbacks['max_frontage_distance_m']}m (no frontage)"
+                )
+                score -= 5
+        
+        if plots.pairs:
+            recommendations.append(
+                f"Keep {setbacks['plot_spacing_m']}m between plots for fire access"
+            )
+        
+        return {
+            "score": max(0, score),
+            "violations": violations,
+            "recommendations": recommendations,
+            "metrics": {
+                "plots": len(plots.results),
+                "spacing_conflicts": len(plots.pairs),
+                "unchecked_plots": len(unchecked)
+            }
+        }
+    
     def _check_ieat_roads(self, layout: Dict) -> Dict:
         """
         IEAT Road Standards:
@@ -4,11 +4,12 @@ Combines AI chat parameters with advanced optimization algorithms
 """
 
 import logging
-import requests
+import threading
 from typing import Dict, List, Optional, Any
 from shapely.geometry import Polygon, mapping, shape
 import json
 from .terrain_layout_adapter import TerrainLayoutAdapter
+from .redistribution_transport import RedistributionCancelled, get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -19,13 +20,33 @@ class EnhancedLayoutGenerator:
     Workflow: Chat AI Parameters → Land Redistribution → Enhanced Elements
     """
     
-    def __init__(self, redistribution_api_url: str = "http://localhost:7860"):
+    def __init__(
+        self,
+        redistribution_api_url: str = "http://localhost:7860",
+        transport: str = "auto"
+    ):
+        """
+        Args:
+            redistribution_api_url: Land redistribution service URL
+            transport: "auto" (in-process pipeline when importable, else
+                HTTP), "inprocess" or "http"
+        """
         self.redistribution_api_url = redistribution_api_url
+        self.transport_mode = transport
+        self._transport = None
+    
+    @property
+    def transport(self):
+        """Redistribution transport, resolved on first use."""
+        if self._transport is None:
+            self._transport = get_transport(self.redistribution_api_url, self.transport_mode)
+        return self._transport
         
     def generate_comprehensive_layout(
         self, 
         design_params: Dict[str, Any],
-        site_boundary: Polygon
+        site_boundary: Polygon,
+        cancel: Optional[threading.Event] = None
     ) -> Dict[str, Any]:
         """
         Generate complete industrial park layout with diverse elements.
@@ -41,6 +62,8 @@ class EnhancedLayoutGenerator:
                 - infrastructure: Infrastructure specifications
                 
             site_boundary: Shapely Polygon of site boundary
+            cancel: Set when the caller goes away (e.g. client disconnect);
+                raises RedistributionCancelled instead of waiting
             
         Returns:
             Comprehensive layout with:
@@ -63,7 +86,10 @@ class EnhancedLayoutGenerator:
         
         # Step 2: Call Land Redistribution API
         try:
-            layout_result = self._call_redistribution_api(optim_request)
+            layout_result = self._call_redistribution_api(optim_request, cancel)
+        except RedistributionCancelled:
+            logger.info("[ENHANCED] Layout generation cancelled by caller")
+            raise
         except Exception as e:
             logger.error(f"[ENHANCED] Redistribution API failed: {e}")
             # Fallback to simple grid layout
@@ -105,7 +131,8 @@ class EnhancedLayoutGenerator:
             total_area = design_params.get("totalArea_ha", 100) * 10000
             grading_costs = terrain_adapter.calculate_grading_cost(
                 total_area,
-                design_params.get("terrain", {})
+                design_params.get("terrain", {}),
+                plots=enhanced_layout.get("plots")
             )
             enhanced_layout["grading_costs"] = grading_costs
         
@@ -235,22 +262,15 @@ class EnhancedLayoutGenerator:
         else:
             return max(20, int(area_ha / 10))
     
-    def _call_redistribution_api(self, request: Dict) -> Dict:
-        """Call Land Redistribution API endpoint."""
-        url = f"{self.redistribution_api_url}/api/optimize"
-        
-        logger.info(f"[ENHANCED] Calling redistribution API: {url}")
-        
-        response = requests.post(
-            url, 
-            json=request,
-            timeout=120  # 2 minutes timeout
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"API returned {response.status_code}: {response.text}")
+    def _call_redistribution_api(
+        self,
+        request: Dict,
+        cancel: Optional[threading.Event] = None
+    ) -> Dict:
+        """Run the Land Redistribution pipeline (in-process or pooled HTTP)."""
+        logger.info(f"[ENHANCED] Calling redistribution pipeline via {type(self.transport).__name__}")
         
-        result = response.json()
+        result = self.transport.optimize(request, cancel=cancel)
         logger.info(f"[ENHANCED] Received {len(result.get('stages', []))} optimization stages")
         
         return result
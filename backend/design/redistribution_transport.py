@@ -0,0 +1,314 @@
+"""
+Redistribution Transport - how layout generation reaches the land
+redistribution pipeline (backend/docker).
+
+- in-process: when the pipeline package is importable, requests are
+  validated with the service's own request schema and run on plain dicts
+  (no HTTP, no JSON) in a local worker process, which is terminated when
+  the run is cancelled or times out
+- HTTP: one pooled keep-alive session per service URL and client settings,
+  a bounded retry budget for connection errors and 502/503, gzip-compressed
+  request bodies and gzip responses; requests wait on their own thread pool
+- both honour a cancellation token (threading.Event): the caller is
+  released as soon as it is set, and every wait is bounded
+"""
+
+import gzip
+import importlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Land redistribution service sources (pipeline/, core/, api/schemas/)
+PIPELINE_DIR = Path(__file__).resolve().parent.parent / "docker"
+
+# HTTP client
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 120.0
+RETRY_BUDGET = 2           # connection errors / 502-503 only; slow or timed-out runs are not retried
+RETRY_BACKOFF = 0.5
+POOL_SIZE = 4
+
+# Runs in flight at once per transport (worker processes / HTTP wait threads)
+MAX_CONCURRENT_RUNS = 4
+
+# How often a waiting caller checks its cancellation token (s)
+CANCEL_POLL_INTERVAL = 0.2
+
+
+class RedistributionError(Exception):
+    """The redistribution service rejected or failed a request."""
+
+
+class RedistributionCancelled(Exception):
+    """The caller cancelled the request before a result arrived."""
+
+
+# HTTP calls block one of these threads; the caller waits on the future
+_http_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_RUNS, thread_name_prefix="redistribution-http")
+
+# In-process runs: one worker process each, at most MAX_CONCURRENT_RUNS at once
+_run_slots = threading.BoundedSemaphore(MAX_CONCURRENT_RUNS)
+
+
+def _check(cancel: Optional[threading.Event], deadline: float, timeout: float):
+    """Raise when cancel is set or the deadline has passed."""
+    if cancel is not None and cancel.is_set():
+        raise RedistributionCancelled("Redistribution request cancelled by caller")
+    if time.monotonic() >= deadline:
+        raise TimeoutError(f"Redistribution request timed out after {timeout:.0f}s")
+
+
+def _wait(future: Future, cancel: Optional[threading.Event], timeout: float) -> Any:
+    """Result of future, giving up when cancel is set or timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not future.done():
+        _check(cancel, deadline, timeout)
+        if cancel is not None:
+            cancel.wait(CANCEL_POLL_INTERVAL)
+        else:
+            time.sleep(CANCEL_POLL_INTERVAL)
+    return future.result()
+
+
+def _run_pipeline(conn, run_optimization, land_plots, config):
+    """Worker process: run the pipeline, send back (ok, result or error)."""
+    try:
+        conn.send((True, run_optimization(land_plots, config)))
+    except BaseException as e:
+        conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class InProcessTransport:
+    """Run LandRedistributionPipeline locally, in a worker process per run."""
+
+    _lock = threading.Lock()
+    _modules: Optional[tuple] = None
+    _unavailable: Optional[str] = None
+
+    @classmethod
+    def load(cls):
+        """(run_optimization, request schema module), importing once."""
+        with cls._lock:
+            if cls._modules is None and cls._unavailable is None:
+                try:
+                    cls._modules = cls._import()
+                except Exception as e:  # missing solver deps, broken checkout, ...
+                    cls._unavailable = str(e)
+                    logger.info(f"[REDISTRIBUTION] In-process pipeline unavailable: {e}")
+            if cls._modules is None:
+                raise ImportError(cls._unavailable)
+            return cls._modules
+
+    @staticmethod
+    def _import():
+        # The service imports its packages (pipeline, core) top-level;
+        # appended so they never shadow this backend's own packages
+        if str(PIPELINE_DIR) not in sys.path:
+            sys.path.append(str(PIPELINE_DIR))
+        run_optimization = importlib.import_module("pipeline.optimization_response").run_optimization
+
+        # Load the schema module by path: the service's "api" package name
+        # is taken by this backend
+        path = PIPELINE_DIR / "api" / "schemas" / "request_schemas.py"
+        spec = importlib.util.spec_from_file_location("redistribution_request_schemas", path)
+        schemas = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(schemas)
+        return run_optimization, schemas
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            cls.load()
+            return True
+        except ImportError:
+            return False
+
+    def optimize(
+        self,
+        request: Dict[str, Any],
+        cancel: Optional[threading.Event] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Validate and run one /api/optimize request locally.
+
+        The pipeline runs in a worker process, so a cancelled or timed-out
+        run is terminated rather than left running.
+
+        Args:
+            timeout: Seconds before the run is abandoned (READ_TIMEOUT by
+                default, like the HTTP transport)
+
+        Raises:
+            RedistributionError: Invalid request (HTTP 422 equivalent) or
+                pipeline failure
+            RedistributionCancelled: cancel was set first
+            TimeoutError: The run did not finish within timeout
+        """
+        run_optimization, schemas = self.load()
+        try:
+            validated = schemas.OptimizationRequest(**request)
+        except Exception as e:
+            raise RedistributionError(f"Invalid redistribution request: {e}") from e
+
+        land_plots = [plot.dict() for plot in validated.land_plots]
+        config = validated.config.dict()
+        timeout = timeout or READ_TIMEOUT
+        deadline = time.monotonic() + timeout
+
+        while not _run_slots.acquire(timeout=CANCEL_POLL_INTERVAL):
+            _check(cancel, deadline, timeout)
+        try:
+            logger.info(f"[REDISTRIBUTION] Running pipeline locally ({len(land_plots)} land plots)")
+            ok, payload = self._run(run_optimization, land_plots, config, cancel, deadline, timeout)
+        finally:
+            _run_slots.release()
+        if not ok:
+            raise RedistributionError(f"Redistribution pipeline failed: {payload}")
+        return payload
+
+    @staticmethod
+    def _run(run_optimization, land_plots, config, cancel, deadline: float, timeout: float) -> Tuple[bool, Any]:
+        """Run the pipeline in a worker process; terminate it on cancel / timeout."""
+        context = multiprocessing.get_context()
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_run_pipeline, args=(sender, run_optimization, land_plots, config),
+            name="redistribution-run", daemon=True
+        )
+        process.start()
+        sender.close()
+        try:
+            while not receiver.poll(CANCEL_POLL_INTERVAL):
+                if not process.is_alive() and not receiver.poll():
+                    return False, f"worker exited with code {process.exitcode}"
+                _check(cancel, deadline, timeout)
+            return receiver.recv()
+        except EOFError:
+            return False, f"worker exited with code {process.exitcode}"
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            receiver.close()
+
+
+class HttpTransport:
+    """POST /api/optimize over a pooled keep-alive session."""
+
+    _sessions: Dict[Tuple[str, int, int], requests.Session] = {}
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = READ_TIMEOUT,
+        retries: int = RETRY_BUDGET,
+        pool_size: int = POOL_SIZE
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.session = self._session(self.base_url, retries, pool_size)
+
+    @classmethod
+    def _session(cls, base_url: str, retries: int, pool_size: int) -> requests.Session:
+        """Shared session per service URL and settings (connections stay open between calls)."""
+        key = (base_url, retries, pool_size)
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                retry = Retry(
+                    total=retries,
+                    connect=retries,
+                    read=0,
+                    status=retries,
+                    backoff_factor=RETRY_BACKOFF,
+                    # 502 / 503: the gateway or service refused the run. Not 504:
+                    # the run may still be going, so re-POSTing would start another
+                    status_forcelist=(502, 503),
+                    allowed_methods=None,  # POST too: only failures before the run started are retried
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip", "Connection": "keep-alive"})
+                cls._sessions[key] = session
+            return session
+
+    @classmethod
+    def close_all(cls):
+        """Close pooled connections (application shutdown)."""
+        with cls._lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
+
+    def optimize(
+        self,
+        request: Dict[str, Any],
+        cancel: Optional[threading.Event] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        POST one request with a gzip-compressed JSON body.
+
+        Raises:
+            RedistributionError: Non-200 response
+            RedistributionCancelled: cancel was set first
+            TimeoutError: No response within the retry budget's timeouts
+        """
+        url = f"{self.base_url}/api/optimize"
+        body = gzip.compress(json.dumps(request, separators=(",", ":")).encode(), compresslevel=5)
+        read_timeout = timeout or self.timeout
+        logger.info(f"[REDISTRIBUTION] POST {url} ({len(body) / 1024:.1f} KB gzip)")
+
+        def post():
+            return self.session.post(
+                url,
+                data=body,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=(CONNECT_TIMEOUT, read_timeout)
+            )
+
+        # Every attempt is bounded by the session timeouts; the wait covers them all
+        attempts = self.retries + 1
+        wait_timeout = attempts * (CONNECT_TIMEOUT + read_timeout) + RETRY_BACKOFF * 2 ** attempts
+        response = _wait(_http_executor.submit(post), cancel, wait_timeout)
+        if response.status_code != 200:
+            raise RedistributionError(f"API returned {response.status_code}: {response.text[:500]}")
+        return response.json()
+
+
+def get_transport(base_url: str, mode: str = "auto"):
+    """
+    Transport for a redistribution service.
+
+    Args:
+        base_url: Service URL (used by the HTTP transport)
+        mode: "auto" (in-process when importable, else HTTP),
+            "inprocess" or "http"
+    """
+    if mode not in ("auto", "inprocess", "http"):
+        raise ValueError(f"Unknown redistribution transport: {mode}")
+    if mode == "inprocess" or (mode == "auto" and InProcessTransport.available()):
+        return InProcessTransport()
+    return HttpTransport(base_url)
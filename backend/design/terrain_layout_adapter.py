@@ -4,10 +4,13 @@ Adjusts layout generation based on terrain strategy
 """
 
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from shapely.geometry import Polygon, Point, LineString
 import numpy as np
 
+from optimization.elevation_raster import ElevationRaster
+from optimization.zonal_stats import zonal_statistics, CUT_COST_PER_M3, FILL_COST_PER_M3
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,86 +83,111 @@ class TerrainLayoutAdapter:
     def calculate_grading_cost(
         self,
         site_area_m2: float,
-        elevation_data: Dict = None
+        elevation_data: Dict = None,
+        plots: List[Any] = None
     ) -> Dict[str, float]:
         """
         Estimate grading costs based on strategy.
         
+        When elevation_data carries an elevation grid and plots are given,
+        earthwork volumes are measured cell by cell over the plots (zonal
+        statistics) instead of using the per-strategy average depths.
+        
         Args:
             site_area_m2: Site area in square meters
             elevation_data: Optional elevation data
+            plots: Optional plot polygons (or dicts with a 'geometry')
             
         Returns:
             Cost breakdown
         """
         # Cost parameters (VND)
-        cut_cost_per_m3 = 50_000
-        fill_cost_per_m3 = 80_000
+        cut_cost_per_m3 = CUT_COST_PER_M3
+        fill_cost_per_m3 = FILL_COST_PER_M3
         retaining_wall_per_m = 2_000_000
         
+        measured = self._measure_earthwork(elevation_data, plots)
+        
         if self.strategy == "minimal_cut":
             # Minimal earthwork, more retaining walls
             estimated_cut_fill_m3 = site_area_m2 * 0.3  # 30cm avg
             retaining_wall_length_m = site_area_m2 * 0.02  # 2% perimeter
-            
             earthwork_cost = estimated_cut_fill_m3 * cut_cost_per_m3
-            wall_cost = retaining_wall_length_m * retaining_wall_per_m
-            total = earthwork_cost + wall_cost
-            
-            logger.info(f"[TERRAIN] Minimal cut cost: {total/1e9:.2f}B VND")
-            
-            return {
-                "strategy": "minimal_cut",
-                "earthwork_volume_m3": estimated_cut_fill_m3,
-                "earthwork_cost": earthwork_cost,
-                "retaining_walls_m": retaining_wall_length_m,
-                "retaining_wall_cost": wall_cost,
-                "total_cost": total,
-                "cost_per_m2": total / site_area_m2
-            }
-            
+            strategy, label = "minimal_cut", "Minimal cut"
         elif self.strategy == "major_grading":
             # Maximum earthwork, flatten everything
             estimated_cut_fill_m3 = site_area_m2 * 2.0  # 2m avg depth
             retaining_wall_length_m = 0  # No walls needed
-            
             earthwork_cost = estimated_cut_fill_m3 * \
                 (cut_cost_per_m3 + fill_cost_per_m3) / 2
-            total = earthwork_cost
-            
-            logger.info(f"[TERRAIN] Major grading cost: {total/1e9:.2f}B VND")
-            
-            return {
-                "strategy": "major_grading",
-                "earthwork_volume_m3": estimated_cut_fill_m3,
-                "earthwork_cost": earthwork_cost,
-                "retaining_walls_m": 0,
-                "retaining_wall_cost": 0,
-                "total_cost": total,
-                "cost_per_m2": total / site_area_m2
-            }
-            
+            strategy, label = "major_grading", "Major grading"
         else:  # balanced_cut_fill
             # Moderate earthwork
             estimated_cut_fill_m3 = site_area_m2 * 1.0  # 1m avg
             retaining_wall_length_m = site_area_m2 * 0.01  # 1% perimeter
-            
             earthwork_cost = estimated_cut_fill_m3 * \
                 (cut_cost_per_m3 + fill_cost_per_m3) / 2
-            wall_cost = retaining_wall_length_m * retaining_wall_per_m
-            total = earthwork_cost + wall_cost
-            
-            logger.info(f"[TERRAIN] Balanced cost: {total/1e9:.2f}B VND")
-            
-            return {
-                "strategy": "balanced_cut_fill",
-                "earthwork_volume_m3": estimated_cut_fill_m3,
-                "earthwork_cost": earthwork_cost,
-                "retaining_walls_m": retaining_wall_length_m,
-                "retaining_wall_cost": wall_cost,
-                "total_cost": total,
-                "cost_per_m2": total / site_area_m2
-            }
+            strategy, label = "balanced_cut_fill", "Balanced"
+        
+        if measured:
+            estimated_cut_fill_m3 = measured["cut_m3"] + measured["fill_m3"]
+            earthwork_cost = measured["cut_m3"] * cut_cost_per_m3 + \
+                measured["fill_m3"] * fill_cost_per_m3
+        
+        wall_cost = retaining_wall_length_m * retaining_wall_per_m
+        total = earthwork_cost + wall_cost
+        
+        logger.info(f"[TERRAIN] {label} cost: {total/1e9:.2f}B VND"
+                    f"{' (measured)' if measured else ''}")
+        
+        result = {
+            "strategy": strategy,
+            "earthwork_volume_m3": estimated_cut_fill_m3,
+            "earthwork_cost": earthwork_cost,
+            "retaining_walls_m": retaining_wall_length_m,
+            "retaining_wall_cost": wall_cost,
+            "total_cost": total,
+            "cost_per_m2": total / site_area_m2
+        }
+        if measured:
+            result.update({
+                "cut_volume_m3": measured["cut_m3"],
+                "fill_volume_m3": measured["fill_m3"],
+                "measured": True
+            })
+        return result
+    
+    def _measure_earthwork(
+        self,
+        elevation_data: Dict,
+        plots: List[Any]
+    ) -> Optional[Dict[str, float]]:
+        """
+        Cell-exact cut/fill over the plots for this strategy's platform levels.
+        
+        Returns:
+            {'cut_m3', 'fill_m3'}, or None without an elevation grid or plots
+        """
+        if not plots or not elevation_data:
+            return None
+        if not ("raster" in elevation_data or
+                ("x_coords" in elevation_data and
+                 ("grid" in elevation_data or "elevation_grid" in elevation_data))):
+            return None
+        
+        geometries = [p.get("geometry") if isinstance(p, dict) else p for p in plots]
+        try:
+            raster = ElevationRaster.from_grid(elevation_data)
+            stats = zonal_statistics(raster, geometries)
+        except Exception as e:
+            logger.warning(f"[TERRAIN] Earthwork measurement failed, using estimates: {e}")
+            return None
+        
+        volumes = stats.cut_fill(stats.platform_levels(self.strategy))
+        return {
+            "cut_m3": float(volumes["cut_m3"].sum()),
+            "fill_m3": float(volumes["fill_m3"].sum())
+        }
     
     def _follow_contours(
         self,
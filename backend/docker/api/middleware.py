@@ -0,0 +1,67 @@
+"""
+ASGI middleware for compressed request bodies.
+
+Clients (the main backend's redistribution transport) may send large
+GeoJSON payloads with Content-Encoding: gzip; the body is inflated before
+it reaches FastAPI, so routes see plain JSON.
+"""
+
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Refuse request bodies that inflate beyond this
+MAX_INFLATED_BYTES = 256 * 1024 * 1024
+
+
+class GZipRequestMiddleware:
+    """Inflate gzip-encoded request bodies."""
+
+    def __init__(self, app, max_size: int = MAX_INFLATED_BYTES):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"content-encoding", b"").lower() != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        more = True
+        while more:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+
+        try:
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decoder.decompress(b"".join(chunks), self.max_size)
+            if decoder.unconsumed_tail:
+                raise ValueError(f"inflated body exceeds {self.max_size} bytes")
+        except (ValueError, zlib.error) as e:
+            logger.warning(f"[GZIP] Rejecting request body: {e}")
+            await send({"type": "http.response.start", "status": 400,
+                        "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Invalid gzip request body"})
+            return
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (b"content-length", str(len(body)).encode()) if key == b"content-length" else (key, value)
+            for key, value in scope["headers"] if key != b"content-encoding"
+        ]
+        sent = False
+
+        async def inflated_receive():
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, inflated_receive, send)
@@ -4,16 +4,15 @@ import logging
 import uuid
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 
-from utils.dxf_utils import load_boundary_from_dxf, export_to_dxf, validate_dxf
+from api.stores import sessions
+from utils.dxf_stream import ASCII, BINARY
+from utils.dxf_utils import load_boundary_from_dxf, build_dxf_writer, validate_dxf
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Session storage (in-memory for now)
-sessions = {}
-
 
 @router.post("/upload-dxf")
 async def upload_dxf(file: UploadFile = File(...)):
@@ -84,14 +83,18 @@ async def export_dxf_endpoint(request: dict):
     """
     Export optimization results to DXF format.
     
-    Expects: {"result": OptimizationResponse}
-    Returns: DXF file
+    Expects: {"result": OptimizationResponse, "format": "ascii" | "binary"}
+    Returns: DXF file, streamed in chunks (binary DXF is ~half the size)
     """
     try:
         result = request.get('result')
         if not result:
             raise HTTPException(status_code=400, detail="No result data provided")
         
+        dxf_format = str(request.get('format', 'ascii')).lower()
+        if dxf_format not in ('ascii', 'binary'):
+            raise HTTPException(status_code=400, detail=f"Unknown DXF format: {dxf_format}")
+        
         geometries = []
         
         if 'final_layout' in result and result['final_layout']:
@@ -105,13 +108,14 @@ async def export_dxf_endpoint(request: dict):
         if not geometries:
             raise HTTPException(status_code=400, detail="No geometries to export")
         
-        dxf_bytes = export_to_dxf(geometries)
+        writer = build_dxf_writer(geometries)
         
-        if not dxf_bytes:
-            raise HTTPException(status_code=500, detail="Failed to generate DXF")
+        if writer.entity_count == 0:
+            raise HTTPException(status_code=400, detail="No valid geometries to export")
         
-        return Response(
-            content=dxf_bytes,
+        # Sync generator: Starlette iterates it in the threadpool
+        return StreamingResponse(
+            writer.iter_chunks(BINARY if dxf_format == 'binary' else ASCII),
             media_type="application/dxf",
             headers={
                 "Content-Disposition": "attachment; filename=land_redistribution.dxf"
@@ -4,14 +4,11 @@ import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from api.routes.dxf_routes import sessions
+from api.stores import sessions, estates_db
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Estate database (in-memory)
-estates_db = {}
-
 
 class EstateMetadata(BaseModel):
     """Estate metadata model."""
@@ -24,11 +21,12 @@ class EstateMetadata(BaseModel):
 @router.get("/session/{session_id}")
 async def get_session(session_id: str):
     """Get session data by ID."""
-    if session_id not in sessions:
+    session = sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
     
     # Return session data but exclude non-serializable Polygon object
-    session_data = sessions[session_id].copy()
+    session_data = session.copy()
     session_data.pop("polygon", None)
     
     return session_data
@@ -37,17 +35,19 @@ async def get_session(session_id: str):
 @router.post("/session/{session_id}/metadata")
 async def update_session_metadata(session_id: str, metadata: dict):
     """Update session metadata - accepts flexible dict to support all frontend fields."""
-    if session_id not in sessions:
+    session = sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
     
     # Update session with all metadata fields from frontend
-    sessions[session_id]["metadata"].update(metadata)
+    session["metadata"].update(metadata)
+    sessions[session_id] = session
     
     # Store in estates database
     estates_db[session_id] = {
         "session_id": session_id,
-        "metadata": sessions[session_id]["metadata"],
-        "boundary": sessions[session_id]["boundary"]
+        "metadata": session["metadata"],
+        "boundary": session["boundary"]
     }
     
     estate_name = metadata.get("estate_name") or metadata.get("name", "Unknown")
@@ -63,22 +63,26 @@ async def update_session_metadata(session_id: str, metadata: dict):
 @router.get("/estates")
 async def list_estates():
     """List all estates."""
+    estates = estates_db.values()
     return {
-        "estates": list(estates_db.values()),
-        "count": len(estates_db)
+        "estates": estates,
+        "count": len(estates)
     }
 
 
 @router.get("/estate/{session_id}")
 async def get_estate(session_id: str):
     """Get estate details."""
-    if session_id in estates_db:
-        return estates_db[session_id]
-    elif session_id in sessions:
+    estate = estates_db.get(session_id)
+    if estate is not None:
+        return estate
+    
+    session = sessions.get(session_id)
+    if session is not None:
         return {
             "session_id": session_id,
-            "metadata": sessions[session_id]["metadata"],
-            "boundary": sessions[session_id]["boundary"]
+            "metadata": session["metadata"],
+            "boundary": session["boundary"]
         }
     else:
         raise HTTPException(status_code=404, detail=f"Estate {session_id} not found")
@@ -27,6 +27,13 @@ class AlgorithmConfig(BaseModel):
     generations: int = Field(default=100, ge=10, le=500, description="Number of generations")
     ortools_time_limit: float = Field(default=5.0, ge=0.1, le=60.0, description="OR-Tools solver time limit per block (seconds)")
 
+    # Site elevation model (road grade profiling is skipped without one)
+    elevation_grid: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Site elevation grid: {'grid': [[z, ...], ...], 'x_coords': [...], 'y_coords': [...]} "
+                    "in the land plot coordinates (rows follow y_coords, columns x_coords)"
+    )
+
 
 class LandPlot(BaseModel):
     """A land plot represented as a GeoJSON polygon."""
@@ -0,0 +1,56 @@
+"""
+Bounded stores for upload sessions, estates and optimization results.
+
+Backend and limits come from the environment:
+- SESSION_STORE_URL: memory:// (default), sqlite:///sessions.db or redis://...
+- SESSION_TTL_SECONDS: idle time before an entry expires (default 7 days)
+- SESSION_STORE_MAX_ITEMS / SESSION_STORE_MAX_BYTES: LRU budgets
+"""
+
+import os
+
+from utils.session_store import create_session_store
+
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "memory://")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 7 * 24 * 3600))
+SESSION_STORE_MAX_ITEMS = int(os.getenv("SESSION_STORE_MAX_ITEMS", 1000))
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Uploaded DXF sessions (boundary GeoJSON + Shapely polygon + metadata)
+sessions = create_session_store(
+    "sessions",
+    SESSION_STORE_URL,
+    default_ttl=SESSION_TTL_SECONDS,
+    max_items=SESSION_STORE_MAX_ITEMS,
+    max_bytes=SESSION_STORE_MAX_BYTES,
+    sliding=True
+)
+
+# Estates registered from session metadata
+estates_db = create_session_store(
+    "estates",
+    SESSION_STORE_URL,
+    default_ttl=SESSION_TTL_SECONDS,
+    max_items=SESSION_STORE_MAX_ITEMS,
+    max_bytes=SESSION_STORE_MAX_BYTES,
+    sliding=True
+)
+
+# Optimization results (the latest one under LAST_RESULT_KEY)
+optimization_results = create_session_store(
+    "optimization_results",
+    SESSION_STORE_URL,
+    default_ttl=24 * 3600,
+    max_items=16,
+    max_bytes=SESSION_STORE_MAX_BYTES
+)
+LAST_RESULT_KEY = "last"
+
+
+def store_stats() -> dict:
+    """Usage metrics for all stores."""
+    return {
+        "sessions": sessions.info(),
+        "estates": estates_db.info(),
+        "optimization_results": optimization_results.info()
+    }
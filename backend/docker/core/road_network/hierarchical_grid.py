@@ -11,7 +11,7 @@ Matches real Vietnamese industrial estate master plans
 """
 
 import logging
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 from shapely.geometry import Polygon, LineString, Point, MultiPolygon
 from shapely.ops import unary_union, split
 from shapely.affinity import scale
@@ -25,7 +25,8 @@ def create_hierarchical_roads(
     site_boundary: Polygon,
     perimeter_width: float = 20.0,
     main_width: float = 14.0,
-    secondary_width: float = 7.0
+    secondary_width: float = 7.0,
+    centerlines: Optional[List[Dict[str, Any]]] = None
 ) -> Tuple[Polygon, List[Dict[str, Any]], List[Polygon]]:
     """
     Create HIERARCHICAL road network matching reference design
@@ -41,6 +42,8 @@ def create_hierarchical_roads(
         perimeter_width: Perimeter road width (default 20m)
         main_width: Main divider road width (default 14m)
         secondary_width: Internal road width (default 7m)
+        centerlines: Optional list that receives the road centrelines as
+            {'geometry', 'width', 'type'} dicts
         
     Returns:
         (road_network_polygon, blocks_with_metadata, landscape_features)
@@ -74,6 +77,14 @@ def create_hierarchical_roads(
             # Clip to ensure strictly within boundary
             perimeter_clipped = perimeter_road.intersection(site_boundary)
             road_polygons.append(perimeter_clipped)
+            if centerlines is not None:
+                middle = site_boundary.buffer(-perimeter_buffer / 2.0)
+                if middle.geom_type == 'Polygon' and not middle.is_empty:
+                    centerlines.append({
+                        'geometry': LineString(middle.exterior.coords),
+                        'width': perimeter_buffer,  # the band actually occupied
+                        'type': 'perimeter'
+                    })
             logger.info(f"[PERIMETER] Created {perimeter_width}m perimeter road")
     else:
         # Site too small for perimeter road
@@ -127,6 +138,12 @@ def create_hierarchical_roads(
         for line in main_road_lines:
             # Clip to working area first
             clipped = line.intersection(working_area)
+            if centerlines is not None:
+                centerlines.extend(
+                    {'geometry': seg, 'width': main_width, 'type': 'main'}
+                    for seg in getattr(clipped, 'geoms', [clipped])
+                    if seg.geom_type == 'LineString' and not seg.is_empty
+                )
             if not clipped.is_empty:
                 if clipped.geom_type == 'LineString':
                     road_poly = clipped.buffer(main_width / 2.0)
@@ -222,6 +239,12 @@ def create_hierarchical_roads(
             secondary_polys = []
             for line in secondary_lines:
                 clipped = line.intersection(block)
+                if centerlines is not None:
+                    centerlines.extend(
+                        {'geometry': seg, 'width': secondary_road_width, 'type': 'secondary'}
+                        for seg in getattr(clipped, 'geoms', [clipped])
+                        if seg.geom_type == 'LineString' and not seg.is_empty
+                    )
                 if not clipped.is_empty:
                     if clipped.geom_type == 'LineString':
                         road_poly = clipped.buffer(secondary_road_width / 2.0)
@@ -0,0 +1,300 @@
+"""
+Road Grade Profiling
+
+Longitudinal profiles for any number of road centrelines at once:
+- every road is sampled at a fixed chainage spacing in one
+  shapely.line_interpolate_point call
+- ground elevations are bilinearly interpolated from the elevation grid
+  with scipy.ndimage.map_coordinates (or taken from an elevation function)
+- per-road max / mean / end-to-end grade
+- optional design profile limited to a maximum grade, with the cut/fill
+  between design and ground per road
+
+Self-contained (numpy / scipy / shapely only): this is the only copy, it
+ships with the standalone service and the main backend re-exports it as
+optimization.road_profile.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import shapely
+from scipy import ndimage
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPACING = 10.0  # m between profile samples
+
+
+@dataclass
+class RoadProfile:
+    """Longitudinal profile of one road."""
+
+    length: float
+    chainage: np.ndarray = field(repr=False)
+    x: np.ndarray = field(repr=False)
+    y: np.ndarray = field(repr=False)
+    ground: np.ndarray = field(repr=False)
+    design: np.ndarray = field(repr=False)
+    max_grade: float
+    mean_grade: float
+    end_grade: float
+    cut_m3: float = 0.0
+    fill_m3: float = 0.0
+
+    @property
+    def grades(self) -> np.ndarray:
+        """Ground grade (%) of each sample interval."""
+        ds = np.diff(self.chainage)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(ds > 0, np.diff(self.ground) / ds * 100, 0.0)
+
+    def to_dict(self, include_profile: bool = False) -> Dict:
+        """JSON-friendly summary (optionally with the sampled profile)."""
+        result = {
+            'length_m': float(self.length),
+            'max_grade': float(self.max_grade),
+            'mean_grade': float(self.mean_grade),
+            'end_grade': float(self.end_grade),
+            'cut_m3': float(self.cut_m3),
+            'fill_m3': float(self.fill_m3)
+        }
+        if include_profile:
+            result['profile'] = {
+                'chainage': self.chainage.round(2).tolist(),
+                'ground': np.where(np.isnan(self.ground), None, self.ground.round(3)).tolist(),
+                'design': np.where(np.isnan(self.design), None, self.design.round(3)).tolist()
+            }
+        return result
+
+
+ElevationSource = Union[Callable[[np.ndarray, np.ndarray], np.ndarray], Dict, object]
+
+
+def _as_lines(road) -> List[BaseGeometry]:
+    """
+    Component LineStrings of a road given as geometry, GeoJSON or a dict
+    with 'geometry' (empty for non-line geometries).
+    """
+    if isinstance(road, dict):
+        road = road['geometry'] if 'geometry' in road else shape(road)
+        if isinstance(road, dict):
+            road = shape(road)
+    if not isinstance(road, BaseGeometry) or road.is_empty:
+        return []
+    if road.geom_type in ('LineString', 'LinearRing'):
+        return [road]
+    if road.geom_type in ('MultiLineString', 'GeometryCollection'):
+        return [line for g in road.geoms for line in _as_lines(g)]
+    return []
+
+
+def grid_sampler(elevation: ElevationSource) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    """
+    Bilinear elevation lookup for an elevation source.
+
+    Accepts a callable (x, y) -> z, an object with ``data`` and an affine
+    ``transform`` (ElevationRaster), or a terrain / grid dict with
+    'elevation_grid' or 'grid' plus 'x_coords' / 'y_coords'. Points outside
+    the grid get NaN.
+    """
+    if callable(elevation):
+        return lambda x, y: np.asarray(elevation(x, y), dtype=np.float64)
+
+    if isinstance(elevation, dict) and elevation.get('raster') is not None:
+        elevation = elevation['raster']
+
+    if hasattr(elevation, 'transform') and hasattr(elevation, 'data'):
+        t = elevation.transform
+        grid = np.asarray(elevation.data)
+        x0, y0, dx, dy = t[2], t[5], t[0], t[4]
+    else:
+        grid = elevation['elevation_grid'] if 'elevation_grid' in elevation else elevation['grid']
+        if isinstance(grid, dict):
+            return grid_sampler(grid)
+        grid = np.asarray(grid)
+        x_coords = np.asarray(elevation['x_coords'])
+        y_coords = np.asarray(elevation['y_coords'])
+        x0, y0 = float(x_coords[0]), float(y_coords[0])
+        dx = float(x_coords[1] - x_coords[0]) if len(x_coords) > 1 else 1.0
+        dy = float(y_coords[1] - y_coords[0]) if len(y_coords) > 1 else 1.0
+
+    def sample(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        rows = (np.asarray(y, dtype=np.float64) - y0) / dy
+        cols = (np.asarray(x, dtype=np.float64) - x0) / dx
+        # Snap points on the last row / column inside the grid
+        rows = np.where(np.isclose(rows, grid.shape[0] - 1), grid.shape[0] - 1, rows)
+        cols = np.where(np.isclose(cols, grid.shape[1] - 1), grid.shape[1] - 1, cols)
+        return ndimage.map_coordinates(
+            grid.astype(np.float64, copy=False), [rows, cols],
+            order=1, mode='constant', cval=np.nan, prefilter=False
+        )
+
+    return sample
+
+
+def _limit_grade(ground: np.ndarray, chainage: np.ndarray, max_grade: float) -> np.ndarray:
+    """
+    Design elevations within max_grade, balancing cut and fill.
+
+    The design line is midway between the highest grade-limited line below
+    the ground (cut only) and the lowest one above it (fill only); both
+    envelopes, and so their mean, respect max_grade.
+
+    ground / chainage are (roads, samples) arrays padded with NaN; the
+    forward and backward passes run over samples for all roads at once.
+    """
+    ground = ground.copy()
+    cols = ground.shape[1]
+    # Fill gaps (off-grid samples) with the nearest known elevation
+    for j in range(1, cols):
+        gap = np.isnan(ground[:, j]) & ~np.isnan(chainage[:, j])
+        ground[gap, j] = ground[gap, j - 1]
+    for j in range(cols - 2, -1, -1):
+        gap = np.isnan(ground[:, j]) & ~np.isnan(chainage[:, j])
+        ground[gap, j] = ground[gap, j + 1]
+
+    step = np.nan_to_num(np.diff(chainage, axis=1)) * max_grade / 100.0
+    lower = ground.copy()
+    upper = ground.copy()
+    for j in range(1, cols):
+        lower[:, j] = np.fmin(lower[:, j], lower[:, j - 1] + step[:, j - 1])
+        upper[:, j] = np.fmax(upper[:, j], upper[:, j - 1] - step[:, j - 1])
+    for j in range(cols - 2, -1, -1):
+        lower[:, j] = np.fmin(lower[:, j], lower[:, j + 1] + step[:, j])
+        upper[:, j] = np.fmax(upper[:, j], upper[:, j + 1] - step[:, j])
+
+    design = (lower + upper) / 2
+    design[np.isnan(chainage)] = np.nan
+    return design
+
+
+def profile_roads(
+    roads: Sequence,
+    elevation: ElevationSource,
+    spacing: float = DEFAULT_SPACING,
+    max_grade: Optional[float] = None,
+    widths: Union[float, Sequence[float], None] = None
+) -> List[Optional[RoadProfile]]:
+    """
+    Profile all roads in one vectorized pass.
+
+    Args:
+        roads: LineStrings, GeoJSON geometries or road dicts with 'geometry'
+            (and optionally 'width')
+        elevation: Elevation source (see grid_sampler)
+        spacing: Sample spacing along each road (m); every road gets at
+            least its two end points
+        max_grade: Design grade limit (%). When given, a design profile is
+            fitted and cut/fill computed; otherwise design = ground
+        widths: Road width(s) for cut/fill volumes (m)
+
+    Returns:
+        One RoadProfile per road (None for non-line geometries). A
+        MultiLineString is profiled per component line; its profile runs
+        through the components in order with zero grade across the gaps
+    """
+    parts = [_as_lines(r) for r in roads]
+    if widths is None:
+        widths = [r.get('width', 0.0) if isinstance(r, dict) else 0.0 for r in roads]
+    widths = np.broadcast_to(np.asarray(widths, dtype=np.float64), (len(parts),))
+
+    results: List[Optional[RoadProfile]] = [None] * len(parts)
+    if not any(parts):
+        return results
+
+    geoms = np.array([line for p in parts for line in p], dtype=object)
+    lengths = shapely.length(geoms)
+    counts = np.maximum(np.ceil(lengths / spacing).astype(np.int64), 1) + 1
+
+    # Flat (road, sample) layout
+    road_idx = np.repeat(np.arange(len(geoms)), counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    local = np.arange(counts.sum()) - np.repeat(starts, counts)
+    chainage = local / (counts - 1)[road_idx] * lengths[road_idx]
+
+    points = shapely.line_interpolate_point(geoms[road_idx], chainage)
+    xy = shapely.get_coordinates(points)
+    ground = grid_sampler(elevation)(xy[:, 0], xy[:, 1])
+
+    # Padded (roads, samples) matrices for the per-sample passes
+    ground_m = np.full((len(geoms), counts.max()), np.nan)
+    chain_m = ground_m.copy()
+    ground_m[road_idx, local] = ground
+    chain_m[road_idx, local] = chainage
+
+    design_m = _limit_grade(ground_m, chain_m, max_grade) if max_grade is not None else ground_m
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ds = np.diff(chain_m, axis=1)
+        dz = np.abs(np.diff(ground_m, axis=1))
+        known = np.isfinite(dz) & (ds > 0)
+        grade = np.where(known, dz / ds * 100, 0.0)
+        max_g = grade.max(axis=1, initial=0.0)
+        run = np.where(known, ds, 0.0).sum(axis=1)
+        rise = np.where(known, dz, 0.0).sum(axis=1)
+
+        # Cut / fill: trapezoidal depth between design and ground
+        depth = design_m - ground_m
+        fill_d = np.clip(depth, 0, None)
+        cut_d = np.clip(-depth, 0, None)
+        fill_a = np.nansum((fill_d[:, 1:] + fill_d[:, :-1]) / 2 * ds, axis=1)
+        cut_a = np.nansum((cut_d[:, 1:] + cut_d[:, :-1]) / 2 * ds, axis=1)
+
+    first = np.concatenate(([0], np.cumsum([len(p) for p in parts])[:-1]))
+    for i, p in enumerate(parts):
+        if not p:
+            continue
+        ks = range(first[i], first[i] + len(p))
+        # Chainage continues through the components (offset by the lengths before)
+        offsets = np.concatenate(([0.0], np.cumsum(lengths[ks])[:-1]))
+        chain = np.concatenate([chain_m[k, :counts[k]] + off for k, off in zip(ks, offsets)])
+        g = np.concatenate([ground_m[k, :counts[k]] for k in ks])
+        design = np.concatenate([design_m[k, :counts[k]] for k in ks])
+        xs = np.concatenate([xy[starts[k]:starts[k] + counts[k], 0] for k in ks])
+        ys = np.concatenate([xy[starts[k]:starts[k] + counts[k], 1] for k in ks])
+        road_run = run[ks].sum()
+
+        known = np.flatnonzero(~np.isnan(g))
+        end_grade = 0.0
+        if len(known) >= 2 and chain[known[-1]] > chain[known[0]]:
+            end_grade = abs(g[known[-1]] - g[known[0]]) / (chain[known[-1]] - chain[known[0]]) * 100
+        results[i] = RoadProfile(
+            length=float(lengths[ks].sum()),
+            chainage=chain,
+            x=xs,
+            y=ys,
+            ground=g,
+            design=design,
+            max_grade=float(max_g[ks].max()),
+            mean_grade=float(rise[ks].sum() / road_run * 100) if road_run > 0 else 0.0,
+            end_grade=float(end_grade),
+            cut_m3=float(cut_a[ks].sum() * widths[i]),
+            fill_m3=float(fill_a[ks].sum() * widths[i])
+        )
+
+    return results
+
+
+def summarize_profiles(profiles: Sequence[Optional[RoadProfile]], grade_limit: float = 8.0) -> Dict:
+    """Network totals: length, worst grade, roads over the limit, cut/fill."""
+    valid = [p for p in profiles if p is not None]
+    if not valid:
+        return {
+            'road_count': 0, 'total_length_m': 0.0, 'max_grade': 0.0, 'mean_grade': 0.0,
+            'roads_over_limit': 0, 'total_cut_m3': 0.0, 'total_fill_m3': 0.0
+        }
+    lengths = np.array([p.length for p in valid])
+    return {
+        'road_count': len(valid),
+        'total_length_m': float(lengths.sum()),
+        'max_grade': float(max(p.max_grade for p in valid)),
+        'mean_grade': float(np.average([p.mean_grade for p in valid], weights=lengths if lengths.sum() > 0 else None)),
+        'roads_over_limit': int(sum(p.max_grade > grade_limit for p in valid)),
+        'total_cut_m3': float(sum(p.cut_m3 for p in valid)),
+        'total_fill_m3': float(sum(p.fill_m3 for p in valid))
+    }
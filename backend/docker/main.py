@@ -4,11 +4,14 @@ import logging
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from api.schemas.response_schemas import HealthResponse
 from api.routes import optim_router, dxf_router, estate_router
+from api.stores import store_stats
+from api.middleware import GZipRequestMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -32,6 +35,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressed payloads both ways (large GeoJSON layouts)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+app.add_middleware(GZipRequestMiddleware)
+
 # Detect static file path
 # In Docker, volume mounted to /app/static
 # Locally, use ../static
@@ -53,6 +60,12 @@ async def health_check():
     return HealthResponse(status="healthy", version="2.0.0")
 
 
+@app.get("/api/stores/stats")
+async def get_store_stats():
+    """Item counts, memory usage and hit/eviction metrics of the session stores."""
+    return store_stats()
+
+
 @app.get("/")
 async def root():
     """Serve the main index page."""
@@ -31,7 +31,6 @@ from core.config.settings import (
     MIN_LOT_AREA,
 )
 from core.geometry.polygon_utils import (
-    get_elevation,
     normalize_geometry_list,
     filter_by_min_area,
     sort_by_elevation,
@@ -54,6 +53,10 @@ from core.infrastructure.network_planner import generate_loop_network
 from core.infrastructure.transformer_planner import generate_transformers
 from core.infrastructure.drainage_planner import calculate_drainage
 from core.road_network import generate_skeleton_roads
+from core.roads.road_profile import grid_sampler, profile_roads, summarize_profiles
+
+# Maximum longitudinal road grade (%)
+MAX_ROAD_GRADE = 8.0
 
 # Import amenities generators
 try:
@@ -198,6 +201,8 @@ class LandRedistributionPipeline:
         self.config = config
         self.settings = settings or AlgorithmSettings.from_dict(config)
         self.lake_poly = Polygon()  # No lake by default
+        # Centrelines (with widths) of the last generated road network
+        self.road_centerlines = []
         
         logger.info(f"Pipeline initialized with land area: {self.land_poly.area:.2f} m²")
     
@@ -266,13 +271,18 @@ class LandRedistributionPipeline:
         logger.info(f"[ROAD] Site area: {site.area:.0f}m²")
         
         # Generate hierarchical road network
+        self.road_centerlines = []
         try:
+            road_centerlines = []
             network_poly, blocks_meta, landscape_features = create_hierarchical_roads(
                 site_boundary=site,
                 perimeter_width=20.0,
                 main_width=14.0,
-                secondary_width=7.0
+                secondary_width=7.0,
+                centerlines=road_centerlines
             )
+            # Centrelines (with widths) for road grade profiling
+            self.road_centerlines = road_centerlines
             logger.info(
                 f"[ROAD] ✓ Generated {len(blocks_meta)} blocks, "
                 f"{len(landscape_features)} landscape features"
@@ -853,6 +863,82 @@ class LandRedistributionPipeline:
             'commercial': commercial_blocks
         }
     
+    def _site_elevation(self):
+        """
+        Elevation lookup (x, y) -> z in the pipeline's metric frame, from
+        config['elevation_grid']; None when the request has no elevation model.
+        """
+        grid = self.config.get('elevation_grid')
+        if not grid:
+            return None
+        sample = grid_sampler(grid)
+        if not self.is_geographic:
+            return sample
+        # Grid is in the input (geographic) coordinates
+        return lambda x, y: sample(
+            np.asarray(x) / self.meters_per_deg_lng + self.reference_lng,
+            np.asarray(y) / self.meters_per_deg_lat + self.reference_lat
+        )
+    
+    def _profile_road_network(self, roads: List[Any]) -> Dict[str, Any]:
+        """
+        Longitudinal grade profiles of the road centrelines.
+        
+        Uses the site elevation model from the request (config
+        'elevation_grid') and reports per-road max / mean grade plus the
+        cut/fill needed to stay within the maximum road grade. Without an
+        elevation model nothing is profiled and 'skipped' says why.
+        
+        Args:
+            roads: Road centrelines (LineStrings or dicts with 'geometry'
+                and 'width')
+            
+        Returns:
+            Dict with 'summary' and per-road 'roads' (plus 'skipped')
+        """
+        if not roads:
+            return {'summary': summarize_profiles([]), 'roads': []}
+        
+        elevation = self._site_elevation()
+        if elevation is None:
+            logger.info("[ROAD] No site elevation model; road grades not profiled")
+            return {
+                'summary': summarize_profiles([]),
+                'roads': [],
+                'skipped': 'No site elevation model (config.elevation_grid); road grades not profiled'
+            }
+        
+        widths = [r.get('width', ROAD_INTERNAL_WIDTH) if isinstance(r, dict) else ROAD_INTERNAL_WIDTH
+                  for r in roads]
+        
+        try:
+            profiles = profile_roads(
+                roads, elevation,
+                spacing=10.0, max_grade=MAX_ROAD_GRADE, widths=widths
+            )
+        except Exception as e:
+            logger.warning(f"[ROAD] Failed to profile roads: {e}")
+            return {'summary': summarize_profiles([]), 'roads': [], 'skipped': f'Road profiling failed: {e}'}
+        
+        summary = summarize_profiles(profiles, grade_limit=MAX_ROAD_GRADE)
+        logger.info(
+            f"[ROAD] Profiled {summary['road_count']} roads: "
+            f"max grade {summary['max_grade']:.1f}%, "
+            f"{summary['roads_over_limit']} over {MAX_ROAD_GRADE:.0f}%"
+        )
+        
+        road_results = []
+        for road, profile in zip(roads, profiles):
+            if profile is None:
+                continue
+            entry = profile.to_dict()
+            if isinstance(road, dict):
+                entry['type'] = road.get('type')
+                entry['width'] = road.get('width')
+            road_results.append(entry)
+        
+        return {'summary': summary, 'roads': road_results}
+    
     @staticmethod
     def _safe_coords(geom):
         """Helper to safely extract coordinates for JSON serialization."""
@@ -879,6 +965,7 @@ class LandRedistributionPipeline:
             num_branches: Number of branches for Skeleton generation
         """
         logger.info(f"Starting full pipeline with method: {layout_method}")
+        self.road_centerlines = []
         
         road_network = Polygon()
         service_blocks_voronoi = []
@@ -1220,6 +1307,9 @@ class LandRedistributionPipeline:
         wwtp_center = xlnt_blocks[0].centroid if xlnt_blocks else None
         drainage = calculate_drainage(infra_polys, wwtp_center)
         
+        # Road grade profiles along the generated road network
+        road_profiles = self._profile_road_network(self.road_centerlines or main_roads)
+        
         logger.info(f"Pipeline complete: {len(stage2_result['lots'])} lots, {len(connections)} connections")
         
         return {
@@ -1244,7 +1334,8 @@ class LandRedistributionPipeline:
                 'connections': [list(line.coords) for line in connections],
                 'drainage': drainage,
                 'transformers': transformers,
-                'road_network': mapping(road_network)
+                'road_network': mapping(road_network),
+                'road_profiles': road_profiles
             },
             'amenities': {
                 'lakes': [{'coords': self._safe_coords(l['geometry']), 'type': 'WATER', 'color': '#1E88E5'} 
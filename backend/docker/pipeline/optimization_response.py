@@ -0,0 +1,337 @@
+"""
+Optimization response builder.
+
+Turns a LandRedistributionPipeline result into the /api/optimize response
+payload (stages, final layout, statistics) as plain dicts, so the HTTP
+route and in-process callers share one conversion.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+from shapely.geometry import Polygon, mapping, LineString, Point, shape
+
+from pipeline.land_redistribution import LandRedistributionPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def land_plot_to_polygon(land_plot: dict) -> Polygon:
+    """Convert LandPlot model to Shapely Polygon."""
+    coords = land_plot['coordinates'][0]  # Exterior ring
+    return Polygon(coords)
+
+
+def polygon_to_geojson(poly: Polygon, pipeline=None) -> dict:
+    """Convert Shapely Polygon to GeoJSON, converting back to geographic if needed."""
+    if pipeline and hasattr(pipeline, 'to_geographic'):
+        poly = pipeline.to_geographic(poly)
+    return mapping(poly)
+
+
+def geom_to_geojson(geom, pipeline=None) -> dict:
+    """Convert any Shapely geometry to GeoJSON, converting back to geographic if needed."""
+    if pipeline and hasattr(pipeline, 'to_geographic'):
+        geom = pipeline.to_geographic(geom)
+    return mapping(geom)
+
+
+def run_optimization(land_plots: List[Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the full pipeline (skeleton layout) and build the response payload.
+
+    Args:
+        land_plots: GeoJSON Polygon dicts
+        config: Validated AlgorithmConfig values (plus skeleton_branches)
+    """
+    land_polygons = [land_plot_to_polygon(plot) for plot in land_plots]
+    pipeline = LandRedistributionPipeline(land_polygons, config)
+    num_branches = config.get('skeleton_branches', 20)
+    result = pipeline.run_full_pipeline(layout_method='skeleton', num_branches=num_branches)
+    return build_optimization_response(result, pipeline, config)
+
+
+def build_optimization_response(
+    result: Dict[str, Any],
+    pipeline: LandRedistributionPipeline,
+    config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    OptimizationResponse fields for a run_full_pipeline result.
+
+    Geometry is converted back to geographic coordinates when the pipeline
+    input was geographic.
+    """
+    # Build stage results
+    stages = []
+
+    # Stage 1: Grid Optimization
+    stage1_geoms = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": polygon_to_geojson(block, pipeline),
+                "properties": {"stage": "grid", "type": "block"}
+            }
+            for block in result['stage1']['blocks']
+        ]
+    }
+
+    stages.append(dict(
+        stage_name="Grid Optimization (NSGA-II)",
+        geometry=stage1_geoms,
+        metrics=result['stage1']['metrics'],
+        parameters={
+            "spacing": result['stage1']['spacing'],
+            "angle": result['stage1']['angle']
+        }
+    ))
+
+    # Stage 2: Subdivision
+    stage2_features = []
+
+    # Add lots with REAL zone data from advanced classifier
+    for idx, lot in enumerate(result['stage2']['lots']):
+        # Use real zone from pipeline (advanced classifier)
+        # This creates coherent zone clusters like reference design
+        real_zone = lot.get('zone', 'WAREHOUSE')  # Default if missing
+
+        lot_props = {
+            "stage": "subdivision",
+            "type": "lot",
+            "width": lot['width'],
+            "area": lot.get('area', 0),
+            "zone": real_zone,  # Use REAL zone from classifier
+            "zone_color": lot.get('zone_color', '#9E9E9E')
+        }
+        geojson_geom = polygon_to_geojson(lot['geometry'], pipeline)
+        # Debug first lot coordinates
+        if idx == 0:
+            coords = geojson_geom['coordinates'][0][0]  # First point
+            logger.info(f"[OPTIMIZE] First lot: zone={real_zone}, coords={coords}")
+        stage2_features.append({
+            "type": "Feature",
+            "geometry": geojson_geom,
+            "properties": lot_props
+        })
+
+        # Setback
+        if lot.get('buildable'):
+            stage2_features.append({
+                "type": "Feature",
+                "geometry": polygon_to_geojson(lot['buildable'], pipeline),
+                "properties": {
+                    "stage": "subdivision",
+                    "type": "setback",
+                    "parent_lot": str(lot['geometry'])
+                }
+            })
+
+    # Add parks
+    for park in result['stage2']['parks']:
+        stage2_features.append({
+            "type": "Feature",
+            "geometry": polygon_to_geojson(park, pipeline),
+            "properties": {
+                "stage": "subdivision",
+                "type": "lot",  # Changed to lot so it uses zone coloring
+                "zone": "GREEN"
+            }
+        })
+
+    # Add green_spaces (includes lakes from amenities)
+    for green_space in result['stage2'].get('green_spaces', []):
+        stage2_features.append({
+            "type": "Feature",
+            "geometry": polygon_to_geojson(green_space, pipeline),
+            "properties": {
+                "stage": "subdivision",
+                "type": "lot",  # Use lot type so it uses zone coloring
+                "zone": "GREEN"
+            }
+        })
+
+    # Add amenities (lakes with WATER zone)
+    if 'amenities' in result:
+        # Add parks/green buffers
+        for park in result['amenities'].get('parks', []):
+            if 'coords' in park:
+                stage2_features.append({
+                    "type": "Feature",
+                    "geometry": {"type": "Polygon", "coordinates": park['coords']},
+                    "properties": {
+                        "stage": "subdivision",
+                        "type": "park",
+                        "park_type": park.get('type', 'park'),
+                        "area": park.get('area', 0)
+                    }
+                })
+
+        # Add lakes
+        for lake in result['amenities'].get('lakes', []):
+            if 'coords' in lake:
+                stage2_features.append({
+                    "type": "Feature",
+                    "geometry": {"type": "Polygon", "coordinates": lake['coords']},
+                    "properties": {
+                        "stage": "subdivision",
+                        "type": "water",
+                        "area": lake.get('area', 0)
+                    }
+                })
+
+        # Add parking areas
+        for parking in result['amenities'].get('parking', []):
+            if 'coords' in parking:
+                stage2_features.append({
+                    "type": "Feature",
+                    "geometry": {"type": "Polygon", "coordinates": parking['coords']},
+                    "properties": {
+                        "stage": "subdivision",
+                        "type": "parking",
+                        "zone": parking.get('zone', 'WAREHOUSE')
+                    }
+                })
+
+    # Add Service Blocks
+    for block in result['classification'].get('service', []):
+        stage2_features.append({
+            "type": "Feature",
+            "geometry": polygon_to_geojson(block, pipeline),
+            "properties": {
+                "stage": "subdivision",
+                "type": "service",
+                "label": "Operating Center/Parking"
+            }
+        })
+
+    # Add XLNT Block
+    for block in result['classification'].get('xlnt', []):
+        stage2_features.append({
+            "type": "Feature",
+            "geometry": polygon_to_geojson(block, pipeline),
+            "properties": {
+                "stage": "subdivision",
+                "type": "xlnt",
+                "label": "Wastewater Treatment"
+            }
+        })
+
+    stage2_geoms = {
+        "type": "FeatureCollection",
+        "features": stage2_features
+    }
+
+    stages.append(dict(
+        stage_name="Block Subdivision (OR-Tools)",
+        geometry=stage2_geoms,
+        metrics={
+            **result['stage2']['metrics'],
+            "service_count": result['classification']['service_count'],
+            "xlnt_count": result['classification']['xlnt_count']
+        },
+        parameters={
+            "min_lot_width": config.get('min_lot_width'),
+            "max_lot_width": config.get('max_lot_width'),
+            "target_lot_width": config.get('target_lot_width')
+        }
+    ))
+
+    # Stage 3: Infrastructure
+    stage3_features = []
+
+    # Add road network (also add to Stage 2 for visualization)
+    if 'road_network' in result['stage3']:
+        # Convert back from metric to geographic
+        road_geom = shape(result['stage3']['road_network'])
+        road_feat = {
+            "type": "Feature",
+            "geometry": geom_to_geojson(road_geom, pipeline),
+            "properties": {
+                "stage": "subdivision",
+                "type": "road",
+                "label": "Road Network"
+            }
+        }
+        # Add to both Stage 2 and Stage 3 for complete visualization
+        stage2_features.insert(0, road_feat)
+        stage3_features.insert(0, road_feat)
+
+    # Add connection lines
+    for conn_coords in result['stage3']['connections']:
+        stage3_features.append({
+            "type": "Feature",
+            "geometry": geom_to_geojson(LineString(conn_coords), pipeline),
+            "properties": {
+                "stage": "infrastructure",
+                "type": "connection",
+                "layer": "electricity_water"
+            }
+        })
+
+    # Add Transformers
+    if 'transformers' in result['stage3']:
+        for tf_coords in result['stage3']['transformers']:
+            stage3_features.append({
+                "type": "Feature",
+                "geometry": geom_to_geojson(Point(tf_coords), pipeline),
+                "properties": {
+                    "stage": "infrastructure",
+                    "type": "transformer",
+                    "label": "Transformer Station"
+                }
+            })
+
+    # Add drainage
+    for drainage in result['stage3']['drainage']:
+        start = drainage['start']
+        vec = drainage['vector']
+        end = (start[0] + vec[0], start[1] + vec[1])
+        stage3_features.append({
+            "type": "Feature",
+            "geometry": geom_to_geojson(LineString([start, end]), pipeline),
+            "properties": {
+                "stage": "infrastructure",
+                "type": "drainage"
+            }
+        })
+
+    stage3_geoms = {
+        "type": "FeatureCollection",
+        "features": stage3_features + stage2_features
+    }
+
+    road_profiles = result['stage3'].get('road_profiles', {})
+    road_summary = road_profiles.get('summary', {})
+
+    stages.append(dict(
+        stage_name="Infrastructure (MST & Drainage & Roads)",
+        geometry=stage3_geoms,
+        metrics={
+            "total_connections": len(result['stage3']['connections']),
+            "drainage_points": len(result['stage3']['drainage']),
+            "transformers": len(result.get('stage3', {}).get('transformers', [])),
+            "max_road_grade": road_summary.get('max_grade', 0.0),
+            "roads_over_grade_limit": road_summary.get('roads_over_limit', 0),
+            "road_earthwork_m3": road_summary.get('total_cut_m3', 0.0) + road_summary.get('total_fill_m3', 0.0)
+        },
+        parameters={"road_profiles_skipped": road_profiles['skipped']} if 'skipped' in road_profiles else {}
+    ))
+
+    return dict(
+        success=True,
+        message="Optimization completed successfully",
+        stages=stages,
+        final_layout=stage3_geoms,
+        total_lots=result['total_lots'],
+        statistics={
+            "total_blocks": result['stage1']['metrics']['total_blocks'],
+            "total_lots": result['stage2']['metrics']['total_lots'],
+            "total_parks": result['stage2']['metrics']['total_parks'],
+            "optimal_spacing": result['stage1']['spacing'],
+            "optimal_angle": result['stage1']['angle'],
+            "avg_lot_width": result['stage2']['metrics']['avg_lot_width'],
+            "service_area_count": result['classification']['service_count'] + result['classification']['xlnt_count']
+        }
+    )
@@ -10,6 +10,8 @@ from shapely.ops import unary_union, polygonize
 from typing import Optional, List, Tuple
 import io
 
+from utils.dxf_stream import DXFStreamWriter, ASCII
+
 logger = logging.getLogger(__name__)
 
 
@@ -172,101 +174,94 @@ def load_boundary_from_dxf(dxf_content: bytes) -> Optional[Polygon]:
         return None
 
 
-def export_to_dxf(geometries: List[dict], output_type: str = 'final') -> bytes:
+# Export layers (AutoCAD color index) and feature type -> layer mapping
+EXPORT_LAYERS = {
+    'BLOCKS': 5,          # Blue for blocks
+    'LOTS': 3,            # Green for lots
+    'PARKS': 2,           # Yellow for parks
+    'SERVICE': 4,         # Cyan for service
+    'ROADS': 8,           # Gray for roads
+    'INFRASTRUCTURE': 1,  # Red for infrastructure
+}
+
+EXPORT_LAYER_MAP = {
+    'block': 'BLOCKS',
+    'park': 'PARKS',
+    'service': 'SERVICE',
+    'xlnt': 'SERVICE',
+    'road': 'ROADS',
+    'road_network': 'ROADS',
+    'connection': 'INFRASTRUCTURE',
+    'transformer': 'INFRASTRUCTURE',
+    'drainage': 'INFRASTRUCTURE',
+    'lot': 'LOTS',
+    'setback': 'LOTS'
+}
+
+
+def build_dxf_writer(geometries: List[dict]) -> DXFStreamWriter:
+    """
+    Collect GeoJSON features into a DXFStreamWriter, batched per layer.
+
+    Points become circles, lines open polylines and every polygon ring a
+    closed polyline. Multi-part geometries are exploded; malformed
+    coordinate lists are skipped.
+
+    Args:
+        geometries: List of geometry dicts with 'geometry' and 'properties'
+
+    Returns:
+        DXFStreamWriter ready to stream
+    """
+    writer = DXFStreamWriter(EXPORT_LAYERS)
+
+    for item in geometries:
+        geom = item.get('geometry')
+        if not geom or 'coordinates' not in geom:
+            continue
+
+        props = item.get('properties') or {}
+        layer = EXPORT_LAYER_MAP.get(props.get('type', 'lot'), 'LOTS')
+        coords = geom['coordinates']
+        geom_type = geom.get('type', 'Polygon')
+
+        if geom_type == 'Point':
+            writer.add_circle(layer, coords, radius=2.0)
+        elif geom_type == 'MultiPoint':
+            for point in coords:
+                writer.add_circle(layer, point, radius=2.0)
+        elif geom_type == 'LineString':
+            writer.add_polyline(layer, coords, closed=False)
+        elif geom_type == 'MultiLineString':
+            for line in coords:
+                writer.add_polyline(layer, line, closed=False)
+        elif geom_type in ('Polygon', 'MultiPolygon'):
+            polygons = coords if geom_type == 'MultiPolygon' else [coords]
+            for rings in polygons:
+                # Tolerate a bare exterior ring instead of a ring list
+                if rings and rings[0] and not isinstance(rings[0][0], (list, tuple)):
+                    rings = [rings]
+                for ring in rings:
+                    writer.add_polyline(layer, ring, closed=True)
+
+    return writer
+
+
+def export_to_dxf(geometries: List[dict], output_type: str = 'final',
+                  fmt: str = ASCII) -> bytes:
     """
     Export geometries to DXF format.
     
     Args:
         geometries: List of geometry dicts with 'geometry' and 'properties'
         output_type: Type of output ('stage1', 'stage2', 'final')
+        fmt: 'asc' (ASCII DXF) or 'bin' (binary DXF)
         
     Returns:
         DXF file content as bytes
     """
     try:
-        # Create new DXF document
-        doc = ezdxf.new('R2010')
-        msp = doc.modelspace()
-        
-        # Create layers
-        doc.layers.add('BLOCKS', color=5)      # Blue for blocks
-        doc.layers.add('LOTS', color=3)        # Green for lots
-        doc.layers.add('PARKS', color=2)       # Yellow for parks
-        doc.layers.add('SERVICE', color=4)     # Cyan for service
-        doc.layers.add('ROADS', color=8)       # Gray for roads
-        doc.layers.add('INFRASTRUCTURE', color=1)  # Red for infrastructure
-        
-        # Add geometries
-        for item in geometries:
-            geom = item.get('geometry')
-            props = item.get('properties', {})
-            geom_type = props.get('type', 'lot')
-            
-            # Determine layer
-            layer_map = {
-                'block': 'BLOCKS',
-                'park': 'PARKS',
-                'service': 'SERVICE',
-                'xlnt': 'SERVICE',
-                'road_network': 'ROADS',
-                'connection': 'INFRASTRUCTURE',
-                'transformer': 'INFRASTRUCTURE',
-                'drainage': 'INFRASTRUCTURE',
-                'lot': 'LOTS',
-                'setback': 'LOTS'
-            }
-            layer = layer_map.get(geom_type, 'LOTS')
-            
-            # Get coordinates
-            if geom and 'coordinates' in geom:
-                coords = geom['coordinates']
-                geom_geom_type = geom.get('type', 'Polygon')
-                
-                # Handle different geometry types
-                if geom_geom_type == 'Point':
-                    # Point: [x, y]
-                    if isinstance(coords, list) and len(coords) >= 2:
-                        msp.add_circle(
-                            center=(coords[0], coords[1]),
-                            radius=2.0,
-                            dxfattribs={'layer': layer}
-                        )
-                        
-                elif geom_geom_type == 'LineString':
-                    # LineString: [[x1, y1], [x2, y2], ...]
-                    if isinstance(coords, list) and len(coords) > 0:
-                        if all(isinstance(p, (list, tuple)) and len(p) >= 2 for p in coords):
-                            points_2d = [(p[0], p[1]) for p in coords]
-                            if len(points_2d) >= 2:
-                                msp.add_lwpolyline(
-                                    points_2d,
-                                    dxfattribs={'layer': layer, 'closed': False}
-                                )
-                                
-                elif geom_geom_type == 'Polygon':
-                    # Polygon: [[[x1, y1], [x2, y2], ...]]  (exterior ring)
-                    if isinstance(coords, list) and len(coords) > 0:
-                        points = coords[0] if isinstance(coords[0], list) else coords
-                        
-                        # Validate points structure
-                        if isinstance(points, list) and len(points) >= 3:
-                            if all(isinstance(p, (list, tuple)) and len(p) >= 2 for p in points):
-                                points_2d = [(p[0], p[1]) for p in points]
-                                
-                                # Create closed polyline
-                                msp.add_lwpolyline(
-                                    points_2d,
-                                    dxfattribs={
-                                        'layer': layer,
-                                        'closed': True
-                                    }
-                                )
-        
-        # Save to bytes
-        stream = io.StringIO()
-        doc.write(stream, fmt='asc')  # ASCII format for better compatibility
-        return stream.getvalue().encode('utf-8')
-        
+        return build_dxf_writer(geometries).to_bytes(fmt)
     except Exception as e:
         logger.error(f"Error exporting DXF: {e}")
         return b''
@@ -0,0 +1,650 @@
+"""
+Bounded session / project stores.
+
+Replaces unbounded module-level dicts with stores that expire entries after
+a TTL and evict least-recently-used entries beyond an item or byte budget.
+All backends share a Redis-style interface (get/set with ``ex``/delete/
+exists/expire/ttl/keys) plus dict-style access, so call sites can switch
+backend by URL:
+
+- ``memory://``            in-process (values kept by reference)
+- ``sqlite:///path.db``    shared by all workers on one host (pickled values)
+- ``redis://host:6379/0``  Redis (pickled values, eviction by Redis policy)
+
+Values in the SQLite and Redis backends are copies: mutate, then write back
+with ``store[key] = value``.
+
+Features:
+- TTL (optionally sliding: refreshed on every read)
+- LRU eviction by item count and estimated byte size
+- Hit / miss / eviction / expiration counters via info()
+
+This is the only implementation: the service is deployed standalone from
+this directory, and the main backend re-exports it as
+database.session_store.
+"""
+
+import fnmatch
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate memory footprint of a value in bytes.
+
+    Uses the pickled size where possible and falls back to a recursive
+    sys.getsizeof walk for unpicklable objects (e.g. API clients).
+    """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        pass
+
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, '__dict__'):
+            stack.append(vars(obj))
+    return total
+
+
+class SessionStore(ABC):
+    """Redis-style key/value store with TTL and bounded size."""
+
+    backend = "abstract"
+
+    def __init__(self, namespace: str = "default", default_ttl: Optional[float] = None,
+                 sliding: bool = False):
+        """
+        Args:
+            namespace: Logical store name (key prefix / partition)
+            default_ttl: Seconds until expiry for set() without ``ex``;
+                None keeps entries until evicted
+            sliding: Refresh the TTL on every successful read
+        """
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.sliding = sliding
+        self.hits = 0
+        self.misses = 0
+
+    # ==================== REDIS-STYLE API ====================
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value for key, or default when missing / expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        """Store value; ``ex`` overrides the default TTL (seconds)."""
+
+    @abstractmethod
+    def delete(self, *keys: str) -> int:
+        """Delete keys, returning how many existed."""
+
+    @abstractmethod
+    def expire(self, key: str, seconds: float) -> bool:
+        """Set a TTL on an existing key."""
+
+    @abstractmethod
+    def ttl(self, key: str) -> int:
+        """Seconds to live; -1 without expiry, -2 when missing (like Redis)."""
+
+    @abstractmethod
+    def keys(self, pattern: str = "*") -> List[str]:
+        """Live keys matching a glob pattern."""
+
+    @abstractmethod
+    def values(self) -> List[Any]:
+        """All live values (does not refresh TTLs or LRU order)."""
+
+    @abstractmethod
+    def flushdb(self) -> None:
+        """Remove every entry in this namespace."""
+
+    @abstractmethod
+    def info(self) -> Dict[str, Any]:
+        """Usage metrics (items, bytes, hits, misses, evictions...)."""
+
+    def exists(self, *keys: str) -> int:
+        """Number of given keys that exist."""
+        return sum(1 for key in keys if self.ttl(key) != -2)
+
+    def _ttl_for(self, ex: Optional[float]) -> Optional[float]:
+        ttl = self.default_ttl if ex is None else ex
+        return time.time() + ttl if ttl else None
+
+    # ==================== DICT-STYLE API ====================
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.exists(key) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process store. Values are kept by reference, so in-place mutation is
+    visible to later reads (but not to other workers).
+    """
+
+    backend = "memory"
+
+    # Expired entries are swept every N writes
+    PURGE_INTERVAL = 256
+
+    def __init__(self, namespace: str = "default", default_ttl: Optional[float] = None,
+                 max_items: Optional[int] = None, max_bytes: Optional[int] = None,
+                 sliding: bool = False):
+        """
+        Args:
+            max_items: Evict LRU entries beyond this count
+            max_bytes: Evict LRU entries beyond this estimated size
+                (sizes are only computed when set)
+        """
+        super().__init__(namespace, default_ttl, sliding)
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        # key -> [value, expires_at, size]
+        self._data: "OrderedDict[str, list]" = OrderedDict()
+        self._bytes = 0
+        self._writes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.RLock()
+
+    def _live_entry(self, key: str) -> Optional[list]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _drop(self, key: str) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if self.sliding and entry[1] is not None:
+                entry[1] = self._ttl_for(None)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        size = estimate_size(value) if self.max_bytes else 0
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = [value, self._ttl_for(ex), size]
+            self._bytes += size
+
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                self.purge_expired()
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        while self._data and (
+            (self.max_items is not None and len(self._data) > self.max_items)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes
+                and len(self._data) > 1)
+        ):
+            key = next(iter(self._data))
+            self._drop(key)
+            self.evictions += 1
+
+    def purge_expired(self) -> int:
+        """Drop all expired entries, returning how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._data.items() if e[1] is not None and e[1] <= now]
+            for key in expired:
+                self._drop(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def delete(self, *keys: str) -> int:
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if self._live_entry(key) is not None:
+                    self._drop(key)
+                    removed += 1
+        return removed
+
+    def expire(self, key: str, seconds: float) -> bool:
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return False
+            entry[1] = time.time() + seconds
+            return True
+
+    def ttl(self, key: str) -> int:
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return -2
+            if entry[1] is None:
+                return -1
+            return max(0, int(round(entry[1] - time.time())))
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        self.purge_expired()
+        with self._lock:
+            keys = list(self._data)
+        if pattern == "*":
+            return keys
+        return [k for k in keys if fnmatch.fnmatchcase(k, pattern)]
+
+    def values(self) -> List[Any]:
+        self.purge_expired()
+        with self._lock:
+            return [entry[0] for entry in self._data.values()]
+
+    def flushdb(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        self.purge_expired()
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "namespace": self.namespace,
+                "items": len(self._data),
+                "bytes": self._bytes if self.max_bytes else None,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "default_ttl": self.default_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed store (pickled values), shared by all worker processes
+    that point at the same file.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, namespace: str = "default",
+                 default_ttl: Optional[float] = None, max_items: Optional[int] = None,
+                 max_bytes: Optional[int] = None, sliding: bool = False):
+        super().__init__(namespace, default_ttl, sliding)
+        self.path = path
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.expirations = 0
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS session_store (
+                       namespace TEXT NOT NULL,
+                       key TEXT NOT NULL,
+                       value BLOB NOT NULL,
+                       size INTEGER NOT NULL,
+                       expires_at REAL,
+                       accessed_at REAL NOT NULL,
+                       PRIMARY KEY (namespace, key)
+                   )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_session_store_lru "
+                "ON session_store (namespace, accessed_at)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _purge(self, conn: sqlite3.Connection) -> None:
+        cur = conn.execute(
+            "DELETE FROM session_store WHERE namespace = ? "
+            "AND expires_at IS NOT NULL AND expires_at <= ?",
+            (self.namespace, time.time())
+        )
+        self.expirations += cur.rowcount
+
+    def get(self, key: str, default: Any = None) -> Any:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at FROM session_store WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        now = time.time()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self.misses += 1
+            return default
+
+        expires_at = row[1]
+        if self.sliding and expires_at is not None:
+            expires_at = self._ttl_for(None)
+        conn.execute(
+            "UPDATE session_store SET accessed_at = ?, expires_at = ? "
+            "WHERE namespace = ? AND key = ?",
+            (now, expires_at, self.namespace, key)
+        )
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO session_store "
+                "(namespace, key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, blob, len(blob), self._ttl_for(ex), time.time())
+            )
+            self._purge(conn)
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        if self.max_items is not None:
+            cur = conn.execute(
+                "DELETE FROM session_store WHERE namespace = ? AND key IN ("
+                "  SELECT key FROM session_store WHERE namespace = ?"
+                "  ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_items)
+            )
+            self.evictions += cur.rowcount
+        if self.max_bytes is not None:
+            # Keep the most recent entries whose running size fits the budget
+            # (the newest entry is always kept)
+            cur = conn.execute(
+                "DELETE FROM session_store WHERE namespace = ? AND key IN ("
+                "  SELECT key FROM ("
+                "    SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) AS running,"
+                "           ROW_NUMBER() OVER (ORDER BY accessed_at DESC) AS rank"
+                "    FROM session_store WHERE namespace = ?)"
+                "  WHERE running > ? AND rank > 1)",
+                (self.namespace, self.namespace, self.max_bytes)
+            )
+            self.evictions += cur.rowcount
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        conn = self._conn()
+        now = time.time()
+        removed = 0
+        for key in keys:
+            cur = conn.execute(
+                "DELETE FROM session_store WHERE namespace = ? AND key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (self.namespace, key, now)
+            )
+            removed += cur.rowcount
+        return removed
+
+    def expire(self, key: str, seconds: float) -> bool:
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE session_store SET expires_at = ? WHERE namespace = ? AND key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (now + seconds, self.namespace, key, now)
+        )
+        return cur.rowcount > 0
+
+    def ttl(self, key: str) -> int:
+        row = self._conn().execute(
+            "SELECT expires_at FROM session_store WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return -2
+        if row[0] is None:
+            return -1
+        remaining = row[0] - time.time()
+        return -2 if remaining <= 0 else int(round(remaining))
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        rows = self._conn().execute(
+            "SELECT key FROM session_store WHERE namespace = ? "
+            "AND (expires_at IS NULL OR expires_at > ?) AND key GLOB ? "
+            "ORDER BY accessed_at",
+            (self.namespace, time.time(), pattern)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def values(self) -> List[Any]:
+        rows = self._conn().execute(
+            "SELECT value FROM session_store WHERE namespace = ? "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY accessed_at",
+            (self.namespace, time.time())
+        ).fetchall()
+        return [pickle.loads(row[0]) for row in rows]
+
+    def flushdb(self) -> None:
+        self._conn().execute(
+            "DELETE FROM session_store WHERE namespace = ?", (self.namespace,)
+        )
+
+    def info(self) -> Dict[str, Any]:
+        conn = self._conn()
+        self._purge(conn)
+        items, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM session_store WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()
+        return {
+            "backend": self.backend,
+            "namespace": self.namespace,
+            "path": self.path,
+            "items": items,
+            "bytes": size,
+            "max_items": self.max_items,
+            "max_bytes": self.max_bytes,
+            "default_ttl": self.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Redis-backed store (pickled values, keys prefixed with the namespace).
+
+    Item / byte budgets are enforced by the server's maxmemory policy
+    (use ``allkeys-lru``); only TTLs are applied here.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, namespace: str = "default",
+                 default_ttl: Optional[float] = None, sliding: bool = False):
+        super().__init__(namespace, default_ttl, sliding)
+        self.client = client
+        self._prefix = f"session:{namespace}:"
+
+    def _ex(self, ex: Optional[float]) -> Optional[int]:
+        ttl = self.default_ttl if ex is None else ex
+        return int(ttl) if ttl else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        name = self._prefix + key
+        if self.sliding and self.default_ttl:
+            blob = self.client.getex(name, ex=self._ex(None))
+        else:
+            blob = self.client.get(name)
+        if blob is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(blob)
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return bool(self.client.set(self._prefix + key, blob, ex=self._ex(ex)))
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return self.client.delete(*(self._prefix + k for k in keys))
+
+    def expire(self, key: str, seconds: float) -> bool:
+        return bool(self.client.expire(self._prefix + key, int(seconds)))
+
+    def ttl(self, key: str) -> int:
+        return self.client.ttl(self._prefix + key)
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        start = len(self._prefix)
+        keys = []
+        for name in self.client.scan_iter(match=self._prefix + pattern):
+            if isinstance(name, bytes):
+                name = name.decode()
+            keys.append(name[start:])
+        return keys
+
+    def values(self) -> List[Any]:
+        names = [self._prefix + k for k in self.keys()]
+        if not names:
+            return []
+        return [pickle.loads(blob) for blob in self.client.mget(names) if blob is not None]
+
+    def flushdb(self) -> None:
+        names = [self._prefix + k for k in self.keys()]
+        if names:
+            self.client.delete(*names)
+
+    def info(self) -> Dict[str, Any]:
+        memory = self.client.info("memory")
+        return {
+            "backend": self.backend,
+            "namespace": self.namespace,
+            "items": len(self.keys()),
+            "bytes": None,
+            "server_used_memory": memory.get("used_memory"),
+            "server_maxmemory_policy": memory.get("maxmemory_policy"),
+            "default_ttl": self.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# ==================== FACTORY ====================
+
+_redis_clients: Dict[str, Any] = {}
+
+
+def _parse_url(url: str) -> Tuple[str, str]:
+    scheme, _, rest = url.partition("://")
+    return scheme.lower(), rest
+
+
+def create_session_store(namespace: str, url: str = "memory://",
+                         default_ttl: Optional[float] = None,
+                         max_items: Optional[int] = None,
+                         max_bytes: Optional[int] = None,
+                         sliding: bool = False) -> SessionStore:
+    """
+    Build a store for ``namespace`` from a backend URL.
+
+    Args:
+        namespace: Store name (e.g. "projects")
+        url: ``memory://``, ``sqlite:///relative.db``, ``sqlite:////abs.db``
+            or ``redis://...``
+        default_ttl: Seconds until entries expire (None = no expiry)
+        max_items: LRU item budget (memory / sqlite)
+        max_bytes: LRU byte budget (memory / sqlite)
+        sliding: Refresh TTL on read
+
+    Returns:
+        SessionStore
+    """
+    scheme, rest = _parse_url(url)
+
+    if scheme == "memory":
+        return MemorySessionStore(namespace, default_ttl, max_items, max_bytes, sliding)
+
+    if scheme == "sqlite":
+        path = rest[1:] if rest.startswith("/") else rest
+        return SQLiteSessionStore(
+            path or "sessions.db", namespace, default_ttl, max_items, max_bytes, sliding
+        )
+
+    if scheme in ("redis", "rediss", "unix"):
+        import redis
+
+        client = _redis_clients.get(url)
+        if client is None:
+            client = _redis_clients[url] = redis.Redis.from_url(url)
+        return RedisSessionStore(client, namespace, default_ttl, sliding)
+
+    raise ValueError(f"Unsupported session store URL: {url}")
@@ -0,0 +1,278 @@
+"""
+Elevation Grid Interpolation
+
+Builds regular elevation grids from scattered survey / contour samples:
+- One Delaunay triangulation and KD-tree per point set, cached and reused
+  across calls (re-gridding at another resolution or with new Z values
+  does not re-triangulate)
+- Methods: linear, cubic (Clough-Tocher on the same triangulation),
+  nearest, idw
+- Cells outside the convex hull are filled from a KD-tree query over the
+  masked cells only (nearest / idw / mean / none)
+- Evaluation in row tiles, so memory is bounded by the tile, not the grid
+
+Grid contract (same as scipy griddata on a meshgrid):
+    grid.shape == (len(y_coords), len(x_coords)), grid[i, j] at (x[j], y[i])
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator
+from scipy.spatial import Delaunay, QhullError, cKDTree
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('linear', 'cubic', 'nearest', 'idw')
+FILL_METHODS = ('nearest', 'idw', 'mean', None)
+
+# Cells evaluated per tile (~50 MB of temporaries for linear interpolation)
+TILE_CELLS = 1_000_000
+
+
+class _PointSet:
+    """Triangulation and KD-tree for one set of XY sample locations."""
+
+    def __init__(self, points: np.ndarray):
+        self.points = points
+        self.tree = cKDTree(points)
+        self._tri = None
+        self._tri_failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def triangulation(self) -> Optional[Delaunay]:
+        """Delaunay triangulation, built on first use (None if degenerate)."""
+        if self._tri is None and not self._tri_failed:
+            with self._lock:
+                if self._tri is None and not self._tri_failed:
+                    try:
+                        self._tri = Delaunay(self.points)
+                    except (QhullError, ValueError) as e:
+                        logger.warning(f"[TERRAIN] Cannot triangulate {len(self.points)} points: {e}")
+                        self._tri_failed = True
+        return self._tri
+
+
+class _PointSetCache:
+    """Small LRU of point sets keyed by a hash of the coordinates."""
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, _PointSet]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, points: np.ndarray) -> _PointSet:
+        key = hashlib.blake2b(points.tobytes(), digest_size=16).hexdigest() + str(points.shape)
+        with self._lock:
+            point_set = self._items.get(key)
+            if point_set is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return point_set
+            self.misses += 1
+
+        point_set = _PointSet(points)
+        with self._lock:
+            self._items[key] = point_set
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return point_set
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_cache = _PointSetCache()
+
+
+def clear_cache():
+    """Drop cached triangulations / KD-trees."""
+    _cache.clear()
+
+
+class ElevationInterpolator:
+    """
+    Interpolates Z values of scattered samples at arbitrary XY locations.
+
+    Example:
+        interp = ElevationInterpolator(points_xy, z, method='linear')
+        grid = interp.grid(x_coords, y_coords)
+    """
+
+    def __init__(
+        self,
+        points_xy: np.ndarray,
+        values: np.ndarray,
+        method: str = 'linear',
+        fill: Optional[str] = 'nearest',
+        idw_neighbors: int = 8,
+        idw_power: float = 2.0,
+        tile_cells: int = TILE_CELLS
+    ):
+        """
+        Args:
+            points_xy: (N, 2) sample locations
+            values: (N,) elevations
+            method: 'linear', 'cubic', 'nearest' or 'idw'
+            fill: How to fill cells outside the convex hull of the samples:
+                'nearest', 'idw', 'mean' or None (leave NaN)
+            idw_neighbors: Neighbours used for inverse distance weighting
+            idw_power: Distance exponent for inverse distance weighting
+            tile_cells: Maximum cells evaluated at once
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown interpolation method: {method}")
+        if fill not in FILL_METHODS:
+            raise ValueError(f"Unknown fill method: {fill}")
+
+        points = np.ascontiguousarray(points_xy, dtype=np.float64).reshape(-1, 2)
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(points) != len(values):
+            raise ValueError("points_xy and values differ in length")
+        if len(points) == 0:
+            raise ValueError("No elevation points to interpolate")
+
+        self.values = values
+        self.method = method
+        self.fill = fill
+        self.idw_neighbors = max(1, min(idw_neighbors, len(points)))
+        self.idw_power = idw_power
+        self.tile_cells = max(1, tile_cells)
+        self._points = _cache.get(points)
+        self._interp = None
+
+        if method in ('linear', 'cubic'):
+            tri = self._points.triangulation
+            if tri is None:
+                logger.warning("[TERRAIN] Falling back to nearest interpolation")
+                self.method = 'nearest'
+            elif method == 'linear':
+                self._interp = LinearNDInterpolator(tri, values)
+            else:
+                self._interp = CloughTocher2DInterpolator(tri, values)
+
+    def __call__(self, xy: np.ndarray) -> np.ndarray:
+        """Interpolate at (M, 2) locations, in tiles."""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        out = np.empty(len(xy))
+        for start in range(0, len(xy), self.tile_cells):
+            stop = start + self.tile_cells
+            out[start:stop] = self._evaluate(xy[start:stop])
+        return out
+
+    def grid(
+        self,
+        x_coords: Sequence[float],
+        y_coords: Sequence[float],
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Interpolate on the grid spanned by x_coords / y_coords.
+
+        Args:
+            x_coords: Grid column coordinates
+            y_coords: Grid row coordinates
+            out: Optional (len(y), len(x)) array to fill tile by tile
+                (e.g. a memory-mapped raster)
+
+        Returns:
+            (len(y_coords), len(x_coords)) array
+        """
+        x_coords = np.asarray(x_coords, dtype=np.float64)
+        y_coords = np.asarray(y_coords, dtype=np.float64)
+        nx, ny = len(x_coords), len(y_coords)
+        if out is None:
+            out = np.empty((ny, nx))
+        elif out.shape != (ny, nx):
+            raise ValueError(f"out has shape {out.shape}, expected {(ny, nx)}")
+        if nx == 0 or ny == 0:
+            return out
+
+        rows = max(1, self.tile_cells // nx)
+        for start in range(0, ny, rows):
+            stop = min(start + rows, ny)
+            gx, gy = np.meshgrid(x_coords, y_coords[start:stop])
+            tile = self._evaluate(np.column_stack([gx.ravel(), gy.ravel()]))
+            out[start:stop] = tile.reshape(stop - start, nx)
+        return out
+
+    def _evaluate(self, xy: np.ndarray) -> np.ndarray:
+        if self.method == 'nearest':
+            return self._nearest(xy)
+        if self.method == 'idw':
+            return self._idw(xy)
+
+        z = self._interp(xy)
+        mask = np.isnan(z)
+        if mask.any() and self.fill is not None:
+            if self.fill == 'nearest':
+                z[mask] = self._nearest(xy[mask])
+            elif self.fill == 'idw':
+                z[mask] = self._idw(xy[mask])
+            else:
+                z[mask] = np.nanmean(self.values)
+        return z
+
+    def _nearest(self, xy: np.ndarray) -> np.ndarray:
+        _, idx = self._points.tree.query(xy, k=1)
+        return self.values[idx]
+
+    def _idw(self, xy: np.ndarray) -> np.ndarray:
+        dist, idx = self._points.tree.query(xy, k=self.idw_neighbors)
+        if self.idw_neighbors == 1:
+            return self.values[idx]
+
+        with np.errstate(divide='ignore'):
+            weights = 1.0 / dist ** self.idw_power
+        # Exact hits take the sample value
+        exact = np.isinf(weights)
+        hit_rows = exact.any(axis=1)
+        weights[hit_rows] = exact[hit_rows]
+
+        return (weights * self.values[idx]).sum(axis=1) / weights.sum(axis=1)
+
+
+def interpolate_grid(
+    points_xy: np.ndarray,
+    values: np.ndarray,
+    x_coords: Sequence[float],
+    y_coords: Sequence[float],
+    method: str = 'linear',
+    fill: Optional[str] = 'nearest',
+    tile_cells: int = TILE_CELLS,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Interpolate scattered elevations onto a regular grid.
+
+    Args:
+        points_xy: (N, 2) sample locations
+        values: (N,) elevations
+        x_coords: Grid column coordinates
+        y_coords: Grid row coordinates
+        method: 'linear', 'cubic', 'nearest' or 'idw'
+        fill: Fill for cells outside the hull ('nearest', 'idw', 'mean', None)
+        tile_cells: Maximum cells evaluated at once
+        out: Optional output array (filled in place)
+
+    Returns:
+        (len(y_coords), len(x_coords)) elevation grid
+    """
+    interpolator = ElevationInterpolator(
+        points_xy, values, method=method, fill=fill, tile_cells=tile_cells
+    )
+    return interpolator.grid(x_coords, y_coords, out=out)
+
+
+def split_points(elevation_points) -> Tuple[np.ndarray, np.ndarray]:
+    """[(x, y, z), ...] -> ((N, 2) xy, (N,) z) arrays."""
+    data = np.asarray(elevation_points, dtype=np.float64).reshape(-1, 3)
+    return data[:, :2], data[:, 2]
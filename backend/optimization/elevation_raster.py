@@ -0,0 +1,392 @@
+"""
+Georeferenced Elevation Raster
+
+One type for terrain grids shared by the topography extractor, zone
+processor, full-site analyzer and layout generators:
+- float32 elevations plus an affine transform (grid index -> map coordinates)
+- large grids live in a np.memmap file instead of process memory
+- windows (zones) are zero-copy views of the parent grid
+- derived layers (slope, buildable mask) are computed once and shared
+  by every window
+- shared() hands the grid to worker processes read-only (memmap file or
+  shared memory) without pickling the array
+
+Grid convention (same as create_elevation_grid):
+    data[row, col] is the elevation at
+    x = x0 + col * resolution, y = y0 + row * resolution
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import weakref
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Grids above this size are backed by a file on disk
+MEMMAP_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+DEFAULT_MAX_SLOPE = 15.0
+
+# Shared memory blocks created (and later unlinked) by this process
+_owned_blocks = set()
+
+
+class Affine(NamedTuple):
+    """
+    GDAL-style affine transform:
+        x = c + col * a + row * b
+        y = f + col * d + row * e
+    """
+    a: float
+    b: float
+    c: float
+    d: float
+    e: float
+    f: float
+
+    @classmethod
+    def from_origin(cls, x0: float, y0: float, resolution: float) -> "Affine":
+        """North-up grid whose rows run along +y (row 0 at y0)."""
+        return cls(resolution, 0.0, x0, 0.0, resolution, y0)
+
+    def offset(self, row: int, col: int) -> "Affine":
+        """Transform of a sub-grid starting at (row, col)."""
+        return self._replace(
+            c=self.c + col * self.a + row * self.b,
+            f=self.f + col * self.d + row * self.e
+        )
+
+
+class RasterHandle(NamedTuple):
+    """Picklable reference to raster data another process can attach to."""
+    shape: Tuple[int, int]
+    transform: Affine
+    path: Optional[str] = None
+    shm_name: Optional[str] = None
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class _Layers:
+    """Derived layers of one full grid, shared with its windows."""
+
+    def __init__(self):
+        self.slope: Optional[np.ndarray] = None
+        self.buildable: Dict[float, np.ndarray] = {}
+
+
+class ElevationRaster:
+    """
+    Elevation grid with georeferencing and cached derived layers.
+
+    Example:
+        raster = ElevationRaster.from_array(grid, Affine.from_origin(x0, y0, 10.0))
+        zone = raster.window(*zone_polygon.bounds)      # view, no copy
+        zone.slope(), zone.buildable_mask(15.0)         # views of cached layers
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        transform: Affine,
+        _layers: Optional[_Layers] = None,
+        _parent: Optional["ElevationRaster"] = None,
+        _origin: Tuple[int, int] = (0, 0)
+    ):
+        """
+        Args:
+            data: 2D float32 array (or memmap)
+            transform: Affine transform; rotated grids are not supported
+        """
+        if data.ndim != 2:
+            raise ValueError("Elevation raster must be 2D")
+        transform = Affine(*transform)
+        if transform.b != 0 or transform.d != 0:
+            raise ValueError("Rotated raster transforms are not supported")
+
+        self.data = data
+        self.transform = transform
+        self._layers = _layers if _layers is not None else _Layers()
+        self._parent = _parent
+        self._origin = _origin
+        self.path: Optional[str] = getattr(data, 'filename', None)
+
+    # ==================== CONSTRUCTION ====================
+
+    @classmethod
+    def empty(
+        cls,
+        shape: Tuple[int, int],
+        transform: Affine,
+        path: Optional[str] = None,
+        memmap_threshold: int = MEMMAP_THRESHOLD_BYTES
+    ) -> "ElevationRaster":
+        """
+        Allocate an uninitialized raster.
+
+        Args:
+            shape: (rows, cols)
+            transform: Affine transform
+            path: Backing file; a temporary file is used for grids larger
+                than memmap_threshold when not given
+            memmap_threshold: Size in bytes above which the grid is memory-mapped
+        """
+        nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+        if path is None and nbytes <= memmap_threshold:
+            return cls(np.empty(shape, dtype=np.float32), transform)
+
+        temporary = path is None
+        if temporary:
+            fd, path = tempfile.mkstemp(prefix='elevation_', suffix='.f32')
+            os.close(fd)
+        data = np.memmap(path, dtype=np.float32, mode='w+', shape=tuple(shape))
+        raster = cls(data, transform)
+        if temporary:
+            # Temporary backing file goes away with the raster
+            weakref.finalize(raster, _remove_file, path)
+        logger.info(f"[TERRAIN] Memory-mapped {shape[0]}x{shape[1]} raster ({nbytes / 1e6:.0f} MB) at {path}")
+        return raster
+
+    @classmethod
+    def from_array(
+        cls,
+        array: np.ndarray,
+        transform: Affine,
+        path: Optional[str] = None,
+        memmap_threshold: int = MEMMAP_THRESHOLD_BYTES
+    ) -> "ElevationRaster":
+        """Raster holding a float32 copy of ``array``."""
+        array = np.asarray(array)
+        raster = cls.empty(array.shape, transform, path=path, memmap_threshold=memmap_threshold)
+        raster.data[...] = array
+        return raster
+
+    @classmethod
+    def open(cls, path: str, shape: Tuple[int, int], transform: Affine) -> "ElevationRaster":
+        """Read-only raster over an existing float32 file."""
+        return cls(np.memmap(path, dtype=np.float32, mode='r', shape=tuple(shape)), transform)
+
+    @classmethod
+    def from_grid(cls, grid_data: Dict) -> "ElevationRaster":
+        """
+        Raster for a create_elevation_grid() result (or zone terrain dict).
+
+        Returns the attached raster when the dict already carries one.
+        """
+        raster = grid_data.get('raster')
+        if raster is not None:
+            return raster
+        grid = grid_data['grid'] if 'grid' in grid_data else grid_data['elevation_grid']
+        transform = Affine.from_origin(
+            float(grid_data['x_coords'][0]),
+            float(grid_data['y_coords'][0]),
+            float(grid_data['resolution'])
+        )
+        return cls.from_array(grid, transform)
+
+    @contextmanager
+    def shared(self) -> Iterator[RasterHandle]:
+        """
+        Share the grid with other processes for the duration of the block.
+
+        File-backed rasters hand out their memmap path; in-memory grids are
+        copied once into a shared memory block, released on exit.
+
+        Example:
+            with raster.shared() as handle:
+                pool.submit(work, handle)   # worker: ElevationRaster.attach(handle)
+        """
+        if self.path is not None and self._parent is None:
+            self.data.flush()
+            yield RasterHandle(self.shape, self.transform, path=self.path)
+            return
+
+        shm = shared_memory.SharedMemory(create=True, size=max(self.data.nbytes, 1))
+        _owned_blocks.add(shm.name)
+        try:
+            np.ndarray(self.shape, dtype=np.float32, buffer=shm.buf)[...] = self.data
+            yield RasterHandle(self.shape, self.transform, shm_name=shm.name)
+        finally:
+            _owned_blocks.discard(shm.name)
+            shm.close()
+            shm.unlink()
+
+    @classmethod
+    def attach(cls, handle: RasterHandle) -> "ElevationRaster":
+        """Read-only raster over data shared with ElevationRaster.shared()."""
+        if handle.path is not None:
+            return cls.open(handle.path, handle.shape, handle.transform)
+
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=handle.shm_name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=handle.shm_name)
+            # The owning process unlinks the block. Its own process and its
+            # multiprocessing workers (fork, spawn or forkserver) share one
+            # resource tracker, which must keep the entry; only a separate
+            # tracker (unrelated process) would unlink it on exit. The tracker
+            # is keyed by the platform name (shm._name, leading "/" on POSIX).
+            if handle.shm_name not in _owned_blocks and multiprocessing.parent_process() is None:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        data = np.ndarray(handle.shape, dtype=np.float32, buffer=shm.buf)
+        data.flags.writeable = False
+        raster = cls(data, handle.transform)
+        raster._shm = shm  # keep the mapping alive with the raster
+        return raster
+
+    # ==================== GEOREFERENCING ====================
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.data.shape
+
+    @property
+    def resolution(self) -> float:
+        return self.transform.a
+
+    @property
+    def x_coords(self) -> np.ndarray:
+        return self.transform.c + np.arange(self.shape[1]) * self.transform.a
+
+    @property
+    def y_coords(self) -> np.ndarray:
+        return self.transform.f + np.arange(self.shape[0]) * self.transform.e
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """(minx, miny, maxx, maxy) of the cell centres."""
+        t = self.transform
+        xs = (t.c, t.c + (self.shape[1] - 1) * t.a)
+        ys = (t.f, t.f + (self.shape[0] - 1) * t.e)
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def index(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest (row, col) for map coordinates; may fall outside the grid."""
+        t = self.transform
+        col = np.rint((np.asarray(x, dtype=np.float64) - t.c) / t.a).astype(np.int64)
+        row = np.rint((np.asarray(y, dtype=np.float64) - t.f) / t.e).astype(np.int64)
+        return row, col
+
+    def sample(self, x, y, fill: float = np.nan) -> np.ndarray:
+        """Elevation of the nearest cell for each (x, y); ``fill`` outside."""
+        row, col = self.index(x, y)
+        inside = (row >= 0) & (row < self.shape[0]) & (col >= 0) & (col < self.shape[1])
+        out = np.full(row.shape, fill, dtype=np.float32)
+        out[inside] = self.data[row[inside], col[inside]]
+        return out
+
+    def window(self, minx: float, miny: float, maxx: float, maxy: float) -> "ElevationRaster":
+        """
+        Zero-copy sub-raster of the cells with minx <= x < maxx, miny <= y < maxy.
+
+        Derived layers of a window are views of the parent's layers.
+        """
+        t = self.transform
+        cols = sorted(((minx - t.c) / t.a, (maxx - t.c) / t.a))
+        rows = sorted(((miny - t.f) / t.e, (maxy - t.f) / t.e))
+        col0, col1 = (min(max(math.ceil(v - 1e-9), 0), self.shape[1]) for v in cols)
+        row0, row1 = (min(max(math.ceil(v - 1e-9), 0), self.shape[0]) for v in rows)
+
+        root, (r, c) = self._root()
+        return ElevationRaster(
+            self.data[row0:row1, col0:col1],
+            t.offset(row0, col0),
+            _layers=root._layers,
+            _parent=root,
+            _origin=(r + row0, c + col0)
+        )
+
+    def _root(self) -> Tuple["ElevationRaster", Tuple[int, int]]:
+        if self._parent is None:
+            return self, (0, 0)
+        return self._parent, self._origin
+
+    def _view(self, layer: np.ndarray) -> np.ndarray:
+        r, c = self._origin
+        return layer[r:r + self.shape[0], c:c + self.shape[1]]
+
+    # ==================== DERIVED LAYERS ====================
+
+    def slope(self) -> np.ndarray:
+        """Slope in percent (float32), computed once over the full grid."""
+        root, _ = self._root()
+        layers = root._layers
+        if layers.slope is None:
+            t = root.transform
+            data = np.asarray(root.data)
+            if min(data.shape) < 2:
+                layers.slope = np.zeros(data.shape, dtype=np.float32)
+            else:
+                dy, dx = np.gradient(data, abs(t.e), abs(t.a))
+                layers.slope = (np.hypot(dx, dy) * 100).astype(np.float32)
+        return self._view(layers.slope)
+
+    def buildable_mask(self, max_slope: float = DEFAULT_MAX_SLOPE) -> np.ndarray:
+        """Cells with slope <= max_slope (cached per threshold)."""
+        root, _ = self._root()
+        layers = root._layers
+        mask = layers.buildable.get(max_slope)
+        if mask is None:
+            mask = layers.buildable[max_slope] = root.slope() <= max_slope
+        return self._view(mask)
+
+    def statistics(self, max_slope: float = DEFAULT_MAX_SLOPE) -> Dict[str, float]:
+        """Elevation / slope summary of this raster (NaN cells ignored)."""
+        if self.data.size == 0:
+            return {
+                'avg_elevation': 0.0, 'min_elevation': 0.0, 'max_elevation': 0.0,
+                'avg_slope': 0.0, 'buildable_percentage': 0.0
+            }
+        slope = self.slope()
+        buildable = self.buildable_mask(max_slope)
+        return {
+            'avg_elevation': float(np.nanmean(self.data)),
+            'min_elevation': float(np.nanmin(self.data)),
+            'max_elevation': float(np.nanmax(self.data)),
+            'avg_slope': float(np.nanmean(slope)),
+            'buildable_percentage': float(buildable.sum() / buildable.size * 100)
+        }
+
+    # ==================== LEGACY DICTS ====================
+
+    def to_grid_dict(self) -> Dict:
+        """create_elevation_grid() format, carrying the raster as 'raster'."""
+        return {
+            'grid': self.data,
+            'x_coords': self.x_coords,
+            'y_coords': self.y_coords,
+            'resolution': self.resolution,
+            'shape': self.shape,
+            'raster': self
+        }
+
+    def to_terrain_dict(self, max_slope: float = DEFAULT_MAX_SLOPE) -> Dict:
+        """Zone terrain format used by the layout generators."""
+        return {
+            'elevation_grid': self.data,
+            'x_coords': self.x_coords,
+            'y_coords': self.y_coords,
+            'slope_map': self.slope(),
+            'buildable_areas': self.buildable_mask(max_slope),
+            'resolution': self.resolution,
+            'raster': self,
+            **self.statistics(max_slope)
+        }
+
+    def __repr__(self) -> str:
+        backing = f"memmap:{self.path}" if self.path else "memory"
+        return f"ElevationRaster(shape={self.shape}, resolution={self.resolution}, {backing})"
@@ -3,9 +3,14 @@ Financial Optimization Module
 
 Calculate construction costs, revenue projections, and ROI
 for industrial park master plans.
+
+The engine is columnar: lots and designs are turned into NumPy columns
+once (LotColumns / DesignColumns) and revenue, cost breakdown and ROI are
+computed for all of them together, so a whole GA population is evaluated
+in one call.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 from dataclasses import dataclass
 from shapely.geometry import Polygon, LineString, Point
 import numpy as np
@@ -60,6 +65,129 @@ class RevenueParameters:
     market_demand_multiplier: float = 1.0       # Adjust based on market
 
 
+# Zone type -> price class (0 factory, 1 warehouse, 2 office); unknown -> factory
+ZONE_PRICE_CLASS = {
+    'FACTORY': 0, 'MANUFACTURING': 0, 'INDUSTRIAL': 0,
+    'WAREHOUSE': 1, 'LOGISTICS': 1, 'STORAGE': 1,
+    'OFFICE': 2, 'COMMERCIAL': 2, 'ADMIN': 2
+}
+
+# Cost breakdown keys, in reporting order
+COST_ITEMS = (
+    'site_clearing', 'grading', 'retaining_walls', 'roads',
+    'water_pipes', 'sewer_pipes', 'electric_cables', 'utility_connections',
+    'landscaping', 'tree_planting'
+)
+
+# Lot revenue adjustments, in reporting order
+REVENUE_ADJUSTMENTS = (
+    'base', 'corner_premium', 'quality_premium', 'frontage_premium',
+    'large_lot_discount', 'irregular_shape_discount', 'market_adjustment'
+)
+
+
+def _lot_area(lot: Dict[str, Any]) -> float:
+    geom = lot.get('geometry')
+    return geom.area if isinstance(geom, Polygon) else lot.get('area', 0)
+
+
+@dataclass
+class LotColumns:
+    """Lot attributes as columns (one row per lot, any number of designs)"""
+    
+    ids: List[Any]
+    area: np.ndarray
+    zone_class: np.ndarray
+    quality: np.ndarray
+    is_corner: np.ndarray
+    frontage: np.ndarray
+    design: np.ndarray      # index of the design each lot belongs to
+    
+    @classmethod
+    def from_lots(cls, lots: List[Dict[str, Any]], design_index: int = 0) -> "LotColumns":
+        """Columns for one design's lot dicts"""
+        n = len(lots)
+        return cls(
+            ids=[lot.get('id', 0) for lot in lots],
+            area=np.fromiter((_lot_area(lot) for lot in lots), dtype=np.float64, count=n),
+            zone_class=np.fromiter(
+                (ZONE_PRICE_CLASS.get(lot.get('zone_type', lot.get('zone', 'FACTORY')), 0) for lot in lots),
+                dtype=np.int8, count=n
+            ),
+            quality=np.fromiter((lot.get('quality_score', 70) for lot in lots), dtype=np.float64, count=n),
+            is_corner=np.fromiter((bool(lot.get('is_corner', False)) for lot in lots), dtype=bool, count=n),
+            frontage=np.fromiter((lot.get('frontage', 0) for lot in lots), dtype=np.float64, count=n),
+            design=np.full(n, design_index, dtype=np.int64)
+        )
+    
+    @classmethod
+    def concat(cls, parts: Sequence["LotColumns"]) -> "LotColumns":
+        """Stack the lots of several designs"""
+        return cls(
+            ids=[i for part in parts for i in part.ids],
+            **{
+                name: np.concatenate([getattr(part, name) for part in parts])
+                for name in ('area', 'zone_class', 'quality', 'is_corner', 'frontage', 'design')
+            }
+        )
+    
+    def __len__(self) -> int:
+        return len(self.area)
+
+
+@dataclass
+class DesignColumns:
+    """Per-design quantities that drive construction cost"""
+    
+    total_area: np.ndarray
+    main_road_length: np.ndarray
+    internal_road_length: np.ndarray
+    green_area: np.ndarray
+    lot_count: np.ndarray
+    lots: LotColumns
+    
+    @classmethod
+    def from_designs(cls, designs: List[Dict[str, Any]]) -> "DesignColumns":
+        """Columns for a population of design dicts"""
+        n = len(designs)
+        lots = LotColumns.concat(
+            [LotColumns.from_lots(d.get('lots', []), i) for i, d in enumerate(designs)]
+        ) if designs else LotColumns.from_lots([])
+        lot_area = np.bincount(lots.design, weights=lots.area, minlength=n)
+        
+        total_area = np.array([d.get('total_area', 0) for d in designs], dtype=np.float64)
+        # Site area from the lots when not provided
+        total_area = np.where(total_area == 0, lot_area, total_area)
+        
+        main = np.zeros(n)
+        internal = np.zeros(n)
+        for i, design in enumerate(designs):
+            for road in design.get('roads', []):
+                if isinstance(road, dict):
+                    if road.get('type', 'internal') == 'main':
+                        main[i] += road.get('length', 0)
+                    else:
+                        internal[i] += road.get('length', 0)
+                elif isinstance(road, LineString):
+                    internal[i] += road.length
+        
+        green = np.array([d.get('green_space_area', 0) for d in designs], dtype=np.float64)
+        # Estimate as 15% of total area (typical requirement)
+        green = np.where(green == 0, total_area * 0.15, green)
+        
+        return cls(
+            total_area=total_area,
+            main_road_length=main,
+            internal_road_length=internal,
+            green_area=green,
+            lot_count=np.bincount(lots.design, minlength=n),
+            lots=lots
+        )
+    
+    def __len__(self) -> int:
+        return len(self.total_area)
+
+
 class FinancialModel:
     """
     Calculate comprehensive financial metrics for industrial park layouts
@@ -89,104 +217,76 @@ class FinancialModel:
         Returns:
             Dict with cost breakdown and total
         """
+        columns = self.cost_columns(
+            DesignColumns.from_designs([design]), terrain_strategy, utility_network_costs
+        )
+        return {key: float(values[0]) for key, values in columns.items()}
+    
+    def cost_columns(
+        self,
+        designs: DesignColumns,
+        terrain_strategy: str = "balanced_cut_fill",
+        utility_network_costs: Dict[str, float] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Cost breakdown for every design at once
+        
+        Returns:
+            Dict of per-design arrays keyed like calculate_construction_cost
+        """
+        p = self.cost_params
+        area = designs.total_area
         costs = {}
         
         # 1. Site preparation
-        total_area = design.get('total_area', 0)
-        if total_area == 0 and 'lots' in design:
-            # Calculate from lots if not provided
-            total_area = sum(
-                lot.get('geometry', Polygon()).area if isinstance(lot.get('geometry'), Polygon)
-                else lot.get('area', 0)
-                for lot in design.get('lots', [])
-            )
-        
-        costs['site_clearing'] = total_area * self.cost_params.site_clearing_per_m2
+        costs['site_clearing'] = area * p.site_clearing_per_m2
         
         # Terrain-aware grading costs
         if terrain_strategy == "minimal_cut":
             # Lower earthwork, higher retaining walls
-            costs['grading'] = total_area * (self.cost_params.grading_per_m2 * 0.3)
-            costs['retaining_walls'] = total_area * 0.02 * 2_000_000  # THB
+            costs['grading'] = area * (p.grading_per_m2 * 0.3)
+            costs['retaining_walls'] = area * 0.02 * 2_000_000  # THB
         elif terrain_strategy == "major_grading":
             # Maximum earthwork, no retaining walls
-            costs['grading'] = total_area * (self.cost_params.grading_per_m2 * 2.5)
-            costs['retaining_walls'] = 0
+            costs['grading'] = area * (p.grading_per_m2 * 2.5)
+            costs['retaining_walls'] = np.zeros_like(area)
         else:  # balanced_cut_fill
             # Standard grading costs
-            costs['grading'] = total_area * self.cost_params.grading_per_m2
-            costs['retaining_walls'] = total_area * 0.01 * 2_000_000  # THB
+            costs['grading'] = area * p.grading_per_m2
+            costs['retaining_walls'] = area * 0.01 * 2_000_000  # THB
         
         # 2. Road construction
-        roads = design.get('roads', [])
-        road_cost = 0
-        total_road_length = 0
-        
-        for road in roads:
-            if isinstance(road, dict):
-                length = road.get('length', 0)
-                road_type = road.get('type', 'internal')
-            elif isinstance(road, LineString):
-                length = road.length
-                road_type = 'internal'
-            else:
-                continue
-            
-            base_cost = length * self.cost_params.road_cost_per_meter
-            
-            if road_type == 'main':
-                base_cost *= self.cost_params.main_road_multiplier
-            
-            road_cost += base_cost
-            total_road_length += length
-        
-        costs['roads'] = road_cost
+        costs['roads'] = (
+            designs.main_road_length * p.road_cost_per_meter * p.main_road_multiplier
+            + designs.internal_road_length * p.road_cost_per_meter
+        )
+        road_length = designs.main_road_length + designs.internal_road_length
         
         # 3. Utility infrastructure
         if utility_network_costs:
-            costs['water_pipes'] = utility_network_costs.get('water_pipes', 0)
-            costs['sewer_pipes'] = utility_network_costs.get('sewer_pipes', 0)
-            costs['electric_cables'] = utility_network_costs.get('electric_cables', 0)
-            # Use real values if provided, otherwise fallback (or 0 if not key)
+            # Real network costs replace the road-length estimate
+            for key in ('water_pipes', 'sewer_pipes', 'electric_cables'):
+                costs[key] = np.full_like(area, utility_network_costs.get(key, 0))
         else:
             # Estimate utility length as same as road network
-            costs['water_pipes'] = (
-                total_road_length * self.cost_params.water_pipe_per_meter
-            )
-            costs['sewer_pipes'] = (
-                total_road_length * self.cost_params.sewer_pipe_per_meter
-            )
-            costs['electric_cables'] = (
-                total_road_length * self.cost_params.electric_cable_per_meter
-            )
+            costs['water_pipes'] = road_length * p.water_pipe_per_meter
+            costs['sewer_pipes'] = road_length * p.sewer_pipe_per_meter
+            costs['electric_cables'] = road_length * p.electric_cable_per_meter
         
         # Utility connections per lot
-        num_lots = len(design.get('lots', []))
-        costs['utility_connections'] = (
-            num_lots * self.cost_params.utility_connection_per_lot
-        )
-        
-        # 4. Green space
-        green_area = design.get('green_space_area', 0)
-        if green_area == 0:
-            # Estimate as 15% of total area (typical requirement)
-            green_area = total_area * 0.15
+        costs['utility_connections'] = designs.lot_count * p.utility_connection_per_lot
         
-        costs['landscaping'] = green_area * self.cost_params.landscaping_per_m2
+        # 4. Green space (1 tree per 50m²)
+        costs['landscaping'] = designs.green_area * p.landscaping_per_m2
+        costs['tree_planting'] = np.floor(designs.green_area / 50) * p.tree_planting_per_unit
         
-        # Estimate 1 tree per 50m² of green space
-        num_trees = int(green_area / 50)
-        costs['tree_planting'] = num_trees * self.cost_params.tree_planting_per_unit
+        # 5. Overhead on the subtotal
+        subtotal = sum(costs[key] for key in COST_ITEMS)
+        costs['design_fee'] = subtotal * p.design_fee_percentage
+        costs['contingency'] = subtotal * p.contingency_percentage
         
-        # 5. Calculate subtotal
-        subtotal = sum(costs.values())
-        
-        # 6. Add overhead
-        costs['design_fee'] = subtotal * self.cost_params.design_fee_percentage
-        costs['contingency'] = subtotal * self.cost_params.contingency_percentage
-        
-        # 7. Total
-        costs['total_construction_cost'] = sum(costs.values())
+        # 6. Total
+        costs['total_construction_cost'] = subtotal + costs['design_fee'] + costs['contingency']
         
         return costs
     
@@ -203,123 +303,70 @@ class FinancialModel:
         Returns:
             Dict with revenue breakdown and total
         """
-        revenue_breakdown = []
-        total_revenue = 0
-        
-        for lot in lots:
-            lot_revenue = self._calculate_lot_revenue(lot)
-            revenue_breakdown.append(lot_revenue)
-            total_revenue += lot_revenue['revenue']
-        
-        total_area = sum(
-            lot.get('geometry', Polygon()).area if isinstance(lot.get('geometry'), Polygon)
-            else lot.get('area', 0)
-            for lot in lots
-        )
+        columns = LotColumns.from_lots(lots)
+        revenue = self.lot_revenue_columns(columns)
+        total_revenue = float(revenue['revenue'].sum())
+        total_area = float(columns.area.sum())
         
         return {
             'total_revenue': total_revenue,
-            'lots': revenue_breakdown,
+            'lots': self._revenue_breakdown(columns, revenue),
             'avg_price_per_m2': total_revenue / total_area if total_area > 0 else 0,
             'num_lots': len(lots)
         }
     
-    def _calculate_lot_revenue(
-        self,
-        lot: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Calculate revenue for single lot with premiums/discounts"""
-        
-        # Extract geometry and area
-        geom = lot.get('geometry')
-        if isinstance(geom, Polygon):
-            area = geom.area
-        else:
-            area = lot.get('area', 0)
-        
-        if area == 0:
-            return {
-                'lot_id': lot.get('id', 0),
-                'area': 0,
-                'base_price_per_m2': 0,
-                'adjustments': {},
-                'revenue': 0,
-                'price_per_m2': 0
-            }
-        
-        zone_type = lot.get('zone_type', lot.get('zone', 'FACTORY'))
-        quality_score = lot.get('quality_score', 70)
-        is_corner = lot.get('is_corner', False)
-        frontage = lot.get('frontage', 0)
-        
-        # Base price
-        if zone_type in ['FACTORY', 'MANUFACTURING', 'INDUSTRIAL']:
-            base_price = self.revenue_params.base_price_factory
-        elif zone_type in ['WAREHOUSE', 'LOGISTICS', 'STORAGE']:
-            base_price = self.revenue_params.base_price_warehouse
-        elif zone_type in ['OFFICE', 'COMMERCIAL', 'ADMIN']:
-            base_price = self.revenue_params.base_price_office
-        else:
-            base_price = self.revenue_params.base_price_factory
-        
-        base_revenue = area * base_price
-        
-        # Apply premiums
-        adjustments = {'base': base_revenue}
-        
-        # Corner lot premium
-        if is_corner:
-            corner_premium = base_revenue * self.revenue_params.corner_lot_premium
-            adjustments['corner_premium'] = corner_premium
-        else:
-            adjustments['corner_premium'] = 0
-        
-        # Quality premium
-        if quality_score > 85:
-            quality_premium = base_revenue * self.revenue_params.high_quality_premium
-            adjustments['quality_premium'] = quality_premium
-        else:
-            adjustments['quality_premium'] = 0
-        
-        # Frontage premium
-        if frontage > 0:
-            frontage_premium = frontage * self.revenue_params.frontage_premium_per_meter
-            adjustments['frontage_premium'] = frontage_premium
-        else:
-            adjustments['frontage_premium'] = 0
-        
-        # Apply discounts
-        # Large lot discount
-        if area > 5000:
-            large_discount = -base_revenue * self.revenue_params.large_lot_discount
-            adjustments['large_lot_discount'] = large_discount
-        else:
-            adjustments['large_lot_discount'] = 0
-        
-        # Irregular shape discount
-        if quality_score < 60:
-            shape_discount = -base_revenue * self.revenue_params.irregular_shape_discount
-            adjustments['irregular_shape_discount'] = shape_discount
-        else:
-            adjustments['irregular_shape_discount'] = 0
-        
-        # Market adjustment
-        market_adjustment = base_revenue * (
-            self.revenue_params.market_demand_multiplier - 1.0
-        )
-        adjustments['market_adjustment'] = market_adjustment
+    def lot_revenue_columns(self, lots: LotColumns) -> Dict[str, np.ndarray]:
+        """
+        Revenue of every lot with premiums/discounts
         
-        # Total revenue
-        total_revenue = sum(adjustments.values())
+        Returns:
+            Per-lot arrays: base_price_per_m2, each adjustment in
+            REVENUE_ADJUSTMENTS, and revenue (their sum)
+        """
+        r = self.revenue_params
+        sold = lots.area > 0
+        prices = np.array([r.base_price_factory, r.base_price_warehouse, r.base_price_office])
+        base_price = np.where(sold, prices[lots.zone_class], 0.0)
+        base = lots.area * base_price
         
-        return {
-            'lot_id': lot.get('id', 0),
-            'area': area,
+        columns = {
             'base_price_per_m2': base_price,
-            'adjustments': adjustments,
-            'revenue': total_revenue,
-            'price_per_m2': total_revenue / area if area > 0 else 0
+            'base': base,
+            'corner_premium': np.where(lots.is_corner, base * r.corner_lot_premium, 0.0),
+            'quality_premium': np.where(lots.quality > 85, base * r.high_quality_premium, 0.0),
+            'frontage_premium': np.where(
+                sold & (lots.frontage > 0), lots.frontage * r.frontage_premium_per_meter, 0.0
+            ),
+            'large_lot_discount': np.where(lots.area > 5000, -base * r.large_lot_discount, 0.0),
+            'irregular_shape_discount': np.where(
+                lots.quality < 60, -base * r.irregular_shape_discount, 0.0
+            ),
+            'market_adjustment': base * (r.market_demand_multiplier - 1.0)
         }
+        columns['revenue'] = sum(columns[key] for key in REVENUE_ADJUSTMENTS)
+        return columns
+    
+    def _revenue_breakdown(
+        self,
+        lots: LotColumns,
+        revenue: Dict[str, np.ndarray]
+    ) -> List[Dict[str, Any]]:
+        """Per-lot revenue dicts from the revenue columns"""
+        adjustments = zip(*(revenue[key].tolist() for key in REVENUE_ADJUSTMENTS))
+        breakdown = []
+        for lot_id, area, base_price, total, values in zip(
+            lots.ids, lots.area.tolist(), revenue['base_price_per_m2'].tolist(),
+            revenue['revenue'].tolist(), adjustments
+        ):
+            breakdown.append({
+                'lot_id': lot_id,
+                'area': area,
+                'base_price_per_m2': base_price,
+                'adjustments': dict(zip(REVENUE_ADJUSTMENTS, values)) if area > 0 else {},
+                'revenue': total,
+                'price_per_m2': total / area if area > 0 else 0
+            })
+        return breakdown
     
     def calculate_roi_metrics(
         self,
@@ -365,6 +412,45 @@ class FinancialModel:
             'revenue_per_lot': total_revenue / len(lots) if lots else 0,
             'profit_per_lot': gross_profit / len(lots) if lots else 0
         }
+    
+    def evaluate_population(
+        self,
+        designs: List[Dict[str, Any]],
+        terrain_strategy: str = "balanced_cut_fill",
+        utility_network_costs: Dict[str, float] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Headline financial metrics for many designs in one vectorized pass
+        
+        Args:
+            designs: Design dicts (e.g. one GA generation)
+            terrain_strategy: Grading strategy applied to all designs
+            utility_network_costs: Optional real utility costs for all designs
+            
+        Returns:
+            Per-design arrays: total_cost, total_revenue, gross_profit,
+            roi_percentage, profit_margin, avg_quality, num_lots
+        """
+        columns = DesignColumns.from_designs(designs)
+        n = len(columns)
+        lots = columns.lots
+        
+        total_cost = self.cost_columns(columns, terrain_strategy, utility_network_costs)['total_construction_cost']
+        revenue = self.lot_revenue_columns(lots)['revenue']
+        total_revenue = np.bincount(lots.design, weights=revenue, minlength=n)
+        gross_profit = total_revenue - total_cost
+        quality_sum = np.bincount(lots.design, weights=lots.quality, minlength=n)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'total_cost': total_cost,
+                'total_revenue': total_revenue,
+                'gross_profit': gross_profit,
+                'roi_percentage': np.where(total_cost > 0, gross_profit / total_cost * 100, 0.0),
+                'profit_margin': np.where(total_revenue > 0, gross_profit / total_revenue * 100, 0.0),
+                'avg_quality': np.where(columns.lot_count > 0, quality_sum / columns.lot_count, 0.0),
+                'num_lots': columns.lot_count
+            }
 
 
 class MultiObjectiveFinancialOptimizer:
@@ -385,28 +471,30 @@ class MultiObjectiveFinancialOptimizer:
         Returns:
             (roi, quality_score, cost_efficiency, revenue)
         """
-        # Calculate ROI metrics
-        metrics = self.financial_model.calculate_roi_metrics(design)
+        return tuple(float(v) for v in self.evaluate_population_fitness([design])[0])
+    
+    def evaluate_population_fitness(
+        self,
+        designs: List[Dict[str, Any]]
+    ) -> np.ndarray:
+        """
+        Evaluate a whole population in one call
         
-        # Calculate average quality score
-        lots = design.get('lots', [])
-        if lots:
-            avg_quality = np.mean([
-                lot.get('quality_score', 70) for lot in lots
-            ])
-        else:
-            avg_quality = 0
+        Returns:
+            (n_designs, 4) array of (roi, quality_score, cost_efficiency,
+            revenue), all maximized by NSGA-II
+        """
+        metrics = self.financial_model.evaluate_population(designs)
         
         # Cost efficiency (revenue per unit cost)
-        cost_efficiency = (
-            metrics['total_revenue'] / metrics['total_cost']
-            if metrics['total_cost'] > 0 else 0
-        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cost_efficiency = np.where(
+                metrics['total_cost'] > 0, metrics['total_revenue'] / metrics['total_cost'], 0.0
+            )
         
-        # Return tuple for NSGA-II
-        return (
+        return np.column_stack([
             metrics['roi_percentage'],      # Maximize ROI
-            avg_quality,                    # Maximize quality
+            metrics['avg_quality'],         # Maximize quality
             cost_efficiency,                # Maximize efficiency
             metrics['total_revenue']        # Maximize revenue
-        )
+        ])
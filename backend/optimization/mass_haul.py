@@ -0,0 +1,351 @@
+"""
+Earthwork Mass-Haul Optimization
+
+Replaces flat haul-distance assumptions with a transport plan:
+- cut and fill are aggregated into coarse supply / demand nodes (grid
+  blocks or plots); cut and fill inside one node balance locally
+- cut surplus moves to fill demand by the minimum-cost transport solved
+  with scipy linprog (HiGHS); shortfalls are imported from a borrow pit and
+  surpluses hauled to disposal at fixed distances
+- returns haul volumes, average distance, cost and a route layer (GeoJSON)
+
+Hundreds of nodes solve well under a second.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import linprog
+from scipy.spatial.distance import cdist
+
+logger = logging.getLogger(__name__)
+
+HAUL_COST_PER_M3_KM = 20_000  # VND
+DEFAULT_MAX_NODES = 400
+ARC_NEIGHBOURS = 12  # initial arcs per node before column generation
+
+
+@dataclass
+class HaulNodes:
+    """Aggregated earthwork nodes (volume > 0 cut surplus, < 0 fill demand)."""
+
+    positions: np.ndarray
+    volumes: np.ndarray
+    local_m3: np.ndarray
+    local_distance_m: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.volumes)
+
+
+@dataclass
+class MassHaulResult:
+    """Optimal haul plan."""
+
+    hauled_m3: float
+    local_m3: float
+    import_m3: float
+    export_m3: float
+    average_haul_km: float
+    haul_cost: float
+    routes: List[Dict] = field(default_factory=list)
+    node_count: int = 0
+    solve_time_s: float = 0.0
+
+    def summary(self) -> Dict:
+        """Totals without the route list."""
+        return {
+            'hauled_m3': self.hauled_m3,
+            'local_m3': self.local_m3,
+            'import_m3': self.import_m3,
+            'export_m3': self.export_m3,
+            'average_haul_km': self.average_haul_km,
+            'haul_cost': self.haul_cost,
+            'route_count': len(self.routes),
+            'node_count': self.node_count,
+            'solve_time_s': self.solve_time_s
+        }
+
+    def to_geojson(self) -> Dict:
+        """Haul routes as a GeoJSON FeatureCollection of LineStrings."""
+        return {
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {'type': 'LineString', 'coordinates': [route['from'], route['to']]},
+                    'properties': {
+                        'layer': 'HAUL_ROUTES',
+                        'volume_m3': route['volume_m3'],
+                        'distance_m': route['distance_m']
+                    }
+                }
+                for route in self.routes
+            ]
+        }
+
+
+def grid_nodes(
+    depth: np.ndarray,
+    resolution: float,
+    x0: float = 0.0,
+    y0: float = 0.0,
+    max_nodes: int = DEFAULT_MAX_NODES
+) -> HaulNodes:
+    """
+    Aggregate a cut/fill depth grid into square blocks.
+
+    Args:
+        depth: proposed - existing elevation (> 0 fill, < 0 cut); NaN ignored
+        resolution: Cell size (m); cell [row, col] is at
+            (x0 + col * resolution, y0 + row * resolution)
+        x0, y0: Coordinates of cell [0, 0]
+        max_nodes: Upper bound on blocks with earthwork
+
+    Returns:
+        HaulNodes at the volume-weighted centre of each block
+    """
+    depth = np.nan_to_num(np.asarray(depth, dtype=np.float64))
+    rows, cols = depth.shape
+    cell_area = resolution ** 2
+    active = max(int(np.count_nonzero(depth)), 1)
+
+    # Block size so the active blocks stay within max_nodes
+    block = max(1, int(np.ceil(np.sqrt(active / max_nodes))))
+    while True:
+        block_rows = np.arange(rows) // block
+        block_cols = np.arange(cols) // block
+        n_bc = block_cols[-1] + 1 if cols else 1
+        labels = (block_rows[:, None] * n_bc + block_cols[None, :]).ravel()
+        size = (block_rows[-1] + 1 if rows else 1) * n_bc
+        weight = np.abs(depth).ravel()
+        mass = np.bincount(labels, weights=weight, minlength=size)
+        if np.count_nonzero(mass) <= max_nodes or block >= max(rows, cols):
+            break
+        block += 1
+
+    cut = np.bincount(labels, weights=np.clip(-depth, 0, None).ravel(), minlength=size) * cell_area
+    fill = np.bincount(labels, weights=np.clip(depth, 0, None).ravel(), minlength=size) * cell_area
+    r, c = np.indices(depth.shape)
+    x = (x0 + c * resolution).ravel()
+    y = (y0 + r * resolution).ravel()
+    used = mass > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cx = np.bincount(labels, weights=weight * x, minlength=size)[used] / mass[used]
+        cy = np.bincount(labels, weights=weight * y, minlength=size)[used] / mass[used]
+
+    return HaulNodes(
+        positions=np.column_stack([cx, cy]),
+        volumes=(cut - fill)[used],
+        local_m3=np.minimum(cut, fill)[used],
+        local_distance_m=np.full(int(used.sum()), block * resolution / 2)
+    )
+
+
+def plot_nodes(plots: List[Dict]) -> HaulNodes:
+    """
+    Nodes from plot dicts with 'centroid' (or 'geometry'), 'cut_volume_m3',
+    'fill_volume_m3' and 'area_m2'.
+    """
+    positions, cut, fill, area = [], [], [], []
+    for plot in plots:
+        centroid = plot.get('centroid')
+        if centroid is None and plot.get('geometry') is not None:
+            point = plot['geometry'].centroid
+            centroid = (point.x, point.y)
+        if centroid is None:
+            continue
+        positions.append(tuple(centroid)[:2])
+        cut.append(plot.get('cut_volume_m3', 0.0))
+        fill.append(plot.get('fill_volume_m3', 0.0))
+        area.append(plot.get('area_m2', 0.0))
+
+    cut, fill, area = (np.asarray(v, dtype=np.float64) for v in (cut, fill, area))
+    return HaulNodes(
+        positions=np.asarray(positions, dtype=np.float64).reshape(-1, 2),
+        volumes=cut - fill,
+        local_m3=np.minimum(cut, fill),
+        local_distance_m=np.sqrt(area) / 2
+    )
+
+
+def _solve_transport(
+    arc_cost: np.ndarray,
+    supply: np.ndarray,
+    demand: np.ndarray,
+    import_cost: float,
+    export_cost: float,
+    neighbours: int = ARC_NEIGHBOURS
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Transportation LP with import / export slacks, by column generation.
+
+    Starts from the arcs to each node's nearest partners, solves with HiGHS
+    and adds arcs with negative reduced cost (from the row duals) until
+    none is left, which makes the sparse solution optimal for the full
+    problem. Arcs dearer than export + import are never needed.
+
+    Returns:
+        (flows (ns, nd), imports (nd,), exports (ns,))
+    """
+    ns, nd = arc_cost.shape
+    useful = arc_cost < import_cost + export_cost
+    active = np.zeros((ns, nd), dtype=bool)
+    k_row = min(nd, neighbours)
+    k_col = min(ns, neighbours)
+    supply_ids = np.arange(ns)[:, None]
+    active[supply_ids, np.argpartition(arc_cost, k_row - 1, axis=1)[:, :k_row]] = True
+    active[np.argpartition(arc_cost, k_col - 1, axis=0)[:k_col], np.arange(nd)[None, :]] = True
+    active &= useful
+    tolerance = 1e-9 * max(float(arc_cost.max()), 1.0)
+
+    while True:
+        rows, cols = np.nonzero(active)
+        m = len(rows)
+        # Supply rows: sum_j x_ij + export_i = supply_i
+        # Demand rows: sum_i x_ij + import_j = demand_j
+        A_eq = sparse.coo_matrix(
+            (np.ones(2 * m + ns + nd),
+             (np.concatenate([rows, ns + cols, np.arange(ns), ns + np.arange(nd)]),
+              np.concatenate([np.arange(m), np.arange(m), m + nd + np.arange(ns), m + np.arange(nd)]))),
+            shape=(ns + nd, m + nd + ns)
+        ).tocsr()
+        result = linprog(
+            np.concatenate([arc_cost[rows, cols], np.full(nd, import_cost), np.full(ns, export_cost)]),
+            A_eq=A_eq,
+            b_eq=np.concatenate([supply, demand]),
+            bounds=(0, None),
+            method='highs'
+        )
+        if result.status != 0:
+            raise RuntimeError(f"Mass-haul transport problem failed: {result.message}")
+
+        duals = result.eqlin.marginals
+        reduced = arc_cost - duals[:ns, None] - duals[None, ns:]
+        reduced[~useful | active] = 0.0
+        if not (reduced < -tolerance).any():
+            break
+        # Most negative few arcs per cut node keep the LP sparse
+        entering = np.zeros_like(active)
+        entering[supply_ids, np.argpartition(reduced, k_row - 1, axis=1)[:, :k_row]] = True
+        active |= entering & (reduced < -tolerance)
+
+    flows = np.zeros((ns, nd))
+    flows[rows, cols] = result.x[:m]
+    return flows, result.x[m:m + nd], result.x[m + nd:]
+
+
+def solve_mass_haul(
+    nodes: HaulNodes,
+    haul_cost_per_m3_km: float = HAUL_COST_PER_M3_KM,
+    borrow_distance_km: float = 1.0,
+    disposal_distance_km: float = 1.0,
+    min_route_m3: float = 1e-6
+) -> MassHaulResult:
+    """
+    Minimum-cost transport of cut surplus to fill demand.
+
+    Variables: flow cut node i -> fill node j, import into j, export from i.
+    Each cut node ships exactly its surplus, each fill node receives exactly
+    its demand. Only arcs that can improve the plan enter the LP (see
+    _solve_transport), so hundreds of nodes stay sparse.
+
+    Args:
+        nodes: Aggregated earthwork nodes
+        haul_cost_per_m3_km: Transport rate
+        borrow_distance_km: Haul distance for imported fill
+        disposal_distance_km: Haul distance for exported cut
+        min_route_m3: Routes below this volume are dropped from the layer
+
+    Returns:
+        MassHaulResult
+    """
+    start = time.time()
+    volumes = nodes.volumes
+    supply_idx = np.flatnonzero(volumes > 0)
+    demand_idx = np.flatnonzero(volumes < 0)
+    supply = volumes[supply_idx]
+    demand = -volumes[demand_idx]
+
+    local_m3 = float(nodes.local_m3.sum())
+    local_cost = float((nodes.local_m3 * nodes.local_distance_m).sum() / 1000 * haul_cost_per_m3_km)
+
+    ns, nd = len(supply), len(demand)
+    routes: List[Dict] = []
+    flows = np.zeros((ns, nd))
+    imports = demand.copy()
+    exports = supply.copy()
+
+    if ns and nd:
+        dist = cdist(nodes.positions[supply_idx], nodes.positions[demand_idx])
+        flows, imports, exports = _solve_transport(
+            dist / 1000 * haul_cost_per_m3_km,
+            supply,
+            demand,
+            borrow_distance_km * haul_cost_per_m3_km,
+            disposal_distance_km * haul_cost_per_m3_km
+        )
+
+        for i, j in zip(*np.nonzero(flows > min_route_m3)):
+            routes.append({
+                'from': nodes.positions[supply_idx[i]].tolist(),
+                'to': nodes.positions[demand_idx[j]].tolist(),
+                'volume_m3': float(flows[i, j]),
+                'distance_m': float(dist[i, j])
+            })
+        haul_m3_m = float((flows * dist).sum())
+    else:
+        haul_m3_m = 0.0
+
+    hauled = float(flows.sum())
+    import_m3 = float(imports.sum())
+    export_m3 = float(exports.sum())
+    haul_cost = (
+        haul_m3_m / 1000 * haul_cost_per_m3_km
+        + import_m3 * borrow_distance_km * haul_cost_per_m3_km
+        + export_m3 * disposal_distance_km * haul_cost_per_m3_km
+        + local_cost
+    )
+    moved = hauled + import_m3 + export_m3 + local_m3
+    distance_km = (
+        haul_m3_m / 1000
+        + import_m3 * borrow_distance_km
+        + export_m3 * disposal_distance_km
+        + float((nodes.local_m3 * nodes.local_distance_m).sum()) / 1000
+    )
+
+    elapsed = time.time() - start
+    logger.info(
+        f"[MASS-HAUL] {ns} cut / {nd} fill nodes: {hauled:,.0f} m³ hauled, "
+        f"{import_m3:,.0f} m³ import, {export_m3:,.0f} m³ export in {elapsed:.2f}s"
+    )
+
+    return MassHaulResult(
+        hauled_m3=hauled,
+        local_m3=local_m3,
+        import_m3=import_m3,
+        export_m3=export_m3,
+        average_haul_km=distance_km / moved if moved > 0 else 0.0,
+        haul_cost=float(haul_cost),
+        routes=routes,
+        node_count=len(nodes),
+        solve_time_s=elapsed
+    )
+
+
+def grid_mass_haul(
+    existing: np.ndarray,
+    proposed: np.ndarray,
+    resolution: float,
+    x0: float = 0.0,
+    y0: float = 0.0,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    **kwargs
+) -> MassHaulResult:
+    """Mass-haul plan for a proposed grading surface (see solve_mass_haul)."""
+    nodes = grid_nodes(np.asarray(proposed) - np.asarray(existing), resolution, x0, y0, max_nodes)
+    return solve_mass_haul(nodes, **kwargs)
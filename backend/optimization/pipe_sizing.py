@@ -0,0 +1,220 @@
+"""
+Hydraulic Pipe Sizing
+
+Sizes every pipe of a routed utility tree in one vectorized pass:
+- design flows accumulate down the tree with one sparse triangular solve
+  (each pipe carries its own node's demand plus everything upstream)
+- water mains and sewer force mains: Hazen-Williams, smallest catalogue
+  diameter within the velocity and unit-headloss limits
+- gravity sewers: Manning, smallest catalogue diameter flowing at most
+  MAX_SEWER_FILL full; velocity from the part-full section
+- returns per-pipe diameter, flow, velocity and headloss arrays
+
+All edges are sized at once against the whole catalogue, so 10k-pipe
+networks take milliseconds.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve_triangular
+
+logger = logging.getLogger(__name__)
+
+# Standard catalogues (internal diameter, mm)
+WATER_DIAMETERS_MM = (110, 125, 160, 200, 250, 315, 400, 500, 630, 800)
+SEWER_DIAMETERS_MM = (200, 250, 300, 400, 500, 600, 800, 1000, 1200, 1500)
+
+# Demand (industrial park, per hectare of lot area)
+WATER_DEMAND_M3_PER_HA_DAY = 40.0
+SEWER_RETURN_FACTOR = 0.8
+PEAK_FACTOR = 2.5
+
+# Design limits
+HAZEN_WILLIAMS_C = 130.0      # HDPE / uPVC
+MANNING_N = 0.013             # concrete / uPVC sewer
+MAX_WATER_VELOCITY = 1.5      # m/s
+MAX_UNIT_HEADLOSS = 0.01      # m per m (10 m/km)
+MAX_SEWER_FILL = 0.8          # depth / diameter
+MIN_SEWER_SLOPE = 0.005
+
+
+@dataclass
+class PipeSizing:
+    """Per-pipe hydraulic sizing (arrays aligned with the input edges)."""
+
+    diameter_mm: np.ndarray
+    flow_m3s: np.ndarray
+    velocity_ms: np.ndarray
+    headloss_m: np.ndarray
+    adequate: np.ndarray  # False when even the largest diameter fails
+
+    def summary(self) -> Dict:
+        """Network totals and extremes."""
+        return {
+            'pipe_count': int(len(self.diameter_mm)),
+            'max_diameter_mm': float(self.diameter_mm.max()) if len(self.diameter_mm) else 0.0,
+            'max_velocity_ms': float(self.velocity_ms.max()) if len(self.velocity_ms) else 0.0,
+            'total_headloss_m': float(self.headloss_m.sum()),
+            'undersized_pipes': int(np.count_nonzero(~self.adequate))
+        }
+
+
+def lot_demand_m3s(lot_area_m2, sewer: bool = False) -> np.ndarray:
+    """Peak design flow (m3/s) for lot areas."""
+    daily = np.asarray(lot_area_m2, dtype=np.float64) / 10_000 * WATER_DEMAND_M3_PER_HA_DAY
+    if sewer:
+        daily = daily * SEWER_RETURN_FACTOR
+    return daily * PEAK_FACTOR / 86_400
+
+
+def accumulate_flows(parent: np.ndarray, demand: np.ndarray) -> np.ndarray:
+    """
+    Flow through the pipe joining each node to its parent.
+
+    Solves (I - C) q = demand, where C[p, a] = 1 when p = parent[a]; the
+    matrix is triangular in any root-first order, so one sparse
+    triangular solve replaces a Python walk over the tree.
+
+    Args:
+        parent: Parent index per node (the next node toward the source or
+            outlet), negative for roots
+        demand: Flow entering the network at each node
+
+    Returns:
+        q[a] = demand of a plus all demand upstream of it
+    """
+    parent = np.asarray(parent)
+    demand = np.asarray(demand, dtype=np.float64)
+    n = len(parent)
+    if n == 0:
+        return demand.copy()
+
+    # Root-first order: depth by pointer doubling, all nodes at once
+    depth = (parent >= 0).astype(np.int64)
+    hop = np.where(parent >= 0, parent, np.arange(n))
+    while np.any(hop != hop[hop]):
+        depth = depth + depth[hop]
+        hop = hop[hop]
+    order = np.argsort(depth, kind='stable')
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+
+    child = np.flatnonzero(parent >= 0)
+    matrix = sparse.identity(n, format='csr') - sparse.csr_matrix(
+        (np.ones(len(child)), (rank[parent[child]], rank[child])), shape=(n, n)
+    )
+    flows = spsolve_triangular(matrix.tocsr(), demand[order], lower=False)
+    return flows[rank]
+
+
+def _pick_smallest(feasible: np.ndarray, catalogue: np.ndarray):
+    """Index of the first feasible catalogue size per row (largest if none)."""
+    adequate = feasible.any(axis=1)
+    index = np.where(adequate, feasible.argmax(axis=1), len(catalogue) - 1)
+    return index, adequate
+
+
+def size_pressure_pipes(
+    flow_m3s,
+    length_m,
+    catalogue_mm: Sequence[float] = WATER_DIAMETERS_MM,
+    c: float = HAZEN_WILLIAMS_C,
+    max_velocity: float = MAX_WATER_VELOCITY,
+    max_unit_headloss: float = MAX_UNIT_HEADLOSS
+) -> PipeSizing:
+    """
+    Hazen-Williams sizing of pressurised pipes.
+
+    hf = 10.67 L Q^1.852 / (C^1.852 D^4.87)
+
+    Args:
+        flow_m3s: Design flow per pipe
+        length_m: Pipe lengths
+        catalogue_mm: Available diameters, ascending
+        c: Hazen-Williams roughness coefficient
+        max_velocity: Velocity limit (m/s)
+        max_unit_headloss: Friction slope limit (m/m)
+    """
+    q = np.abs(np.asarray(flow_m3s, dtype=np.float64))[:, None]
+    length = np.asarray(length_m, dtype=np.float64)
+    catalogue = np.asarray(catalogue_mm, dtype=np.float64)
+    d = catalogue[None, :] / 1000
+
+    velocity = q / (np.pi * d ** 2 / 4)
+    unit_loss = 10.67 * q ** 1.852 / (c ** 1.852 * d ** 4.87)
+    index, adequate = _pick_smallest(
+        (velocity <= max_velocity) & (unit_loss <= max_unit_headloss), catalogue
+    )
+    rows = np.arange(len(index))
+    return PipeSizing(
+        diameter_mm=catalogue[index],
+        flow_m3s=q[:, 0],
+        velocity_ms=velocity[rows, index],
+        headloss_m=unit_loss[rows, index] * length,
+        adequate=adequate
+    )
+
+
+def _part_full(d: np.ndarray, theta: np.ndarray):
+    """Flow area and hydraulic radius of a circular pipe at central angle theta."""
+    area = d ** 2 / 8 * (theta - np.sin(theta))
+    radius = area / np.maximum(d * theta / 2, 1e-12)
+    return area, radius
+
+
+def size_gravity_pipes(
+    flow_m3s,
+    slope,
+    length_m,
+    catalogue_mm: Sequence[float] = SEWER_DIAMETERS_MM,
+    n: float = MANNING_N,
+    max_fill: float = MAX_SEWER_FILL
+) -> PipeSizing:
+    """
+    Manning sizing of gravity sewers.
+
+    A diameter fits when its capacity at max_fill depth carries the flow:
+    Q = (1/n) A R^(2/3) S^(1/2). The velocity is that of the actual
+    part-full depth, found by vectorized bisection on the wetted angle.
+
+    Args:
+        flow_m3s: Design flow per pipe
+        slope: Pipe grade (m/m); capacity uses at least MIN_SEWER_SLOPE
+        length_m: Pipe lengths (headloss is the fall over the length)
+        catalogue_mm: Available diameters, ascending
+        n: Manning roughness
+        max_fill: Largest allowed depth / diameter
+    """
+    q = np.abs(np.asarray(flow_m3s, dtype=np.float64))
+    fall = np.asarray(slope, dtype=np.float64)
+    s = np.maximum(fall, MIN_SEWER_SLOPE)
+    length = np.asarray(length_m, dtype=np.float64)
+    catalogue = np.asarray(catalogue_mm, dtype=np.float64)
+    d_all = catalogue[None, :] / 1000
+
+    theta_max = 2 * np.arccos(1 - 2 * max_fill)
+    area, radius = _part_full(d_all, theta_max)
+    capacity = area * radius ** (2 / 3) * np.sqrt(s)[:, None] / n
+    index, adequate = _pick_smallest(capacity >= q[:, None], catalogue)
+    d = d_all[0, index]
+
+    # Wetted angle carrying q (Q rises with theta up to ~0.94 full)
+    low, high = np.zeros_like(q), np.full_like(q, 2 * np.arccos(1 - 2 * 0.938))
+    for _ in range(40):
+        mid = (low + high) / 2
+        a, r = _part_full(d, mid)
+        below = a * r ** (2 / 3) * np.sqrt(s) / n < q
+        low, high = np.where(below, mid, low), np.where(below, high, mid)
+    a, _ = _part_full(d, high)
+
+    return PipeSizing(
+        diameter_mm=catalogue[index],
+        flow_m3s=q,
+        velocity_ms=np.where(q > 0, q / np.maximum(a, 1e-12), 0.0),
+        headloss_m=np.maximum(fall, 0.0) * length,
+        adequate=adequate
+    )
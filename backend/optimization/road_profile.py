@@ -0,0 +1,42 @@
+"""
+Road Grade Profiling
+
+The implementation lives in docker/core/roads/road_profile.py, which the
+land redistribution service ships standalone; it is loaded here by path
+(the service's top-level "core" package is not importable from this
+backend) and re-exported unchanged.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+_SOURCE = Path(__file__).resolve().parent.parent / "docker" / "core" / "roads" / "road_profile.py"
+_MODULE_NAME = "redistribution_road_profile"
+
+
+def _load():
+    module = sys.modules.get(_MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(_MODULE_NAME, _SOURCE)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[_MODULE_NAME] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+_impl = _load()
+
+DEFAULT_SPACING = _impl.DEFAULT_SPACING
+RoadProfile = _impl.RoadProfile
+grid_sampler = _impl.grid_sampler
+profile_roads = _impl.profile_roads
+summarize_profiles = _impl.summarize_profiles
+
+__all__ = [
+    "DEFAULT_SPACING",
+    "RoadProfile",
+    "grid_sampler",
+    "profile_roads",
+    "summarize_profiles",
+]
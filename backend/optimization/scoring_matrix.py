@@ -10,16 +10,44 @@ Provides weighted scoring across multiple dimensions:
 - Customer Satisfaction (10%)
 - Risk Assessment (5%)
 
-Enables design comparison and sensitivity analysis.
+Enables design comparison and sensitivity analysis:
+- one-parameter sweeps, 2-D / N-D parameter grids and Sobol global
+  sensitivity indices
+- each dimension declares the design inputs it reads, so a parameter
+  only re-scores the dimensions it can affect; the rest are reused
+- large batches are scored in a process pool
 """
 
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import numpy as np
 import logging
-from dataclasses import dataclass
+import os
+import pickle
+import time
+from dataclasses import asdict, dataclass
+from scipy.stats import qmc
 
 logger = logging.getLogger(__name__)
 
+# Design inputs each dimension reads (top-level design keys)
+DIMENSION_INPUTS = {
+    "ieat_compliance": ("compliance",),
+    "financial_roi": ("financial",),
+    "lot_efficiency": ("lots", "site_boundary"),
+    "infrastructure_cost": ("financial", "site_boundary"),
+    "construction_timeline": ("timeline",),
+    "customer_satisfaction": ("customer",),
+    "risk_assessment": ("risks",)
+}
+
+# Sections searched for bare parameter names ("roi_percent" -> financial, risks)
+PARAMETER_SECTIONS = ("compliance", "financial", "timeline", "customer", "risks")
+
+# Batches smaller than this are scored in-process
+PARALLEL_MIN_EVALUATIONS = 50_000
+
 
 @dataclass
 class ScoreWeights:
@@ -99,26 +127,10 @@ class DesignScorer:
         logger.info("[SCORING] Calculating design score")
         
         # Calculate individual dimension scores
-        scores = {
-            "ieat_compliance": self._score_ieat_compliance(design),
-            "financial_roi": self._score_financial_roi(design),
-            "lot_efficiency": self._score_lot_efficiency(design),
-            "infrastructure_cost": self._score_infrastructure_cost(design),
-            "construction_timeline": self._score_construction_timeline(design),
-            "customer_satisfaction": self._score_customer_satisfaction(design),
-            "risk_assessment": self._score_risk_assessment(design)
-        }
+        scores = self._dimension_scores(design, DIMENSION_INPUTS)
         
         # Calculate weighted total
-        weighted_total = (
-            scores["ieat_compliance"] * self.weights.ieat_compliance +
-            scores["financial_roi"] * self.weights.financial_roi +
-            scores["lot_efficiency"] * self.weights.lot_efficiency +
-            scores["infrastructure_cost"] * self.weights.infrastructure_cost +
-            scores["construction_timeline"] * self.weights.construction_timeline +
-            scores["customer_satisfaction"] * self.weights.customer_satisfaction +
-            scores["risk_assessment"] * self.weights.risk_assessment
-        )
+        weighted_total = float(np.dot(list(scores.values()), self._weight_vector()))
         
         # Simple average for total score
         total_score = np.mean(list(scores.values()))
@@ -202,7 +214,9 @@ class DesignScorer:
         
         Args:
             design: Base design
-            parameter: Parameter to vary (e.g., "salable_area_pct")
+            parameter: Parameter to vary: a top-level key, a dotted path
+                ("compliance.salable_area_pct") or a bare name found in a
+                design section ("salable_area_pct")
             value_range: (min, max) values
             num_steps: Number of steps to test
         
@@ -217,20 +231,12 @@ class DesignScorer:
         """
         logger.info(f"[SENSITIVITY] Analyzing {parameter}")
         
-        values = np.linspace(value_range[0], value_range[1], num_steps)
-        scores = []
-        
-        for val in values:
-            # Create modified design
-            modified = design.copy()
-            self._set_parameter(modified, parameter, val)
-            
-            # Score modified design
-            score_result = self.score_design(modified)
-            scores.append(score_result["weighted_score"])
+        grid = self.sensitivity_grid(design, {parameter: value_range}, num_steps)
+        values = grid["axes"][parameter]
+        scores = grid["scores"]
         
         # Find optimal value
-        optimal_idx = np.argmax(scores)
+        optimal_idx = int(np.argmax(scores))
         optimal_value = values[optimal_idx]
         optimal_score = scores[optimal_idx]
         
@@ -242,13 +248,211 @@ class DesignScorer:
         
         return {
             "parameter": parameter,
-            "values": values.tolist(),
+            "values": values,
             "scores": scores,
             "optimal_value": float(optimal_value),
             "optimal_score": float(optimal_score),
             "score_delta": float(score_delta)
         }
     
+    def sensitivity_grid(
+        self,
+        design: Dict,
+        parameters: Dict[str, Tuple[float, float]],
+        num_steps: Any = 10,
+        max_workers: Optional[int] = None
+    ) -> Dict:
+        """
+        Weighted score over a full 2-D / N-D parameter grid.
+        
+        Args:
+            design: Base design
+            parameters: {parameter: (min, max)} (see sensitivity_analysis
+                for parameter naming)
+            num_steps: Steps per axis (int, or one per parameter)
+            max_workers: Process pool size for large grids (1 = in-process)
+        
+        Returns:
+            {
+                "parameters": List[str],
+                "axes": {parameter: values},
+                "scores": nested lists, one level per parameter,
+                "optimal": {parameter: value},
+                "optimal_score": float,
+                "base_score": float (unmodified design),
+                "dimension_ranges": {dimension: (min, max)},
+                "rescored_dimensions": List[str],
+                "evaluations": int,
+                "runtime_s": float
+            }
+        """
+        started = time.perf_counter()
+        names = list(parameters)
+        steps = [num_steps] * len(names) if np.isscalar(num_steps) else list(num_steps)
+        axes = [np.linspace(lo, hi, int(n)) for (lo, hi), n in zip(parameters.values(), steps)]
+        points = np.array(list(product(*axes)), dtype=np.float64).reshape(-1, len(names))
+        
+        dimension_scores, dims = self._evaluate_points(design, names, points, max_workers)
+        weighted = np.round(dimension_scores @ self._weight_vector(), 2)
+        best = int(np.argmax(weighted))
+        
+        logger.info(
+            f"[SENSITIVITY] {len(points)}-point grid over {', '.join(names)}: "
+            f"re-scored {len(dims)}/{len(DIMENSION_INPUTS)} dimensions"
+        )
+        return {
+            "parameters": names,
+            "axes": {name: axis.tolist() for name, axis in zip(names, axes)},
+            "scores": weighted.reshape([len(axis) for axis in axes]).tolist(),
+            "optimal": {name: float(v) for name, v in zip(names, points[best])},
+            "optimal_score": float(weighted[best]),
+            "base_score": self.score_design(design)["weighted_score"],
+            "dimension_ranges": {
+                dim: (float(dimension_scores[:, i].min()), float(dimension_scores[:, i].max()))
+                for i, dim in enumerate(DIMENSION_INPUTS)
+            },
+            "rescored_dimensions": dims,
+            "evaluations": int(len(points)),
+            "runtime_s": time.perf_counter() - started
+        }
+    
+    def sobol_analysis(
+        self,
+        design: Dict,
+        parameters: Dict[str, Tuple[float, float]],
+        num_samples: int = 512,
+        seed: Optional[int] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict:
+        """
+        Sobol global sensitivity of the weighted score.
+        
+        Saltelli sampling on a scrambled Sobol sequence (N * (k + 2)
+        evaluations for k parameters) with the Saltelli first-order and
+        Jansen total-order estimators.
+        
+        Args:
+            design: Base design
+            parameters: {parameter: (min, max)}, sampled uniformly
+            num_samples: Base samples N (a power of two balances the sequence)
+            seed: Scrambling seed
+            max_workers: Process pool size for large batches
+        
+        Returns:
+            {
+                "parameters": List[str],
+                "first_order": {parameter: S1},
+                "total_order": {parameter: ST},
+                "variance": float,
+                "evaluations": int,
+                "runtime_s": float
+            }
+        """
+        started = time.perf_counter()
+        names = list(parameters)
+        k = len(names)
+        low = np.array([lo for lo, _ in parameters.values()], dtype=np.float64)
+        high = np.array([hi for _, hi in parameters.values()], dtype=np.float64)
+        
+        base = qmc.Sobol(d=2 * k, scramble=True, seed=seed).random(num_samples)
+        a = qmc.scale(base[:, :k], low, high) if k else base[:, :0]
+        b = qmc.scale(base[:, k:], low, high) if k else base[:, :0]
+        # A, B, then A with column i taken from B, for each i
+        ab = np.repeat(a[None], k, axis=0)
+        for i in range(k):
+            ab[i, :, i] = b[:, i]
+        points = np.concatenate([a, b, ab.reshape(-1, k)])
+        
+        dimension_scores, _ = self._evaluate_points(design, names, points, max_workers)
+        f = dimension_scores @ self._weight_vector()
+        fa, fb = f[:num_samples], f[num_samples:2 * num_samples]
+        fab = f[2 * num_samples:].reshape(k, num_samples)
+        variance = float(np.var(np.concatenate([fa, fb])))
+        
+        if variance > 0:
+            first = np.mean(fb * (fab - fa), axis=1) / variance
+            total = 0.5 * np.mean((fa - fab) ** 2, axis=1) / variance
+        else:
+            first = total = np.zeros(k)
+        
+        logger.info(f"[SENSITIVITY] Sobol indices for {k} parameters from {len(points)} evaluations")
+        return {
+            "parameters": names,
+            "first_order": {name: float(v) for name, v in zip(names, first)},
+            "total_order": {name: float(v) for name, v in zip(names, total)},
+            "variance": variance,
+            "evaluations": int(len(points)),
+            "runtime_s": time.perf_counter() - started
+        }
+    
+    def _evaluate_points(
+        self,
+        design: Dict,
+        names: List[str],
+        points: np.ndarray,
+        max_workers: Optional[int] = None
+    ) -> Tuple[np.ndarray, List[str]]:
+        """
+        Dimension scores (points x dimensions) for parameter value rows.
+        
+        Dimensions that none of the parameters can reach are scored once
+        on the base design and broadcast; the rest are re-scored per point,
+        in a process pool when the batch is large.
+        
+        Returns:
+            (scores, names of the re-scored dimensions)
+        """
+        paths = {name: self._parameter_paths(design, name) for name in names}
+        touched = {path[0] for name in names for path in paths[name]}
+        dims = [dim for dim, inputs in DIMENSION_INPUTS.items() if touched & set(inputs)]
+        
+        base = self._dimension_scores(design, DIMENSION_INPUTS)
+        scores = np.tile(np.array(list(base.values()), dtype=np.float64), (len(points), 1))
+        if not dims or len(points) == 0:
+            return scores, dims
+        
+        columns = [list(DIMENSION_INPUTS).index(dim) for dim in dims]
+        workers = min(self._pool_size(max_workers), max(len(points) // 1000, 1))
+        varied = None
+        if workers > 1 and len(points) >= PARALLEL_MIN_EVALUATIONS:
+            try:
+                chunks = np.array_split(points, workers * 4)
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_sensitivity_worker,
+                    initargs=(asdict(self.weights), design, paths, dims)
+                ) as pool:
+                    varied = np.concatenate(list(pool.map(_score_points, chunks)))
+            except (OSError, RuntimeError, pickle.PicklingError, AttributeError, TypeError) as e:
+                logger.warning(f"[SENSITIVITY] Process pool unavailable ({e}), scoring in-process")
+        
+        if varied is None:
+            varied = self._score_points(design, paths, dims, points)
+        scores[:, columns] = varied
+        return scores, dims
+    
+    def _score_points(
+        self,
+        design: Dict,
+        paths: Dict[str, List[Tuple[str, ...]]],
+        dims: List[str],
+        points: np.ndarray
+    ) -> np.ndarray:
+        """Score the given dimensions for each row of parameter values."""
+        inputs = {dim: DIMENSION_INPUTS[dim] for dim in dims}
+        out = np.empty((len(points), len(dims)))
+        for row, values in enumerate(points):
+            modified = self._with_parameters(design, paths, values)
+            out[row] = list(self._dimension_scores(modified, inputs).values())
+        return out
+    
+    def _pool_size(self, max_workers: Optional[int]) -> int:
+        return max_workers or os.cpu_count() or 1
+    
+    def unknown_parameters(self, design: Dict, parameters: Sequence[str]) -> List[str]:
+        """Parameter names that match nothing in the design (see sensitivity_analysis)."""
+        return [name for name in parameters if not self._parameter_paths(design, name)]
+    
     # ==================== SCORING METHODS ====================
     
     def _score_ieat_compliance(self, design: Dict) -> float:
@@ -613,12 +817,75 @@ class DesignScorer:
         
         return matrix
     
+    def _dimension_scores(self, design: Dict, dimensions: Dict[str, Sequence[str]]) -> Dict[str, float]:
+        """Scores of the given dimensions, in DIMENSION_INPUTS order."""
+        return {
+            dim: getattr(self, f"_score_{dim}")(design)
+            for dim in DIMENSION_INPUTS if dim in dimensions
+        }
+    
+    def _weight_vector(self) -> np.ndarray:
+        """Weights in DIMENSION_INPUTS order."""
+        return np.array([getattr(self.weights, dim) for dim in DIMENSION_INPUTS])
+    
+    def _parameter_paths(self, design: Dict, parameter: str) -> List[Tuple[str, ...]]:
+        """
+        Key paths a parameter name refers to.
+        
+        Dotted names are explicit paths; top-level keys map to themselves;
+        bare names map to every design section that holds them.
+        """
+        if "." in parameter:
+            return [tuple(parameter.split("."))]
+        if parameter in design:
+            return [(parameter,)]
+        return [
+            (section, parameter) for section in PARAMETER_SECTIONS
+            if isinstance(design.get(section), dict) and parameter in design[section]
+        ]
+    
+    def _with_parameters(
+        self,
+        design: Dict,
+        paths: Dict[str, List[Tuple[str, ...]]],
+        values: Sequence[float]
+    ) -> Dict:
+        """Copy of design with parameters set; only the touched sections are copied."""
+        modified = dict(design)
+        copied = set()
+        for name, value in zip(paths, values):
+            for path in paths[name]:
+                target = modified
+                for depth, key in enumerate(path[:-1]):
+                    if path[:depth + 1] not in copied:
+                        target[key] = dict(target.get(key) or {})
+                        copied.add(path[:depth + 1])
+                    target = target[key]
+                target[path[-1]] = float(value)
+        return modified
+    
     def _set_parameter(self, design: Dict, parameter: str, value: float):
         """Set design parameter for sensitivity analysis."""
-        # This is a simplified version
-        # In production, would need more sophisticated parameter handling
-        if parameter in design:
-            design[parameter] = value
+        paths = {parameter: self._parameter_paths(design, parameter)}
+        design.update(self._with_parameters(design, paths, [value]))
+
+
+# ==================== PROCESS POOL WORKERS ====================
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_sensitivity_worker(weights: Dict, design: Dict, paths: Dict, dims: List[str]):
+    """Pool initializer: keep the scorer and base design for all chunks."""
+    _worker_state.update(
+        scorer=DesignScorer(ScoreWeights(**weights)), design=design, paths=paths, dims=dims
+    )
+
+
+def _score_points(points: np.ndarray) -> np.ndarray:
+    """Score one chunk of parameter rows in a worker."""
+    state = _worker_state
+    return state["scorer"]._score_points(state["design"], state["paths"], state["dims"], points)
 
 
 # Example usage
@@ -8,12 +8,14 @@ Process elevation data and optimize site grading for:
 - Grading cost optimization
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 from shapely.geometry import Polygon, Point
-from scipy.interpolate import griddata
 import logging
 
+from optimization.elevation_interpolation import interpolate_grid, split_points
+from optimization.mass_haul import grid_mass_haul
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,7 +34,9 @@ class TerrainAnalyzer:
     def process_elevation_data(
         self,
         elevation_points: List[Tuple[float, float, float]],
-        site_boundary: Polygon
+        site_boundary: Polygon,
+        method: str = 'cubic',
+        fill: Optional[str] = 'mean'
     ) -> np.ndarray:
         """
         Create elevation grid from point cloud
@@ -40,6 +44,8 @@ class TerrainAnalyzer:
         Args:
             elevation_points: [(x, y, z), ...] - elevation data
             site_boundary: Site polygon
+            method: 'cubic', 'linear', 'nearest' or 'idw'
+            fill: Fill outside the data hull ('mean', 'nearest', 'idw', None)
             
         Returns:
             2D elevation grid (numpy array)
@@ -52,25 +58,10 @@ class TerrainAnalyzer:
         # Create grid
         x_coords = np.arange(minx, maxx, self.grid_resolution)
         y_coords = np.arange(miny, maxy, self.grid_resolution)
-        grid_x, grid_y = np.meshgrid(x_coords, y_coords)
-        
-        # Interpolate elevations
-        points = np.array([(p[0], p[1]) for p in elevation_points])
-        values = np.array([p[2] for p in elevation_points])
-        
-        try:
-            grid_z = griddata(
-                points, values, (grid_x, grid_y),
-                method='cubic',
-                fill_value=np.nanmean(values)
-            )
-        except Exception as e:
-            logger.warning(f"[TERRAIN] Cubic interpolation failed, using linear: {e}")
-            grid_z = griddata(
-                points, values, (grid_x, grid_y),
-                method='linear',
-                fill_value=np.nanmean(values)
-            )
+        
+        # Interpolate elevations (triangulation cached per point set)
+        points, values = split_points(elevation_points)
+        grid_z = interpolate_grid(points, values, x_coords, y_coords, method=method, fill=fill)
         
         logger.info(f"[TERRAIN] ✓ Created {grid_z.shape} elevation grid")
         return grid_z
@@ -135,10 +126,12 @@ class TerrainAnalyzer:
             proposed_elevation: Target elevation grid
             
         Returns:
-            Dict with cut, fill, net volumes in m³
+            Dict with cut, fill, net volumes in m³ (cells without data in
+            either grid are left out)
         """
-        # Calculate difference
+        # Calculate difference over cells known in both grids
         diff = proposed_elevation - existing_elevation
+        diff = diff[np.isfinite(diff)]
         
         # Cell area
         cell_area = self.grid_resolution ** 2
@@ -168,29 +161,48 @@ class TerrainAnalyzer:
 class GradingOptimizer:
     """
     Optimize site grading to minimize cost
+    
+    Each grading zone gets a planar pad: the least-squares plane through the
+    existing ground (cut == fill within the zone), tilted further where
+    needed to reach the minimum drainage slope. All zones are fitted
+    together from per-zone sums, so one pass over the grid solves them all.
+    
+    Haul cost comes from the minimum-cost transport of cut to fill between
+    grid blocks (mass_haul); the net surplus or shortfall goes to / comes
+    from off site at borrow_distance_km.
     """
     
+    # Candidate fall directions when the drainage slope must be enforced
+    DIRECTION_SAMPLES = 720
+    
     def __init__(
         self,
         cut_cost_per_m3: float = 50_000,    # VND
         fill_cost_per_m3: float = 80_000,   # VND (more expensive)
-        haul_cost_per_m3_km: float = 20_000 # VND
+        haul_cost_per_m3_km: float = 20_000, # VND
+        grid_resolution: float = 5.0,
+        borrow_distance_km: float = 0.5
     ):
         """
         Args:
             cut_cost_per_m3: Cost to cut/excavate
             fill_cost_per_m3: Cost to fill/import material
             haul_cost_per_m3_km: Cost to transport material
+            grid_resolution: Elevation grid cell size in meters
+            borrow_distance_km: Haul distance to the borrow / disposal site
         """
         self.cut_cost = cut_cost_per_m3
         self.fill_cost = fill_cost_per_m3
         self.haul_cost = haul_cost_per_m3_km
+        self.grid_resolution = grid_resolution
+        self.borrow_distance_km = borrow_distance_km
     
     def optimize_grading_plan(
         self,
         existing_elevation: np.ndarray,
         site_area: float,
-        target_slope: float = 0.02  # 2% minimum for drainage
+        target_slope: float = 0.02,  # 2% minimum for drainage
+        zones: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """
         Create optimal grading plan
@@ -204,41 +216,56 @@ class GradingOptimizer:
             existing_elevation: Current elevation grid
             site_area: Total site area in m²
             target_slope: Minimum slope for drainage
+            zones: Optional integer grid of grading zones (pads); cells with
+                0 keep their existing elevation. None grades the whole grid
+                as one pad
             
         Returns:
-            Grading plan with costs
+            Grading plan with costs and the fitted pad planes
         """
         logger.info("[GRADING] Optimizing grading plan")
         
-        # Calculate target elevation (balanced cut/fill)
-        target_elevation = self._calculate_balanced_elevation(existing_elevation)
+        existing = np.asarray(existing_elevation, dtype=np.float64)
+        if zones is None:
+            zones = np.ones(existing.shape, dtype=np.int64)
         
-        # Apply drainage slope
-        target_elevation = self._apply_drainage_slope(
-            target_elevation,
-            target_slope
-        )
+        # Fit one drainage-sloped, balanced plane per zone
+        planes = self._fit_pad_planes(existing, zones, target_slope)
+        target_elevation = self._pad_surface(existing, zones, planes)
         
         # Calculate volumes
-        analyzer = TerrainAnalyzer()
+        analyzer = TerrainAnalyzer(grid_resolution=self.grid_resolution)
         volumes = analyzer.calculate_cut_fill_volumes(
-            existing_elevation,
+            existing,
             target_elevation
         )
         
         # Calculate cost
         cut_cost = volumes['cut'] * self.cut_cost
         fill_cost = volumes['fill'] * self.fill_cost
-        haul_cost = volumes['balance'] * self.haul_cost * 0.5  # avg 0.5km haul
+        mass_haul = grid_mass_haul(
+            existing,
+            target_elevation,
+            self.grid_resolution,
+            haul_cost_per_m3_km=self.haul_cost,
+            borrow_distance_km=self.borrow_distance_km,
+            disposal_distance_km=self.borrow_distance_km
+        )
+        haul_cost = mass_haul.haul_cost
         
         total_cost = cut_cost + fill_cost + haul_cost
         
-        logger.info(f"[GRADING] ✓ Total grading cost: {total_cost/1e6:.1f}M VND")
+        logger.info(
+            f"[GRADING] ✓ {len(planes)} pad(s), total grading cost: {total_cost/1e6:.1f}M VND"
+        )
         
         return {
             'existing_elevation': existing_elevation,
             'proposed_elevation': target_elevation,
             'volumes': volumes,
+            'pads': planes,
+            'mass_haul': mass_haul.summary(),
+            'haul_routes': mass_haul.to_geojson(),
             'cost_breakdown': {
                 'cut': cut_cost,
                 'fill': fill_cost,
@@ -248,64 +275,124 @@ class GradingOptimizer:
             'cost_per_m2': total_cost / site_area if site_area > 0 else 0
         }
     
-    def _calculate_balanced_elevation(
+    def _fit_pad_planes(
         self,
-        existing: np.ndarray
-    ) -> np.ndarray:
-        """
-        Calculate target elevation that balances cut/fill
-        
-        Strategy: Use mean elevation with smoothing
-        """
-        # Remove NaN values
-        valid = existing[~np.isnan(existing)]
-        
-        if len(valid) == 0:
-            return existing.copy()
-        
-        # Target is median (more robust than mean)
-        target_level = np.median(valid)
-        
-        # Create target elevation
-        target = np.full_like(existing, target_level)
-        
-        # Smooth to avoid sharp transitions
-        from scipy.ndimage import gaussian_filter
-        try:
-            target = gaussian_filter(target, sigma=2.0)
-        except Exception:
-            pass
-        
-        return target
-    
-    def _apply_drainage_slope(
-        self,
-        elevation: np.ndarray,
+        existing: np.ndarray,
+        zones: np.ndarray,
         min_slope: float
-    ) -> np.ndarray:
+    ) -> List[Dict[str, float]]:
         """
-        Apply minimum slope for drainage
+        Least-squares planes per zone with a minimum gradient
+        
+        The unconstrained plane minimizes the squared cut/fill depths and,
+        having an intercept, balances cut and fill. If its gradient is below
+        min_slope, the gradient is moved onto the min_slope circle in the
+        direction that adds the least squared earthwork; the intercept is
+        then re-balanced.
         
         Args:
-            elevation: Elevation grid
+            existing: Elevation grid
+            zones: Integer zone grid (0 = not graded)
             min_slope: Minimum slope (rise/run, e.g., 0.02 for 2%)
             
         Returns:
-            Adjusted elevation with drainage slope
+            One dict per zone with the plane and its earthwork
         """
-        # For simplicity, apply uniform slope from high to low corner
-        # In production, would use more sophisticated drainage design
-        
-        rows, cols = elevation.shape
-        
-        # Create slope gradient (high at top-left, low at bottom-right)
-        for i in range(rows):
-            for j in range(cols):
-                # Apply diagonal slope
-                distance = np.sqrt(i**2 + j**2)
-                elevation[i, j] -= distance * min_slope * 5.0  # 5m grid resolution
+        res = self.grid_resolution
+        rows, cols = np.indices(existing.shape)
+        valid = (zones > 0) & ~np.isnan(existing)
+        ids, label = np.unique(zones[valid], return_inverse=True)
+        if len(ids) == 0:
+            return []
+        
+        x = cols[valid] * res
+        y = rows[valid] * res
+        z = existing[valid]
+        k = len(ids)
+        
+        def zone_sum(weights=None):
+            return np.bincount(label, weights=weights, minlength=k)
+        
+        n = zone_sum()
+        mx, my, mz = zone_sum(x) / n, zone_sum(y) / n, zone_sum(z) / n
+        # Centred second moments per zone
+        dx, dy, dz = x - mx[label], y - my[label], z - mz[label]
+        cov = np.empty((k, 2, 2))
+        cov[:, 0, 0] = zone_sum(dx * dx)
+        cov[:, 0, 1] = cov[:, 1, 0] = zone_sum(dx * dy)
+        cov[:, 1, 1] = zone_sum(dy * dy)
+        rhs = np.stack([zone_sum(dx * dz), zone_sum(dy * dz)], axis=1)
+        
+        # Unconstrained least-squares gradients
+        gradient = np.einsum('kij,kj->ki', np.linalg.pinv(cov), rhs)
+        
+        # Enforce the drainage slope: minimize (g - g*)' C (g - g*) on |g| = min_slope
+        flat = np.hypot(gradient[:, 0], gradient[:, 1]) < min_slope
+        if flat.any() and min_slope > 0:
+            angles = np.linspace(0, 2 * np.pi, self.DIRECTION_SAMPLES, endpoint=False)
+            circle = min_slope * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+            delta = circle[None, :, :] - gradient[flat][:, None, :]
+            cost = np.einsum('kai,kij,kaj->ka', delta, cov[flat], delta)
+            gradient[flat] = circle[np.argmin(cost, axis=1)]
+        
+        # Intercept through the zone centroid keeps cut == fill
+        depth = mz[label] + gradient[label, 0] * dx + gradient[label, 1] * dy - z
+        cell_area = res ** 2
+        fill = zone_sum(np.clip(depth, 0, None)) * cell_area
+        cut = zone_sum(np.clip(-depth, 0, None)) * cell_area
+        
+        planes = []
+        for i, zone_id in enumerate(ids):
+            slope = float(np.hypot(*gradient[i]))
+            planes.append({
+                'zone': int(zone_id),
+                'cells': int(n[i]),
+                'centroid_x': float(mx[i]),
+                'centroid_y': float(my[i]),
+                'elevation': float(mz[i]),
+                'slope_x': float(gradient[i, 0]),
+                'slope_y': float(gradient[i, 1]),
+                'slope_pct': slope * 100,
+                # Direction of fall, degrees counter-clockwise from +x (columns)
+                'fall_direction_deg': float(np.degrees(np.arctan2(-gradient[i, 1], -gradient[i, 0])) % 360),
+                'cut_m3': float(cut[i]),
+                'fill_m3': float(fill[i])
+            })
+        return planes
+    
+    def _pad_surface(
+        self,
+        existing: np.ndarray,
+        zones: np.ndarray,
+        planes: List[Dict[str, float]]
+    ) -> np.ndarray:
+        """
+        Proposed elevation grid from the pad planes
         
-        return elevation
+        Cells outside every zone keep their existing elevation; cells with
+        no existing elevation (NaN) stay NaN.
+        """
+        proposed = existing.copy()
+        if not planes:
+            return proposed
+        
+        res = self.grid_resolution
+        zone_ids = np.array([p['zone'] for p in planes])
+        params = np.array([
+            [p['elevation'], p['slope_x'], p['slope_y'], p['centroid_x'], p['centroid_y']]
+            for p in planes
+        ])
+        
+        graded = np.isin(zones, zone_ids) & ~np.isnan(existing)
+        rows, cols = np.nonzero(graded)
+        idx = np.searchsorted(np.sort(zone_ids), zones[rows, cols])
+        params = params[np.argsort(zone_ids)][idx]
+        proposed[rows, cols] = (
+            params[:, 0]
+            + params[:, 1] * (cols * res - params[:, 3])
+            + params[:, 2] * (rows * res - params[:, 4])
+        )
+        return proposed
 
 
 def create_synthetic_terrain(
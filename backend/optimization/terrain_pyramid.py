@@ -0,0 +1,105 @@
+"""
+Terrain Pyramid
+
+Multi-resolution view of one elevation raster:
+- elevation, slope and buildable mask are computed once at the base
+  resolution
+- each coarser level halves the resolution by block-averaging the base
+  layers (NaN-aware), and is cached after the first request
+- coarse levels are ElevationRasters whose slope / buildable layers are the
+  downsampled base layers, so slopes are not flattened by the coarse grid
+
+Coarse levels drive whole-site searches (zones, scoring); the base raster is
+read only inside the areas that get refined.
+"""
+
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+from optimization.elevation_raster import Affine, DEFAULT_MAX_SLOPE, ElevationRaster
+
+logger = logging.getLogger(__name__)
+
+# A coarse cell is buildable when at least this share of its base cells is
+BUILDABLE_FRACTION = 0.5
+
+
+def _block_mean(layer: np.ndarray, factor: int) -> np.ndarray:
+    """NaN-aware mean over factor x factor blocks (partial edge blocks included)."""
+    rows, cols = layer.shape
+    out_rows, out_cols = -(-rows // factor), -(-cols // factor)
+    padded = np.full((out_rows * factor, out_cols * factor), np.nan, dtype=np.float64)
+    padded[:rows, :cols] = layer
+    blocks = padded.reshape(out_rows, factor, out_cols, factor)
+    valid = ~np.isnan(blocks)
+    count = valid.sum(axis=(1, 3))
+    total = np.where(valid, blocks, 0.0).sum(axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+class TerrainPyramid:
+    """
+    Base raster plus cached 2x, 4x, 8x ... downsampled levels.
+
+    Example:
+        pyramid = TerrainPyramid(raster, max_slope=15.0)
+        coarse = pyramid.for_resolution(40.0)   # zone search
+        coarse.buildable_mask(15.0)             # downsampled base mask
+        pyramid.base.window(*zone.bounds)       # fine cells of one zone
+    """
+
+    def __init__(self, base: ElevationRaster, max_slope: float = DEFAULT_MAX_SLOPE):
+        """
+        Args:
+            base: Full-resolution raster
+            max_slope: Slope threshold (%) of the buildable layer
+        """
+        self.base = base
+        self.max_slope = max_slope
+        self._levels: Dict[int, ElevationRaster] = {0: base}
+
+    @property
+    def depth(self) -> int:
+        """Number of levels, down to a single cell."""
+        return int(np.ceil(np.log2(max(max(self.base.shape), 1)))) + 1
+
+    def level(self, level: int) -> ElevationRaster:
+        """Raster at base resolution * 2**level (cached)."""
+        if level < 0:
+            raise ValueError("Pyramid level must be >= 0")
+        cached = self._levels.get(level)
+        if cached is not None:
+            return cached
+
+        factor = 2 ** level
+        base = self.base
+        t = base.transform
+        # Block centre of the first block
+        shift = (factor - 1) / 2
+        transform = Affine(t.a * factor, 0.0, t.c + shift * t.a, 0.0, t.e * factor, t.f + shift * t.e)
+
+        raster = ElevationRaster.from_array(_block_mean(np.asarray(base.data), factor), transform)
+        raster._layers.slope = _block_mean(base.slope(), factor).astype(np.float32)
+        buildable = _block_mean(base.buildable_mask(self.max_slope).astype(np.float64), factor)
+        raster._layers.buildable[self.max_slope] = np.nan_to_num(buildable) >= BUILDABLE_FRACTION
+
+        self._levels[level] = raster
+        logger.info(
+            f"[TERRAIN] Pyramid level {level}: {raster.shape[0]}x{raster.shape[1]} "
+            f"at {raster.resolution:g} m"
+        )
+        return raster
+
+    def level_for(self, resolution: Optional[float]) -> int:
+        """Coarsest level whose resolution does not exceed ``resolution``."""
+        if resolution is None or resolution <= self.base.resolution:
+            return 0
+        level = int(np.floor(np.log2(resolution / self.base.resolution) + 1e-9))
+        return min(level, self.depth - 1)
+
+    def for_resolution(self, resolution: Optional[float]) -> ElevationRaster:
+        """Level raster closest to (not coarser than) ``resolution``."""
+        return self.level(self.level_for(resolution))
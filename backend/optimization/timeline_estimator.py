@@ -7,17 +7,37 @@ Generates detailed construction schedules with:
 - Landscaping and final touches
 - Critical path method (CPM) analysis
 - Gantt chart data generation
+- PERT Monte Carlo simulation: completion percentiles and task
+  criticality indices
+
+CPM runs on index arrays in O(V+E): one forward and one backward pass,
+grouped by topological level so every level is a single vectorized
+reduction - across all Monte Carlo runs at once.
 
 Follows IEAT Thailand construction standards.
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Three-point estimates when a task gives only its most likely duration
+DEFAULT_OPTIMISTIC_FACTOR = 0.85
+DEFAULT_PESSIMISTIC_FACTOR = 1.5
+
+# Monte Carlo defaults
+DEFAULT_RUNS = 5000
+RUN_CHUNK_SIZE = 2000
+HISTOGRAM_BINS = 30
+
+# Float tolerance (days) for zero total float
+CRITICAL_SLACK = 1e-6
+
 
 @dataclass
 class Task:
@@ -28,6 +48,158 @@ class Task:
     dependencies: List[str]
     resource: str
     critical: bool = False
+    optimistic_days: Optional[float] = None
+    pessimistic_days: Optional[float] = None
+    
+    def three_point(self) -> Tuple[float, float, float]:
+        """(optimistic, most likely, pessimistic) duration in days."""
+        likely = float(self.duration_days)
+        optimistic = self.optimistic_days
+        pessimistic = self.pessimistic_days
+        if optimistic is None:
+            optimistic = likely * DEFAULT_OPTIMISTIC_FACTOR
+        if pessimistic is None:
+            pessimistic = likely * DEFAULT_PESSIMISTIC_FACTOR
+        return float(optimistic), likely, float(pessimistic)
+
+
+class ScheduleNetwork:
+    """
+    Task precedence graph as index arrays.
+    
+    Tasks are grouped by topological level (longest chain of
+    predecessors) for the forward pass and by height (longest chain of
+    successors) for the backward pass; each group's early start / late
+    finish is one reduceat over its incoming / outgoing edges.
+    
+    Example:
+        network = ScheduleNetwork.from_tasks(tasks)
+        es, ef, ls, lf = network.cpm(durations)   # (runs, n) or (n,)
+    """
+    
+    def __init__(self, ids: Sequence[str], dependencies: Sequence[Sequence[str]]):
+        """
+        Args:
+            ids: Task ids
+            dependencies: Predecessor ids per task
+        
+        Raises:
+            ValueError: Unknown dependency or a dependency cycle
+        """
+        self.ids = list(ids)
+        n = len(self.ids)
+        index = {task_id: i for i, task_id in enumerate(self.ids)}
+        src, dst = [], []
+        for i, deps in enumerate(dependencies):
+            for dep in deps:
+                if dep not in index:
+                    raise ValueError(f"Task {self.ids[i]} depends on unknown task {dep}")
+                src.append(index[dep])
+                dst.append(i)
+        self.src = np.array(src, dtype=np.int64)
+        self.dst = np.array(dst, dtype=np.int64)
+        
+        self.order = self._topological_order(n)
+        self.level = self._longest_chain(self.order, self.src, self.dst, n)
+        self.height = self._longest_chain(self.order[::-1], self.dst, self.src, n)
+        self._forward = self._groups(self.level, self.dst, self.src)
+        self._backward = self._groups(self.height, self.src, self.dst)
+    
+    @classmethod
+    def from_tasks(cls, tasks: Sequence[Union[Task, Dict]]) -> "ScheduleNetwork":
+        """Network of Task objects or scheduled task dicts."""
+        if tasks and isinstance(tasks[0], dict):
+            return cls([t['id'] for t in tasks], [t['dependencies'] for t in tasks])
+        return cls([t.id for t in tasks], [t.dependencies for t in tasks])
+    
+    def _topological_order(self, n: int) -> np.ndarray:
+        """Kahn's algorithm on CSR successor lists."""
+        successors = np.argsort(self.src, kind='stable')
+        starts = np.searchsorted(self.src[successors], np.arange(n + 1))
+        indegree = np.bincount(self.dst, minlength=n)
+        order = list(np.flatnonzero(indegree == 0))
+        head = 0
+        while head < len(order):
+            task = order[head]
+            head += 1
+            for edge in successors[starts[task]:starts[task + 1]]:
+                nxt = self.dst[edge]
+                indegree[nxt] -= 1
+                if indegree[nxt] == 0:
+                    order.append(nxt)
+        if len(order) < n:
+            cyclic = [self.ids[i] for i in np.flatnonzero(indegree > 0)]
+            raise ValueError(f"Dependency cycle among tasks: {', '.join(cyclic[:10])}")
+        return np.array(order, dtype=np.int64)
+    
+    @staticmethod
+    def _longest_chain(order: np.ndarray, src: np.ndarray, dst: np.ndarray, n: int) -> np.ndarray:
+        """Edges on the longest src -> dst chain ending at each task."""
+        incoming = np.argsort(dst, kind='stable')
+        starts = np.searchsorted(dst[incoming], np.arange(n + 1))
+        depth = np.zeros(n, dtype=np.int64)
+        for task in order:
+            edges = incoming[starts[task]:starts[task + 1]]
+            if len(edges):
+                depth[task] = depth[src[edges]].max() + 1
+        return depth
+    
+    @staticmethod
+    def _groups(rank: np.ndarray, owner: np.ndarray, other: np.ndarray) -> List[Tuple]:
+        """
+        Per rank >= 1: (tasks, edge partners sorted by task, reduceat starts).
+        
+        owner is the edge end that belongs to the group (dst for the
+        forward pass, src for the backward pass).
+        """
+        # One sort by (rank, owner), then split into rank groups
+        edge_rank = rank[owner]
+        order = np.lexsort((owner, edge_rank))
+        edge_rank, owners, others = edge_rank[order], owner[order], other[order]
+        levels = np.arange(1, int(rank.max(initial=0)) + 2)
+        bounds = np.searchsorted(edge_rank, levels)
+        # First edge of every (rank, task) run
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (owners[1:] != owners[:-1]) | (edge_rank[1:] != edge_rank[:-1])
+        task_starts = np.flatnonzero(first)
+        task_bounds = np.searchsorted(task_starts, bounds)
+        
+        groups = []
+        for lo, hi, t_lo, t_hi in zip(bounds[:-1], bounds[1:], task_bounds[:-1], task_bounds[1:]):
+            starts = task_starts[t_lo:t_hi]
+            groups.append((owners[starts], others[lo:hi], starts - lo))
+        return groups
+    
+    def cpm(self, durations: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Early / late start and finish times (days from project start).
+        
+        Args:
+            durations: (n,) or (runs, n) task durations
+        
+        Returns:
+            (early_start, early_finish, late_start, late_finish), each
+            shaped like durations
+        """
+        d = np.asarray(durations, dtype=np.float64)
+        single = d.ndim == 1
+        d = np.atleast_2d(d)
+        
+        early_start = np.zeros_like(d)
+        early_finish = d.copy()
+        for tasks, preds, starts in self._forward:
+            early_start[:, tasks] = np.maximum.reduceat(early_finish[:, preds], starts, axis=1)
+            early_finish[:, tasks] = early_start[:, tasks] + d[:, tasks]
+        
+        project_end = early_finish.max(axis=1, keepdims=True) if d.shape[1] else np.zeros((len(d), 1))
+        late_finish = np.broadcast_to(project_end, d.shape).copy()
+        late_start = late_finish - d
+        for tasks, succs, starts in self._backward:
+            late_finish[:, tasks] = np.minimum.reduceat(late_start[:, succs], starts, axis=1)
+            late_start[:, tasks] = late_finish[:, tasks] - d[:, tasks]
+        
+        result = (early_start, early_finish, late_start, late_finish)
+        return tuple(a[0] for a in result) if single else result
 
 
 class TimelineGenerator:
@@ -88,7 +260,7 @@ class TimelineGenerator:
         
         # Mark critical tasks
         for task in scheduled_tasks:
-            task.critical = task['id'] in critical_path
+            task['critical'] = task['id'] in critical_path
         
         # Generate milestones
         milestones = self._generate_milestones(scheduled_tasks)
@@ -329,92 +501,163 @@ class TimelineGenerator:
         """
         Schedule tasks with start/end dates.
         
-        Uses forward pass to calculate early start/finish.
+        Uses forward pass to calculate early start/finish; tasks may be
+        listed in any order.
         """
-        # Create task dict for easy lookup
-        task_dict = {t.id: t for t in tasks}
-        scheduled = {}
+        network = ScheduleNetwork.from_tasks(tasks)
+        durations = np.array([t.duration_days for t in tasks], dtype=np.float64)
+        early_start, early_finish, late_start, _ = network.cpm(durations)
         
-        # Calculate early start/finish (forward pass)
-        for task in tasks:
-            # Find latest finish of dependencies
-            if task.dependencies:
-                dep_finishes = [
-                    scheduled[dep_id]['end_date']
-                    for dep_id in task.dependencies
-                ]
-                early_start = max(dep_finishes)
-            else:
-                early_start = start_date
-            
-            early_finish = early_start + timedelta(days=task.duration_days)
-            
-            scheduled[task.id] = {
+        return [
+            {
                 "id": task.id,
                 "name": task.name,
                 "duration_days": task.duration_days,
                 "dependencies": task.dependencies,
                 "resource": task.resource,
-                "start_date": early_start,
-                "end_date": early_finish,
+                "start_date": start_date + timedelta(days=float(early_start[i])),
+                "end_date": start_date + timedelta(days=float(early_finish[i])),
+                "slack_days": float(late_start[i] - early_start[i]),
                 "critical": False
             }
-        
-        return list(scheduled.values())
+            for i, task in enumerate(tasks)
+        ]
     
     def _find_critical_path(self, tasks: List[Dict]) -> List[str]:
         """
         Find critical path using backward pass.
         
-        Critical path = tasks with zero slack.
+        Critical path = tasks with zero slack, in topological order.
         """
-        # Create task dict
-        task_dict = {t['id']: t for t in tasks}
+        network = ScheduleNetwork.from_tasks(tasks)
+        durations = np.array([t['duration_days'] for t in tasks], dtype=np.float64)
+        early_start, _, late_start, _ = network.cpm(durations)
+        critical = late_start - early_start <= CRITICAL_SLACK
+        return [tasks[i]['id'] for i in network.order if critical[i]]
+    
+    # ==================== MONTE CARLO ====================
+    
+    def simulate_timeline(
+        self,
+        design: Optional[Dict] = None,
+        tasks: Optional[List[Task]] = None,
+        runs: int = DEFAULT_RUNS,
+        distribution: str = "beta",
+        start_date: Optional[datetime] = None,
+        seed: Optional[int] = None,
+        percentiles: Sequence[float] = (10, 50, 80, 90, 95)
+    ) -> Dict:
+        """
+        PERT Monte Carlo simulation of the construction schedule.
         
-        # Calculate late start/finish (backward pass)
-        project_end = max(t['end_date'] for t in tasks)
-        late_times = {}
+        Task durations are drawn from their three-point estimates
+        (Task.three_point) for all tasks and runs at once; each chunk of
+        runs goes through one vectorized CPM pass.
         
-        # Start from end tasks
-        end_tasks = [
-            t for t in tasks
-            if not any(t['id'] in t2['dependencies'] for t2 in tasks)
-        ]
+        Args:
+            design: Design used to scale the standard tasks (ignored when
+                tasks is given)
+            tasks: Custom task list (any size, any order)
+            runs: Number of Monte Carlo runs
+            distribution: "beta" (PERT-beta) or "triangular"
+            start_date: Project start date
+            seed: Random seed
+            percentiles: Completion percentiles to report
         
-        # Backward pass
-        for task in reversed(tasks):
-            # Find earliest late finish of successors
-            successors = [
-                t for t in tasks if task['id'] in t['dependencies']
-            ]
-            
-            if successors:
-                late_finish = min(
-                    late_times[s['id']]['late_start']
-                    for s in successors
-                )
-            else:
-                late_finish = project_end
-            
-            late_start = late_finish - timedelta(
-                days=task['duration_days']
-            )
-            
-            late_times[task['id']] = {
-                'late_start': late_start,
-                'late_finish': late_finish
+        Returns:
+            {
+                "runs": int,
+                "deterministic_days": float,
+                "mean_days": float,
+                "std_days": float,
+                "completion_days": {"P50": float, ...},
+                "completion_dates": {"P50": str, ...},
+                "probability_on_time": float (deterministic date met),
+                "criticality_index": {task_id: share of runs critical},
+                "histogram": {"counts": [...], "edges": [...]}
             }
+        """
+        if runs < 1:
+            raise ValueError("runs must be >= 1")
+        if distribution not in ("beta", "triangular"):
+            raise ValueError(f"Unknown duration distribution: {distribution}")
         
-        # Find tasks with zero slack
-        critical_path = []
-        for task in tasks:
-            slack = (
-                late_times[task['id']]['late_start'] - task['start_date']
-            ).days
-            if slack == 0:
-                critical_path.append(task['id'])
+        tasks = tasks if tasks is not None else self._calculate_task_durations(design or {})
+        network = ScheduleNetwork.from_tasks(tasks)
+        estimates = np.array([t.three_point() for t in tasks], dtype=np.float64).reshape(-1, 3)
+        low, likely, high = estimates.T
+        if np.any((low > likely) | (likely > high)):
+            raise ValueError("Three-point estimates need optimistic <= most likely <= pessimistic")
         
-        return critical_path
+        rng = np.random.default_rng(seed)
+        start = start_date or datetime.now()
+        deterministic = float(network.cpm(likely)[1].max(initial=0.0))
+        logger.info(
+            f"[TIMELINE] Simulating {runs} runs of {len(tasks)} tasks ({distribution})"
+        )
+        
+        completion = np.empty(runs)
+        critical_runs = np.zeros(len(tasks))
+        for offset in range(0, runs, RUN_CHUNK_SIZE):
+            size = min(RUN_CHUNK_SIZE, runs - offset)
+            durations = self._sample_durations(rng, low, likely, high, size, distribution)
+            early_start, early_finish, late_start, _ = network.cpm(durations)
+            completion[offset:offset + size] = early_finish.max(axis=1, initial=0.0)
+            critical_runs += (late_start - early_start <= CRITICAL_SLACK).sum(axis=0)
+        
+        values = np.percentile(completion, percentiles)
+        counts, edges = np.histogram(completion, bins=HISTOGRAM_BINS)
+        
+        result = {
+            "runs": int(runs),
+            "distribution": distribution,
+            "deterministic_days": deterministic,
+            "mean_days": float(completion.mean()),
+            "std_days": float(completion.std()),
+            "completion_days": {f"P{p:g}": float(v) for p, v in zip(percentiles, values)},
+            "completion_dates": {
+                f"P{p:g}": (start + timedelta(days=float(v))).isoformat()
+                for p, v in zip(percentiles, values)
+            },
+            "probability_on_time": float(np.mean(completion <= deterministic + CRITICAL_SLACK)),
+            "criticality_index": {
+                task.id: float(c / runs) for task, c in zip(tasks, critical_runs)
+            },
+            "histogram": {"counts": counts.tolist(), "edges": edges.tolist()}
+        }
+        logger.info(
+            f"[TIMELINE] Monte Carlo P50 {np.percentile(completion, 50):.0f} days, "
+            f"P90 {np.percentile(completion, 90):.0f} days "
+            f"(deterministic {deterministic:.0f})"
+        )
+        return result
+    
+    @staticmethod
+    def _sample_durations(
+        rng: np.random.Generator,
+        low: np.ndarray,
+        likely: np.ndarray,
+        high: np.ndarray,
+        size: int,
+        distribution: str
+    ) -> np.ndarray:
+        """(size, n) durations from three-point estimates."""
+        spread = high - low
+        fixed = spread <= 0
+        safe_spread = np.where(fixed, 1.0, spread)
+        mode = (likely - low) / safe_spread
+        if distribution == "triangular":
+            # Inverse CDF of the unit triangular distribution
+            u = rng.random((size, len(low)))
+            unit = np.where(
+                u < mode,
+                np.sqrt(u * mode),
+                1 - np.sqrt((1 - u) * (1 - mode))
+            )
+        else:
+            # PERT-beta: mean (a + 4m + b) / 6
+            unit = rng.beta(1 + 4 * mode, 1 + 4 * (1 - mode), size=(size, len(low)))
+        return np.where(fixed, likely, low + unit * safe_spread)
     
     def _generate_milestones(self, tasks: List[Dict]) -> List[Dict]:
         """Generate project milestones."""
@@ -10,15 +10,38 @@ Optimize pipe and cable routing for:
 Uses graph algorithms for minimum cost network design.
 """
 
-from typing import List, Dict, Any, Tuple, Optional
-from shapely.geometry import LineString, Point, Polygon
+from typing import List, Dict, Any, Tuple, Optional, Union
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order, dijkstra, minimum_spanning_tree
+from scipy.spatial import cKDTree
+from shapely.geometry import LineString, MultiLineString, Point, Polygon
 from shapely.ops import nearest_points, linemerge
 import networkx as nx
 import numpy as np
+import shapely
 import logging
+import time
+
+from optimization.elevation_raster import ElevationRaster
+from optimization.pipe_sizing import (
+    PipeSizing,
+    accumulate_flows,
+    lot_demand_m3s,
+    size_gravity_pipes,
+    size_pressure_pipes,
+)
 
 logger = logging.getLogger(__name__)
 
+# Longest service connection from a lot to the road graph (meters)
+MAX_CONNECTION_DISTANCE = 1000.0
+
+# Pipe meters charged per meter of trench depth lost to adverse grade
+ADVERSE_GRADE_PENALTY = 50.0
+
+# Sewage lift station (wet well, pumps, controls) in VND
+LIFT_STATION_COST = 1_500_000_000
+
 
 class UtilityNetworkDesigner:
     """
@@ -30,11 +53,13 @@ class UtilityNetworkDesigner:
         min_pipe_spacing: float = 0.5,      # meters
         min_depth: float = 0.8,             # meters
         max_depth: float = 2.0,             # meters
-        road_corridor_width: float = 3.0    # meters from road edge
+        road_corridor_width: float = 3.0,   # meters from road edge
+        min_slope: float = 0.005            # gravity sewer grade (0.5%)
     ):
         self.min_pipe_spacing = min_pipe_spacing
         self.min_depth = min_depth
         self.max_depth = max_depth
+        self.min_slope = min_slope
         self.road_corridor_width = road_corridor_width
     
     def design_water_network(
@@ -63,52 +88,19 @@ class UtilityNetworkDesigner:
             logger.warning("[WATER NETWORK] No road network available")
             return self._empty_network('water', water_source)
         
-        # Add water source
-        source_node = self._add_point_to_graph(G, water_source)
-        
-        # Add lot connection points
-        lot_nodes = []
-        for lot in lots:
-            try:
-                geom = lot.get('geometry')
-                if isinstance(geom, Polygon):
-                    centroid = geom.centroid
-                else:
-                    continue
-                
-                # Find nearest road point
-                nearest_road_point = self._find_nearest_road_point(centroid, roads)
-                if nearest_road_point:
-                    # Add lot connection point and connect to nearest road
-                    lot_node = (nearest_road_point.x, nearest_road_point.y)
-                    
-                    # Find closest existing road node to connect to
-                    min_dist = float('inf')
-                    closest_node = None
-                    for node in G.nodes():
-                        dist = Point(node).distance(Point(lot_node))
-                        if dist < min_dist:
-                            min_dist = dist
-                            closest_node = node
-                    
-                    # Add node and edge
-                    if closest_node and min_dist < 1000:  # Max 1km connection
-                        G.add_node(lot_node, pos=lot_node)
-                        G.add_edge(lot_node, closest_node, length=min_dist)
-                        lot_nodes.append(lot_node)
-            except Exception as e:
-                logger.warning(f"[WATER NETWORK] Failed to add lot: {e}")
-                continue
+        # Connect lots to their nearest road node, then the water source
+        lot_nodes, lot_areas = self._connect_lots(G, lots, roads)
+        source_node = self._snap_to_graph(G, [water_source], max_distance=np.inf)[0]
         
         if not lot_nodes:
             logger.warning("[WATER NETWORK] No lot nodes connected")
             return self._empty_network('water', water_source)
         
-        # Solve Steiner tree (minimum spanning tree approximation)
+        # Solve Steiner tree (Mehlhorn 2-approximation)
         steiner_tree = self._solve_steiner_tree(G, source_node, lot_nodes)
         
-        # Convert to pipe network
-        pipes = self._graph_to_pipes(steiner_tree, 'water')
+        # Convert to pipe network, sized for the demand each pipe carries
+        pipes, hydraulics = self._size_water_tree(steiner_tree, source_node, lot_nodes, lot_areas)
         
         # Calculate cost
         total_length = sum(pipe['length'] for pipe in pipes)
@@ -122,7 +114,9 @@ class UtilityNetworkDesigner:
             'pipes': pipes,
             'total_length': total_length,
             'cost': cost,
-            'num_connections': len(lot_nodes)
+            'num_connections': len(lot_nodes),
+            'hydraulics': hydraulics,
+            'steiner': steiner_tree.graph.get('steiner')
         }
     
     def design_sewer_network(
@@ -130,7 +124,8 @@ class UtilityNetworkDesigner:
         lots: List[Dict[str, Any]],
         roads: List[Dict[str, Any]],
         sewer_outlet: Point,
-        terrain_slope: float = 0.01  # 1% default slope
+        terrain_slope: float = 0.01,  # 1% default slope
+        terrain: Optional[Union[ElevationRaster, Dict]] = None
     ) -> Dict[str, Any]:
         """
         Design gravity sewer network
@@ -138,7 +133,19 @@ class UtilityNetworkDesigner:
         Constraints:
         - Follow terrain slope (gravity flow)
         - Minimum 0.5% slope
+        - Cover between min_depth and max_depth
         - Tree topology (no loops)
+        
+        Args:
+            lots: Building lots to drain
+            roads: Road network (utility corridor)
+            sewer_outlet: Treatment / trunk connection point
+            terrain_slope: Ground fall toward the outlet when no terrain is given
+            terrain: Elevation raster or grid dict for ground levels
+            
+        Returns:
+            Sewer network with pipes (inverts, slopes, depths), lift
+            stations, validation summary and cost
         """
         logger.info(f"[SEWER NETWORK] Designing for {len(lots)} lots")
         
@@ -148,89 +155,61 @@ class UtilityNetworkDesigner:
         if len(G.nodes()) == 0:
             return self._empty_network('sewer', sewer_outlet)
         
-        # Add outlet (lowest point) - connect to nearest road node
-        outlet_node = (sewer_outlet.x, sewer_outlet.y)
-        min_dist = float('inf')
-        closest_node = None
-        for node in G.nodes():
-            dist = Point(node).distance(Point(outlet_node))
-            if dist < min_dist:
-                min_dist = dist
-                closest_node = node
-        
-        if closest_node:
-            G.add_node(outlet_node, pos=outlet_node)
-            G.add_edge(outlet_node, closest_node, length=min_dist)
-        
-        # Add lot connection points
-        lot_nodes = []
-        for lot in lots:
-            try:
-                geom = lot.get('geometry')
-                if isinstance(geom, Polygon):
-                    centroid = geom.centroid
-                else:
-                    continue
-                
-                nearest_road_point = self._find_nearest_road_point(centroid, roads)
-                if nearest_road_point:
-                    # Add lot connection point and connect to nearest road
-                    lot_node = (nearest_road_point.x, nearest_road_point.y)
-                    
-                    # Find closest existing road node
-                    min_dist = float('inf')
-                    closest_node = None
-                    for node in G.nodes():
-                        dist = Point(node).distance(Point(lot_node))
-                        if dist < min_dist:
-                            min_dist = dist
-                            closest_node = node
-                    
-                    # Add node and edge
-                    if closest_node and min_dist < 1000:
-                        G.add_node(lot_node, pos=lot_node)
-                        G.add_edge(lot_node, closest_node, length=min_dist)
-                        lot_nodes.append(lot_node)
-            except Exception as e:
-                logger.warning(f"[SEWER NETWORK] Failed to add lot: {e}")
-                continue
+        # Connect lots, then the outlet (lowest point) to the nearest road node
+        lot_nodes, lot_areas = self._connect_lots(G, lots, roads)
+        outlet_node = self._snap_to_graph(G, [sewer_outlet], max_distance=np.inf)[0]
         
         if not lot_nodes:
             return self._empty_network('sewer', sewer_outlet)
         
-        # Create drainage tree (all flow to outlet)
-        pipes = []
+        nodes, u, v, w = self._graph_arrays(G)
+        ground = self._ground_levels(nodes, sewer_outlet, terrain_slope, terrain)
         
-        for lot_node in lot_nodes:
-            try:
-                path = nx.shortest_path(G, lot_node, outlet_node, weight='length')
-                
-                # Convert path to pipes
-                for i in range(len(path) - 1):
-                    pipe = self._create_pipe_segment(
-                        G, path[i], path[i+1], 'sewer'
-                    )
-                    pipes.append(pipe)
-            except nx.NetworkXNoPath:
-                logger.warning(f"[SEWER NETWORK] No path from lot to outlet")
-                continue
+        # Create drainage tree (all flow to outlet) with one Dijkstra
+        downstream, order = self._gravity_tree(nodes.index(outlet_node), u, v, w, ground)
         
-        # Remove duplicates and merge
-        pipes = self._merge_duplicate_pipes(pipes)
+        index = {node: i for i, node in enumerate(nodes)}
+        lot_idx = [index[node] for node in lot_nodes]
+        connected = [i for i in lot_idx if downstream[i] >= 0 or nodes[i] == outlet_node]
+        if len(connected) < len(lot_idx):
+            logger.warning(f"[SEWER NETWORK] No path from {len(lot_idx) - len(connected)} lots to outlet")
+        
+        pipes, lift_stations = self._size_gravity_sewer(G, nodes, ground, downstream, order, connected)
+        
+        # Hydraulic sizing with the flow accumulated down the tree
+        demand = np.zeros(len(nodes))
+        np.add.at(demand, lot_idx, lot_demand_m3s(lot_areas, sewer=True))
+        flows = accumulate_flows(downstream, demand)
+        hydraulics = self._apply_sizing(pipes, flows[[index[(p['from']['x'], p['from']['y'])] for p in pipes]])
         
         # Calculate cost
         total_length = sum(p['length'] for p in pipes)
-        cost = self._calculate_utility_cost(pipes, 'sewer')
+        cost = self._calculate_utility_cost(pipes, 'sewer') + len(lift_stations) * LIFT_STATION_COST
+        validation = {
+            'min_slope': min((p['slope'] for p in pipes if not p['force_main']), default=None),
+            'max_depth': max((max(p['depth_from'], p['depth_to']) for p in pipes if not p['force_main']), default=None),
+            'slope_violations': sum(1 for p in pipes if not p['force_main'] and p['slope'] < self.min_slope - 1e-9),
+            'depth_violations': sum(
+                1 for p in pipes if not p['force_main']
+                and max(p['depth_from'], p['depth_to']) > self.max_depth + 1e-9
+            ),
+            'force_mains': sum(1 for p in pipes if p['force_main']),
+            'undersized_pipes': hydraulics['undersized_pipes']
+        }
         
-        logger.info(f"[SEWER NETWORK] ✓ {len(pipes)} pipes, {total_length:.0f}m, cost={cost/1e6:.1f}M VND")
+        logger.info(f"[SEWER NETWORK] ✓ {len(pipes)} pipes, {total_length:.0f}m, "
+                    f"{len(lift_stations)} lift stations, cost={cost/1e6:.1f}M VND")
         
         return {
             'type': 'sewer',
             'outlet': {'x': sewer_outlet.x, 'y': sewer_outlet.y},
             'pipes': pipes,
+            'lift_stations': lift_stations,
+            'validation': validation,
+            'hydraulics': hydraulics,
             'total_length': total_length,
             'cost': cost,
-            'num_connections': len(lot_nodes)
+            'num_connections': len(connected)
         }
     
     def design_electrical_network(
@@ -252,26 +231,9 @@ class UtilityNetworkDesigner:
         if len(G.nodes()) == 0:
             return self._empty_network('electrical', substation)
         
-        # Add substation
-        substation_node = self._add_point_to_graph(G, substation)
-        
-        # Add lot nodes
-        lot_nodes = []
-        for lot in lots:
-            try:
-                geom = lot.get('geometry')
-                if isinstance(geom, Polygon):
-                    centroid = geom.centroid
-                else:
-                    continue
-                
-                nearest_road_point = self._find_nearest_road_point(centroid, roads)
-                if nearest_road_point:
-                    lot_node = self._add_point_to_graph(G, nearest_road_point)
-                    lot_nodes.append(lot_node)
-            except Exception as e:
-                logger.warning(f"[ELECTRICAL NETWORK] Failed to add lot: {e}")
-                continue
+        # Connect lots, then the substation
+        lot_nodes, lot_areas = self._connect_lots(G, lots, roads)
+        self._snap_to_graph(G, [substation], max_distance=np.inf)
         
         if not lot_nodes:
             return self._empty_network('electrical', substation)
@@ -300,36 +262,59 @@ class UtilityNetworkDesigner:
         }
     
     def _build_road_graph(self, roads: List[Dict[str, Any]]) -> nx.Graph:
-        """Build network graph from road network"""
-        G = nx.Graph()
+        """
+        Build network graph from road network
         
-        for road in roads:
-            try:
-                geom = road.get('geometry')
-                if isinstance(geom, LineString):
-                    coords = list(geom.coords)
-                else:
-                    continue
-                
-                # Add edges along road
-                for i in range(len(coords) - 1):
-                    p1, p2 = coords[i], coords[i+1]
-                    
-                    # Calculate length
-                    length = Point(p1).distance(Point(p2))
-                    
-                    # Add edge
-                    G.add_edge(p1, p2, length=length, road_id=road.get('id'))
-                    
-                    # Store node positions
-                    G.nodes[p1]['pos'] = p1
-                    G.nodes[p2]['pos'] = p2
-            except Exception as e:
-                logger.warning(f"[GRAPH BUILD] Failed to add road: {e}")
-                continue
+        All roads are noded together with one unary_union pass, so every
+        crossing and T-junction becomes a shared node even when the input
+        lines have no vertex there.
+        """
+        G = nx.Graph()
+        geoms, road_ids = self._road_geometries(roads)
+        if not geoms:
+            return G
         
+        try:
+            pieces = shapely.get_parts(shapely.unary_union(geoms))
+        except Exception as e:
+            logger.warning(f"[GRAPH BUILD] Failed to node roads: {e}")
+            return G
+        pieces = pieces[shapely.get_type_id(pieces) == 1]  # LineStrings only
+        
+        # Each noded piece belongs to the road it was cut from
+        midpoints = shapely.line_interpolate_point(pieces, 0.5, normalized=True)
+        _, owner = shapely.STRtree(geoms).query_nearest(midpoints, all_matches=False)
+        
+        coords, index = shapely.get_coordinates(pieces, return_index=True)
+        same_piece = index[:-1] == index[1:]
+        starts = coords[:-1][same_piece]
+        ends = coords[1:][same_piece]
+        lengths = np.hypot(*(ends - starts).T)
+        edge_roads = np.asarray(road_ids, dtype=object)[owner[index[:-1][same_piece]]]
+        
+        for p1, p2, length, road_id in zip(
+            map(tuple, starts.tolist()), map(tuple, ends.tolist()), lengths.tolist(), edge_roads
+        ):
+            if length > 0:
+                G.add_edge(p1, p2, length=length, road_id=road_id)
+        
+        # Store node positions
+        nx.set_node_attributes(G, {node: node for node in G.nodes()}, 'pos')
+        
+        logger.info(f"[GRAPH BUILD] {len(geoms)} roads noded into "
+                    f"{G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
         return G
     
+    def _road_geometries(self, roads: List[Dict[str, Any]]) -> Tuple[List[Any], List[Any]]:
+        """Line geometries of the road network and their road ids"""
+        geoms, road_ids = [], []
+        for road in roads:
+            geom = road.get('geometry')
+            if isinstance(geom, (LineString, MultiLineString)) and not geom.is_empty:
+                geoms.append(geom)
+                road_ids.append(road.get('id'))
+        return geoms, road_ids
+    
     def _add_point_to_graph(self, G: nx.Graph, point: Point) -> Tuple[float, float]:
         """Add point to graph, return node identifier"""
         node = (point.x, point.y)
@@ -337,29 +322,80 @@ class UtilityNetworkDesigner:
             G.add_node(node, pos=node)
         return node
     
-    def _find_nearest_road_point(
+    def _connect_lots(
         self,
-        point: Point,
+        G: nx.Graph,
+        lots: List[Dict[str, Any]],
         roads: List[Dict[str, Any]]
-    ) -> Optional[Point]:
-        """Find nearest point on road network"""
-        min_dist = float('inf')
-        nearest = None
+    ) -> Tuple[List[Tuple[float, float]], List[float]]:
+        """
+        Add a connection node for every lot and link it into the road graph
         
-        for road in roads:
-            try:
-                geom = road.get('geometry')
-                if isinstance(geom, LineString):
-                    # Project point onto line
-                    dist = geom.distance(point)
-                    if dist < min_dist:
-                        min_dist = dist
-                        # Find closest point on line
-                        nearest = geom.interpolate(geom.project(point))
-            except Exception:
-                continue
+        Each lot centroid is projected onto its nearest road, and the
+        projected point is joined to the nearest road node.
         
-        return nearest
+        Returns:
+            (connection nodes, lot areas in m2) of the lots that were connected
+        """
+        polygons = [lot['geometry'] for lot in lots if isinstance(lot.get('geometry'), Polygon)]
+        road_points = self._find_nearest_road_points([p.centroid for p in polygons], roads)
+        nodes = self._snap_to_graph(G, road_points)
+        connected = [(node, p.area) for node, p in zip(nodes, polygons) if node is not None]
+        return [node for node, _ in connected], [area for _, area in connected]
+    
+    def _find_nearest_road_points(
+        self,
+        points: List[Point],
+        roads: List[Dict[str, Any]]
+    ) -> List[Point]:
+        """Nearest point on the road network for each point (batched)"""
+        geoms, _ = self._road_geometries(roads)
+        if not points or not geoms:
+            return []
+        
+        points = np.asarray(points, dtype=object)
+        point_idx, road_idx = shapely.STRtree(geoms).query_nearest(points, all_matches=False)
+        lines = np.asarray(geoms, dtype=object)[road_idx]
+        nearest = shapely.line_interpolate_point(lines, shapely.line_locate_point(lines, points[point_idx]))
+        return list(nearest[np.argsort(point_idx)])
+    
+    def _snap_to_graph(
+        self,
+        G: nx.Graph,
+        points: List[Point],
+        max_distance: float = MAX_CONNECTION_DISTANCE
+    ) -> List[Optional[Tuple[float, float]]]:
+        """
+        Join points to their nearest existing graph node
+        
+        All points are matched with one KD-tree query against the nodes
+        present before the call, so points never chain onto each other.
+        
+        Args:
+            G: Road graph (modified in place)
+            points: Points to connect
+            max_distance: Longest allowed connection edge
+            
+        Returns:
+            Node of each point, or None when it is farther than max_distance
+        """
+        graph_nodes = list(G.nodes())
+        if not points or not graph_nodes:
+            return [None] * len(points)
+        
+        coords = shapely.get_coordinates(np.asarray(points, dtype=object))
+        distances, nearest = cKDTree(np.asarray(graph_nodes)).query(coords)
+        
+        snapped = []
+        for node, dist, i in zip(map(tuple, coords.tolist()), distances.tolist(), nearest.tolist()):
+            if dist > max_distance:
+                snapped.append(None)
+                continue
+            self._add_point_to_graph(G, Point(node))
+            if node != graph_nodes[i]:
+                G.add_edge(node, graph_nodes[i], length=dist)
+            snapped.append(node)
+        return snapped
     
     def _solve_steiner_tree(
         self,
@@ -367,48 +403,333 @@ class UtilityNetworkDesigner:
         source: Any,
         terminals: List[Any]
     ) -> nx.Graph:
-        """Solve Steiner tree problem (MST approximation)"""
+        """
+        Solve Steiner tree problem (Mehlhorn 2-approximation)
+        
+        1. One multi-source Dijkstra from all terminals splits the graph
+           into terminal Voronoi regions
+        2. Every edge joining two regions proposes a terminal-terminal
+           link of length d(s, u) + w(u, v) + d(v, t); the shortest per
+           pair forms the terminal distance graph
+        3. Its MST is expanded back into road edges, re-spanned and
+           pruned of non-terminal leaves
+        
+        The tree is at most 2 * (1 - 1/T) times the optimum for T
+        terminals. Bound and runtime are stored in tree.graph['steiner'].
+        """
+        started = time.perf_counter()
         try:
-            # Build complete graph on terminal nodes
-            all_nodes = [source] + terminals
-            H = nx.Graph()
+            nodes, u, v, w = self._graph_arrays(G)
+            index = {node: i for i, node in enumerate(nodes)}
+            terminal_idx = np.unique([index[t] for t in [source] + terminals if t in index])
+            adjacency = csr_matrix((w, (u, v)), shape=(len(nodes), len(nodes)))
             
-            for i, n1 in enumerate(all_nodes):
-                for n2 in all_nodes[i+1:]:
-                    try:
-                        path_length = nx.shortest_path_length(G, n1, n2, weight='length')
-                        H.add_edge(n1, n2, weight=path_length)
-                    except nx.NetworkXNoPath:
-                        continue
+            # 1. Terminal Voronoi regions
+            dist, predecessors, region = dijkstra(
+                adjacency, directed=False, indices=terminal_idx,
+                return_predecessors=True, min_only=True
+            )
             
-            # Find MST
-            mst = nx.minimum_spanning_tree(H, weight='weight')
+            # 2. Boundary edges -> shortest link per terminal pair
+            boundary = (region[u] >= 0) & (region[v] >= 0) & (region[u] != region[v])
+            bu, bv = u[boundary], v[boundary]
+            link = dist[bu] + w[boundary] + dist[bv]
+            s, t = np.minimum(region[bu], region[bv]), np.maximum(region[bu], region[bv])
+            order = np.lexsort((link, t, s))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (s[order][1:] != s[order][:-1]) | (t[order][1:] != t[order][:-1])
+            best = order[first]
             
-            # Expand back to original graph
-            steiner = nx.Graph()
-            for edge in mst.edges():
-                n1, n2 = edge
-                try:
-                    path = nx.shortest_path(G, n1, n2, weight='length')
-                    for i in range(len(path) - 1):
-                        if G.has_edge(path[i], path[i+1]):
-                            steiner.add_edge(
-                                path[i], path[i+1],
-                                **G.edges[path[i], path[i+1]]
-                            )
-                except nx.NetworkXNoPath:
-                    continue
+            terminal_graph = csr_matrix(
+                (link[best], (s[best], t[best])), shape=(len(nodes), len(nodes))
+            )
+            mst = minimum_spanning_tree(terminal_graph).tocoo()
             
+            # 3. Expand MST links through the shortest-path forest
+            link_edge = {(a, b): i for i, a, b in zip(best, s[best], t[best])}
+            expanded = set()
+            for a, b in zip(mst.row, mst.col):
+                i = link_edge[(min(a, b), max(a, b))]
+                expanded.add((bu[i], bv[i]))
+                for end in (bu[i], bv[i]):
+                    while predecessors[end] >= 0:
+                        expanded.add((predecessors[end], end))
+                        end = predecessors[end]
+            
+            union = nx.Graph()
+            for a, b in expanded:
+                union.add_edge(nodes[a], nodes[b], **G.edges[nodes[a], nodes[b]])
+            steiner = nx.minimum_spanning_tree(union, weight='length')
+            
+            keep = {nodes[i] for i in terminal_idx}
+            leaves = [n for n in steiner.nodes() if steiner.degree(n) == 1 and n not in keep]
+            while leaves:
+                neighbours = [nb for leaf in leaves for nb in steiner.neighbors(leaf)]
+                steiner.remove_nodes_from(leaves)
+                leaves = [n for n in set(neighbours)
+                          if n in steiner and steiner.degree(n) <= 1 and n not in keep]
+            
+            bound = 2.0 * (1.0 - 1.0 / max(len(terminal_idx), 1))
+            length = steiner.size(weight='length')
+            steiner.graph['steiner'] = {
+                'method': 'mehlhorn',
+                'terminals': int(len(terminal_idx)),
+                'tree_length': length,
+                'approximation_bound': bound,
+                # Optimal tree is at least this long
+                'lower_bound': length / bound if bound > 0 else length,
+                'runtime_s': time.perf_counter() - started
+            }
+            logger.info(
+                f"[STEINER TREE] {len(terminal_idx)} terminals, {length:.0f}m "
+                f"(<= {bound:.2f}x optimal) in {steiner.graph['steiner']['runtime_s']:.2f}s"
+            )
             return steiner
         except Exception as e:
             logger.warning(f"[STEINER TREE] Failed: {e}")
             return nx.Graph()
     
+    def _graph_arrays(
+        self,
+        G: nx.Graph
+    ) -> Tuple[List[Any], np.ndarray, np.ndarray, np.ndarray]:
+        """Node list and edge endpoint indices / lengths for csgraph routines"""
+        nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = list(G.edges(data='length'))
+        u = np.fromiter((index[a] for a, _, _ in edges), dtype=np.int64, count=len(edges))
+        v = np.fromiter((index[b] for _, b, _ in edges), dtype=np.int64, count=len(edges))
+        w = np.fromiter(
+            (length if length is not None else Point(a).distance(Point(b)) for a, b, length in edges),
+            dtype=np.float64, count=len(edges)
+        )
+        # Zero weights would read as missing edges in a sparse graph
+        return nodes, u, v, np.maximum(w, 1e-9)
+    
+    def _ground_levels(
+        self,
+        nodes: List[Tuple[float, float]],
+        outlet: Point,
+        terrain_slope: float,
+        terrain: Optional[Union[ElevationRaster, Dict]]
+    ) -> np.ndarray:
+        """
+        Ground elevation at every graph node
+        
+        Sampled from the terrain raster when given (cells outside it take
+        the median level); otherwise a plane rising at terrain_slope away
+        from the outlet.
+        """
+        xy = np.asarray(nodes, dtype=np.float64)
+        if terrain is not None:
+            raster = terrain if isinstance(terrain, ElevationRaster) else ElevationRaster.from_grid(terrain)
+            ground = raster.sample(xy[:, 0], xy[:, 1]).astype(np.float64)
+            if np.isfinite(ground).any():
+                return np.where(np.isfinite(ground), ground, np.nanmedian(ground))
+        return terrain_slope * np.hypot(xy[:, 0] - outlet.x, xy[:, 1] - outlet.y)
+    
+    def _gravity_tree(
+        self,
+        outlet: int,
+        u: np.ndarray,
+        v: np.ndarray,
+        w: np.ndarray,
+        ground: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Collection tree from one single-source Dijkstra at the outlet
+        
+        Flowing a -> b costs the pipe length plus a penalty for every
+        meter the ground fails to fall by min_slope * length, i.e. extra
+        trench depth. The search runs on the reversed flow graph, so the
+        predecessor of each node is its downstream neighbour.
+        
+        Returns:
+            (downstream node per node, -9999 if none; nodes ordered upstream first)
+        """
+        def shortfall(a, b):
+            return np.maximum(self.min_slope * w - (ground[a] - ground[b]), 0.0)
+        
+        n = len(ground)
+        cost_uv = w + ADVERSE_GRADE_PENALTY * shortfall(u, v)
+        cost_vu = w + ADVERSE_GRADE_PENALTY * shortfall(v, u)
+        # reverse[b, a] = cost of flow a -> b
+        reverse = csr_matrix(
+            (np.concatenate([cost_uv, cost_vu]), (np.concatenate([v, u]), np.concatenate([u, v]))),
+            shape=(n, n)
+        )
+        dist, downstream = dijkstra(reverse, directed=True, indices=outlet, return_predecessors=True)
+        reached = np.flatnonzero(np.isfinite(dist))
+        return downstream, reached[np.argsort(-dist[reached], kind='stable')]
+    
+    def _size_gravity_sewer(
+        self,
+        G: nx.Graph,
+        nodes: List[Tuple[float, float]],
+        ground: np.ndarray,
+        downstream: np.ndarray,
+        order: np.ndarray,
+        sources: List[int]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Set inverts along the collection tree, upstream to downstream
+        
+        Each node leaves at min_depth cover or lower, every pipe falls at
+        min_slope. Where a pipe would arrive deeper than max_depth a lift
+        station at its upstream node pumps back to min_depth; if the
+        ground rises too much even for that, the pipe becomes a force main.
+        
+        Returns:
+            (pipes, lift_stations)
+        """
+        # Only the branches that drain a lot
+        used = np.zeros(len(nodes), dtype=bool)
+        for i in sources:
+            while i >= 0 and not used[i]:
+                used[i] = True
+                i = downstream[i]
+        
+        arriving = np.full(len(nodes), np.inf)
+        rising_main: Dict[int, Dict[str, Any]] = {}
+        pipes, lift_stations = [], []
+        
+        for a in order:
+            b = downstream[a]
+            if not used[a] or b < 0:
+                continue
+            
+            length = G.edges[nodes[a], nodes[b]].get('length')
+            if length is None:
+                length = Point(nodes[a]).distance(Point(nodes[b]))
+            top = ground[a] - self.min_depth
+            leaving = min(top, arriving[a])
+            # Fall at least min_slope, steeper where the ground drops faster
+            invert_to = min(leaving - self.min_slope * length, ground[b] - self.min_depth)
+            force_main = False
+            
+            if ground[b] - invert_to > self.max_depth:
+                pumped_to = top
+                invert_to = min(top - self.min_slope * length, ground[b] - self.min_depth)
+                if ground[b] - invert_to > self.max_depth:
+                    # Ground rises too steeply for gravity: pressurised main at cover depth
+                    force_main = True
+                    invert_to = ground[b] - self.min_depth
+                    pumped_to = invert_to
+                
+                lift = float(pumped_to - leaving)
+                station = rising_main.get(a)
+                if station is not None and force_main:
+                    # Continue the rising main of the station upstream
+                    station['lift'] += max(lift, 0.0)
+                else:
+                    station = {
+                        'x': nodes[a][0],
+                        'y': nodes[a][1],
+                        'lift': max(lift, 0.0),
+                        'force_main': force_main
+                    }
+                    lift_stations.append(station)
+                if force_main:
+                    rising_main[b] = station
+                leaving = top
+            
+            arriving[b] = min(arriving[b], invert_to)
+            pipes.append({
+                'id': len(pipes) + 1,
+                'from': {'x': nodes[a][0], 'y': nodes[a][1]},
+                'to': {'x': nodes[b][0], 'y': nodes[b][1]},
+                'type': 'sewer',
+                'length': length,
+                'invert_from': float(leaving),
+                'invert_to': float(invert_to),
+                'slope': float((leaving - invert_to) / length),
+                'depth_from': float(ground[a] - leaving),
+                'depth_to': float(ground[b] - invert_to),
+                'force_main': force_main
+            })
+        
+        return pipes, lift_stations
+    
+    def _size_water_tree(
+        self,
+        tree: nx.Graph,
+        source: Any,
+        lot_nodes: List[Any],
+        lot_areas: List[float]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Pipes of the water tree, oriented away from the source and sized
+        with Hazen-Williams for the lot demand downstream of each pipe
+        """
+        if tree.number_of_edges() == 0 or source not in tree:
+            return self._graph_to_pipes(tree, 'water'), size_pressure_pipes([], []).summary()
+        
+        nodes, u, v, w = self._graph_arrays(tree)
+        index = {node: i for i, node in enumerate(nodes)}
+        adjacency = csr_matrix((w, (u, v)), shape=(len(nodes), len(nodes)))
+        _, parent = breadth_first_order(adjacency, index[source], directed=False)
+        
+        demand = np.zeros(len(nodes))
+        lots_in_tree = [(index[n], area) for n, area in zip(lot_nodes, lot_areas) if n in index]
+        if lots_in_tree:
+            idx, areas = zip(*lots_in_tree)
+            np.add.at(demand, list(idx), lot_demand_m3s(areas))
+        flows = accumulate_flows(parent, demand)
+        
+        child = np.flatnonzero(parent >= 0)
+        pipes = []
+        for i, a in enumerate(child.tolist()):
+            p = nodes[parent[a]]
+            pipes.append({
+                'id': i + 1,
+                'from': {'x': p[0], 'y': p[1]},
+                'to': {'x': nodes[a][0], 'y': nodes[a][1]},
+                'type': 'water',
+                'length': tree.edges[p, nodes[a]].get('length') or Point(p).distance(Point(nodes[a]))
+            })
+        hydraulics = self._apply_sizing(pipes, flows[child])
+        return pipes, hydraulics
+    
+    def _apply_sizing(self, pipes: List[Dict[str, Any]], flows: np.ndarray) -> Dict[str, Any]:
+        """
+        Size all pipes at once and write diameter / flow / velocity /
+        headloss onto each pipe dict
+        
+        Water mains and sewer force mains use Hazen-Williams, gravity
+        sewers use Manning.
+        """
+        if not pipes:
+            return size_pressure_pipes([], []).summary()
+        
+        lengths = np.array([p['length'] for p in pipes], dtype=np.float64)
+        gravity = np.array([p['type'] == 'sewer' and not p.get('force_main') for p in pipes])
+        slopes = np.array([p.get('slope', 0.0) for p in pipes], dtype=np.float64)
+        
+        pressure = size_pressure_pipes(flows, lengths)
+        sewer = size_gravity_pipes(flows, slopes, lengths)
+        sizing = PipeSizing(*(
+            np.where(gravity, getattr(sewer, f), getattr(pressure, f))
+            for f in ('diameter_mm', 'flow_m3s', 'velocity_ms', 'headloss_m', 'adequate')
+        ))
+        
+        for pipe, d, q, vel, hl in zip(
+            pipes, sizing.diameter_mm.tolist(), sizing.flow_m3s.tolist(),
+            sizing.velocity_ms.tolist(), sizing.headloss_m.tolist()
+        ):
+            pipe['diameter_mm'] = d
+            pipe['flow_lps'] = q * 1000
+            pipe['velocity'] = vel
+            pipe['headloss'] = hl
+        
+        return sizing.summary()
+    
     def _graph_to_pipes(self, G: nx.Graph, pipe_type: str) -> List[Dict[str, Any]]:
         """Convert graph to pipe list"""
         pipes = []
         for i, (n1, n2) in enumerate(G.edges()):
-            length = G.edges[n1, n2].get('length', Point(n1).distance(Point(n2)))
+            length = G.edges[n1, n2].get('length')
+            if length is None:
+                length = Point(n1).distance(Point(n2))
             pipes.append({
                 'id': i + 1,
                 'from': {'x': n1[0], 'y': n1[1]},
@@ -422,36 +743,6 @@ class UtilityNetworkDesigner:
         """Convert graph to cable list"""
         return self._graph_to_pipes(G, 'electrical')
     
-    def _create_pipe_segment(
-        self,
-        G: nx.Graph,
-        n1: Any,
-        n2: Any,
-        pipe_type: str
-    ) -> Dict[str, Any]:
-        """Create pipe segment between two nodes"""
-        length = G.edges[n1, n2].get('length', Point(n1).distance(Point(n2)))
-        return {
-            'from': {'x': n1[0], 'y': n1[1]},
-            'to': {'x': n2[0], 'y': n2[1]},
-            'type': pipe_type,
-            'length': length
-        }
-    
-    def _merge_duplicate_pipes(self, pipes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate pipe segments"""
-        unique = {}
-        for pipe in pipes:
-            # Create unique key from endpoints
-            p1 = (pipe['from']['x'], pipe['from']['y'])
-            p2 = (pipe['to']['x'], pipe['to']['y'])
-            key = tuple(sorted([p1, p2]))
-            
-            if key not in unique:
-                unique[key] = pipe
-        
-        return list(unique.values())
-    
     def _calculate_utility_cost(
         self,
         components: List[Dict[str, Any]],
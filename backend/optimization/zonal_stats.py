@@ -0,0 +1,260 @@
+"""
+Raster Zonal Statistics
+
+Per-polygon terrain statistics on an ElevationRaster:
+- all polygons are burned into one label raster (cell centre inside the
+  polygon -> polygon index + 1), each polygon tested only over its own
+  bounding window with vectorized shapely.contains_xy
+- count / mean / min / max / median per polygon with np.bincount and
+  scipy.ndimage labelled reductions
+- cut/fill volumes from the depth of every covered cell against a platform
+  level per polygon (or one level for all)
+
+Used for plot grading in FastLayoutGenerator, ScenarioGenerator and
+TerrainLayoutAdapter.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import shapely
+from scipy import ndimage
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+
+from optimization.elevation_raster import ElevationRaster
+
+logger = logging.getLogger(__name__)
+
+# Cost parameters (VND), shared by the demo generators
+CUT_COST_PER_M3 = 50_000
+FILL_COST_PER_M3 = 80_000
+HAUL_COST_PER_M3_KM = 20_000
+
+
+def _as_geometry(geom) -> Optional[BaseGeometry]:
+    if geom is None or isinstance(geom, BaseGeometry):
+        return geom
+    if isinstance(geom, dict):
+        return shape(geom)
+    return None
+
+
+def rasterize_polygons(geometries: Sequence, raster: ElevationRaster) -> np.ndarray:
+    """
+    Label raster of polygons on the raster grid.
+
+    A cell belongs to a polygon when its centre lies inside it; where
+    polygons overlap the later one wins.
+
+    Args:
+        geometries: Shapely or GeoJSON polygons
+        raster: Target grid
+
+    Returns:
+        int32 array of raster.shape, 0 = no polygon, i + 1 = geometries[i]
+    """
+    labels = np.zeros(raster.shape, dtype=np.int32)
+    t = raster.transform
+    rows, cols = raster.shape
+    if rows == 0 or cols == 0:
+        return labels
+
+    geoms = np.array([_as_geometry(g) for g in geometries], dtype=object)
+    valid = np.array([g is not None and not g.is_empty for g in geoms], dtype=bool)
+    if not valid.any():
+        return labels
+
+    bounds = np.full((len(geoms), 4), np.nan)
+    bounds[valid] = shapely.bounds(geoms[valid])
+    col_lo = np.ceil((np.fmin(bounds[:, 0], bounds[:, 2]) - t.c) / t.a)
+    col_hi = np.floor((np.fmax(bounds[:, 0], bounds[:, 2]) - t.c) / t.a)
+    row_lo = np.ceil((bounds[:, 1] - t.f) / t.e)
+    row_hi = np.floor((bounds[:, 3] - t.f) / t.e)
+
+    x_coords = raster.x_coords
+    y_coords = raster.y_coords
+    for i in np.flatnonzero(valid):
+        c0, c1 = int(max(col_lo[i], 0)), int(min(col_hi[i], cols - 1))
+        r0, r1 = int(max(row_lo[i], 0)), int(min(row_hi[i], rows - 1))
+        if c0 > c1 or r0 > r1:
+            continue
+        gx, gy = np.meshgrid(x_coords[c0:c1 + 1], y_coords[r0:r1 + 1])
+        inside = shapely.contains_xy(geoms[i], gx, gy)
+        labels[r0:r1 + 1, c0:c1 + 1][inside] = i + 1
+
+    return labels
+
+
+@dataclass
+class ZonalStats:
+    """Per-polygon elevation statistics (arrays indexed like the input polygons)."""
+
+    labels: np.ndarray
+    values: np.ndarray
+    count: np.ndarray
+    mean: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    area_m2: np.ndarray
+    cell_area: float
+
+    @property
+    def zone_count(self) -> int:
+        return len(self.count)
+
+    def median(self) -> np.ndarray:
+        """Median elevation per polygon (NaN where no cell is covered)."""
+        index = np.arange(1, self.zone_count + 1)
+        if not self.count.any():
+            return np.full(self.zone_count, np.nan)
+        result = np.asarray(ndimage.median(self.values, self.labels, index), dtype=np.float64)
+        result[self.count == 0] = np.nan
+        return result
+
+    def platform_levels(self, strategy: str = 'balanced_cut_fill') -> np.ndarray:
+        """
+        Platform elevation per polygon for a terrain strategy.
+
+        - balanced_cut_fill: polygon mean (cut == fill within each plot)
+        - minimal_cut: polygon median (least total earthwork per plot)
+        - major_grading: one area-weighted level for all polygons
+        """
+        if strategy == 'minimal_cut':
+            levels = self.median()
+            missing = np.isnan(levels)
+            levels[missing] = self.mean[missing]
+            return levels
+        if strategy == 'major_grading':
+            hit = ~np.isnan(self.mean)
+            if not hit.any():
+                return self.mean.copy()
+            weights = self.area_m2[hit] if self.area_m2[hit].sum() > 0 else None
+            return np.full(self.zone_count, np.average(self.mean[hit], weights=weights))
+        return self.mean.copy()
+
+    def cut_fill(self, levels: Union[float, np.ndarray, None] = None) -> Dict[str, np.ndarray]:
+        """
+        Cut and fill volumes per polygon for the given platform levels.
+
+        Every covered cell contributes its own depth; the summed depths are
+        scaled from the covered cells to the polygon's true area.
+
+        Args:
+            levels: Platform elevation per polygon, one level for all, or
+                None for each polygon's mean (balanced cut/fill)
+
+        Returns:
+            Dict with 'level', 'cut_m3', 'fill_m3' arrays
+        """
+        if levels is None:
+            levels = self.mean
+        levels = np.broadcast_to(np.asarray(levels, dtype=np.float64), (self.zone_count,))
+
+        covered = self.labels > 0
+        lab = self.labels[covered]
+        depth = levels[lab - 1] - self.values[covered]
+        n = self.zone_count + 1
+        fill = np.bincount(lab, weights=np.clip(depth, 0, None), minlength=n)[1:]
+        cut = np.bincount(lab, weights=np.clip(-depth, 0, None), minlength=n)[1:]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(self.count > 0, self.area_m2 / self.count, 0.0)
+        return {
+            'level': np.array(levels, dtype=np.float64),
+            'cut_m3': cut * scale,
+            'fill_m3': fill * scale
+        }
+
+
+def zonal_statistics(raster: ElevationRaster, geometries: Sequence) -> ZonalStats:
+    """
+    Elevation statistics of each polygon on the raster.
+
+    Polygons covering no cell centre (smaller than a grid cell) take the
+    elevation of the cell nearest their centroid, with zero volume.
+
+    Args:
+        raster: Elevation raster
+        geometries: Shapely or GeoJSON polygons
+
+    Returns:
+        ZonalStats
+    """
+    geoms = [_as_geometry(g) for g in geometries]
+    n = len(geoms)
+    values = np.asarray(raster.data, dtype=np.float64)
+    labels = rasterize_polygons(geoms, raster)
+    # NaN cells (outside the interpolated area) do not count
+    labels[np.isnan(values)] = 0
+
+    covered = labels > 0
+    lab = labels[covered]
+    z = values[covered]
+    count = np.bincount(lab, minlength=n + 1)[1:]
+    total = np.bincount(lab, weights=z, minlength=n + 1)[1:]
+
+    mean = np.full(n, np.nan)
+    zmin = np.full(n, np.nan)
+    zmax = np.full(n, np.nan)
+    hit = count > 0
+    mean[hit] = total[hit] / count[hit]
+    if hit.any():
+        index = np.flatnonzero(hit) + 1
+        zmin[hit] = ndimage.minimum(values, labels, index)
+        zmax[hit] = ndimage.maximum(values, labels, index)
+
+    # Sub-cell polygons: nearest cell to the centroid
+    missing = [i for i in np.flatnonzero(~hit) if geoms[i] is not None and not geoms[i].is_empty]
+    if missing:
+        centroids = shapely.centroid(np.array([geoms[i] for i in missing], dtype=object))
+        sampled = raster.sample(shapely.get_x(centroids), shapely.get_y(centroids))
+        mean[missing] = zmin[missing] = zmax[missing] = sampled
+
+    area = np.array([g.area if g is not None else 0.0 for g in geoms], dtype=np.float64)
+
+    return ZonalStats(
+        labels=labels,
+        values=values,
+        count=count,
+        mean=mean,
+        min=zmin,
+        max=zmax,
+        area_m2=area,
+        cell_area=raster.resolution ** 2
+    )
+
+
+def grading_cost(
+    cut_m3: float,
+    fill_m3: float,
+    haul_distance_km: float = 1.0,
+    usd_rate: float = 24000,
+    haul_cost_vnd: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Earthwork cost breakdown (VND / USD) for total cut and fill volumes.
+
+    The haul cost is the net import over haul_distance_km unless an
+    explicit haul_cost_vnd (e.g. from a mass-haul plan) is given.
+    """
+    net_import = max(0.0, fill_m3 - cut_m3)
+    cut_cost = cut_m3 * CUT_COST_PER_M3
+    fill_cost = fill_m3 * FILL_COST_PER_M3
+    if haul_cost_vnd is None:
+        haul_cost = net_import * HAUL_COST_PER_M3_KM * haul_distance_km
+    else:
+        haul_cost = haul_cost_vnd
+    total = cut_cost + fill_cost + haul_cost
+    return {
+        'total_cut_m3': float(cut_m3),
+        'total_fill_m3': float(fill_m3),
+        'net_import_m3': float(net_import),
+        'cut_cost_vnd': float(cut_cost),
+        'fill_cost_vnd': float(fill_cost),
+        'haul_cost_vnd': float(haul_cost),
+        'estimated_cost_vnd': float(total),
+        'estimated_cost_usd': float(total / usd_rate)
+    }
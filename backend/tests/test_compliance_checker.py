@@ -0,0 +1,115 @@
+"""
+Tests for incremental, STRtree-backed compliance checking
+"""
+
+import copy
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from design.compliance_checker import ComplianceChecker
+
+
+def _layout(columns: int = 10, rows: int = 10):
+    """Grid of 100 x 150 m plots, 20 m apart, along east-west roads"""
+    buildings = [
+        {"id": f"b{r}-{c}", "x": 50 + c * 120, "y": 50 + r * 200,
+         "width_m": 100, "length_m": 150, "area_m2": 15000}
+        for r in range(rows) for c in range(columns)
+    ]
+    width, height = 100 + columns * 120, 100 + rows * 200
+    roads = [
+        {"type": "main", "width_m": 25, "coordinates": [(0, 50 + r * 200 - 10), (width, 50 + r * 200 - 10)]}
+        for r in range(rows)
+    ]
+    return {
+        "buildings": buildings,
+        "site": {
+            "width": width,
+            "height": height,
+            "total_area_m2": width * height,
+            "green_area_m2": width * height * 0.12,
+            "utility_area_m2": width * height * 0.15,
+            "has_substation": True,
+            "retention_pond_rai": width * height / 1600 / 20,
+            "road_network": roads
+        }
+    }
+
+
+class TestComplianceChecker:
+    """Per-plot cache, spatial rules and diff reports"""
+
+    def test_clean_layout_has_no_spatial_violations(self):
+        report = ComplianceChecker().check_layout(_layout())
+        setbacks = report["checks"]["setbacks"]
+        assert setbacks["violations"] == []
+        assert setbacks["score"] == 100
+        assert len(report["checks"]) == 6
+
+    def test_spacing_boundary_and_frontage(self):
+        layout = _layout(3, 3)
+        layout["buildings"][1]["x"] -= 15          # 5 m from its west neighbour
+        layout["buildings"][0]["y"] = 5            # inside the 10 m buffer
+        layout["buildings"][8]["y"] += 60          # away from its road
+        layout["site"]["height"] += 100
+        report = ComplianceChecker().check_layout(layout)
+        violations = report["checks"]["setbacks"]["violations"]
+
+        assert any(v.startswith("Plots 1 and 2") for v in violations)
+        assert any("Plot 1:" in v and "site boundary" in v for v in violations)
+        assert any("Plot 9:" in v and "frontage" in v for v in violations)
+
+    def test_unpositioned_plots_are_unchecked(self):
+        layout = _layout(3, 3)
+        for b in layout["buildings"][:4]:
+            del b["x"], b["y"]
+        checker = ComplianceChecker()
+        setbacks = checker.check_layout(layout)["checks"]["setbacks"]
+
+        # No pile-up at the origin: no spacing, boundary or frontage violations
+        assert setbacks["violations"] == []
+        assert setbacks["metrics"]["unchecked_plots"] == 4
+        assert any(r.startswith("Plots 1, 2, 3, 4: no position") for r in setbacks["recommendations"])
+
+        # Placing them later checks them like any other plot
+        placed = _layout(3, 3)
+        assert checker.check_layout(placed) == ComplianceChecker().check_layout(placed)
+
+    def test_cache_matches_fresh_checker(self):
+        checker = ComplianceChecker()
+        layout = _layout()
+        checker.check_layout(layout)
+        edited = copy.deepcopy(layout)
+        edited["buildings"][5]["x"] += 12
+        edited["buildings"][7]["width_m"] = 60
+
+        incremental = checker.check_layout(edited)
+        fresh = ComplianceChecker().check_layout(edited)
+        assert incremental == fresh
+        assert checker.cache_hits >= 98
+
+    def test_edit_diff_report(self):
+        checker = ComplianceChecker()
+        layout = _layout(40, 25)
+        checker.check_layout_diff(layout)
+
+        edited = copy.deepcopy(layout)
+        edited["buildings"][0]["x"] += 15      # now 5 m from b0-1
+        start = time.time()
+        report = checker.check_layout_diff(edited)
+        elapsed = time.time() - start
+
+        diff = report["diff"]
+        assert diff["changed_plots"] == ["b0-0"]
+        assert diff["reused_plots"] == 999
+        assert diff["new_violations"] == ["Plots 1 and 2: closer than 12m spacing"]
+        assert diff["score_changes"]["setbacks"] == {"before": 100, "after": 95}
+        assert elapsed < 0.5
+
+        # Undo restores the original report
+        undo = checker.check_layout_diff(layout)["diff"]
+        assert undo["resolved_violations"] == ["Plots 1 and 2: closer than 12m spacing"]
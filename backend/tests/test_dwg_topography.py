@@ -0,0 +1,73 @@
+"""
+Tests for single-pass topography extraction from DXF
+"""
+
+import sys
+from pathlib import Path
+
+import ezdxf
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from demo.dwg_topography_extractor import DWGTopographyExtractor
+
+
+@pytest.fixture
+def topo_dxf(tmp_path):
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    # Contour named by layer; contour carrying only an LWPOLYLINE elevation
+    msp.add_lwpolyline([(0, 0), (100, 0)], dxfattribs={'layer': 'CONTOUR_105.5'})
+    msp.add_lwpolyline([(0, 50), (60, 50)], dxfattribs={'layer': 'C-TOPO', 'elevation': 107.0})
+    # 3D polyline with per-vertex Z, and a 2D polyline on a non-topo layer
+    msp.add_polyline3d([(10, 10, 101.0), (20, 10, 102.0), (30, 10, 0.0)], dxfattribs={'layer': 'SURVEY'})
+    msp.add_polyline2d([(0, 0), (5, 5)], dxfattribs={'layer': 'WALLS'})
+    # Spot levels and annotations
+    msp.add_point((40, 40, 103.0), dxfattribs={'layer': 'MISC'})
+    msp.add_point((45, 45, 0.0), dxfattribs={'layer': 'SPOT_ELEVATION'})
+    msp.add_point((46, 46, 0.0), dxfattribs={'layer': 'MISC'})
+    msp.add_text('RL 104.25', dxfattribs={'insert': (70, 70)})
+    msp.add_mtext('Existing level\\PEL 99.5', dxfattribs={'insert': (80, 80)})
+    msp.add_text('Gate A', dxfattribs={'insert': (90, 90)})
+    path = tmp_path / 'topo.dxf'
+    doc.saveas(path)
+    return str(path)
+
+
+class TestTopographyExtraction:
+    """Entity dispatch, text patterns and contour sampling"""
+
+    def test_single_pass_extraction(self, topo_dxf):
+        result = DWGTopographyExtractor().extract_from_file(topo_dxf)
+        points = result['elevation_points']
+
+        assert isinstance(points, np.ndarray) and points.shape == (result['point_count'], 3)
+        contours = sorted((c['elevation'], c['geometry'].length) for c in result['contour_lines'])
+        assert contours == [(105.5, 100.0), (107.0, 60.0)]
+
+        # 3D polyline vertices with Z, LWPOLYLINE elevation vertices, points, texts
+        z = set(points[:, 2].round(2))
+        assert {101.0, 102.0, 107.0, 103.0, 0.0, 104.25, 99.5} <= z
+        assert not np.any((points[:, 0] == 46) & (points[:, 1] == 46))
+        assert result['elevation_range'] == (0.0, 107.0)
+
+        # Contours sampled every 20 m (at least both ends)
+        sampled = points[points[:, 2] == 105.5]
+        assert len(sampled) == 5
+        np.testing.assert_allclose(sampled[:, 0], [0, 25, 50, 75, 100])
+
+    def test_text_patterns_keep_priority(self):
+        extractor = DWGTopographyExtractor()
+        cases = {
+            'RL 105.5': 105.5,
+            'EL.100.0': 100.0,
+            '105.5m': 105.5,
+            'ELEV:99': 99.0,
+            'LEVEL 5 RL 100': 100.0,   # RL pattern wins over the earlier EL match
+            'Gate A': None
+        }
+        for text, expected in cases.items():
+            assert extractor._parse_elevation_from_text(text) == expected
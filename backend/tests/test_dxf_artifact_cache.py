@@ -0,0 +1,150 @@
+"""
+Tests for the persistent DXF artifact cache
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cad.artifact_cache import DXFArtifactCache, georef_fingerprint
+from cad.dxf_georeferencer import DXFGeoreferencer
+
+
+class TestDXFArtifactCache:
+    """Test artifact cache round-trip and eviction"""
+
+    def test_roundtrip_with_numpy_values(self, tmp_path):
+        cache = DXFArtifactCache(str(tmp_path))
+        value = {"area_m2": np.float64(12.5), "centroid": (1.0, 2.0)}
+
+        compressed = cache.put("file-1", "features", value, "abc")
+
+        assert cache.get("file-1", "features", "abc") == {
+            "area_m2": 12.5,
+            "centroid": [1.0, 2.0]
+        }
+        assert json.loads(gzip.decompress(compressed))["area_m2"] == 12.5
+        assert cache.get_bytes("file-1", "features", "abc") == compressed
+        assert cache.get("file-1", "features", "other") is None
+
+    def test_lru_eviction_by_bytes(self, tmp_path):
+        blob = {"data": os.urandom(2000).hex()}
+        entry_size = len(gzip.compress(json.dumps(blob).encode()))
+        cache = DXFArtifactCache(str(tmp_path), max_bytes=entry_size * 2 + 100)
+
+        cache.put("a", "geojson", blob)
+        time.sleep(0.01)
+        cache.put("b", "geojson", blob)
+        time.sleep(0.01)
+        cache.get("a", "geojson")  # a becomes most recent
+        time.sleep(0.01)
+        cache.put("c", "geojson", blob)
+
+        assert cache.get("a", "geojson") is not None
+        assert cache.get("b", "geojson") is None
+        assert cache.get("c", "geojson") is not None
+
+    def test_invalidate(self, tmp_path):
+        cache = DXFArtifactCache(str(tmp_path))
+        cache.put("a", "features", {"x": 1})
+        cache.put("a", "geojson", {"x": 2}, "fp")
+        cache.put("b", "features", {"x": 3})
+
+        cache.invalidate("a")
+
+        assert cache.stats()["entries"] == 1
+        assert cache.get("b", "features") == {"x": 3}
+
+    def test_corrupt_entries_are_misses(self, tmp_path):
+        cache = DXFArtifactCache(str(tmp_path))
+        cache.put("a", "features", {"x": 1})
+        cache.put("b", "features", {"x": 2})
+        path_a = cache.path_for("a", "features")
+        path_b = cache.path_for("b", "features")
+
+        # Truncated gzip stream / valid gzip holding broken JSON
+        with open(path_a, "r+b") as f:
+            f.truncate(os.path.getsize(path_a) // 2)
+        with open(path_b, "wb") as f:
+            f.write(gzip.compress(b'{"x": '))
+
+        assert cache.get("a", "features") is None
+        assert cache.get("b", "features") is None
+        assert not os.path.exists(path_a) and not os.path.exists(path_b)
+
+    def test_georeferencer_persistence(self):
+        georef = DXFGeoreferencer()
+        georef.set_manual_control_points(
+            [(0, 0), (1000, 0), (0, 800)],
+            [(100.5, 13.75), (100.51, 13.75), (100.5, 13.7572)]
+        )
+
+        restored = DXFGeoreferencer.from_dict(
+            json.loads(json.dumps(georef.to_dict()))
+        )
+
+        assert restored.is_georeferenced
+        assert restored.transform_point(500, 400) == georef.transform_point(500, 400)
+        assert (
+            georef_fingerprint(restored.transformation_matrix)
+            == georef_fingerprint(georef.transformation_matrix)
+        )
+
+
+class TestDXFEndpointStorage:
+    """Upload-directory state shared between workers"""
+
+    def test_georeferencer_reloaded_after_rewrite(self, tmp_path, monkeypatch):
+        from api import dxf_endpoints
+
+        monkeypatch.setattr(dxf_endpoints, "UPLOAD_DIR", str(tmp_path))
+        monkeypatch.setattr(dxf_endpoints, "georef_instances", {})
+        first = DXFGeoreferencer()
+        first.set_manual_control_points(
+            [(0, 0), (1000, 0), (0, 800)],
+            [(100.5, 13.75), (100.51, 13.75), (100.5, 13.7572)]
+        )
+        dxf_endpoints._save_georeferencer("f1", first)
+        assert dxf_endpoints._load_georeferencer("f1") is first
+
+        # Another worker re-georeferences the file
+        second = DXFGeoreferencer()
+        second.set_manual_control_points(
+            [(0, 0), (1000, 0), (0, 800)],
+            [(101.5, 14.75), (101.51, 14.75), (101.5, 14.7572)]
+        )
+        path = tmp_path / "f1.georef.json"
+        path.write_text(json.dumps(second.to_dict()))
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+
+        reloaded = dxf_endpoints._load_georeferencer("f1")
+        assert reloaded.transform_point(0, 0) == second.transform_point(0, 0)
+
+    def test_reusability_override_path_checks(self, tmp_path, monkeypatch):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api import dxf_endpoints
+
+        monkeypatch.setattr(dxf_endpoints, "UPLOAD_DIR", str(tmp_path / "uploads"))
+        (tmp_path / "uploads").mkdir()
+        (tmp_path / "uploads" / "f1.dxf").write_text("0\nEOF\n")
+        app = FastAPI()
+        app.include_router(dxf_endpoints.router)
+        client = TestClient(app)
+        body = {"keep_as_is": [], "reuse_modified": [], "demolish": ["a"]}
+
+        assert client.post("/dxf/f1/reusability-override", json=dict(body, file_id="f2")).status_code == 400
+        assert client.post("/dxf/..%2Fx/reusability-override", json=dict(body, file_id="../x")).status_code == 404
+        assert client.post("/dxf/f9/reusability-override", json=dict(body, file_id="f9")).status_code == 404
+        assert not (tmp_path / "x.reusability.json").exists()
+
+        assert client.post("/dxf/f1/reusability-override", json=dict(body, file_id="f1")).status_code == 200
+        assert json.loads((tmp_path / "uploads" / "f1.reusability.json").read_text())["demolish"] == ["a"]
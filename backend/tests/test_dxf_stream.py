@@ -0,0 +1,137 @@
+"""
+Tests for streaming DXF export
+"""
+
+import io
+import sys
+import threading
+from pathlib import Path
+
+import ezdxf
+
+# Add backend and docker directories to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "docker"))
+
+from cad.dxf_generator import DXFGenerator
+from utils.dxf_stream import DXFStreamWriter, ASCII, BINARY
+from utils.dxf_utils import build_dxf_writer, export_to_dxf
+
+
+def _read(data: bytes, tmp_path):
+    path = tmp_path / "out.dxf"
+    path.write_bytes(data)
+    return ezdxf.readfile(str(path))
+
+
+class TestDXFStreamWriter:
+    """Test the raw ENTITIES writer against ezdxf's reader"""
+
+    def test_roundtrip_ascii_and_binary(self, tmp_path):
+        writer = DXFStreamWriter({'LOTS': 3, 'ROADS': 8})
+        assert writer.add_polyline('LOTS', [(0, 0), (10, 0), (10, 10), (0, 0)], closed=True)
+        assert writer.add_polyline('ROADS', [(0, 0), (663409.1234567, 1523456.987654)])
+        assert writer.add_circle('LOTS', (5, 5), 2.0)
+        # Malformed / degenerate input is skipped
+        assert not writer.add_polyline('LOTS', [[0, 0], [1]])
+        assert not writer.add_polyline('LOTS', [(0, 0), (0, 0)], closed=True)
+        assert writer.entity_count == 3
+
+        for fmt in (ASCII, BINARY):
+            doc = _read(writer.to_bytes(fmt), tmp_path)
+            entities = list(doc.modelspace())
+
+            assert [(e.dxftype(), e.dxf.layer) for e in entities] == [
+                ('LWPOLYLINE', 'LOTS'), ('CIRCLE', 'LOTS'), ('LWPOLYLINE', 'ROADS')
+            ]
+            assert entities[0].closed
+            assert list(entities[0].get_points('xy')) == [(0, 0), (10, 0), (10, 10)]
+            assert list(entities[2].get_points('xy'))[1] == (663409.1234567, 1523456.987654)
+            assert doc.layers.get('ROADS').color == 8
+            # Handle seed advanced past the streamed entities
+            handles = [int(e.dxf.handle, 16) for e in entities]
+            assert int(doc.header['$HANDSEED'], 16) == max(handles) + 1
+            assert not doc.audit().has_errors
+
+    def test_chunked_output(self, tmp_path):
+        writer = DXFStreamWriter({'LOTS': 3})
+        for i in range(500):
+            writer.add_polyline('LOTS', [(i, 0), (i + 1, 0), (i + 1, 1)], closed=True)
+
+        chunks = list(writer.iter_chunks(ASCII, chunk_size=4096))
+
+        assert len(chunks) > 3
+        assert all(len(chunk) >= 4096 for chunk in chunks[1:-2])
+        assert len(_read(b''.join(chunks), tmp_path).modelspace()) == 500
+
+
+class TestFeatureExport:
+    """Test GeoJSON feature -> DXF layer export"""
+
+    def test_features_batched_per_layer(self, tmp_path):
+        features = [
+            {"geometry": {"type": "Polygon", "coordinates": [
+                [[0, 0], [10, 0], [10, 10], [0, 0]],
+                [[2, 2], [3, 2], [3, 3], [2, 2]]
+            ]}, "properties": {"type": "lot"}},
+            {"geometry": {"type": "MultiLineString", "coordinates": [
+                [[0, 0], [5, 5]], [[1, 1], [2, 2]]
+            ]}, "properties": {"type": "road"}},
+            {"geometry": {"type": "Point", "coordinates": [1, 1]},
+             "properties": {"type": "transformer"}},
+            {"geometry": {"type": "Polygon", "coordinates": [[[0, 0], [1, 1]]]},
+             "properties": {"type": "park"}},
+        ]
+
+        writer = build_dxf_writer(features)
+        assert writer.entity_count == 5
+
+        doc = _read(export_to_dxf(features, fmt=BINARY), tmp_path)
+        layers = [e.dxf.layer for e in doc.modelspace()]
+        assert layers == ['LOTS', 'LOTS', 'ROADS', 'ROADS', 'INFRASTRUCTURE']
+
+    def test_generator_stream_batches_hatches(self, tmp_path):
+        layout = {
+            "name": "Test",
+            "buildings": [
+                {"id": f"b{i}", "type": "warehouse", "x": i * 60, "y": 0,
+                 "width": 40, "height": 40}
+                for i in range(10)
+            ],
+            "site": {"width": 1000, "height": 500}
+        }
+        generator = DXFGenerator(str(tmp_path))
+
+        data = b''.join(generator.stream(layout, chunk_size=1024))
+        doc = ezdxf.read(io.StringIO(data.decode()))
+
+        hatches = [e for e in doc.modelspace() if e.dxftype() == 'HATCH'
+                   and e.dxf.layer == 'WAREHOUSE']
+        assert len(hatches) == 1
+        assert len(hatches[0].paths) == 10
+        assert b''.join(generator.stream(layout, binary=True)).startswith(
+            b"AutoCAD Binary DXF"
+        )
+
+    def test_generator_stream_yields_bounded_chunks_and_stops_early(self, tmp_path):
+        layout = {
+            "name": "Test",
+            "buildings": [
+                {"id": f"b{i}", "type": "warehouse", "x": i * 60, "y": 0,
+                 "width": 40, "height": 40}
+                for i in range(10)
+            ],
+            "site": {"width": 1000, "height": 500}
+        }
+        generator = DXFGenerator(str(tmp_path))
+
+        chunks = list(generator.stream(layout, chunk_size=1024))
+        assert len(chunks) > 1
+        assert all(len(c) == 1024 for c in chunks[:-1])
+        assert 0 < len(chunks[-1]) <= 1024
+
+        # Closing the response early must not leave the writer thread blocked
+        stream = generator.stream(layout, chunk_size=1024)
+        next(stream)
+        stream.close()
+        assert not any(t.name == "dxf-stream" for t in threading.enumerate())
@@ -0,0 +1,93 @@
+"""
+Tests for elevation grid interpolation
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy.interpolate import griddata
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import box
+
+from optimization import elevation_interpolation
+from optimization.elevation_interpolation import ElevationInterpolator, interpolate_grid
+from optimization.terrain_analyzer import TerrainAnalyzer
+from demo.dwg_topography_extractor import DWGTopographyExtractor
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(10, 190, size=(400, 2))
+    z = 100 + 0.02 * xy[:, 0] + 0.01 * xy[:, 1]
+    return xy, z
+
+
+class TestElevationInterpolator:
+    """Grid contract and fill behaviour"""
+
+    def test_matches_griddata(self, samples):
+        xy, z = samples
+        x = np.arange(0, 200, 7.0)
+        y = np.arange(0, 200, 5.0)
+        gx, gy = np.meshgrid(x, y)
+
+        expected = griddata(xy, z, (gx, gy), method='linear')
+        nearest = griddata(xy, z, (gx, gy), method='nearest')
+        expected[np.isnan(expected)] = nearest[np.isnan(expected)]
+
+        # Small tiles exercise the row-band evaluation
+        grid = interpolate_grid(xy, z, x, y, tile_cells=100)
+
+        assert grid.shape == (len(y), len(x))
+        np.testing.assert_allclose(grid, expected)
+
+    def test_fill_modes(self, samples):
+        xy, z = samples
+        x = y = np.arange(0, 200, 10.0)
+
+        raw = interpolate_grid(xy, z, x, y, fill=None)
+        assert np.isnan(raw[0, 0]) and not np.isnan(raw[10, 10])
+
+        mean = interpolate_grid(xy, z, x, y, fill='mean')
+        assert mean[0, 0] == pytest.approx(z.mean())
+
+        idw = interpolate_grid(xy, z, x, y, method='idw')
+        assert not np.isnan(idw).any()
+        assert idw.min() >= z.min() and idw.max() <= z.max()
+        # IDW reproduces samples exactly
+        assert ElevationInterpolator(xy, z, method='idw')(xy[:5]) == pytest.approx(z[:5])
+
+    def test_triangulation_reused(self, samples):
+        xy, z = samples
+        elevation_interpolation.clear_cache()
+        cache = elevation_interpolation._cache
+        misses = cache.misses
+
+        interpolate_grid(xy, z, np.arange(0, 200, 10.0), np.arange(0, 200, 10.0))
+        interpolate_grid(xy.copy(), z + 1, np.arange(0, 200, 5.0), np.arange(0, 200, 5.0))
+
+        assert cache.misses == misses + 1
+        assert cache.hits >= 1
+
+    def test_degenerate_points_fall_back_to_nearest(self):
+        xy = np.array([[0, 0], [1, 1], [2, 2]], dtype=float)
+        grid = interpolate_grid(xy, [1.0, 2.0, 3.0], [0.0, 2.0], [0.0])
+
+        assert grid.tolist() == [[1.0, 2.0]]
+
+    def test_callers_keep_grid_contract(self, samples):
+        xy, z = samples
+        points = [(px, py, pz) for (px, py), pz in zip(xy, z)]
+        site = box(0, 0, 200, 200)
+
+        terrain = TerrainAnalyzer(grid_resolution=10.0).process_elevation_data(points, site)
+        grid_data = DWGTopographyExtractor(grid_resolution=10.0).create_elevation_grid(points, site)
+
+        assert terrain.shape == grid_data['shape'] == (20, 20)
+        assert not np.isnan(terrain).any() and not np.isnan(grid_data['grid']).any()
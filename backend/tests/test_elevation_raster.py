@@ -0,0 +1,120 @@
+"""
+Tests for the georeferenced elevation raster
+"""
+
+import gc
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import box
+
+from optimization.elevation_raster import Affine, ElevationRaster
+from demo.dwg_topography_extractor import DWGTopographyExtractor
+from demo.pilot_zone_processor import PilotZoneProcessor
+
+
+@pytest.fixture
+def raster():
+    # 2% slope along x on a 10 m grid starting at (1000, 2000)
+    x = 1000 + np.arange(40) * 10.0
+    grid = np.tile(100 + 0.02 * (x - 1000), (30, 1))
+    grid[20:, 30:] += np.arange(10) * 5.0  # steep corner
+    return ElevationRaster.from_array(grid, Affine.from_origin(1000, 2000, 10.0))
+
+
+class TestElevationRaster:
+    """Georeferencing, windows and derived layers"""
+
+    def test_georeferencing(self, raster):
+        assert raster.data.dtype == np.float32
+        assert raster.bounds == (1000, 2000, 1390, 2290)
+        assert raster.x_coords[3] == 1030 and raster.y_coords[2] == 2020
+
+        row, col = raster.index([1031, 1000], [2019, 2000])
+        assert row.tolist() == [2, 0] and col.tolist() == [3, 0]
+        samples = raster.sample([1030, 5000], [2000, 2000])
+        assert samples[0] == pytest.approx(100.6) and np.isnan(samples[1])
+
+    def test_window_is_a_view(self, raster):
+        zone = raster.window(1100, 2050, 1200, 2150)
+
+        assert zone.shape == (10, 10)
+        assert np.shares_memory(zone.data, raster.data)
+        assert zone.x_coords[0] == 1100 and zone.y_coords[0] == 2050
+        # Same cells as the old searchsorted slicing
+        x, y = raster.x_coords, raster.y_coords
+        cols = slice(np.searchsorted(x, 1100), np.searchsorted(x, 1200))
+        rows = slice(np.searchsorted(y, 2050), np.searchsorted(y, 2150))
+        np.testing.assert_array_equal(zone.data, raster.data[rows, cols])
+
+        nested = zone.window(1150, 2100, 1500, 2500)
+        assert nested.shape == (5, 5)
+        assert nested.x_coords[0] == 1150
+
+    def test_derived_layers_cached_and_shared(self, raster):
+        slope = raster.slope()
+        assert slope.dtype == np.float32
+        assert slope[0, 0] == pytest.approx(2.0, rel=1e-4)
+        assert raster._layers.slope is not None and np.shares_memory(raster.slope(), slope)
+
+        zone = raster.window(1300, 2200, 1400, 2300)
+        assert np.shares_memory(zone.slope(), slope)
+        assert np.shares_memory(zone.buildable_mask(), raster.buildable_mask())
+        assert not zone.buildable_mask().all()
+        assert raster.window(1000, 2000, 1100, 2100).statistics()['buildable_percentage'] == 100
+
+    def test_memmap_backing(self, tmp_path):
+        grid = np.random.default_rng(0).normal(100, 1, size=(50, 60))
+
+        raster = ElevationRaster.from_array(grid, Affine.from_origin(0, 0, 5.0), memmap_threshold=0)
+        path = raster.path
+        assert isinstance(raster.data, np.memmap) and os.path.exists(path)
+        np.testing.assert_allclose(raster.data, grid, rtol=1e-6)
+
+        reopened = ElevationRaster.open(path, raster.shape, raster.transform)
+        np.testing.assert_array_equal(reopened.data, raster.data)
+        del reopened
+
+        # Temporary backing file removed with the raster
+        del raster
+        gc.collect()
+        assert not os.path.exists(path)
+
+    def test_shared_with_other_processes(self, raster, tmp_path):
+        with raster.shared() as handle:
+            assert handle.shm_name is not None
+            attached = ElevationRaster.attach(handle)
+            np.testing.assert_array_equal(attached.data, raster.data)
+            assert not attached.data.flags.writeable
+            assert attached.transform == raster.transform
+            del attached
+
+        mapped = ElevationRaster.from_array(raster.data, raster.transform, path=str(tmp_path / 'dem.f32'))
+        with mapped.shared() as handle:
+            assert handle.path == mapped.path
+            np.testing.assert_array_equal(ElevationRaster.attach(handle).data, raster.data)
+
+    def test_zone_terrain_from_grid(self):
+        rng = np.random.default_rng(1)
+        points = [(x, y, 100 + 0.05 * x) for x, y in rng.uniform(0, 400, size=(300, 2))]
+        site = box(0, 0, 400, 400)
+        grid_data = DWGTopographyExtractor(grid_resolution=10.0).create_elevation_grid(points, site)
+
+        processor = PilotZoneProcessor()
+        processor.boundary = site
+        processor.divide_into_zones(site)
+        zone = processor.extract_zone(2, {'elevation_grid': grid_data})
+        terrain = zone['terrain_data']
+
+        assert terrain['elevation_grid'].shape == (20, 20)
+        assert np.shares_memory(terrain['elevation_grid'], grid_data['grid'])
+        assert terrain['x_coords'][0] == 200
+        assert terrain['avg_slope'] == pytest.approx(5.0, abs=0.5)
+        assert terrain['buildable_percentage'] == 100
@@ -0,0 +1,101 @@
+"""
+Tests for Monte Carlo financial risk simulation
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from shapely.geometry import box
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from optimization.financial_risk import Distribution, FinancialRiskSimulator
+
+
+def _fixed(**values):
+    return {name: Distribution('fixed', {'value': v}) for name, v in values.items()}
+
+
+class TestFinancialRisk:
+    """Cash flows, metrics, percentiles and sensitivities"""
+
+    def test_deterministic_cash_flow_metrics(self):
+        simulator = FinancialRiskSimulator(
+            distributions=_fixed(price=1.0, cost=1.0, absorption=0.5, interest_rate=0.1)
+        )
+        result = simulator.simulate_totals(total_revenue=100.0, total_cost=60.0, n_scenarios=3)
+
+        # Years: -30, -30 + 50, +50, then nothing left to sell
+        flows = np.array([-30.0, 20.0, 50.0])
+        assert np.allclose(result.npv, sum(f / 1.1 ** t for t, f in enumerate(flows)))
+        assert np.allclose(result.irr, 2 / 3)
+        assert np.allclose(result.payback_years, 1.2)
+
+    def test_summary_percentiles_histograms_tornado(self):
+        simulator = FinancialRiskSimulator(seed=7, chunk_size=3_000)
+        summary = simulator.simulate_totals(500e9, 300e9, 10_000).summary()
+
+        assert summary['scenarios'] == 10_000
+        for metric in ('npv', 'irr', 'payback_years'):
+            p = summary[metric]
+            assert p['p10'] <= p['p50'] <= p['p90']
+        assert sum(summary['histograms']['npv']['counts']) == 10_000
+        swings = [bar['swing'] for bar in summary['tornado']]
+        assert swings == sorted(swings, reverse=True)
+        assert {bar['variable'] for bar in summary['tornado']} == {'price', 'cost', 'absorption', 'interest_rate'}
+
+    def test_design_input_and_loss_probability(self):
+        design = {
+            'total_area': 50000,
+            'roads': [{'type': 'internal', 'length': 800}],
+            'lots': [{'id': i, 'geometry': box(i * 50, 0, i * 50 + 50, 50)} for i in range(20)]
+        }
+        cheap = FinancialRiskSimulator(seed=1).simulate(design, 5_000).summary()
+        dear = FinancialRiskSimulator(
+            seed=1, distributions={'cost': Distribution('triangular', {'low': 1.5, 'mode': 2.0, 'high': 3.0})}
+        ).simulate(design, 5_000).summary()
+
+        assert dear['npv']['p50'] < cheap['npv']['p50']
+        assert dear['probability_of_loss'] >= cheap['probability_of_loss']
+
+    def test_invalid_distributions_rejected(self):
+        with pytest.raises(ValueError, match="mode"):
+            Distribution('triangular', {'low': 0.8, 'high': 1.2})
+        with pytest.raises(ValueError, match="low <= mode <= high"):
+            Distribution('triangular', {'low': 0.8, 'mode': 1.5, 'high': 1.2})
+        with pytest.raises(ValueError, match="low <= high"):
+            Distribution('uniform', {'low': 2.0, 'high': 1.0})
+        with pytest.raises(ValueError, match="std > 0"):
+            Distribution('normal', {'mean': 0.1, 'std': 0.0})
+        with pytest.raises(ValueError, match="sigma > 0"):
+            Distribution('lognormal', {'median': 1.0, 'sigma': -0.1})
+        with pytest.raises(ValueError, match="prise"):
+            FinancialRiskSimulator(distributions=_fixed(prise=1.0))
+
+    def test_hundred_thousand_scenarios(self):
+        start = time.time()
+        result = FinancialRiskSimulator(seed=0).simulate_totals(500e9, 300e9, 100_000)
+
+        assert time.time() - start < 5.0
+        assert len(result.npv) == 100_000 and np.isfinite(result.npv).all()
+
+    def test_endpoint_rejects_out_of_range_timeline(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api.financial_endpoints import router
+
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+        design = {"total_area": 50000, "roads": [], "lots": []}
+
+        for horizon, construction in ((10_000, 2), (-1, 2), (5, 0), (3, 5)):
+            response = client.post("/api/financial/risk", json={
+                "design": design, "n_scenarios": 100,
+                "horizon_years": horizon, "construction_years": construction
+            })
+            assert response.status_code == 400, (horizon, construction)
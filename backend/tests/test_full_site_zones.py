@@ -0,0 +1,91 @@
+"""
+Tests for contiguous buildable zone extraction
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import box
+
+from demo.full_site_analyzer import FullSiteAnalyzer, _mask_outline
+
+
+class TestMaskOutline:
+    """Raster-to-polygon tracing"""
+
+    def test_outline_follows_cells_and_keeps_holes(self):
+        mask = np.zeros((12, 12), dtype=bool)
+        mask[1:11, 1:11] = True
+        mask[4:7, 4:7] = False      # hole
+        mask[1, 10] = False         # notch
+        polygon = _mask_outline(mask, 0.0, 0.0, 10.0)
+
+        assert polygon.geom_type == 'Polygon' and polygon.is_valid
+        assert polygon.area == pytest.approx(mask.sum() * 100)
+        assert len(polygon.interiors) == 1
+        assert polygon.bounds == (5.0, 5.0, 105.0, 105.0)
+
+    def test_separate_parts_and_empty(self):
+        mask = np.zeros((6, 6), dtype=bool)
+        mask[0:2, 0:2] = True
+        mask[4:6, 3:6] = True
+        outline = _mask_outline(mask, 100.0, 200.0, 1.0)
+
+        assert outline.geom_type == 'MultiPolygon' and len(outline.geoms) == 2
+        assert outline.area == pytest.approx(10.0)
+        assert _mask_outline(np.zeros((3, 3), dtype=bool), 0, 0, 1).is_empty
+
+
+class TestContiguousZones:
+    """Zones from the buildable mask"""
+
+    def test_zones_exact_area_and_metrics(self):
+        res = 20.0
+        shape = (60, 60)
+        buildable = np.zeros(shape, dtype=bool)
+        buildable[5:35, 5:35] = True        # 36 ha block with a hole
+        buildable[15:20, 15:20] = False
+        buildable[40:55, 40:58] = True      # 10.8 ha strip
+        buildable[0, ::2] = True            # isolated specks, skipped
+        elevation = np.tile(100 + np.arange(shape[1], dtype=float), (shape[0], 1))
+        slope = np.where(buildable, 5.0, 30.0)
+        grid = {
+            'grid': elevation,
+            'x_coords': np.arange(shape[1]) * res,
+            'y_coords': np.arange(shape[0]) * res
+        }
+
+        analyzer = FullSiteAnalyzer(grid_resolution=res)
+        zones = analyzer._find_contiguous_zones(buildable, grid, slope, box(-10, -10, 1200, 1200))
+
+        assert len(zones) == 2
+        big, small = zones
+        assert big['area_m2'] == pytest.approx((900 - 25) * res ** 2)
+        assert len(big['geometry'].interiors) == 1
+        assert big['cell_count'] == 875
+        assert big['metrics']['min_elevation'] == 105 and big['metrics']['max_elevation'] == 134
+        assert big['metrics']['avg_slope'] == pytest.approx(5.0)
+        assert big['metrics']['slope_std'] == pytest.approx(0.0, abs=1e-9)
+        assert small['area_ha'] == pytest.approx(15 * 18 * res ** 2 / 10000)
+
+    def test_zone_clipped_to_site(self):
+        res = 20.0
+        buildable = np.ones((30, 30), dtype=bool)
+        grid = {
+            'grid': np.zeros((30, 30)),
+            'x_coords': np.arange(30) * res,
+            'y_coords': np.arange(30) * res
+        }
+
+        zones = FullSiteAnalyzer(res)._find_contiguous_zones(
+            buildable, grid, np.zeros((30, 30)), box(0, 0, 300, 580)
+        )
+
+        assert len(zones) == 1
+        assert zones[0]['area_m2'] == pytest.approx(300 * 580)
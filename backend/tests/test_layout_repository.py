@@ -0,0 +1,122 @@
+"""
+Tests for the SQLite layout repository
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import Polygon, box, mapping
+
+from database.layout_repository import LayoutRepository, extract_features
+from optimization.scoring_matrix import DesignScorer
+
+
+def _variant(variant_id, n=10):
+    return {
+        "id": variant_id,
+        "name": f"Variant {variant_id}",
+        "layout": {
+            "buildings": [
+                {"id": f"b{i}", "type": "warehouse", "x": i * 100, "y": 0,
+                 "width": 50, "height": 40}
+                for i in range(n)
+            ],
+            "site": {"width": n * 100, "height": 500}
+        },
+        "fitness_scores": {"total": 1.5},
+        "compliance": {"salable_area_pct": 0.7}
+    }
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = LayoutRepository(str(tmp_path / "layouts.db"))
+    yield repository
+    repository.close()
+
+
+class TestLayoutRepository:
+    """Writes, listing and spatial queries"""
+
+    def test_save_and_list(self, repo):
+        repo.save_project({"id": "p1", "name": "Park", "variants": [{"id": "x"}]})
+        repo.save_variants("p1", [_variant("v1"), _variant("v2", n=4)]).result()
+
+        assert repo.get_project("p1") == {"id": "p1", "name": "Park"}
+        summaries = repo.list_variants("p1")
+        assert [v["id"] for v in summaries] == ["v1", "v2"]
+        assert "layout" not in summaries[0]
+        assert summaries[0]["fitness_scores"] == {"total": 1.5}
+        assert summaries[1]["feature_count"] == 4
+        assert summaries[0]["bounds"] == [0, 0, 1000, 500]
+
+        full = repo.list_variants("p1", include_layout=True)
+        assert len(full[0]["layout"]["buildings"]) == 10
+
+        # Regenerating replaces the project's variants
+        repo.save_variants("p1", [_variant("v3")])
+        repo.flush()
+        assert [v["id"] for v in repo.list_variants("p1")] == ["v3"]
+        assert repo.stats()["features"] == 10
+
+    def test_load_designs_for_scoring(self, repo):
+        lots = [box(i * 50, 0, i * 50 + 40, 40) for i in range(5)]
+        repo.save_variants(None, [
+            {"id": "d1", "site_boundary": box(0, 0, 300, 100), "lots": lots,
+             "financial": {"roi_percent": 20}},
+            _variant("d2"),
+        ]).result()
+
+        designs = repo.load_designs(["d1", "d2", "missing"])
+
+        assert set(designs) == {"d1", "d2"}
+        assert designs["d1"]["site_boundary"].area == 30000
+        assert [lot.area for lot in designs["d1"]["lots"]] == [1600] * 5
+        assert designs["d1"]["financial"] == {"roi_percent": 20}
+        # Building footprints stand in for lots
+        assert len(designs["d2"]["lots"]) == 10
+        assert designs["d2"]["site_boundary"].bounds == (0, 0, 1000, 500)
+
+        result = DesignScorer().compare_designs([designs["d1"], designs["d2"]])
+        assert len(result["scores"]) == 2
+
+    def test_query_bbox_per_layout(self, repo):
+        repo.save_variants("p", [_variant("a"), _variant("b")]).result()
+
+        features = repo.query_bbox("a", (120, 10, 260, 20))
+        assert sorted(f["properties"]["id"] for f in features) == ["b1", "b2"]
+        assert features[0]["properties"]["area_m2"] == 2000
+
+        # R-tree candidate (bbox overlaps) rejected by the exact test
+        triangle = Polygon([(0, 0), (100, 0), (0, 100)])
+        repo.save_variants(None, [{"id": "t", "lots": [mapping(triangle)]}]).result()
+        assert repo.query_bbox("t", (80, 80, 90, 90)) == []
+        assert len(repo.query_bbox("t", (0, 0, 10, 10), kind="lot")) == 1
+        assert repo.query_bbox("t", (0, 0, 10, 10), kind="building") == []
+        assert repo.query_bbox("missing", (0, 0, 10, 10)) == []
+
+    def test_delete_variant(self, repo):
+        repo.save_variants("p", [_variant("a")]).result()
+
+        assert repo.delete_variant("a").result()
+        assert repo.get_variant("a") is None
+        assert repo.query_bbox("a", (0, 0, 1000, 1000)) == []
+        assert repo.stats()["features"] == 0
+
+    def test_extract_features(self):
+        variant = {
+            "lots": [box(0, 0, 1, 1)],
+            "features": {"type": "FeatureCollection", "features": [
+                {"type": "Feature", "geometry": mapping(box(0, 0, 2, 2)),
+                 "properties": {"type": "park"}},
+                {"type": "Feature", "geometry": None, "properties": {}},
+            ]},
+            "layout": {"buildings": [{"x": 0, "y": 0, "width": 1}]},
+        }
+
+        assert [kind for kind, _, _ in extract_features(variant)] == ["lot", "park"]
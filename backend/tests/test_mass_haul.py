@@ -0,0 +1,84 @@
+"""
+Tests for the earthwork mass-haul optimizer
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from optimization.mass_haul import HaulNodes, grid_mass_haul, grid_nodes, solve_mass_haul
+from optimization.terrain_analyzer import GradingOptimizer
+
+
+def _nodes(positions, volumes):
+    n = len(volumes)
+    return HaulNodes(
+        positions=np.asarray(positions, dtype=float),
+        volumes=np.asarray(volumes, dtype=float),
+        local_m3=np.zeros(n),
+        local_distance_m=np.zeros(n)
+    )
+
+
+class TestMassHaul:
+    """Transport plan, aggregation and scale"""
+
+    def test_nearest_fill_first(self):
+        # Cut at 0 and 3000 m; fills at 100 m and 2900 m
+        nodes = _nodes([(0, 0), (3000, 0), (100, 0), (2900, 0)], [100, 100, -100, -100])
+        result = solve_mass_haul(nodes, haul_cost_per_m3_km=1000)
+
+        assert np.isclose(result.hauled_m3, 200)
+        assert result.import_m3 < 1e-6 and result.export_m3 < 1e-6
+        assert np.isclose(result.haul_cost, 200 * 0.1 * 1000)
+        assert np.isclose(result.average_haul_km, 0.1)
+        assert sorted(r['distance_m'] for r in result.routes) == [100, 100]
+
+    def test_imports_when_borrow_is_cheaper(self):
+        # Fill 5 km from the only cut; borrow pit at 1 km
+        nodes = _nodes([(0, 0), (5000, 0)], [50, -80])
+        result = solve_mass_haul(nodes, haul_cost_per_m3_km=1000, borrow_distance_km=1.0)
+
+        assert result.hauled_m3 < 1e-6
+        assert np.isclose(result.import_m3, 80) and np.isclose(result.export_m3, 50)
+        assert result.to_geojson()['features'] == []
+
+    def test_grid_aggregation_and_route_layer(self):
+        existing = np.zeros((60, 80))
+        proposed = existing.copy()
+        proposed[:, :40] = -1.0   # cut west
+        proposed[:, 40:] = 1.0    # fill east
+        result = grid_mass_haul(existing, proposed, resolution=5.0, max_nodes=50)
+
+        nodes = grid_nodes(proposed - existing, 5.0, max_nodes=50)
+        assert len(nodes) <= 50
+        assert np.isclose(nodes.volumes.sum(), 0.0)
+        assert np.isclose(result.hauled_m3, 40 * 60 * 25)
+        features = result.to_geojson()['features']
+        assert features and all(f['geometry']['type'] == 'LineString' for f in features)
+
+    def test_hundreds_of_nodes_under_a_second(self):
+        rng = np.random.default_rng(0)
+        positions = rng.uniform(0, 2000, (400, 2))
+        volumes = rng.normal(0, 500, 400)
+        start = time.time()
+        result = solve_mass_haul(_nodes(positions, volumes))
+
+        assert time.time() - start < 1.0
+        # Every cut is shipped, every fill supplied
+        assert np.isclose(result.hauled_m3 + result.export_m3, volumes[volumes > 0].sum())
+        assert np.isclose(result.hauled_m3 + result.import_m3, -volumes[volumes < 0].sum())
+
+    def test_grading_plan_uses_mass_haul(self):
+        x = np.arange(40, dtype=float)
+        existing = np.tile(100 + 0.5 * np.sin(x / 4), (30, 1))
+        plan = GradingOptimizer(grid_resolution=5.0).optimize_grading_plan(existing, site_area=40 * 30 * 25)
+
+        assert np.isclose(plan['cost_breakdown']['haul'], plan['mass_haul']['haul_cost'])
+        assert plan['mass_haul']['hauled_m3'] > 0
+        assert plan['haul_routes']['type'] == 'FeatureCollection'
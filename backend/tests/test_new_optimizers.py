@@ -160,6 +160,42 @@ class TestFinancialOptimizer:
         assert revenue > 0
         
         print(f"✓ Fitness: ROI={roi:.1f}%, Quality={quality:.1f}, Efficiency={efficiency:.2f}")
+    
+    def test_population_matches_single_design(self):
+        """Test vectorized population evaluation against per-design metrics"""
+        
+        designs = [
+            {
+                'total_area': 20000 + 5000 * k,
+                'roads': [{'type': 'main', 'length': 200}, {'type': 'internal', 'length': 100 * k}],
+                'lots': [
+                    {
+                        'id': i,
+                        'geometry': box(i*40, 0, i*40+40, 30 + 10 * k),
+                        'quality_score': 50 + 5 * i,
+                        'is_corner': i == 0,
+                        'frontage': 40,
+                        'zone_type': ['FACTORY', 'WAREHOUSE', 'OFFICE'][(i + k) % 3]
+                    }
+                    for i in range(5 + k)
+                ]
+            }
+            for k in range(6)
+        ]
+        designs.append({'total_area': 10000, 'roads': [], 'lots': []})
+        
+        model = FinancialModel()
+        population = model.evaluate_population(designs)
+        fitness = MultiObjectiveFinancialOptimizer(model).evaluate_population_fitness(designs)
+        
+        assert fitness.shape == (len(designs), 4)
+        for i, design in enumerate(designs):
+            metrics = model.calculate_roi_metrics(design)
+            assert np.isclose(population['total_cost'][i], metrics['total_cost'])
+            assert np.isclose(population['total_revenue'][i], metrics['total_revenue'])
+            assert np.isclose(fitness[i, 0], metrics['roi_percentage'])
+        
+        print(f"✓ Population of {len(designs)} evaluated in one call")
 
 
 # ============================================================================
@@ -380,6 +416,55 @@ class TestTerrainAnalyzer:
         
         print(f"✓ Grading cost: {plan['cost_breakdown']['total']/1e6:.1f}M VND")
 
+    def test_grading_pad_planes(self):
+        """Pads balance cut/fill and keep the drainage slope"""
+
+        rows, cols = np.indices((40, 60))
+        # Gentle 0.5% tilt with a mound; left and right halves as two pads
+        existing = 100 + 0.005 * cols * 5.0 + 2.0 * np.exp(-((rows - 20) ** 2 + (cols - 15) ** 2) / 50)
+        zones = np.where(cols < 30, 1, 2)
+        zones[:5, :] = 0  # ungraded strip
+
+        optimizer = GradingOptimizer(grid_resolution=5.0)
+        plan = optimizer.optimize_grading_plan(existing, site_area=40 * 60 * 25, zones=zones)
+
+        pads = {p['zone']: p for p in plan['pads']}
+        assert set(pads) == {1, 2}
+        for pad in pads.values():
+            assert pad['slope_pct'] >= 2.0 - 1e-9
+            assert pad['cut_m3'] == pytest.approx(pad['fill_m3'], rel=1e-6)
+
+        proposed = plan['proposed_elevation']
+        np.testing.assert_array_equal(proposed[:5], existing[:5])
+        # Proposed pads are planar with the reported gradient
+        pad2 = pads[2]
+        assert proposed[10, 41] - proposed[10, 40] == pytest.approx(pad2['slope_x'] * 5.0)
+        assert proposed[11, 40] - proposed[10, 40] == pytest.approx(pad2['slope_y'] * 5.0)
+
+        # Steep pads keep their own least-squares gradient
+        steep = 100 + 0.05 * cols * 5.0
+        steep_plan = optimizer.optimize_grading_plan(steep, site_area=1.0)
+        assert steep_plan['pads'][0]['slope_pct'] == pytest.approx(5.0)
+        assert steep_plan['volumes']['cut'] == pytest.approx(0.0, abs=1e-6)
+
+    def test_grading_leaves_missing_cells_unset(self):
+        """Cells without survey data get no pad and no earthwork"""
+
+        rows, cols = np.indices((30, 40))
+        existing = 100 + 0.5 * np.sin(cols / 4) + 0.01 * rows
+        holed = existing.copy()
+        holed[10:15, 10:20] = np.nan
+
+        optimizer = GradingOptimizer(grid_resolution=5.0)
+        plan = optimizer.optimize_grading_plan(holed, site_area=30 * 40 * 25)
+
+        proposed = plan['proposed_elevation']
+        assert np.isnan(proposed[10:15, 10:20]).all()
+        assert np.isfinite(proposed[~np.isnan(holed)]).all()
+        pad = plan['pads'][0]
+        assert plan['volumes']['cut'] == pytest.approx(pad['cut_m3'])
+        assert plan['volumes']['fill'] == pytest.approx(pad['fill_m3'])
+
 
 # ============================================================================
 # RUN ALL TESTS
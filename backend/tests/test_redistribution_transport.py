@@ -0,0 +1,162 @@
+"""
+Tests for the in-process / pooled HTTP redistribution transport
+"""
+
+import gzip
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from shapely.geometry import box
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from design.enhanced_layout_generator import EnhancedLayoutGenerator
+from design.redistribution_transport import (
+    HttpTransport,
+    InProcessTransport,
+    RedistributionCancelled,
+    RedistributionError,
+)
+
+REQUEST = {
+    "land_plots": [{"type": "Polygon", "coordinates": [[[0, 0], [400, 0], [400, 300], [0, 300], [0, 0]]]}],
+    "config": {
+        "spacing_min": 25, "spacing_max": 40, "road_width": 22, "min_lot_width": 40,
+        "population_size": 10, "generations": 10, "ortools_time_limit": 0.5
+    }
+}
+
+
+def _slow_run(land_plots, config):
+    time.sleep(30)
+
+
+class _Service(BaseHTTPRequestHandler):
+    """Echoes the inflated request; `status` for the first `failures` calls"""
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    status = 503
+    delay = 0.0
+    requests_seen = []
+    connections = set()
+
+    def do_POST(self):
+        cls = type(self)
+        cls.connections.add(self.client_address)
+        raw = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            raw = gzip.decompress(raw)
+        cls.requests_seen.append(json.loads(raw))
+        time.sleep(cls.delay)
+
+        status = 200
+        if cls.failures > 0:
+            cls.failures -= 1
+            status = cls.status
+        body = json.dumps({"stages": [{"stage_name": "echo"}], "total_lots": len(cls.requests_seen)}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def service():
+    _Service.failures, _Service.delay, _Service.status = 0, 0.0, 503
+    _Service.requests_seen, _Service.connections = [], set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    HttpTransport.close_all()
+
+
+class TestHttpTransport:
+    """Pooling, compression, retries and cancellation"""
+
+    def test_keep_alive_and_gzip(self, service):
+        for _ in range(3):
+            result = HttpTransport(service).optimize(REQUEST)
+        assert result["total_lots"] == 3
+        assert _Service.requests_seen[0] == REQUEST
+        # One pooled connection served every call
+        assert len(_Service.connections) == 1
+
+    def test_retries_unavailable_service(self, service):
+        _Service.failures = 2
+        result = HttpTransport(service, retries=2).optimize(REQUEST)
+        assert result["total_lots"] == 3
+
+        # Sessions are keyed on the retry budget too
+        assert HttpTransport(service, retries=1).session is not HttpTransport(service, retries=2).session
+        _Service.failures = 5
+        with pytest.raises(RedistributionError):
+            HttpTransport(service, retries=1).optimize(REQUEST)
+
+    def test_gateway_timeout_not_retried(self, service):
+        # The run may still be going behind a 504; POSTing again would start another
+        _Service.failures, _Service.status = 1, 504
+        with pytest.raises(RedistributionError, match="504"):
+            HttpTransport(service, retries=2).optimize(REQUEST)
+        assert len(_Service.requests_seen) == 1
+
+    def test_cancel_releases_caller(self, service):
+        _Service.delay = 3.0
+        cancel = threading.Event()
+        threading.Timer(0.3, cancel.set).start()
+        start = time.time()
+        with pytest.raises(RedistributionCancelled):
+            HttpTransport(service).optimize(REQUEST, cancel=cancel)
+        assert time.time() - start < 1.5
+
+
+@pytest.mark.skipif(not InProcessTransport.available(), reason="pipeline dependencies not installed")
+class TestInProcessTransport:
+    """Pipeline run without HTTP"""
+
+    def test_runs_pipeline(self):
+        result = InProcessTransport().optimize(REQUEST)
+        assert result["success"] and result["total_lots"] > 0
+        assert [s["stage_name"] for s in result["stages"]][0] == "Grid Optimization (NSGA-II)"
+
+    def test_cancel_terminates_run(self, monkeypatch):
+        _, schemas = InProcessTransport.load()
+        monkeypatch.setattr(InProcessTransport, "_modules", (_slow_run, schemas))
+        cancel = threading.Event()
+        threading.Timer(0.3, cancel.set).start()
+        start = time.time()
+        with pytest.raises(RedistributionCancelled):
+            InProcessTransport().optimize(REQUEST, cancel=cancel)
+        assert time.time() - start < 1.5
+        assert not [p for p in multiprocessing.active_children() if p.name == "redistribution-run"]
+
+        with pytest.raises(TimeoutError):
+            InProcessTransport().optimize(REQUEST, timeout=0.5)
+
+    def test_invalid_request_rejected(self):
+        bad = dict(REQUEST, config=dict(REQUEST["config"], spacing_min=1))
+        with pytest.raises(RedistributionError):
+            InProcessTransport().optimize(bad)
+
+    def test_generator_uses_in_process_pipeline(self):
+        generator = EnhancedLayoutGenerator(redistribution_api_url="http://127.0.0.1:9", transport="auto")
+        request = generator._prepare_optimization_request({"totalArea_ha": 12}, box(0, 0, 400, 300))
+        request["config"].update(population_size=10, generations=10, min_lot_width=40)
+
+        result = generator._call_redistribution_api(request)
+        assert isinstance(generator.transport, InProcessTransport)
+        assert len(result["stages"]) == 3
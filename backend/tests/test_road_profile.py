@@ -0,0 +1,147 @@
+"""
+Tests for vectorized road grade profiling
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import LineString, MultiLineString, box, mapping
+
+from optimization.elevation_raster import Affine, ElevationRaster
+from optimization.road_profile import profile_roads, summarize_profiles
+from demo.fast_layout_generator import FastLayoutGenerator, MAX_ROAD_GRADE
+
+
+@pytest.fixture
+def terrain():
+    # 5% rise along x, with a 12 m step between x = 100 and x = 110
+    x = np.arange(0, 200, 2.0)
+    z = 100 + 0.05 * x + np.clip((x - 100) / 10, 0, 1) * 12
+    grid = np.tile(z, (100, 1))
+    return ElevationRaster.from_array(grid, Affine.from_origin(0, 0, 2.0))
+
+
+class TestRoadProfile:
+    """Sampling, grades and design profile"""
+
+    def test_grades_along_road(self, terrain):
+        roads = [LineString([(0, 50), (198, 50)]), LineString([(50, 0), (50, 198)])]
+        along, across = profile_roads(roads, terrain, spacing=2.0)
+
+        # Bilinear samples between grid nodes
+        assert along.ground[0] == pytest.approx(100.0)
+        assert along.max_grade == pytest.approx(125.0, rel=1e-3)
+        assert along.end_grade == pytest.approx((0.05 * 198 + 12) / 198 * 100, rel=1e-3)
+        assert along.mean_grade > along.end_grade - 1e-6
+        assert across.max_grade == pytest.approx(0.0, abs=1e-6)
+
+    def test_design_profile_limits_grade(self, terrain):
+        road = {'geometry': mapping(LineString([(0, 50), (198, 50)])), 'width': 10.0}
+        profile = profile_roads([road], terrain, spacing=2.0, max_grade=8.0)[0]
+
+        design_grades = np.abs(np.diff(profile.design)) / np.diff(profile.chainage) * 100
+        assert design_grades.max() <= 8.0 + 1e-6
+        assert profile.cut_m3 > 0 and profile.fill_m3 > 0
+
+        flat = profile_roads([road], terrain, spacing=2.0, max_grade=20.0)[0]
+        assert flat.cut_m3 + flat.fill_m3 < profile.cut_m3 + profile.fill_m3
+
+    def test_sources_and_invalid_roads(self, terrain):
+        grid = terrain.to_grid_dict()
+        grid.pop('raster')
+        line = LineString([(10, 10), (150, 120)])
+        roads = [line, box(0, 0, 1, 1), LineString([(500, 500), (600, 500)])]
+
+        from_dict = profile_roads(roads, grid)
+        from_raster = profile_roads(roads, terrain)
+        from_function = profile_roads([line], lambda x, y: 50 - 0.02 * x - 0.03 * y)
+
+        assert from_dict[1] is None
+        np.testing.assert_allclose(from_dict[0].ground, from_raster[0].ground)
+        # Off-grid road: NaN profile, zero grade
+        assert np.isnan(from_dict[2].ground).all() and from_dict[2].max_grade == 0
+        expected = (0.02 * 140 + 0.03 * 110) / line.length * 100
+        assert from_function[0].mean_grade == pytest.approx(expected)
+
+        summary = summarize_profiles(from_dict, grade_limit=5.0)
+        assert summary['road_count'] == 2
+        assert summary['roads_over_limit'] == 1
+
+    def test_multilinestring_profiled_per_component(self, terrain):
+        west = LineString([(0, 50), (90, 50)])
+        east = LineString([(120, 50), (198, 50)])
+        whole, parts_w, parts_e = profile_roads(
+            [MultiLineString([west, east]), west, east], terrain, spacing=2.0
+        )
+
+        assert whole.length == pytest.approx(west.length + east.length)
+        assert whole.max_grade == pytest.approx(max(parts_w.max_grade, parts_e.max_grade))
+        # No grade across the gap between the components
+        assert whole.max_grade < 10
+        assert len(whole.chainage) == len(parts_w.chainage) + len(parts_e.chainage)
+        assert whole.chainage[-1] == pytest.approx(whole.length)
+
+
+class TestLayoutRoads:
+    """FastLayoutGenerator attaches full-length grades"""
+
+    def test_generated_roads_carry_profiles(self, terrain):
+        params = {'road_width_main': 20.0, 'road_width_secondary': 12.0}
+        roads = FastLayoutGenerator().generate_terrain_aware_roads(
+            box(0, 0, 198, 198), terrain.to_terrain_dict(), params
+        )
+
+        horizontal = roads[0]
+        # The step is caught even though both ends are on gentle ground
+        assert horizontal['max_grade'] > 100
+        assert horizontal['max_grade'] >= horizontal['grade']
+        assert horizontal['cut_m3'] + horizontal['fill_m3'] > 0
+        assert MAX_ROAD_GRADE == 8.0
+
+        flat = FastLayoutGenerator().generate_terrain_aware_roads(box(0, 0, 198, 198), None, params)
+        assert all(r['grade'] == 0.0 and r['max_grade'] == 0.0 for r in flat)
+
+
+class TestPipelineRoadProfiles:
+    """The redistribution pipeline profiles against the request's elevation grid"""
+
+    def test_profiles_only_with_site_elevation(self, terrain):
+        sys.path.append(str(Path(__file__).parent.parent / "docker"))
+        from pipeline.land_redistribution import LandRedistributionPipeline
+
+        roads = [{'geometry': LineString([(0, 50), (198, 50)]), 'width': 10.0}]
+        pipeline = LandRedistributionPipeline([box(0, 0, 198, 198)], {})
+        assert pipeline.road_centerlines == []
+
+        skipped = pipeline._profile_road_network(roads)
+        assert skipped['roads'] == [] and 'elevation' in skipped['skipped']
+
+        grid = terrain.to_grid_dict()
+        grid.pop('raster')
+        pipeline.config['elevation_grid'] = {
+            'grid': grid['grid'].tolist(), 'x_coords': list(grid['x_coords']), 'y_coords': list(grid['y_coords'])
+        }
+        profiled = pipeline._profile_road_network(roads)
+        assert 'skipped' not in profiled
+        assert profiled['summary']['roads_over_limit'] == 1
+        assert profiled['roads'][0]['width'] == 10.0
+
+    def test_perimeter_centreline_width_matches_band(self):
+        sys.path.append(str(Path(__file__).parent.parent / "docker"))
+        from core.road_network.hierarchical_grid import create_hierarchical_roads
+
+        centerlines = []
+        site = box(0, 0, 600, 400)
+        create_hierarchical_roads(site_boundary=site, perimeter_width=20.0, centerlines=centerlines)
+        perimeter = next(c for c in centerlines if c['type'] == 'perimeter')
+
+        band = site.difference(site.buffer(-10.0))
+        # Centreline length x recorded width covers the perimeter band
+        assert perimeter['width'] == 10.0
+        assert perimeter['geometry'].length * perimeter['width'] == pytest.approx(band.area, rel=0.02)
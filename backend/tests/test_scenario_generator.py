@@ -0,0 +1,80 @@
+"""
+Tests for strategy-driven, parallel scenario generation
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import box
+
+from optimization.elevation_raster import Affine, ElevationRaster
+from demo.scenario_generator import DEFAULT_STRATEGIES, ScenarioGenerator, ScenarioStrategy
+
+
+@pytest.fixture(scope='module')
+def site_analysis():
+    # 1.2 km x 0.8 km site on a 20 m grid, gently rising along x
+    x = np.arange(60) * 20.0
+    grid = np.tile(50 + 0.01 * x, (40, 1)) + np.random.default_rng(0).normal(0, 0.2, (40, 60))
+    raster = ElevationRaster.from_array(grid, Affine.from_origin(0, 0, 20.0))
+    zones = []
+    for i, (minx, width) in enumerate([(0, 300), (350, 400), (800, 380)]):
+        geom = box(minx, 20, minx + width, 760)
+        zones.append({
+            'id': i,
+            'geometry': geom,
+            'area_ha': geom.area / 10000,
+            'metrics': {'avg_slope': 1.0 + i},
+            'scores': {'total': 80 - 10 * abs(i - 1)}
+        })
+    return {
+        'optimal_zones': zones,
+        'terrain_data': {
+            'raster': raster,
+            'elevation_grid': raster.to_grid_dict(),
+            'grid': raster.data,
+            'resolution': 20.0
+        }
+    }
+
+
+class TestScenarioGenerator:
+    """Default and user-defined strategies, sequential and pooled"""
+
+    def test_parallel_matches_sequential(self, site_analysis):
+        sequential = ScenarioGenerator(max_workers=1).generate_scenarios(site_analysis, target_plot_count=60)
+        parallel = ScenarioGenerator(max_workers=3).generate_scenarios(site_analysis, target_plot_count=60)
+
+        assert [s['scenario_id'] for s in parallel] == ['A', 'B', 'C']
+        for seq, par in zip(sequential, parallel):
+            assert par['metrics']['plot_count'] == seq['metrics']['plot_count'] > 0
+            assert par['grading_cost']['estimated_cost_vnd'] == pytest.approx(seq['grading_cost']['estimated_cost_vnd'])
+            assert par['generation_time_s'] > 0
+
+    def test_user_defined_strategies(self, site_analysis):
+        strategies = [
+            {'scenario_id': 'S1', 'name': 'Sparse', 'strategy': 'sparse', 'rank_by': 'flatness',
+             'area_factor': 0.5, 'plots_per_ha': 4},
+            ScenarioStrategy('S2', 'Dense', 'dense', rank_by='area', area_factor=2.0, plots_per_ha=14),
+            DEFAULT_STRATEGIES[2]
+        ]
+        scenarios = ScenarioGenerator(max_workers=1).generate_scenarios(
+            site_analysis, target_plot_count=60, strategies=strategies
+        )
+
+        assert [s['scenario_id'] for s in scenarios] == ['S1', 'S2', 'C']
+        sparse, dense, _ = scenarios
+        # Flattest zone only for the sparse strategy, every zone for the dense one
+        assert [z['id'] for z in sparse['selected_zones']] == [0]
+        assert len(dense['selected_zones']) == 3
+        assert dense['metrics']['development_area_ha'] > sparse['metrics']['development_area_ha']
+
+    def test_invalid_strategy(self):
+        with pytest.raises(ValueError):
+            ScenarioStrategy.from_dict({'scenario_id': 'X', 'name': 'X', 'strategy': 'x', 'rank_by': 'price'})
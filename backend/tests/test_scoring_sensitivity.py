@@ -0,0 +1,115 @@
+"""
+Tests for batched multi-parameter sensitivity analysis
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+from shapely.geometry import box
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from optimization.scoring_matrix import DesignScorer
+
+
+def _design():
+    return {
+        "name": "Base",
+        "site_boundary": box(0, 0, 400, 400),
+        "lots": [box(x, y, x + 40, y + 40) for x in range(0, 400, 50) for y in range(0, 400, 50)],
+        "compliance": {"salable_area_pct": 0.72, "green_space_pct": 0.12},
+        "financial": {"roi_percent": 15, "irr_percent": 12, "payback_years": 6},
+        "timeline": {"total_months": 14, "critical_path_pct": 80, "parallel_tasks": 3},
+        "customer": {"lot_size_diversity": 2, "industry_compatibility_score": 60},
+        "risks": {"ieat_compliant": True, "roi_percent": 15}
+    }
+
+
+class TestSensitivity:
+    """Sweeps, grids and Sobol indices"""
+
+    def test_sweep_matches_full_rescoring(self):
+        scorer = DesignScorer()
+        design = _design()
+        result = scorer.sensitivity_analysis(design, "salable_area_pct", (0.6, 0.8), num_steps=5)
+
+        for value, score in zip(result["values"], result["scores"]):
+            modified = dict(design, compliance=dict(design["compliance"], salable_area_pct=value))
+            assert np.isclose(score, scorer.score_design(modified)["weighted_score"], atol=0.01)
+        assert result["optimal_value"] >= 0.75
+        # Base design left untouched
+        assert design["compliance"]["salable_area_pct"] == 0.72
+
+    def test_grid_rescores_only_affected_dimensions(self):
+        scorer = DesignScorer()
+        grid = scorer.sensitivity_grid(
+            _design(), {"compliance.salable_area_pct": (0.6, 0.8), "total_months": (8, 30)}, num_steps=6
+        )
+
+        assert np.array(grid["scores"]).shape == (6, 6)
+        assert grid["evaluations"] == 36
+        assert set(grid["rescored_dimensions"]) == {"ieat_compliance", "construction_timeline"}
+        low, high = grid["dimension_ranges"]["financial_roi"]
+        assert low == high
+        assert grid["optimal"]["total_months"] <= 10
+
+    def test_bare_name_sets_every_section(self):
+        scorer = DesignScorer()
+        grid = scorer.sensitivity_grid(_design(), {"roi_percent": (5, 25)}, num_steps=3)
+        assert set(grid["rescored_dimensions"]) >= {"financial_roi", "risk_assessment"}
+
+    def test_sobol_ranks_influential_parameter(self):
+        result = DesignScorer().sobol_analysis(
+            _design(),
+            {"salable_area_pct": (0.6, 0.8), "total_months": (8, 30), "lot_size_diversity": (2, 2.5)},
+            num_samples=256,
+            seed=0
+        )
+
+        assert result["evaluations"] == 256 * 5
+        first, total = result["first_order"], result["total_order"]
+        assert total["lot_size_diversity"] < 1e-9
+        assert total["total_months"] > 0.05 and total["salable_area_pct"] > 0.05
+        assert all(-0.1 <= first[name] <= total[name] + 0.1 for name in first)
+
+    def test_unknown_parameters_rejected(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api.scoring_endpoints import router
+
+        design = _design()
+        design.pop("site_boundary")
+        design["lots"] = []
+        assert DesignScorer().unknown_parameters(design, ["roi_percent", "roi_pct"]) == ["roi_pct"]
+
+        app = FastAPI()
+        app.include_router(router)
+        response = TestClient(app).post("/scoring/sensitivity/multi", json={
+            "design_id": "d1",
+            "design_data": design,
+            "parameters": {"roi_percent": [5, 25], "roi_pct": [5, 25], "months": [8, 30]},
+            "num_steps": 3
+        })
+        assert response.status_code == 400
+        assert "roi_pct, months" in response.json()["detail"]
+
+    def test_non_positive_step_counts_rejected(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api.scoring_endpoints import router
+
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+        base = {"design_id": "d1", "design_data": {"compliance": {"salable_area_pct": 0.7}}}
+        parameters = {"salable_area_pct": [0.6, 0.8]}
+
+        for body in (
+            {"parameters": parameters, "method": "grid", "num_steps": 0},
+            {"parameters": parameters, "method": "sobol", "num_samples": -4},
+        ):
+            assert client.post("/scoring/sensitivity/multi", json={**base, **body}).status_code == 400
+        single = {**base, "parameter": "salable_area_pct", "value_range": [0.6, 0.8], "num_steps": 0}
+        assert client.post("/scoring/sensitivity", json=single).status_code == 400
@@ -0,0 +1,150 @@
+"""
+Tests for bounded session / project stores
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import Polygon
+
+from database.session_store import (
+    MemorySessionStore,
+    SQLiteSessionStore,
+    create_session_store,
+    estimate_size,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "memory":
+            return create_session_store("test", "memory://", **kwargs)
+        return create_session_store("test", f"sqlite:///{tmp_path}/sessions.db", **kwargs)
+    return factory
+
+
+class TestSessionStore:
+    """Behaviour shared by all backends"""
+
+    def test_dict_and_redis_style_access(self, make_store):
+        store = make_store()
+        store["a"] = {"polygon": Polygon([(0, 0), (1, 0), (1, 1)]), "n": 1}
+        store.set("b", [1, 2], ex=100)
+
+        assert "a" in store and "missing" not in store
+        assert store["a"]["polygon"].area == 0.5
+        assert store.get("missing", "default") == "default"
+        assert store.ttl("a") == -1
+        assert 0 < store.ttl("b") <= 100
+        assert store.ttl("missing") == -2
+        assert store.exists("a", "b", "c") == 2
+        assert sorted(store.keys()) == ["a", "b"]
+        assert store.keys("a*") == ["a"]
+        assert len(store) == 2
+
+        with pytest.raises(KeyError):
+            store["missing"]
+        assert store.delete("a", "missing") == 1
+        assert store.values() == [[1, 2]]
+
+    def test_ttl_expiry(self, make_store):
+        store = make_store(default_ttl=0.2)
+        store["a"] = 1
+        store.set("b", 2, ex=60)
+
+        time.sleep(0.3)
+
+        assert store.get("a") is None
+        assert store.get("b") == 2
+        assert store.info()["items"] == 1
+
+    def test_lru_by_items(self, make_store):
+        store = make_store(max_items=3)
+        for key in "abc":
+            store[key] = key
+            time.sleep(0.01)
+        store.get("a")  # a becomes most recent
+        time.sleep(0.01)
+        store["d"] = "d"
+
+        assert sorted(store.keys()) == ["a", "c", "d"]
+        assert store.info()["evictions"] == 1
+
+    def test_lru_by_bytes(self, make_store):
+        entry = "x" * 1000
+        store = make_store(max_bytes=int(estimate_size(entry) * 2.5))
+        for key in "abcd":
+            store[key] = entry
+            time.sleep(0.01)
+
+        assert sorted(store.keys()) == ["c", "d"]
+        assert store.info()["bytes"] <= store.max_bytes
+
+
+class TestBackends:
+    """Backend-specific semantics"""
+
+    def test_memory_keeps_references(self):
+        store = MemorySessionStore()
+        store["job"] = {"progress": 0}
+        store["job"]["progress"] = 50
+
+        assert store["job"]["progress"] == 50
+
+    def test_sqlite_shared_and_needs_write_back(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+        store = SQLiteSessionStore(path, namespace="jobs")
+        other = SQLiteSessionStore(path, namespace="jobs")
+        unrelated = SQLiteSessionStore(path, namespace="projects")
+
+        store["job"] = {"progress": 0}
+        store["job"]["progress"] = 50  # mutates a copy
+        assert other["job"]["progress"] == 0
+
+        job = store["job"]
+        job["progress"] = 50
+        store["job"] = job
+        assert other["job"]["progress"] == 50
+        assert "job" not in unrelated
+
+    def test_sqlite_thread_safety(self, tmp_path):
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"), max_items=50)
+
+        def writer(offset):
+            for i in range(40):
+                store[f"k{offset}-{i}"] = i
+
+        threads = [threading.Thread(target=writer, args=(t,)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(store) == 50
+
+    def test_sliding_ttl(self):
+        store = MemorySessionStore(default_ttl=0.3, sliding=True)
+        store["a"] = 1
+        for _ in range(3):
+            time.sleep(0.15)
+            assert store.get("a") == 1
+
+    def test_estimate_size_unpicklable(self):
+        class Client:
+            def __init__(self):
+                self.lock = threading.Lock()
+                self.history = ["message"] * 100
+
+        assert estimate_size(Client()) > estimate_size(["message"])
+
+    def test_unknown_url(self):
+        with pytest.raises(ValueError):
+            create_session_store("x", "postgres://localhost")
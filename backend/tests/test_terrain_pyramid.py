@@ -0,0 +1,77 @@
+"""
+Tests for the terrain pyramid and coarse-to-fine zone refinement
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import box
+
+from optimization.elevation_raster import Affine, ElevationRaster
+from optimization.terrain_pyramid import TerrainPyramid
+from demo.full_site_analyzer import FullSiteAnalyzer
+
+
+@pytest.fixture
+def raster():
+    # 5 m grid, 2% slope along x, a steep ridge through the middle
+    x = np.arange(150) * 5.0
+    grid = np.tile(100 + 0.02 * x, (101, 1))
+    grid[:, 70:80] += np.abs(np.arange(10) - 4.5) * -10 + 50
+    grid[0, 0] = np.nan
+    return ElevationRaster.from_array(grid, Affine.from_origin(1000, 2000, 5.0))
+
+
+class TestTerrainPyramid:
+    """Levels, alignment and downsampled layers"""
+
+    def test_levels_are_cached_and_aligned(self, raster):
+        pyramid = TerrainPyramid(raster, max_slope=15.0)
+        level = pyramid.level(2)
+
+        assert level is pyramid.level(2)
+        assert level.resolution == 20.0 and level.shape == (26, 38)
+        # Block centre of the first 4x4 block; NaN cell ignored in the mean
+        assert level.x_coords[0] == pytest.approx(1000 + 7.5)
+        assert level.data[0, 0] == pytest.approx(np.nanmean(raster.data[:4, :4]), rel=1e-6)
+        assert pyramid.level_for(None) == 0 and pyramid.level_for(45.0) == 3
+        assert pyramid.for_resolution(1e6) is pyramid.level(pyramid.depth - 1)
+
+    def test_layers_come_from_base(self, raster):
+        pyramid = TerrainPyramid(raster, max_slope=15.0)
+        coarse = pyramid.level(3)
+
+        np.testing.assert_allclose(coarse.slope()[5, 2], raster.slope()[40:48, 16:24].mean(), rtol=1e-5)
+        # Ridge columns 70..79 (x 1350..1395) are steep at every level
+        assert not raster.buildable_mask(15.0)[50, 72]
+        assert not coarse.buildable_mask(15.0)[6, 9]
+        assert coarse.buildable_mask(15.0)[6, 2]
+
+
+class TestZoneRefinement:
+    """Coarse zone search refined at the base resolution"""
+
+    def test_refined_outline_matches_base_cells(self, raster):
+        site = box(990, 1990, 1760, 2510)
+        analyzer = FullSiteAnalyzer(grid_resolution=5.0, search_resolution=40.0)
+        level = TerrainPyramid(raster, max_slope=15.0).for_resolution(40.0)
+        coarse = analyzer._find_contiguous_zones(
+            level.buildable_mask(15.0), level.to_grid_dict(), level.slope(), site
+        )
+        assert coarse and all(z['resolution'] == 40.0 for z in coarse)
+
+        west = min(coarse, key=lambda z: z['centroid'].x)
+        coarse_area = west['area_m2']
+        analyzer._refine_zones([west], raster, site, 40.0)
+
+        fine_cells = raster.buildable_mask(15.0)[:, :70].sum()
+        assert west['resolution'] == 5.0
+        assert west['area_m2'] == pytest.approx(fine_cells * 25, rel=0.02)
+        assert west['area_m2'] != pytest.approx(coarse_area)
+        assert west['metrics']['max_slope'] <= 15.0
@@ -0,0 +1,108 @@
+"""
+Tests for array-based CPM and PERT Monte Carlo scheduling
+"""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from optimization.timeline_estimator import ScheduleNetwork, Task, TimelineGenerator
+
+
+def _random_programme(n: int, seed: int = 0):
+    """Random DAG of n tasks, listed in shuffled order"""
+    rng = np.random.default_rng(seed)
+    tasks = []
+    for i in range(n):
+        deps = sorted({f"T{j}" for j in rng.integers(0, i, size=min(i, 3))}) if i else []
+        tasks.append(Task(f"T{i}", f"Task {i}", int(rng.integers(1, 30)), deps, "Crew"))
+    order = rng.permutation(n)
+    return [tasks[i] for i in order]
+
+
+class TestCriticalPath:
+    """Forward / backward pass"""
+
+    def test_standard_programme(self):
+        generator = TimelineGenerator()
+        timeline = generator.generate_timeline({}, start_date=datetime(2026, 1, 1))
+
+        tasks = {t['id']: t for t in timeline['tasks']}
+        for task in tasks.values():
+            for dep in task['dependencies']:
+                assert task['start_date'] >= tasks[dep]['end_date']
+        assert timeline['critical_path'][0] == "T001"
+        assert timeline['critical_path'][-1] == "T021"
+        assert all(tasks[t]['critical'] and tasks[t]['slack_days'] == 0 for t in timeline['critical_path'])
+
+    def test_matches_longest_path(self):
+        tasks = _random_programme(300)
+        network = ScheduleNetwork.from_tasks(tasks)
+        durations = np.array([t.duration_days for t in tasks], dtype=float)
+        early_start, early_finish, late_start, _ = network.cpm(durations)
+
+        G = nx.DiGraph()
+        for t in tasks:
+            G.add_edge("start", t.id, weight=0)
+            G.add_edge(t.id, "end", weight=t.duration_days)
+            for dep in t.dependencies:
+                G.add_edge(dep, t.id, weight=next(x.duration_days for x in tasks if x.id == dep))
+        assert np.isclose(early_finish.max(), nx.dag_longest_path_length(G))
+        assert np.all(late_start >= early_start - 1e-9)
+
+    def test_cycle_is_rejected(self):
+        tasks = [Task("A", "A", 1, ["B"], "x"), Task("B", "B", 1, ["A"], "x")]
+        try:
+            ScheduleNetwork.from_tasks(tasks)
+        except ValueError as e:
+            assert "cycle" in str(e)
+        else:
+            raise AssertionError("cycle not detected")
+
+
+class TestMonteCarlo:
+    """PERT simulation"""
+
+    def test_serial_chain_percentiles(self):
+        tasks = [
+            Task(f"T{i}", f"Task {i}", 10, [f"T{i - 1}"] if i else [], "Crew",
+                 optimistic_days=6, pessimistic_days=20)
+            for i in range(20)
+        ]
+        result = TimelineGenerator().simulate_timeline(tasks=tasks, runs=20000, seed=1)
+
+        # PERT mean (a + 4m + b) / 6 per task
+        assert np.isclose(result['mean_days'], 20 * (6 + 40 + 20) / 6, rtol=0.01)
+        assert all(v == 1.0 for v in result['criticality_index'].values())
+        assert result['completion_days']['P10'] < result['completion_days']['P90']
+
+    def test_triangular_and_parallel_branches(self):
+        tasks = [
+            Task("S", "Start", 1, [], "x", optimistic_days=1, pessimistic_days=1),
+            Task("A", "Long", 30, ["S"], "x", optimistic_days=25, pessimistic_days=40),
+            Task("B", "Short", 10, ["S"], "x", optimistic_days=8, pessimistic_days=12),
+            Task("E", "End", 1, ["A", "B"], "x", optimistic_days=1, pessimistic_days=1)
+        ]
+        result = TimelineGenerator().simulate_timeline(
+            tasks=tasks, runs=5000, distribution="triangular", seed=2
+        )
+
+        index = result['criticality_index']
+        assert index["A"] == 1.0 and index["B"] == 0.0 and index["S"] == 1.0
+        assert np.isclose(result['mean_days'], 2 + (25 + 30 + 40) / 3, rtol=0.01)
+
+    def test_hundreds_of_tasks(self):
+        tasks = _random_programme(500, seed=4)
+        start = time.time()
+        result = TimelineGenerator().simulate_timeline(tasks=tasks, runs=5000, seed=4)
+
+        assert time.time() - start < 5.0
+        assert result['completion_days']['P95'] >= result['completion_days']['P50']
+        assert max(result['criticality_index'].values()) == 1.0
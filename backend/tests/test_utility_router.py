@@ -0,0 +1,162 @@
+"""
+Tests for utility network routing on the noded road graph
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+from networkx.algorithms.approximation import steiner_tree
+from shapely.geometry import LineString, Point, box
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from optimization.elevation_raster import Affine, ElevationRaster
+from optimization.utility_router import UtilityNetworkDesigner
+
+
+def _grid_roads(extent: float, spacing: float):
+    """Full-length streets that cross without sharing vertices"""
+    steps = int(extent // spacing) + 1
+    roads = []
+    for i in range(steps):
+        d = i * spacing
+        roads.append({'id': f'H{i}', 'geometry': LineString([(0, d), (extent, d)])})
+        roads.append({'id': f'V{i}', 'geometry': LineString([(d, 0), (d, extent)])})
+    return roads
+
+
+def _terrain(fn, extent: float = 400, resolution: float = 5.0):
+    """Raster of fn(x, y) over [0, extent]^2"""
+    coords = np.arange(0, extent + resolution, resolution)
+    xx, yy = np.meshgrid(coords, coords)
+    return ElevationRaster.from_array(fn(xx, yy), Affine.from_origin(0, 0, resolution))
+
+
+class TestRoadGraph:
+    """Noding and snapping"""
+
+    def test_crossing_roads_are_noded(self):
+        roads = [
+            {'id': 1, 'geometry': LineString([(0, 50), (100, 50)])},
+            {'id': 2, 'geometry': LineString([(50, 0), (50, 100)])}
+        ]
+        G = UtilityNetworkDesigner()._build_road_graph(roads)
+
+        assert G.degree((50.0, 50.0)) == 4
+        assert {G.edges[(0.0, 50.0), (50.0, 50.0)]['road_id'],
+                G.edges[(50.0, 0.0), (50.0, 50.0)]['road_id']} == {1, 2}
+
+    def test_water_routes_across_crossing(self):
+        roads = [
+            {'id': 1, 'geometry': LineString([(0, 50), (100, 50)])},
+            {'id': 2, 'geometry': LineString([(50, 0), (50, 100)])}
+        ]
+        lots = [{'id': 1, 'geometry': box(55, 85, 75, 100)}]
+        network = UtilityNetworkDesigner().design_water_network(lots, roads, Point(0, 50))
+
+        assert network['num_connections'] == 1
+        # Source -> crossing -> up the cross street to the lot connection
+        assert 100 <= network['total_length'] <= 120
+
+    def test_sewer_two_thousand_lots_in_seconds(self):
+        roads = _grid_roads(2000, 50)
+        lots = [
+            {'id': i * 50 + j, 'geometry': box(x + 5, y + 5, x + 20, y + 20)}
+            for i, x in enumerate(range(0, 2000, 50))
+            for j, y in enumerate(range(0, 2000, 40))
+        ]
+        assert len(lots) == 2000
+
+        start = time.time()
+        network = UtilityNetworkDesigner().design_sewer_network(lots, roads, Point(0, 0))
+
+        assert time.time() - start < 5.0
+        assert network['num_connections'] == 2000
+        assert network['total_length'] > 0
+
+
+class TestSteinerTree:
+    """Mehlhorn approximation"""
+
+    def test_matches_networkx_mehlhorn(self):
+        rng = np.random.default_rng(3)
+        G = nx.random_geometric_graph(300, 0.12, seed=3)
+        G = G.subgraph(max(nx.connected_components(G), key=len)).copy()
+        for a, b in G.edges():
+            G.edges[a, b]['length'] = float(rng.uniform(1, 10))
+        terminals = sorted(rng.choice(list(G.nodes()), 25, replace=False).tolist())
+
+        tree = UtilityNetworkDesigner()._solve_steiner_tree(G, terminals[0], terminals[1:])
+        reference = steiner_tree(G, terminals, weight='length', method='mehlhorn')
+
+        assert nx.is_tree(tree) and set(terminals) <= set(tree.nodes())
+        assert np.isclose(tree.size(weight='length'), reference.size(weight='length'))
+        stats = tree.graph['steiner']
+        assert np.isclose(stats['approximation_bound'], 2 * (1 - 1 / 25))
+        assert stats['lower_bound'] <= stats['tree_length']
+
+    def test_water_two_thousand_lots_in_seconds(self):
+        roads = _grid_roads(2000, 50)
+        lots = [
+            {'id': f'{x}-{y}', 'geometry': box(x + 5, y + 5, x + 20, y + 20)}
+            for x in range(0, 2000, 50)
+            for y in range(0, 2000, 40)
+        ]
+
+        start = time.time()
+        network = UtilityNetworkDesigner().design_water_network(lots, roads, Point(0, 0))
+
+        assert time.time() - start < 5.0
+        assert network['num_connections'] == 2000
+        assert network['steiner']['terminals'] > 1000
+        assert network['steiner']['runtime_s'] < 5.0
+
+
+class TestGravitySewer:
+    """Inverts, slope / depth checks and lift stations"""
+
+    def test_downhill_road_needs_no_lift(self):
+        roads = [{'id': 1, 'geometry': LineString([(x, 0) for x in range(0, 401, 20)])}]
+        lots = [{'id': 1, 'geometry': box(390, 5, 400, 15)}]
+        terrain = _terrain(lambda x, y: 0.01 * x)
+        designer = UtilityNetworkDesigner()
+        network = designer.design_sewer_network(lots, roads, Point(0, 0), terrain=terrain)
+
+        assert network['lift_stations'] == []
+        assert network['validation']['slope_violations'] == 0
+        assert network['validation']['depth_violations'] == 0
+        for pipe in network['pipes']:
+            assert pipe['slope'] >= designer.min_slope - 1e-9
+            assert designer.min_depth - 1e-9 <= pipe['depth_from'] <= designer.max_depth
+
+    def test_ridge_gets_lift_station(self):
+        roads = [{'id': 1, 'geometry': LineString([(x, 0) for x in range(0, 401, 20)])}]
+        lots = [{'id': 1, 'geometry': box(390, 5, 400, 15)}]
+        # Ridge 6 m above the lot halfway to the outlet
+        terrain = _terrain(lambda x, y: 10 + 6 * np.exp(-((x - 200) / 60) ** 2) - 0.005 * (400 - x))
+        network = UtilityNetworkDesigner().design_sewer_network(lots, roads, Point(0, 0), terrain=terrain)
+
+        assert network['lift_stations']
+        assert network['validation']['depth_violations'] == 0
+        assert network['validation']['slope_violations'] == 0
+        assert network['cost'] > UtilityNetworkDesigner()._calculate_utility_cost(network['pipes'], 'sewer')
+
+    def test_route_avoids_adverse_grade(self):
+        # Two equal-length routes round a block; the west one crosses a hump
+        roads = [
+            {'id': 1, 'geometry': LineString([(0, 0), (200, 0), (200, 200)])},
+            {'id': 2, 'geometry': LineString([(0, 0), (0, 200), (200, 200)])}
+        ]
+        lots = [{'id': 1, 'geometry': box(205, 190, 215, 200)}]
+        terrain = _terrain(
+            lambda x, y: 0.02 * (x + y) + 6 * np.exp(-(x ** 2 + (y - 200) ** 2) / 2000),
+            extent=220
+        )
+        network = UtilityNetworkDesigner().design_sewer_network(lots, roads, Point(0, 0), terrain=terrain)
+
+        visited = {(p['to']['x'], p['to']['y']) for p in network['pipes']}
+        assert (200.0, 0.0) in visited and (0.0, 200.0) not in visited
@@ -0,0 +1,126 @@
+"""
+Tests for Mapbox Vector Tile generation
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import Polygon, LineString
+
+from cad.vector_tiles import (
+    VectorTileSet,
+    VectorTileStore,
+    _encode_geometry,
+    _encode_varints,
+    lnglat_to_world,
+)
+
+
+def _lot(lng, lat, size=0.0005, **props):
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [lng, lat], [lng + size, lat], [lng + size, lat + size],
+                [lng, lat + size], [lng, lat]
+            ]]
+        },
+        "properties": {"type": "lot", **props}
+    }
+
+
+def _tile_for(lng, lat, z):
+    wx, wy = lnglat_to_world(np.array([[lng, lat]]))[0]
+    return z, int(wx * 2 ** z), int(wy * 2 ** z)
+
+
+class TestVectorTiles:
+    """Test MVT encoding and tiling"""
+
+    def test_varint_encoding(self):
+        values = np.array([0, 1, 127, 128, 300, 2 ** 32 - 1])
+        expected = bytes([
+            0x00, 0x01, 0x7F, 0x80, 0x01, 0xAC, 0x02,
+            0xFF, 0xFF, 0xFF, 0xFF, 0x0F
+        ])
+
+        assert _encode_varints(values) == expected
+        # Long arrays take the vectorized path
+        assert _encode_varints(np.tile(values, 20)) == expected * 20
+
+    def test_polygon_commands(self):
+        # Counter-clockwise in y-down space -> must be reversed for MVT
+        geom_type, commands = _encode_geometry(
+            Polygon([(0, 0), (0, 10), (10, 10), (10, 0)])
+        )
+
+        assert geom_type == 3
+        # MoveTo(1) 0,0  LineTo(3) ... ClosePath
+        assert commands[0] == (1 | (1 << 3))
+        assert commands[3] == (2 | (3 << 3))
+        assert commands[-1] == (7 | (1 << 3))
+        assert len(commands) == 1 + 2 + 1 + 6 + 1
+
+    def test_line_commands(self):
+        geom_type, commands = _encode_geometry(LineString([(1, 1), (3, 1)]))
+
+        assert geom_type == 2
+        assert list(commands) == [9, 2, 2, 10, 4, 0]
+
+    def test_render_splits_layers_and_caches(self):
+        features = [_lot(100.5 + i * 0.001, 13.75, zone="FACTORY") for i in range(20)]
+        features.append({
+            "type": "Feature",
+            "geometry": {
+                "type": "LineString",
+                "coordinates": [[100.5, 13.7502], [100.52, 13.7502]]
+            },
+            "properties": {"type": "road"}
+        })
+        tileset = VectorTileSet(features, layer_property="type")
+        store = VectorTileStore()
+        store.register("result", tileset)
+
+        z, x, y = _tile_for(100.505, 13.7502, 14)
+        data = store.tile("result", z, x, y)
+
+        assert data
+        assert b"lot" in data and b"road" in data and b"FACTORY" in data
+        assert store.tile("result", z, x, y) is data
+        assert store.stats()["cached_tiles"] == 1
+        # Far-away tile is empty
+        assert store.tile("result", 14, 0, 0) == b""
+        assert store.tile("missing", z, x, y) is None
+
+    def test_small_features_dropped_at_low_zoom(self):
+        tileset = VectorTileSet([_lot(100.5, 13.75, size=0.00001)])
+
+        z, x, y = _tile_for(100.5, 13.75, 4)
+        assert tileset.render(z, x, y) == b""
+
+        z, x, y = _tile_for(100.5, 13.75, 18)
+        assert tileset.render(z, x, y) != b""
+
+    def test_tile_endpoint_rejects_out_of_range_zoom(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from api.tile_endpoints import router
+
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+        layer = client.post("/tiles/layers", json={
+            "geojson": {"type": "FeatureCollection", "features": [_lot(100.5, 13.75)]},
+            "max_zoom": 16
+        }).json()["layer"]
+
+        z, x, y = _tile_for(100.5, 13.75, 16)
+        assert client.get(f"/tiles/{layer}/{z}/{x}/{y}.pbf").status_code == 200
+        assert client.get(f"/tiles/{layer}/17/0/0.pbf").status_code == 400
+        assert client.get(f"/tiles/{layer}/100000000/0/0.pbf").status_code == 400
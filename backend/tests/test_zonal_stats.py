@@ -0,0 +1,103 @@
+"""
+Tests for raster zonal statistics and plot cut/fill
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shapely.geometry import box, mapping
+
+from optimization.elevation_raster import Affine, ElevationRaster
+from optimization.zonal_stats import rasterize_polygons, zonal_statistics
+from demo.fast_layout_generator import FastLayoutGenerator
+from design.terrain_layout_adapter import TerrainLayoutAdapter
+
+
+@pytest.fixture
+def raster():
+    # Plane rising 0.1 m per metre along x on a 1 m grid
+    x = np.arange(100, dtype=float)
+    grid = np.tile(50 + 0.1 * x, (80, 1))
+    return ElevationRaster.from_array(grid, Affine.from_origin(0, 0, 1.0))
+
+
+class TestZonalStats:
+    """Label raster, per-polygon statistics and volumes"""
+
+    def test_rasterize_labels(self, raster):
+        plots = [box(0, 0, 10, 10), box(5, 5, 20, 20), box(500, 500, 510, 510)]
+        labels = rasterize_polygons(plots, raster)
+
+        assert labels.shape == raster.shape
+        # Later polygon wins on overlap; off-grid polygon covers nothing
+        assert labels[7, 7] == 2 and labels[2, 2] == 1
+        assert (labels == 3).sum() == 0
+        assert (labels == 2).sum() == 14 * 14
+
+    def test_statistics_on_plane(self, raster):
+        stats = zonal_statistics(raster, [box(10.5, 10.5, 30.5, 20.5), mapping(box(60.5, 0.5, 70.5, 10.5))])
+
+        assert stats.count.tolist() == [200, 100]
+        assert stats.mean[0] == pytest.approx(50 + 0.1 * 20.5, abs=1e-4)
+        assert stats.min[0] == pytest.approx(51.1, abs=1e-4)
+        assert stats.max[0] == pytest.approx(53.0, abs=1e-4)
+        assert stats.median()[1] == pytest.approx(56.55, abs=1e-4)
+
+    def test_cut_fill_exact(self, raster):
+        plot = box(10.5, 0.5, 30.5, 10.5)  # 20 x 10 m, terrain 51.1 .. 53.0
+        stats = zonal_statistics(raster, [plot])
+
+        balanced = stats.cut_fill()
+        # Ramp of +-0.95 m around its mean: cut == fill == 10 rows * (0.05 + ... + 0.95)
+        assert balanced['cut_m3'][0] == pytest.approx(balanced['fill_m3'][0], rel=1e-4)
+        assert balanced['cut_m3'][0] == pytest.approx(50.0, rel=1e-3)
+
+        lowered = stats.cut_fill(50.0)
+        assert lowered['fill_m3'][0] == 0
+        assert lowered['cut_m3'][0] == pytest.approx(200 * (stats.mean[0] - 50.0), rel=1e-4)
+
+    def test_subcell_plot_uses_centroid(self, raster):
+        stats = zonal_statistics(raster, [box(40.1, 40.1, 40.3, 40.3)])
+
+        assert stats.count[0] == 0
+        assert stats.mean[0] == pytest.approx(54.0, abs=1e-4)
+        assert stats.cut_fill()['cut_m3'][0] == 0
+
+
+class TestGradingIntegration:
+    """Generators use the measured volumes"""
+
+    def test_layout_generator_plots(self, raster):
+        terrain = raster.to_terrain_dict()
+        plots = [box(10.5, 0.5, 30.5, 10.5), box(50.5, 20.5, 70.5, 40.5)]
+
+        generator = FastLayoutGenerator()
+        result = generator.create_uniform_plots_with_elevation(plots, terrain, {})
+        assert result[0]['platform_elevation'] == pytest.approx(52.05, abs=1e-3)
+        assert result[0]['cut_volume_m3'] == pytest.approx(50.0, rel=1e-3)
+        assert result[1]['terrain_elevation']['max'] == pytest.approx(57.0, abs=1e-4)
+
+        cost = generator.calculate_grading_cost(result, terrain)
+        assert cost['total_cut_m3'] == pytest.approx(sum(p['cut_volume_m3'] for p in result))
+
+        flat = FastLayoutGenerator('major_grading').create_uniform_plots_with_elevation(plots, terrain, {})
+        assert flat[0]['platform_elevation'] == flat[1]['platform_elevation']
+        assert flat[0]['fill_volume_m3'] > result[0]['fill_volume_m3']
+
+    def test_terrain_adapter_measured(self, raster):
+        plots = [{'geometry': mapping(box(10.5, 0.5, 30.5, 10.5))}]
+        adapter = TerrainLayoutAdapter('balanced_cut_fill')
+
+        measured = adapter.calculate_grading_cost(200.0, raster.to_grid_dict(), plots=plots)
+        assert measured['measured'] is True
+        assert measured['earthwork_volume_m3'] == pytest.approx(100.0, rel=1e-3)
+
+        # Without a grid the strategy estimate is kept
+        estimate = adapter.calculate_grading_cost(200.0, {'avg_slope': 3.0}, plots=plots)
+        assert estimate['earthwork_volume_m3'] == 200.0 and 'measured' not in estimate